@@ -4,10 +4,12 @@ import sys
 import timeit
 import datetime
 import collections as cx
+import numpy as np
 from goatools.evidence_codes import EvidenceCodes
 from goatools.anno.opts import AnnoOptions
 from goatools.godag.consts import NAMESPACE2NS
-from goatools.gosubdag.go_tasks import get_go2parents_go2obj
+from goatools.godag.closure import get_go2ancestors_goids
+from goatools.anno.columns import AnnoColumns
 
 __copyright__ = "Copyright (C) 2016-present, DV Klopfenstein, H Tang. All rights reserved."
 __author__ = "DV Klopfenstein"
@@ -91,6 +93,9 @@ class AnnoReaderBase(object):
         if self.name in {'gpad', 'id2gos'}:
             assert self.godag is not None, "{T}: LOAD godag TO USE {C}::ns2ntsanno".format(
                 C=self.__class__.__name__, T=self.name)
+        if isinstance(annotations, AnnoColumns):
+            nss = self.exp_nss.intersection(annotations.get_values_used('NS'))
+            return {ns:annotations.select('NS', {ns}) for ns in nss}
         ns2nts = cx.defaultdict(list)
         for nta in annotations:
             ns2nts[nta.NS].append(nta)
@@ -100,6 +105,12 @@ class AnnoReaderBase(object):
         """Return all associations in a dict, id2gos, regardless of namespace"""
         return self._get_id2gos(self.associations, **kws)
 
+    def get_dbids(self):
+        """Return the set of gene product IDs in the annotations"""
+        if isinstance(self.associations, AnnoColumns):
+            return set(self.associations.get_values_used('DB_ID'))
+        return set(nt.DB_ID for nt in self.associations)
+
     def get_id2gos(self, namespace=None, prt=sys.stdout, **kws):
         """Return associations from specified namespace in a dict, id2gos"""
         # pylint: disable=superfluous-parens
@@ -125,6 +136,8 @@ class AnnoReaderBase(object):
             nspc = 'BP' if namespace_usr is None else namespace_usr
             # Return one namespace
             if nspc in set(NAMESPACE2NS.values()):
+                if isinstance(self.associations, AnnoColumns):
+                    return nspc, self.associations.select('NS', {nspc})
                 return nspc, [nt for nt in self.associations if nt.NS == nspc]
             # Return all namespaces
             return nspc, self.associations
@@ -200,8 +213,20 @@ class AnnoReaderBase(object):
     def reduce_annotations(self, annotations, options):
         """Reduce annotations to ones used to identify enrichment (normally exclude ND and NOT)."""
         getfnc_qual_ev = options.getfnc_qual_ev()
+        if isinstance(annotations, AnnoColumns):
+            return annotations.take(self._get_mask_qual_ev(annotations, getfnc_qual_ev))
         return [nt for nt in annotations if getfnc_qual_ev(nt.Qualifier, nt.Evidence_Code)]
 
+    @staticmethod
+    def _get_mask_qual_ev(annotations, getfnc_qual_ev):
+        """Get a mask of columnar annotations to keep, testing each evidence code with and without NOT"""
+        # Selections test Qualifiers only for NOT. See goatools/anno/opts.py
+        quals = [set(), {'NOT'}]
+        keep = np.array([[getfnc_qual_ev(q, ev) for q in quals] \
+            for ev in annotations.get_values('Evidence_Code')], dtype=bool).reshape(-1, 2)
+        has_not = annotations.get_mask('Qualifier', {'NOT'})
+        return keep[annotations.get_codes('Evidence_Code'), has_not.astype(np.int64)]
+
     @staticmethod
     def update_association(assc_goidsets, go2ancestors, prt=sys.stdout):
         """Update the GO sets in assc_gene2gos to include all GO ancestors"""
@@ -221,9 +246,7 @@ class AnnoReaderBase(object):
         goids_avail = set(_godag)
         self._rpt_goids_notfound(goids_assoc_usr, goids_avail)
         goids_assoc_cur = goids_assoc_usr.intersection(goids_avail)
-        # Get GO Term for each current GO ID in the annotations
-        _go2obj_assc = {go:_godag[go] for go in goids_assoc_cur}
-        go2ancestors = get_go2parents_go2obj(_go2obj_assc, relationships, prt)
+        go2ancestors = get_go2ancestors_goids(_godag, goids_assoc_cur, relationships, prt)
         if prt:
             prt.write('{N} GO IDs -> {M} go2ancestors\n'.format(
                 N=len(goids_avail), M=len(go2ancestors)))
@@ -246,6 +269,8 @@ class AnnoReaderBase(object):
     @staticmethod
     def _get_dbid2goids_p0(associations):
         """Return gene2goids with annotations as-is (propagate_counts == False)"""
+        if isinstance(associations, AnnoColumns):
+            return associations.get_id2values('DB_ID', 'GO_ID')
         id2gos = cx.defaultdict(set)
         for ntd in associations:
             id2gos[ntd.DB_ID].add(ntd.GO_ID)
@@ -253,6 +278,11 @@ class AnnoReaderBase(object):
 
     def _get_dbid2goids_p1(self, ntannos, relationships=None, prt=sys.stdout):
         """Return gene2goids with propagate_counts == True"""
+        if isinstance(ntannos, AnnoColumns):
+            go2ancestors = self._get_go2ancestors(set(ntannos.get_values_used('GO_ID')), relationships, prt)
+            id2gos = ntannos.get_id2values('DB_ID', 'GO_ID')
+            self.update_association(id2gos.values(), go2ancestors)
+            return id2gos
         id2gos = cx.defaultdict(set)
         goids_annos = set(nt.GO_ID for nt in ntannos)
         go2ancestors = self._get_go2ancestors(goids_annos, relationships, prt)
@@ -260,12 +290,15 @@ class AnnoReaderBase(object):
             goid = ntd.GO_ID
             goids = id2gos[ntd.DB_ID]
             goids.add(goid)
-            goids.update(go2ancestors[goid])
+            if goid in go2ancestors:
+                goids.update(go2ancestors[goid])
         return dict(id2gos)
 
     @staticmethod
     def get_goid2dbids(associations):
         """Return gene2go data for user-specified taxids."""
+        if isinstance(associations, AnnoColumns):
+            return associations.get_id2values('GO_ID', 'DB_ID')
         go2ids = cx.defaultdict(set)
         for ntd in associations:
             go2ids[ntd.GO_ID].add(ntd.DB_ID)
@@ -0,0 +1,218 @@
+"""Save and load the filtered, and optionally propagated, associations of an annotation file.
+
+    Reading and filtering a large GAF or gene2go file is the main start-up cost of
+    programs, like find_enrichment.py, which run GOEAs on the same annotations many
+    times. An AnnoCache stands in for an annotation reader. The associations returned
+    by get_ns2assc, get_id2gos, get_id2gos_nss, and get_dbids are saved in
+    integer-coded arrays, one cache file for each call's arguments, such as
+    ev_exclude={'IEA'} or propagate_counts=True. The annotation file is read only
+    when a cache file is missing or stale, or other reader attributes are used.
+
+    A cache file is keyed by the annotation file's path, size, modification time,
+    and a hash of its first and last MB, the reader arguments, the version of the
+    GO DAG, if loaded, and the call's arguments. A stale cache file is ignored and
+    rewritten.
+
+        >>> objanno = get_objanno('goa_human.gaf', godag=godag, cache=True)
+        >>> ns2assc = objanno.get_ns2assc(propagate_counts=True)  # Writes goa_human.gaf.<hash>.assc
+        >>> ns2assc = objanno.get_ns2assc(propagate_counts=True)  # Reads goa_human.gaf.<hash>.assc
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+import os
+import sys
+import gc
+import pickle
+import hashlib
+from array import array
+
+
+class AnnoCache(object):
+    """Save and load the filtered, and optionally propagated, associations of an annotation file."""
+
+    version = 1
+    suffix = '.assc'
+    # Number of bytes hashed at the beginning and at the end of the annotation file
+    hashsize = 1 << 20
+    # Reader arguments which do not change the annotations read
+    kws_nokey = {'prt', 'processes', 'columnar'}
+
+    def __init__(self, fin_anno, anno_type, cache=True, **kws):
+        # kws: Reader arguments, such as namespaces, taxids, godag, and prt
+        self.fin_anno = fin_anno
+        self.name = anno_type
+        self.dir_cache = os.path.dirname(os.path.abspath(fin_anno)) if cache is True else cache
+        self.kws = kws
+        self.prt = kws.get('prt', sys.stdout)
+        self.kws_key = {k:v for k, v in kws.items() if k not in self.kws_nokey}
+        self.key_file = self._init_key_file()
+        self.objanno = None  # Reader, created when the annotation file is read
+
+    def get_ns2assc(self, taxid=None, **kws):
+        """Return given associations into 3 (BP, MF, CC) dicts, id2gos"""
+        return self._get_assc('get_ns2assc', (taxid,), kws)
+
+    def get_id2gos(self, namespace=None, prt=sys.stdout, **kws):
+        """Return associations from specified namespace in a dict, id2gos"""
+        kws['prt'] = prt
+        return self._get_assc('get_id2gos', (namespace,), kws)
+
+    def get_id2gos_nss(self, **kws):
+        """Return all associations in a dict, id2gos, regardless of namespace"""
+        return self._get_assc('get_id2gos_nss', (), kws)
+
+    def get_dbids(self):
+        """Return the set of gene product IDs in the annotations"""
+        return self._get_assc('get_dbids', (), {})
+
+    def get_reader(self):
+        """Read the annotation file, if not already read, and return the reader"""
+        if self.objanno is None:
+            from goatools.anno.factory import get_objanno
+            self.objanno = get_objanno(self.fin_anno, self.name, **self.kws)
+        return self.objanno
+
+    def __getattr__(self, name):
+        # Other reader attributes, such as associations, are from the annotation file
+        if name[:2] == '__' or name in {'objanno', 'fin_anno', 'name', 'kws'}:
+            raise AttributeError(name)
+        return getattr(self.get_reader(), name)
+
+    def get_fin_cache(self, method, args, kws):
+        """Get the name of the cache file for one call to a reader method"""
+        key = _get_hashable((self.name, self.kws_key, method, args, kws))
+        return os.path.join(self.dir_cache, '{BASE}.{HASH}{SFX}'.format(
+            BASE=os.path.basename(self.fin_anno),
+            HASH=hashlib.sha1(repr(key).encode()).hexdigest()[:16],
+            SFX=self.suffix))
+
+    def _get_assc(self, method, args, kws):
+        """Load associations from the cache, or get them from the reader and save them"""
+        kws_key = {k:v for k, v in kws.items() if k != 'prt'}
+        fin_cache = self.get_fin_cache(method, args, kws_key)
+        key = (self.key_file, _get_hashable((self.name, self.kws_key, method, args, kws_key)))
+        payload = self._read_payload(fin_cache, key)
+        if payload is not None:
+            if self.prt:
+                self.prt.write('  READ: {CACHE}\n'.format(CACHE=fin_cache))
+            return _load_assc(payload)
+        assc = getattr(self.get_reader(), method)(*args, **kws)
+        self.save(fin_cache, key, _get_payload(assc))
+        return assc
+
+    def save(self, fout_cache, key, payload):
+        """Write the cache file of one call to a reader method"""
+        fout_tmp = '{CACHE}.{PID}.tmp'.format(CACHE=fout_cache, PID=os.getpid())
+        try:
+            with open(fout_tmp, 'wb') as prt_cache:
+                pickle.dump(key, prt_cache, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(payload, prt_cache, pickle.HIGHEST_PROTOCOL)
+            # Replace atomically so concurrent readers never see a partial cache file
+            os.replace(fout_tmp, fout_cache)
+        except (IOError, OSError) as err:
+            sys.stderr.write("**WARNING: COULD NOT WRITE ANNOTATION CACHE({F}): {E}\n".format(
+                F=fout_cache, E=err))
+            if os.path.exists(fout_tmp):
+                os.remove(fout_tmp)
+            return
+        if self.prt:
+            self.prt.write('  WROTE: {CACHE}\n'.format(CACHE=fout_cache))
+
+    @staticmethod
+    def _read_payload(fin_cache, key):
+        """Read the cache payload if the cache file is current. Otherwise return None."""
+        if not os.path.exists(fin_cache):
+            return None
+        try:
+            with open(fin_cache, 'rb') as ifstrm:
+                if pickle.load(ifstrm) != key:
+                    return None
+                return pickle.load(ifstrm)
+        # A truncated or corrupt cache file is treated as a stale cache file
+        except Exception:  # pylint: disable=broad-except
+            return None
+
+    def _init_key_file(self):
+        """Get the values which must match for the annotation file to be unchanged."""
+        fstat = os.stat(self.fin_anno)
+        return (
+            self.version,
+            os.path.abspath(self.fin_anno),
+            fstat.st_size,
+            fstat.st_mtime_ns,
+            _get_file_hash(self.fin_anno, fstat.st_size, self.hashsize))
+
+
+def _get_file_hash(fin, size, hashsize):
+    """Hash the beginning and the end of a file"""
+    hashobj = hashlib.sha1()
+    with open(fin, 'rb') as ifstrm:
+        hashobj.update(ifstrm.read(hashsize))
+        if size > hashsize:
+            ifstrm.seek(max(hashsize, size - hashsize))
+            hashobj.update(ifstrm.read(hashsize))
+    return hashobj.hexdigest()
+
+def _get_hashable(val):
+    """Get a value which has the same repr for equal arguments. A GO DAG is its version"""
+    # GODag is a dict
+    if hasattr(val, 'version') and hasattr(val, 'data_version'):
+        return ('godag', val.version)
+    if isinstance(val, dict):
+        return tuple(sorted((k, _get_hashable(v)) for k, v in val.items()))
+    if isinstance(val, (set, frozenset)):
+        return tuple(sorted(val, key=repr))
+    if isinstance(val, (list, tuple)):
+        return tuple(_get_hashable(v) for v in val)
+    return val
+
+def _get_payload(assc):
+    """Store associations: ns2assc, id2gos, or a set of IDs, in integer-coded arrays."""
+    if isinstance(assc, set):
+        return {'ids':list(assc)}
+    values = []
+    val2idx = {}
+    if assc and all(isinstance(v, dict) for v in assc.values()):
+        return {'values':values, 'ns2csr':{ns:_get_csr(a2bs, values, val2idx) for ns, a2bs in assc.items()}}
+    return {'values':values, 'csr':_get_csr(assc, values, val2idx)}
+
+def _get_csr(a2bs, values, val2idx):
+    """Store a dict of sets as a CSR-style index pointer array and index array."""
+    indptr = array('i', [0])
+    indices = array('i')
+    for vals in a2bs.values():
+        for val in vals:
+            idx = val2idx.get(val)
+            if idx is None:
+                idx = val2idx[val] = len(values)
+                values.append(val)
+            indices.append(idx)
+        indptr.append(len(indices))
+    return list(a2bs.keys()), indptr, indices
+
+def _load_assc(payload):
+    """Create associations from a cache payload."""
+    if 'ids' in payload:
+        return set(payload['ids'])
+    # Creating many sets triggers many cyclic garbage collections, none needed
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        values = payload['values']
+        if 'ns2csr' in payload:
+            return {ns:_load_csr(csr, values) for ns, csr in payload['ns2csr'].items()}
+        return _load_csr(payload['csr'], values)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+def _load_csr(csr, values):
+    """Create a dict of sets from a CSR-style table."""
+    keys, indptr, indices = csr
+    vals = [values[i] for i in indices]
+    return {k:set(vals[b:e]) for k, b, e in zip(keys, indptr, indptr[1:])}
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
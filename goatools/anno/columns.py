@@ -0,0 +1,277 @@
+"""Annotations stored in dictionary-encoded NumPy columns, instead of one namedtuple per line.
+
+    Each field is stored as integer codes into a list of the distinct values of
+    that field, so a gene ID, GO ID, or evidence code seen on many lines is stored
+    once. Fields holding many values per annotation, like Qualifier or DB_Reference,
+    store the codes of all annotations in one array, with the offsets of the codes
+    of each annotation in a second array.
+
+    Distinct values are converted once, not once per line, by optional converters,
+    such as date strings to dates. Filtering and grouping use array operations on
+    the codes. Namedtuples are made on demand, one annotation at a time:
+
+        >>> annos = AnnoColumns(ntobj, {'Qualifier':'set'})
+        >>> annos.append(vals)  # One value per field, while reading an annotation file
+        >>> annos.finish()
+        >>> annos.select('NS', {'BP'}).get_id2values('DB_ID', 'GO_ID')
+        >>> annos[0]  # namedtuple
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+from array import array
+import collections as cx
+import numpy as np
+
+
+class AnnoColumns(object):
+    """Annotations stored in dictionary-encoded NumPy columns."""
+
+    kinds = {'set', 'list'}
+
+    def __init__(self, ntobj, fld2kind=None, fld2cnv=None):
+        self.ntobj = ntobj
+        self.flds = ntobj._fields
+        # Fields holding many values per annotation: 'set' or 'list'
+        self.fld2kind = {} if fld2kind is None else fld2kind
+        assert self.kinds.issuperset(self.fld2kind.values()), self.fld2kind
+        # Converters run once on each distinct value, when reading is finished
+        self.fld2cnv = {} if fld2cnv is None else fld2cnv
+        # Distinct values of each field
+        self.fld2values = {f:[] for f in self.flds}
+        # Codes of each field, in annotation order. Set when reading is finished
+        self.fld2codes = None
+        # For fields holding many values: Offsets of the codes of each annotation
+        self.fld2offsets = None
+        self.num_rows = 0
+        # Value-to-code dicts and growing arrays, used while reading
+        self._building = [(
+            {},
+            self.fld2values[f],
+            array('i'),
+            array('q', [0]) if f in self.fld2kind else None) for f in self.flds]
+
+    def append(self, vals):
+        """Add one annotation, given one value per field.
+
+           Values of fields holding many values may be iterables or '|'-separated strings.
+        """
+        for val, (val2code, values, codes, offsets) in zip(vals, self._building):
+            if offsets is None:
+                code = val2code.get(val)
+                if code is None:
+                    code = val2code[val] = len(values)
+                    values.append(val)
+                codes.append(code)
+            else:
+                if isinstance(val, str):
+                    val = val.split('|') if val else ()
+                for item in val:
+                    code = val2code.get(item)
+                    if code is None:
+                        code = val2code[item] = len(values)
+                        values.append(item)
+                    codes.append(code)
+                offsets.append(len(codes))
+        self.num_rows += 1
+
+    def finish(self):
+        """Store the columns in NumPy arrays and convert each distinct value once"""
+        self.fld2codes = {}
+        self.fld2offsets = {}
+        for fld, (_, values, codes, offsets) in zip(self.flds, self._building):
+            self.fld2codes[fld] = np.frombuffer(codes, dtype=np.int32)
+            if offsets is not None:
+                self.fld2offsets[fld] = np.frombuffer(offsets, dtype=np.int64)
+            if fld in self.fld2cnv:
+                cnv = self.fld2cnv[fld]
+                self.fld2values[fld] = [cnv(v) for v in values]
+        self._building = None
+        return self
+
+    @staticmethod
+    def concat(annos_lst, ntobj=None):
+        """Combine finished columnar stores, such as stores read from parts of a file, in order"""
+        annos = AnnoColumns(annos_lst[0].ntobj if ntobj is None else ntobj, annos_lst[0].fld2kind)
+        annos.fld2codes = {}
+        annos.fld2offsets = {}
+        annos.num_rows = sum(a.num_rows for a in annos_lst)
+        annos._building = None
+        for fld in annos.flds:
+            values = annos.fld2values[fld]
+            val2code = {}
+            codes_lst = []
+            for annos_cur in annos_lst:
+                # Codes of one store, as codes of the combined store
+                remap = np.array([annos._get_code(v, val2code, values) \
+                    for v in annos_cur.fld2values[fld]], dtype=np.int32)
+                codes_lst.append(remap[annos_cur.fld2codes[fld]] if remap.size else annos_cur.fld2codes[fld])
+            annos.fld2codes[fld] = np.concatenate(codes_lst).astype(np.int32)
+            if fld in annos.fld2kind:
+                offsets_lst = [np.zeros(1, dtype=np.int64)]
+                num_codes = 0
+                for annos_cur in annos_lst:
+                    offsets_lst.append(annos_cur.fld2offsets[fld][1:] + num_codes)
+                    num_codes += annos_cur.fld2codes[fld].size
+                annos.fld2offsets[fld] = np.concatenate(offsets_lst)
+        return annos
+
+    @staticmethod
+    def _get_code(val, val2code, values):
+        """Get the code of a value, adding it if it is new. Unhashable values are always added"""
+        try:
+            code = val2code.get(val)
+            if code is None:
+                code = val2code[val] = len(values)
+                values.append(val)
+            return code
+        except TypeError:
+            values.append(val)
+            return len(values) - 1
+
+    def __getstate__(self):
+        """Pickle a finished store. Namedtuple classes made while reading are pickled by their fields"""
+        assert self._building is None, 'FINISH READING BEFORE PICKLING'
+        state = dict(self.__dict__)
+        state['ntobj'] = (self.ntobj.__name__, self.ntobj._fields)
+        # Converters were run when reading was finished
+        state['fld2cnv'] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.ntobj = cx.namedtuple(*state['ntobj'])
+
+    # -- Row views ----------------------------------------------------------------------------
+    def __len__(self):
+        return self.num_rows
+
+    def __getitem__(self, idx):
+        """Get one annotation as a namedtuple, or a slice of annotations as columns"""
+        if isinstance(idx, slice):
+            return self.take(np.arange(self.num_rows)[idx])
+        if idx < 0:
+            idx += self.num_rows
+        if not 0 <= idx < self.num_rows:
+            raise IndexError('ANNOTATION INDEX({I}) OUT OF RANGE'.format(I=idx))
+        return self.ntobj._make(self._get_val(f, idx) for f in self.flds)
+
+    def __iter__(self):
+        """Iterate through the annotations as namedtuples"""
+        getters = [self._get_fnc_val(f) for f in self.flds]
+        ntobj_make = self.ntobj._make
+        for idx in range(self.num_rows):
+            yield ntobj_make(fnc(idx) for fnc in getters)
+
+    def _get_val(self, fld, idx):
+        """Get the value of one field of one annotation"""
+        values = self.fld2values[fld]
+        codes = self.fld2codes[fld]
+        if fld not in self.fld2kind:
+            return values[codes[idx]]
+        offsets = self.fld2offsets[fld]
+        items = [values[c] for c in codes[offsets[idx]:offsets[idx+1]]]
+        return set(items) if self.fld2kind[fld] == 'set' else items
+
+    def _get_fnc_val(self, fld):
+        """Get a function returning the value of a field, given an annotation index"""
+        values = self.fld2values[fld]
+        codes = self.fld2codes[fld].tolist()
+        if fld not in self.fld2kind:
+            return lambda idx: values[codes[idx]]
+        offsets = self.fld2offsets[fld].tolist()
+        if self.fld2kind[fld] == 'set':
+            return lambda idx: set(values[c] for c in codes[offsets[idx]:offsets[idx+1]])
+        return lambda idx: [values[c] for c in codes[offsets[idx]:offsets[idx+1]]]
+
+    # -- Columns ------------------------------------------------------------------------------
+    def get_values(self, fld):
+        """Get the distinct values of a field. Codes are indexes into this list"""
+        return self.fld2values[fld]
+
+    def get_codes(self, fld):
+        """Get the codes of a field. Fields holding many values have all codes in one array"""
+        return self.fld2codes[fld]
+
+    def get_rows(self, fld):
+        """Get the annotation index of each code of a field holding many values"""
+        return np.repeat(np.arange(self.num_rows), np.diff(self.fld2offsets[fld]))
+
+    def get_values_used(self, fld):
+        """Get the distinct values of a field seen in the annotations, in order first seen"""
+        codes, idxs = np.unique(self.fld2codes[fld], return_index=True)
+        values = self.fld2values[fld]
+        return list(dict.fromkeys(values[c] for c in codes[np.argsort(idxs)].tolist()))
+
+    def get_mask(self, fld, values):
+        """Get a mask of the annotations having any of the given values in a field"""
+        hits = np.array([v in values for v in self.fld2values[fld]], dtype=bool)
+        if not hits.size:
+            return np.zeros(self.num_rows, dtype=bool)
+        codes = self.fld2codes[fld]
+        if fld not in self.fld2kind:
+            return hits[codes]
+        mask = np.zeros(self.num_rows, dtype=bool)
+        mask[self.get_rows(fld)[hits[codes]]] = True
+        return mask
+
+    # -- Filtering and grouping ---------------------------------------------------------------
+    def take(self, rows):
+        """Get the annotations at the given indexes, or where a mask is True"""
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        annos = AnnoColumns(self.ntobj, self.fld2kind)
+        annos.fld2values = self.fld2values
+        annos.fld2codes = {}
+        annos.fld2offsets = {}
+        annos.num_rows = rows.size
+        annos._building = None
+        for fld, codes in self.fld2codes.items():
+            if fld not in self.fld2kind:
+                annos.fld2codes[fld] = codes[rows]
+                continue
+            offsets = self.fld2offsets[fld]
+            counts = offsets[rows + 1] - offsets[rows]
+            offsets_new = np.concatenate([[0], np.cumsum(counts)])
+            # Index of each code kept: start of its annotation, plus its place within it
+            idxs = np.repeat(offsets[rows] - offsets_new[:-1], counts) + np.arange(offsets_new[-1])
+            annos.fld2codes[fld] = codes[idxs]
+            annos.fld2offsets[fld] = offsets_new
+        return annos
+
+    def select(self, fld, values):
+        """Get the annotations having any of the given values in a field"""
+        return self.take(self.get_mask(fld, values))
+
+    def get_id2values(self, fld_key, fld_val):
+        """Group the values of one field by the values of another: dict of sets"""
+        assert fld_key not in self.fld2kind and fld_val not in self.fld2kind
+        num_vals = max(1, len(self.fld2values[fld_val]))
+        # One pair code for each distinct pair of key and value codes, sorted by key
+        pairs = np.unique(self.fld2codes[fld_key].astype(np.int64)*num_vals + self.fld2codes[fld_val])
+        keycodes = pairs//num_vals
+        bounds = np.flatnonzero(np.diff(keycodes)) + 1
+        values = self.fld2values[fld_val]
+        vals = [values[c] for c in (pairs % num_vals).tolist()]
+        keys = self.fld2values[fld_key]
+        id2values = {}
+        for keycode, beg, end in zip(
+                keycodes[np.concatenate([[0], bounds])].tolist() if pairs.size else [],
+                [0] + bounds.tolist(),
+                bounds.tolist() + [pairs.size]):
+            key = keys[keycode]
+            if key in id2values:
+                id2values[key].update(vals[beg:end])
+            else:
+                id2values[key] = set(vals[beg:end])
+        return id2values
+
+    def get_nbytes(self):
+        """Get the number of bytes in the code and offset arrays"""
+        return sum(a.nbytes for a in self.fld2codes.values()) + \
+               sum(a.nbytes for a in self.fld2offsets.values())
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
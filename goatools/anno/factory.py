@@ -7,12 +7,20 @@ from goatools.anno.genetogo_reader import Gene2GoReader
 from goatools.anno.gaf_reader import GafReader
 from goatools.anno.gpad_reader import GpadReader
 from goatools.anno.idtogos_reader import IdToGosReader
+from goatools.anno.init.opener import get_anno_basename
 
 
-def get_objanno(fin_anno, anno_type=None, **kws):
-    """Read annotations in GAF, GPAD, Entrez gene2go, or text format."""
+def get_objanno(fin_anno, anno_type=None, cache=None, **kws):
+    """Read annotations in GAF, GPAD, Entrez gene2go, or text format.
+
+       If cache is True or a directory, associations are saved in, and loaded from,
+       cache files which are current until the annotation file or the arguments change.
+    """
     # kws get_objanno: taxids hdr_only prt allow_missing_symbol
     anno_type = get_anno_desc(fin_anno, anno_type)
+    if cache and anno_type is not None:
+        from goatools.anno.cache import AnnoCache
+        return AnnoCache(fin_anno, anno_type, cache, **kws)
     if anno_type is not None:
         if anno_type == 'gene2go':
             # kws: taxid taxids
@@ -53,6 +61,8 @@ def get_anno_desc(fin_anno, anno_type):
     """Indicate annotation format: gaf, gpad, NCBI gene2go, or id2gos."""
     if anno_type is not None:
         return anno_type
+    # goa_human.gaf.gz
+    fin_anno = get_anno_basename(fin_anno)
     if fin_anno[-7:] == 'gene2go':
         return 'gene2go'
     if fin_anno[-3:] == 'gaf':
@@ -17,7 +17,7 @@ __author__ = "DV Klopfenstein"
 class GafReader(AnnoReaderBase):
     """Reads a Gene Annotation File (GAF). Returns a Python object."""
 
-    exp_kws = {'hdr_only', 'prt', 'namespaces', 'allow_missing_symbol', 'godag'}
+    exp_kws = {'hdr_only', 'prt', 'namespaces', 'allow_missing_symbol', 'godag', 'columnar', 'processes'}
 
     def __init__(self, filename=None, **kws):
         super(GafReader, self).__init__(
@@ -26,7 +26,9 @@ class GafReader(AnnoReaderBase):
             hdr_only=kws.get('hdr_only', False),
             prt=kws.get('prt', sys.stdout),
             namespaces=kws.get('namespaces'),
-            allow_missing_symbol=kws.get('allow_missing_symbol', False))
+            allow_missing_symbol=kws.get('allow_missing_symbol', False),
+            columnar=kws.get('columnar', False),
+            processes=kws.get('processes'))
 
     def read_gaf(self, namespace='BP', **kws):
         """Read Gene Association File (GAF). Return associations."""
@@ -67,7 +69,8 @@ class GafReader(AnnoReaderBase):
     def _init_associations(self, fin_gaf, **kws):
         """Read annotation file and store a list of namedtuples."""
         ini = InitAssc(fin_gaf)
-        nts = ini.init_associations(kws['hdr_only'], kws['prt'], kws['namespaces'], kws['allow_missing_symbol'])
+        nts = ini.init_associations(kws['hdr_only'], kws['prt'], kws['namespaces'], kws['allow_missing_symbol'],
+                                    kws['columnar'], kws['processes'])
         self.hdr = ini.hdr
         return nts
 
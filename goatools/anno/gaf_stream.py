@@ -0,0 +1,216 @@
+"""Read a GO Annotation File (GAF) one line at a time, keeping only selected annotations.
+
+    Selections are tested on the raw, split fields of each line, before any
+    namedtuple, set, or date is made: namespaces, evidence codes (ev_include,
+    ev_exclude), ND and NOT (keep_ND, keep_NOT), and the taxids of gene products.
+    Each selection is decided once for each distinct raw value, such as a
+    Qualifier string, and remembered.
+
+    Associations, id2gos, are made directly from the selected lines, without
+    keeping annotations in memory:
+
+        >>> objstrm = GafStream(fin_gaf, namespaces={'BP'}, ev_exclude={'IEA'})
+        >>> id2gos = objstrm.get_id2gos()
+
+    An uncompressed GAF may be read in line-aligned byte ranges by many processes.
+    The id2gos of each range are merged in file order:
+
+        >>> id2gos = objstrm.get_id2gos(processes=4)
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+import sys
+import timeit
+import datetime
+import collections as cx
+from goatools.evidence_codes import EvidenceCodes
+from goatools.anno.opts import AnnoOptions
+from goatools.anno.annoreader_base import AnnoReaderBase
+from goatools.anno.init.reader_gaf import GafData
+from goatools.anno.init.reader_gaf import GafHdr
+from goatools.anno.init.chunks import is_chunkable
+from goatools.anno.init.chunks import get_hdr_end
+from goatools.anno.init.chunks import get_byte_ranges
+from goatools.anno.init.chunks import get_num_chunks
+from goatools.anno.init.chunks import iter_lines
+from goatools.anno.init.chunks import map_chunks
+from goatools.anno.init.opener import open_anno
+from goatools.godag.closure import get_go2ancestors_goids
+
+# The GafStream object of a worker process
+_WORKER = {}
+
+
+class GafStream(object):
+    """Read a GAF one line at a time, keeping only selected annotations."""
+
+    exp_nss = {'BP', 'MF', 'CC'}
+
+    def __init__(self, fin_gaf, namespaces=None, taxids=None, allow_missing_symbol=False, **kws):
+        # kws: AnnoOptions: ev_include ev_exclude keep_ND keep_NOT b_geneid2gos go2geneids
+        self.fin_gaf = fin_gaf
+        self.namespaces = self.exp_nss if namespaces is None else set(namespaces)
+        # Taxids of gene products: the first taxon in GAF column 13. None keeps all taxids
+        self.taxids = None if taxids is None else set(taxids)
+        self.allow_missing_symbol = allow_missing_symbol
+        self.options = AnnoOptions(EvidenceCodes(), **kws)
+        self.hdr = None
+        self.ver = None
+        # Number of annotation lines read, and kept, by the last pass through the file
+        self.num_read = 0
+        self.num_kept = 0
+
+    # pylint: disable=too-many-arguments
+    def get_id2gos(self, propagate_counts=False, godag=None, relationships=None, prt=sys.stdout, processes=None):
+        """Return the selected associations in a dict, id2gos, or go2ids if go2geneids=True"""
+        tic = timeit.default_timer()
+        if processes is not None and processes > 1 and is_chunkable(self.fin_gaf):
+            id2gos = self._get_id2gos_chunks(processes)
+        else:
+            id2gos = self.get_id2gos_lines()
+        if prt:
+            prt.write('HMS:{HMS} {N:7,} of {M:,} annotations KEPT: {ANNO} {NSs}\n'.format(
+                N=self.num_kept, M=self.num_read, ANNO=self.fin_gaf, NSs=','.join(sorted(self.namespaces)),
+                HMS=str(datetime.timedelta(seconds=(timeit.default_timer()-tic)))))
+        # pylint: disable=protected-access
+        if propagate_counts:
+            assert godag is not None, 'LOAD godag TO PROPAGATE COUNTS: get_id2gos(godag=godag)'
+            goids_annos = set().union(*id2gos.values())
+            AnnoReaderBase._rpt_goids_notfound(goids_annos, set(godag))
+            go2ancestors = get_go2ancestors_goids(godag, goids_annos.intersection(godag), relationships, prt)
+            AnnoReaderBase.update_association(id2gos.values(), go2ancestors)
+        if self.options.b_geneid2gos:
+            return id2gos
+        return AnnoReaderBase._get_goid2dbids(id2gos)
+
+    def get_id2gos_lines(self, lines=None):
+        """Get id2gos, as-is, from the selected lines of the GAF, or of the lines given"""
+        id2gos = cx.defaultdict(set)
+        # Columns after Taxon (col 12) are not split
+        for flds, _ in self.iter_flds(maxsplit=13, lines=lines):
+            id2gos[flds[1]].add(flds[4])
+        return dict(id2gos)
+
+    def _get_id2gos_chunks(self, processes):
+        """Get id2gos, as-is, reading line-aligned byte ranges in a process pool"""
+        hdr_lines, beg = get_hdr_end(self.fin_gaf, '!')
+        # Read the header
+        self.get_id2gos_lines(hdr_lines)
+        hdr = self.hdr
+        ver = self.ver
+        ranges = get_byte_ranges(self.fin_gaf, beg, get_num_chunks(processes))
+        id2gos = {}
+        num_read = 0
+        num_kept = 0
+        for id2gos_cur, num_read_cur, num_kept_cur in map_chunks(
+                _get_id2gos_chunk, ranges, processes, _init_worker, (self,)):
+            for dbid, goids in id2gos_cur.items():
+                if dbid in id2gos:
+                    id2gos[dbid].update(goids)
+                else:
+                    id2gos[dbid] = goids
+            num_read += num_read_cur
+            num_kept += num_kept_cur
+        self.hdr = hdr
+        self.ver = ver
+        self.num_read = num_read
+        self.num_kept = num_kept
+        return id2gos
+
+    def iter_nts(self):
+        """Yield a namedtuple, with all GAF columns, for each selected annotation"""
+        datobj = None
+        ntobj_make = None
+        for flds, nspc in self.iter_flds():
+            if datobj is None:
+                datobj = GafData(self.ver, self.allow_missing_symbol)
+                ntobj_make = datobj.get_ntobj()._make
+            yield ntobj_make(datobj.get_gafvals(flds, nspc))
+
+    # pylint: disable=too-many-locals
+    def iter_flds(self, maxsplit=-1, lines=None):
+        """Yield the split fields, and the namespace, of each selected annotation line"""
+        if lines is not None:
+            for flds_nspc in self._iter_flds(lines, maxsplit):
+                yield flds_nspc
+            return
+        with open_anno(self.fin_gaf) as ifstrm:
+            for flds_nspc in self._iter_flds(ifstrm, maxsplit):
+                yield flds_nspc
+
+    def _iter_flds(self, lines, maxsplit):
+        """Yield the split fields, and the namespace, of each selected line"""
+        aspect2ns = {a:ns for a, ns in GafData.aspect2ns.items() if ns in self.namespaces}
+        getfnc_qual_ev = self.options.getfnc_qual_ev()
+        # Selections, decided once for each distinct raw value
+        qualev2keep = {}
+        taxon2keep = {}
+        taxids = self.taxids
+        hdrobj = GafHdr()
+        self.ver = None
+        self.num_read = 0
+        self.num_kept = 0
+        lnum = -1
+        line = ''
+        try:
+            for lnum, line in enumerate(lines, 1):
+                if line[0] == '!':
+                    if self.ver is None and line[1:13] == 'gaf-version:':
+                        self.ver = line[13:].strip()
+                    hdrobj.chkaddhdr(line)
+                    continue
+                self.num_read += 1
+                flds = line.split('\t', maxsplit)
+                # 8 GAF Aspect -> BP, MF, or CC
+                nspc = aspect2ns.get(flds[8])
+                if nspc is None:
+                    continue
+                # 3 Qualifier, 6 Evidence_Code
+                qualev = (flds[3], flds[6])
+                keep = qualev2keep.get(qualev)
+                if keep is None:
+                    # pylint: disable=protected-access
+                    keep = qualev2keep[qualev] = getfnc_qual_ev(GafData._get_qualifier(flds[3]), flds[6])
+                if not keep:
+                    continue
+                # 12 Taxon
+                if taxids is not None:
+                    keep = taxon2keep.get(flds[12])
+                    if keep is None:
+                        keep = taxon2keep[flds[12]] = self._get_taxid(flds[12]) in taxids
+                    if not keep:
+                        continue
+                self.num_kept += 1
+                yield flds, nspc
+        # pylint: disable=broad-except
+        except Exception as inst:
+            import traceback
+            traceback.print_exc()
+            sys.stderr.write("\n  **FATAL-gaf: {MSG}\n\n".format(MSG=str(inst)))
+            sys.stderr.write("**FATAL-gaf: {FIN}[{LNUM}]:\n{L}".format(
+                FIN=self.fin_gaf, L=line, LNUM=lnum))
+            sys.exit(1)
+        self.hdr = hdrobj.get_hdr()
+
+    @staticmethod
+    def _get_taxid(taxons):
+        """Get the taxid of the gene product: the first taxon"""
+        # taxon:9606|taxon:10090
+        taxon = taxons.split('|', 1)[0]
+        return int(taxon[taxon.find(':') + 1:])
+
+
+def _init_worker(objstrm):
+    """Save the GafStream object in a new worker process"""
+    _WORKER['objstrm'] = objstrm
+
+def _get_id2gos_chunk(byte_range):
+    """Get id2gos, and the numbers of lines read and kept, for a byte range, in a worker process"""
+    objstrm = _WORKER['objstrm']
+    id2gos = objstrm.get_id2gos_lines(iter_lines(objstrm.fin_gaf, *byte_range))
+    return id2gos, objstrm.num_read, objstrm.num_kept
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
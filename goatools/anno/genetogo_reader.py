@@ -11,6 +11,7 @@ from itertools import chain
 from goatools.anno.init.reader_genetogo import InitAssc
 from goatools.anno.annoreader_base import AnnoReaderBase
 from goatools.anno.opts import AnnoOptions
+from goatools.anno.columns import AnnoColumns
 
 __copyright__ = "Copyright (C) 2016-present, DV Klopfenstein, H Tang. All rights reserved."
 __author__ = "DV Klopfenstein"
@@ -20,7 +21,7 @@ __author__ = "DV Klopfenstein"
 class Gene2GoReader(AnnoReaderBase):
     """Reads a Gene Annotation File (GAF). Returns a Python object."""
 
-    exp_kws = {'taxids', 'taxid', 'namespaces', 'godag'}
+    exp_kws = {'taxids', 'taxid', 'namespaces', 'godag', 'columnar', 'processes'}
 
     def __init__(self, filename=None, **kws):
         # kws: taxids or taxid
@@ -46,7 +47,7 @@ class Gene2GoReader(AnnoReaderBase):
             return self.taxid2asscs[taxid_cur]
         # If taxid is True, combine all associations
         if taxid is True:
-            return list(chain.from_iterable(self.taxid2asscs.values()))
+            return self._get_assc_taxids(self.taxid2asscs.keys())
         # If taxid is an int, return the associations for user-specified taxid
         if isinstance(taxid, int):
             return self.taxid2asscs[taxid] if taxid in self.taxid2asscs else []
@@ -58,15 +59,20 @@ class Gene2GoReader(AnnoReaderBase):
         taxids = set(taxid).intersection(self.taxid2asscs.keys())
         if taxids:
             # Return user-specified taxids combined
-            return list(chain.from_iterable(self.taxid2asscs[t] for t in taxids))
+            return self._get_assc_taxids(taxids)
         return {}
 
     def get_id2gos_nss(self, **kws):
         """Return all associations in a dict, id2gos, regardless of namespace"""
         taxids = self._get_taxids(kws.get('taxids'), kws.get('taxid'))
         assert taxids, "NO TAXIDS FOUND"
-        assc = list(chain.from_iterable([self.taxid2asscs[t] for t in taxids]))
-        return self._get_id2gos(assc, **kws)
+        return self._get_id2gos(self._get_assc_taxids(taxids), **kws)
+
+    def _get_assc_taxids(self, taxids):
+        """Combine the associations of taxids"""
+        if isinstance(self.associations, AnnoColumns):
+            return self.associations.select('tax_id', set(taxids))
+        return list(chain.from_iterable(self.taxid2asscs[t] for t in taxids))
 
     def get_name(self):
         """Get name using taxid"""
@@ -154,10 +160,15 @@ class Gene2GoReader(AnnoReaderBase):
     @staticmethod
     def _init_associations(fin_anno, taxid=None, taxids=None, namespaces=None, **kws):
         """Read annotation file and store a list of namedtuples."""
-        return InitAssc(taxid, taxids).init_associations(fin_anno, taxids, namespaces)
+        return InitAssc(taxid, taxids).init_associations(
+            fin_anno, taxids, namespaces, kws.get('columnar', False), kws.get('processes'))
 
     def _init_taxid2asscs(self):
         """Create dict with taxid keys and annotation namedtuple list."""
+        if isinstance(self.associations, AnnoColumns):
+            taxids = self.associations.get_values_used('tax_id')
+            assert taxids, "**FATAL: NO TAXIDS: {F}".format(F=self.filename)
+            return {t:self.associations.select('tax_id', {t}) for t in taxids}
         taxid2asscs = cx.defaultdict(list)
         for ntanno in self.associations:
             taxid2asscs[ntanno.tax_id].append(ntanno)
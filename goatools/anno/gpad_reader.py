@@ -17,13 +17,14 @@ __author__ = "DV Klopfenstein"
 class GpadReader(AnnoReaderBase):
     """dRead a Gene Product Association Data (GPAD) and store the data in a Python object."""
 
-    exp_kws = {'hdr_only', 'godag', 'namespaces'}
+    exp_kws = {'hdr_only', 'godag', 'namespaces', 'columnar'}
 
     def __init__(self, filename=None, **kws):
         super(GpadReader, self).__init__('gpad', filename,
                                          hdr_only=kws.get('hdr_only', False),
                                          godag=kws.get('godag'),
-                                         namespaces=kws.get('namespaces'))
+                                         namespaces=kws.get('namespaces'),
+                                         columnar=kws.get('columnar', False))
         self.qty = len(self.associations)
 
     def get_relation_cnt(self):
@@ -37,7 +38,7 @@ class GpadReader(AnnoReaderBase):
     def _init_associations(self, fin_gpad, **kws):
         """Read annotation file and store a list of namedtuples."""
         ini = InitAssc(fin_gpad, kws['godag'])
-        nts = ini.init_associations(kws['hdr_only'], kws['namespaces'])
+        nts = ini.init_associations(kws['hdr_only'], kws['namespaces'], columnar=kws['columnar'])
         self.hdr = ini.hdr
         return nts
 
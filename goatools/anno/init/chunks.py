@@ -0,0 +1,87 @@
+"""Split an uncompressed annotation file into line-aligned byte ranges, read by many processes.
+
+    The header is read first. The rest of the file is split into byte ranges of
+    about the same size, each starting at the beginning of a line. Each range is
+    read by one task in a process pool. Results are returned in file order, so
+    merging them gives the same result as reading the file in one process.
+
+        >>> hdr_lines, beg = get_hdr_end(fin_anno, '!')
+        >>> ranges = get_byte_ranges(fin_anno, beg, num_chunks=8)
+        >>> results = map_chunks(read_chunk, [(fin_anno, b, e) for b, e in ranges], processes=4)
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+import os
+from goatools.anno.init.opener import get_compression
+
+# Number of byte ranges for each process, so processes finishing early read more ranges
+CHUNKS_PER_PROCESS = 4
+
+
+def get_num_chunks(processes):
+    """Get the number of byte ranges read, given the number of processes"""
+    return processes*CHUNKS_PER_PROCESS
+
+def is_chunkable(fin_anno):
+    """Return True if a file can be read in byte ranges: a local, uncompressed file"""
+    if fin_anno is None or not os.path.isfile(fin_anno):
+        return False
+    return get_compression(fin_anno) is None
+
+def get_hdr_end(fin_anno, hdr_prefix):
+    """Get the header lines, and the byte offset of the first line after the header"""
+    hdr_lines = []
+    beg = 0
+    prefix = hdr_prefix.encode()
+    with open(fin_anno, 'rb') as ifstrm:
+        for line in ifstrm:
+            if not line.startswith(prefix):
+                break
+            hdr_lines.append(line.decode())
+            beg += len(line)
+    return hdr_lines, beg
+
+def get_byte_ranges(fin_anno, beg, num_chunks):
+    """Split a file, after byte beg, into about num_chunks ranges, each starting at a line"""
+    size = os.path.getsize(fin_anno)
+    bounds = [beg]
+    with open(fin_anno, 'rb') as ifstrm:
+        for idx in range(1, num_chunks):
+            pos = beg + (size - beg)*idx//num_chunks
+            if pos <= bounds[-1]:
+                continue
+            # Move to the start of the next line, unless pos is already at the start of a line
+            ifstrm.seek(pos - 1)
+            ifstrm.readline()
+            pos = ifstrm.tell()
+            if bounds[-1] < pos < size:
+                bounds.append(pos)
+    if size > bounds[-1]:
+        bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def iter_lines(fin_anno, beg, end):
+    """Yield the lines in a byte range"""
+    with open(fin_anno, 'rb') as ifstrm:
+        ifstrm.seek(beg)
+        pos = beg
+        for line in ifstrm:
+            if pos >= end:
+                break
+            pos += len(line)
+            yield line.decode()
+
+def map_chunks(fnc, tasks, processes, initializer=None, initargs=()):
+    """Run a function on each task in a process pool. Return the results in task order"""
+    if processes is None or processes < 2 or len(tasks) < 2:
+        if initializer is not None:
+            initializer(*initargs)
+        return [fnc(t) for t in tasks]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(min(processes, len(tasks)), initializer=initializer, initargs=initargs) as executor:
+        return list(executor.map(fnc, tasks))
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
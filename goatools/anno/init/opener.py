@@ -0,0 +1,205 @@
+"""Open annotation files to read text: uncompressed, gzip, bgzip, or bzip2.
+
+    Compression is found from the first bytes of the file, not its name. gzip files,
+    including bgzip files and other files with many gzip members, are decompressed
+    in large blocks while the parser reads lines:
+
+        'subprocess': A piped pigz or gzip process
+        'thread':     zlib, in a background thread. zlib releases the GIL while decompressing
+        'inline':     Python's gzip module, in the reading thread
+
+    The default is a piped pigz, if installed, else a thread, if there is more than
+    one CPU, else inline:
+
+        >>> with open_anno('goa_human.gaf.gz') as ifstrm:
+        >>>     for line in ifstrm:
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+import os
+import io
+import zlib
+import queue
+import threading
+from goatools.base import nopen
+
+# Size of compressed blocks read, and of buffers passed to the parser
+BLOCKSIZE = 1 << 20
+# Number of decompressed blocks waiting to be parsed
+QUEUESIZE = 8
+
+DECOMPRESS = {'subprocess', 'thread', 'inline'}
+
+
+def open_anno(fin_anno, decompress=None):
+    """Open an annotation file to read text"""
+    if not os.path.isfile(fin_anno):
+        # URLs, '-' (stdin), or '|command'
+        return nopen(fin_anno)
+    compression = get_compression(fin_anno)
+    if compression is None:
+        return open(fin_anno)
+    if compression == 'bzip2':
+        import bz2
+        return bz2.open(fin_anno, 'rt')
+    decompress = _get_decompress(decompress)
+    if decompress == 'inline':
+        import gzip
+        return io.TextIOWrapper(io.BufferedReader(gzip.open(fin_anno), BLOCKSIZE))
+    if decompress == 'thread':
+        return io.TextIOWrapper(io.BufferedReader(_GzipThread(fin_anno), BLOCKSIZE))
+    return io.TextIOWrapper(io.BufferedReader(_GzipProcess(fin_anno), BLOCKSIZE))
+
+def get_compression(fin_anno):
+    """Get the compression of a file from its first bytes: 'gzip', 'bzip2', or None"""
+    with open(fin_anno, 'rb') as ifstrm:
+        magic = ifstrm.read(3)
+    if magic[:2] == b'\x1f\x8b':
+        return 'gzip'
+    if magic == b'BZh':
+        return 'bzip2'
+    return None
+
+def get_anno_basename(fin_anno):
+    """Get the annotation filename without a compression extension, like .gz"""
+    base, ext = os.path.splitext(fin_anno)
+    return base if ext in {'.gz', '.bgz', '.z', '.Z', '.bz2'} else fin_anno
+
+def _get_decompress(decompress):
+    """Get the method used to decompress a gzip file"""
+    if decompress is None:
+        if _get_gunzip_exe('pigz') is not None:
+            return 'subprocess'
+        return 'thread' if (os.cpu_count() or 1) > 1 else 'inline'
+    assert decompress in DECOMPRESS, 'UNKNOWN decompress({D}). EXPECTED: {E}'.format(
+        D=decompress, E=' '.join(sorted(DECOMPRESS)))
+    return decompress
+
+def _get_gunzip_exe(names=('pigz', 'gzip')):
+    """Get the path of the first decompression program found"""
+    import shutil
+    for name in [names] if isinstance(names, str) else names:
+        exe = shutil.which(name)
+        if exe is not None:
+            return exe
+    return None
+
+
+class _GzipThread(io.RawIOBase):
+    """Bytes of a gzip file, decompressed in large blocks in a background thread."""
+
+    def __init__(self, fin_gz):
+        super(_GzipThread, self).__init__()
+        self.fin_gz = fin_gz
+        self.blocks = queue.Queue(QUEUESIZE)
+        self.stop = threading.Event()
+        self.block = b''
+        self.pos = 0
+        self.thread = threading.Thread(target=self._run, name='gunzip', daemon=True)
+        self.thread.start()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        """Copy decompressed bytes into the buffer. Return 0 at the end of the file"""
+        while self.block is not None and self.pos == len(self.block):
+            block = self.blocks.get()
+            if isinstance(block, Exception):
+                raise block
+            self.block = block
+            self.pos = 0
+        if self.block is None:
+            return 0
+        num = min(len(buf), len(self.block) - self.pos)
+        buf[:num] = memoryview(self.block)[self.pos:self.pos + num]
+        self.pos += num
+        return num
+
+    def close(self):
+        """Stop the background thread, even if not all blocks were read"""
+        if not self.closed:
+            self.stop.set()
+            while self.thread.is_alive():
+                try:
+                    self.blocks.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            self.thread.join()
+        super(_GzipThread, self).close()
+
+    def _run(self):
+        """Decompress all gzip members of the file, one block at a time"""
+        try:
+            with open(self.fin_gz, 'rb') as ifstrm:
+                dobj = zlib.decompressobj(zlib.MAX_WBITS | 16)
+                started = False
+                data = ifstrm.read(BLOCKSIZE)
+                while data and not self.stop.is_set():
+                    started = True
+                    self._put(dobj.decompress(data))
+                    if dobj.eof:
+                        # bgzip files have many gzip members
+                        data = dobj.unused_data or ifstrm.read(BLOCKSIZE)
+                        dobj = zlib.decompressobj(zlib.MAX_WBITS | 16)
+                        started = False
+                    else:
+                        data = ifstrm.read(BLOCKSIZE)
+                if started and not self.stop.is_set():
+                    raise EOFError('COMPRESSED FILE ENDED BEFORE THE END-OF-STREAM MARKER: {GZ}'.format(
+                        GZ=self.fin_gz))
+            self._put(None)
+        # pylint: disable=broad-except
+        except Exception as inst:
+            self._put(inst)
+
+    def _put(self, block):
+        """Queue a block, unless the reader has stopped reading"""
+        if block == b'':
+            return
+        while not self.stop.is_set():
+            try:
+                self.blocks.put(block, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+
+class _GzipProcess(io.RawIOBase):
+    """Bytes of a gzip file, decompressed by a piped pigz or gzip process."""
+
+    def __init__(self, fin_gz):
+        import subprocess
+        super(_GzipProcess, self).__init__()
+        self.fin_gz = fin_gz
+        exe = _get_gunzip_exe()
+        assert exe is not None, 'pigz OR gzip NOT FOUND. USE decompress="thread"'
+        self.proc = subprocess.Popen(
+            [exe, '-dc', fin_gz], stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=BLOCKSIZE)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        """Copy decompressed bytes into the buffer. Return 0 at the end of the file"""
+        num = self.proc.stdout.readinto(buf)
+        if num == 0 and self.proc.wait() != 0:
+            raise IOError('{EXE} EXIT({R}): {ERR}'.format(
+                EXE=self.proc.args[0], R=self.proc.returncode,
+                ERR=self.proc.stderr.read().decode(errors='replace').strip()))
+        return num
+
+    def close(self):
+        """Stop the process, even if not all bytes were read"""
+        if not self.closed:
+            if self.proc.poll() is None:
+                self.proc.kill()
+            self.proc.stdout.close()
+            self.proc.stderr.close()
+            self.proc.wait()
+        super(_GzipProcess, self).close()
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -10,6 +10,14 @@ import re
 import collections as cx
 import datetime
 from goatools.anno.annoreader_base import AnnoReaderBase
+from goatools.anno.columns import AnnoColumns
+from goatools.anno.init.chunks import is_chunkable
+from goatools.anno.init.chunks import get_hdr_end
+from goatools.anno.init.chunks import get_byte_ranges
+from goatools.anno.init.chunks import get_num_chunks
+from goatools.anno.init.chunks import iter_lines
+from goatools.anno.init.chunks import map_chunks
+from goatools.anno.init.opener import open_anno
 from goatools.anno.init.utils import get_date_yyyymmdd
 from goatools.anno.extensions.factory import get_extensions
 
@@ -27,11 +35,14 @@ class InitAssc:
         self.datobj = None
 
     # pylint: disable=too-many-arguments
-    def init_associations(self, hdr_only, prt, namespaces, allow_missing_symbol):
-        """Read GAF file. Store annotation data in a list of namedtuples."""
+    def init_associations(self, hdr_only, prt, namespaces, allow_missing_symbol, columnar=False, processes=None):
+        """Read GAF file. Store annotation data in a list of namedtuples, or in columns."""
         import timeit
         tic = timeit.default_timer()
-        nts = self._read_gaf_nts(hdr_only, namespaces, allow_missing_symbol)
+        if processes is not None and processes > 1 and not hdr_only and is_chunkable(self.fin_gaf):
+            nts = self._read_gaf_chunks(namespaces, allow_missing_symbol, columnar, processes)
+        else:
+            nts = self._read_gaf_nts(hdr_only, namespaces, allow_missing_symbol, columnar)
         # GAF file has been read
         if prt:
             prt.write('HMS:{HMS} {N:7,} annotations READ: {ANNO} {NSs}\n'.format(
@@ -46,20 +57,20 @@ class InitAssc:
         #### return self.evobj.sort_nts(nts, 'Evidence_Code')
 
     # pylint: disable=too-many-locals
-    def _read_gaf_nts(self, hdr_only, namespaces, allow_missing_symbol):
-        """Read GAF file. Store annotation data in a list of namedtuples."""
+    def _read_gaf_nts(self, hdr_only, namespaces, allow_missing_symbol, columnar=False):
+        """Read GAF file. Store annotation data in a list of namedtuples, or in columns."""
         nts = []
         ver = None
         hdrobj = GafHdr()
         datobj = None
         # pylint: disable=not-callable
-        ntobj_make = None
+        add_gafvals = None
         get_gafvals = None
         lnum = -1
         line = ''
         get_all_nss = namespaces is None or namespaces == {'BP', 'MF', 'CC'}
         try:
-            with open(self.fin_gaf) as ifstrm:
+            with open_anno(self.fin_gaf) as ifstrm:
                 for lnum, line in enumerate(ifstrm, 1):
                     # Read data
                     if get_gafvals:
@@ -69,7 +80,7 @@ class InitAssc:
                         if get_all_nss or nspc in namespaces:
                             gafvals = get_gafvals(flds, nspc)
                             if gafvals:
-                                nts.append(ntobj_make(gafvals))
+                                add_gafvals(gafvals)
                             else:
                                 datobj.ignored.append((lnum, line))
                     # Read header
@@ -83,9 +94,15 @@ class InitAssc:
                             if hdr_only:
                                 return nts
                             datobj = GafData(ver, allow_missing_symbol)
-                            get_gafvals = datobj.get_gafvals
-                            ntobj_make = datobj.get_ntobj()._make
-                            self._add_data0(nts, lnum, line, get_all_nss, namespaces, datobj)
+                            if columnar:
+                                nts = datobj.get_columns()
+                                get_gafvals = datobj.get_colvals
+                                add_gafvals = nts.append
+                            else:
+                                get_gafvals = datobj.get_gafvals
+                                ntobj_make = datobj.get_ntobj()._make
+                                add_gafvals = lambda vals: nts.append(ntobj_make(vals))
+                            self._add_data0(lnum, line, get_all_nss, namespaces, datobj, get_gafvals, add_gafvals)
         # pylint: disable=broad-except
         except Exception as inst:
             import traceback
@@ -97,21 +114,91 @@ class InitAssc:
                 datobj.prt_line_detail(sys.stdout, line)
             sys.exit(1)
         self.datobj = datobj
+        if isinstance(nts, AnnoColumns):
+            nts.finish()
         return nts
 
+    def _read_gaf_chunks(self, namespaces, allow_missing_symbol, columnar, processes):
+        """Read GAF file in line-aligned byte ranges, using a process pool"""
+        hdr_lines, beg = get_hdr_end(self.fin_gaf, '!')
+        ver = None
+        hdrobj = GafHdr()
+        for line in hdr_lines:
+            if ver is None and line[1:13] == 'gaf-version:':
+                ver = line[13:].strip()
+            hdrobj.chkaddhdr(line)
+        self.hdr = hdrobj.get_hdr()
+        datobj = GafData(ver, allow_missing_symbol)
+        tasks = [(self.fin_gaf, b, e, datobj.ver, allow_missing_symbol, namespaces, columnar) \
+            for b, e in get_byte_ranges(self.fin_gaf, beg, get_num_chunks(processes))]
+        ntobj = datobj.get_ntobj()
+        nts = []
+        chunks = []
+        # Line numbers of the lines in each chunk start after the lines of earlier chunks
+        lnum = len(hdr_lines)
+        for rows, num_lines, ignored, illegal_lines, err in map_chunks(_read_gaf_chunk, tasks, processes):
+            if err is not None:
+                sys.stderr.write(err[2])
+                sys.stderr.write("**FATAL-gaf: {FIN}[{LNUM}]:\n{L}".format(
+                    FIN=self.fin_gaf, L=err[1], LNUM=lnum + err[0]))
+                datobj.prt_line_detail(sys.stdout, err[1])
+                sys.exit(1)
+            datobj.ignored.extend((lnum + n, line) for n, line in ignored)
+            for errname, lines in illegal_lines.items():
+                datobj.illegal_lines[errname].extend((lnum + n if n > 0 else n, line) for n, line in lines)
+            if columnar:
+                chunks.append(rows)
+            else:
+                nts.extend(ntobj._make(vals) for vals in rows)
+            lnum += num_lines
+        self.datobj = datobj
+        if chunks:
+            return AnnoColumns.concat(chunks, ntobj)
+        return nts
+
+    # pylint: disable=too-many-arguments
     @staticmethod
-    def _add_data0(nts, lnum, line, get_all_nss, namespaces, datobj):
+    def _add_data0(lnum, line, get_all_nss, namespaces, datobj, get_gafvals, add_gafvals):
         """Do tasks upon finding the end of the header"""
         flds = line.split('\t')
         nspc = GafData.aspect2ns[flds[8]]  # 8 GAF Aspect -> BP, MF, or CC
         if get_all_nss or nspc in namespaces:
-            gafvals = datobj.get_gafvals(flds, nspc)
+            gafvals = get_gafvals(flds, nspc)
             if gafvals:
-                nts.append(datobj.get_ntobj()._make(gafvals))
+                add_gafvals(gafvals)
             else:
                 datobj.ignored.append((lnum, line))
 
 
+def _read_gaf_chunk(task):
+    """Read the annotation lines in a byte range of a GAF file, in a worker process"""
+    fin_gaf, beg, end, ver, allow_missing_symbol, namespaces, columnar = task
+    datobj = GafData(ver, allow_missing_symbol)
+    get_all_nss = namespaces is None or namespaces == {'BP', 'MF', 'CC'}
+    rows = datobj.get_columns() if columnar else []
+    get_vals = datobj.get_colvals if columnar else datobj.get_gafvals
+    lnum = 0
+    line = ''
+    try:
+        for lnum, line in enumerate(iter_lines(fin_gaf, beg, end), 1):
+            flds = line.split('\t')
+            nspc = GafData.aspect2ns[flds[8]]  # 8 GAF Aspect -> BP, MF, or CC
+            if get_all_nss or nspc in namespaces:
+                vals = get_vals(flds, nspc)
+                if vals:
+                    rows.append(vals)
+                else:
+                    datobj.ignored.append((lnum, line))
+    # pylint: disable=broad-except
+    except Exception as inst:
+        import traceback
+        err = '{TB}\n  **FATAL-gaf: {MSG}\n\n'.format(TB=traceback.format_exc(), MSG=str(inst))
+        return None, lnum, [], {}, (lnum, line, err)
+    if columnar:
+        rows.finish()
+    return rows, lnum, datobj.ignored, dict(datobj.illegal_lines), None
+
+
 class GafData:
     """Extracts GAF fields from a GAF line."""
 
@@ -223,6 +310,25 @@ class GafData:
         """Get namedtuple object specific to version"""
         return cx.namedtuple("ntgafobj", " ".join(self.flds))
 
+    def get_columns(self):
+        """Get an empty columnar store for annotations of this GAF version"""
+        fld2kind = {f:'set' for f in ['Qualifier', 'DB_Reference', 'With_From', 'DB_Name', 'DB_Synonym']}
+        fld2kind['Taxon'] = 'list'
+        fld2cnv = {'Qualifier':self._get_qualifier_item, 'Date':get_date_yyyymmdd}
+        if self.is_long:
+            fld2kind['Gene_Product_Form_ID'] = 'set'
+            fld2cnv['Extension'] = get_extensions
+        else:
+            fld2kind['Assigned_By'] = 'set'
+        return AnnoColumns(self.get_ntobj(), fld2kind, fld2cnv)
+
+    def get_colvals(self, flds, nspc):
+        """Get GAF fields for a columnar store, which splits, and converts, distinct values once"""
+        flds[8] = nspc                         #  8 GAF Aspect field converted to BP, MF, or CC
+        flds[12] = self._do_taxons(flds[12])   # 12 Taxon
+        flds[-1] = flds[-1].rstrip()
+        return flds
+
     def get_gafvals(self, flds, nspc):
         """Convert fields from string to preferred format for GAF ver 2.1 and 2.0."""
         flds[3] = self._get_qualifier(flds[3])  # 3 Qualifier
@@ -253,6 +359,12 @@ class GafData:
             quals.add(item if item != 'not' else 'NOT')
         return quals
 
+    @staticmethod
+    def _get_qualifier_item(item):
+        """Get one qualifier. Correct for inconsistent capitalization in GAF files"""
+        item = item.lower()
+        return item if item != 'not' else 'NOT'
+
     @staticmethod
     def _get_set(val):
         """Further split a GAF value within a single field."""
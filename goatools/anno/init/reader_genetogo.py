@@ -9,6 +9,14 @@ import sys
 import collections as cx
 import timeit
 import datetime
+from goatools.anno.columns import AnnoColumns
+from goatools.anno.init.chunks import is_chunkable
+from goatools.anno.init.chunks import get_hdr_end
+from goatools.anno.init.chunks import get_byte_ranges
+from goatools.anno.init.chunks import get_num_chunks
+from goatools.anno.init.chunks import iter_lines
+from goatools.anno.init.chunks import map_chunks
+from goatools.anno.init.opener import open_anno
 
 __copyright__ = "Copyright (C) 2016-present, DV Klopfenstein, H Tang. All rights reserved."
 __author__ = "DV Klopfenstein"
@@ -49,59 +57,25 @@ class InitAssc(object):
             print('**NOTE: DEFAULT TAXID STORED FROM gene2go IS 9606 (human)\n')
         return ret
 
-    # pylint: disable=too-many-locals
-    def init_associations(self, fin_anno, taxids=None, namespaces=None):
-        """Read annotation file. Store annotation data in a list of namedtuples."""
+    # pylint: disable=too-many-arguments
+    def init_associations(self, fin_anno, taxids=None, namespaces=None, columnar=False, processes=None):
+        """Read annotation file. Store annotation data in a list of namedtuples, or in columns."""
         nts = []
         if fin_anno is None:
             return nts
         tic = timeit.default_timer()
-        lnum = -1
-        line = "\t"*len(self.flds)
-        cnts = {'taxids':set(), 'genes':set(), 'goids':set()}
-        try:
-            with open(fin_anno) as ifstrm:
-                category2ns = {'Process':'BP', 'Function':'MF', 'Component':'CC'}
-                ntobj = cx.namedtuple('ntanno', self.flds)
-                # Get: 1) Specified taxids, default taxid(human), or all taxids
-                get_all_taxids = taxids is True
-                get_all_nss = namespaces is None or namespaces == {'BP', 'MF', 'CC'}
-                taxids = self.taxids
-                for lnum, line in enumerate(ifstrm, 1):
-                    # Read data
-                    if line[0] != '#':
-                        vals = line.split('\t')
-                        taxid = int(vals[0])
-                        nspc = category2ns[vals[7].rstrip()]
-                        if (get_all_taxids or taxid in taxids) and (get_all_nss or nspc in namespaces):
-                            # assert len(vals) == 8
-                            cnts['taxids'].add(taxid)
-                            geneid = int(vals[1])
-                            cnts['genes'].add(geneid)
-                            goid = vals[2]
-                            cnts['goids'].add(goid)
-                            ntd = ntobj(
-                                tax_id=taxid,
-                                DB_ID=geneid,
-                                GO_ID=goid,
-                                Evidence_Code=vals[3],
-                                Qualifier=self._get_qualifiers(vals[4]),
-                                GO_term=vals[5],
-                                DB_Reference=self._get_pmids(vals[6]),
-                                NS=nspc)
-                            #self._chk_qualifiers(qualifiers, lnum, ntd)
-                            nts.append(ntd)
-                    # Read header
-                    elif line[0] == '#':
-                        assert line[1:-1].split('\t') == self.hdrs
-        # pylint: disable=broad-except
-        except Exception as inst:
-            import traceback
-            traceback.print_exc()
-            sys.stderr.write("\n  **FATAL: {MSG}\n\n".format(MSG=str(inst)))
-            sys.stderr.write("**FATAL: {FIN}[{LNUM}]:\n{L}".format(FIN=fin_anno, L=line, LNUM=lnum))
-            self._prt_line_detail(sys.stdout, line, lnum)
-            sys.exit(1)
+        if processes is not None and processes > 1 and is_chunkable(fin_anno):
+            nts, cnts = self._read_chunks(fin_anno, taxids, namespaces, columnar, processes)
+        else:
+            ntobj = cx.namedtuple('ntanno', self.flds)
+            nts = self._get_nts(ntobj, columnar)
+            with open_anno(fin_anno) as ifstrm:
+                cnts, lnum, line, err = self._read_lines(
+                    ifstrm, taxids, namespaces, nts, tuple if columnar else ntobj._make)
+            if err is not None:
+                self._prt_fatal(fin_anno, lnum, line, err)
+            if columnar:
+                nts.finish()
         print('HMS:{HMS} {N:7,} annotations, {G:6,} genes, {GOs:6,} GOs, {T} taxids READ: {ANNO} {NSs}'.format(
             N=len(nts), ANNO=fin_anno,
             G=len(cnts['genes']), GOs=len(cnts['goids']), T=len(cnts['taxids']),
@@ -110,6 +84,85 @@ class InitAssc(object):
             HMS=str(datetime.timedelta(seconds=(timeit.default_timer()-tic)))))
         return nts
 
+    def _read_chunks(self, fin_anno, taxids, namespaces, columnar, processes):
+        """Read annotation file in line-aligned byte ranges, using a process pool"""
+        hdr_lines, beg = get_hdr_end(fin_anno, '#')
+        for line in hdr_lines:
+            assert line[1:].rstrip('\r\n').split('\t') == self.hdrs
+        tasks = [(self, fin_anno, b, e, taxids, namespaces, columnar) \
+            for b, e in get_byte_ranges(fin_anno, beg, get_num_chunks(processes))]
+        ntobj = cx.namedtuple('ntanno', self.flds)
+        nts = []
+        chunks = []
+        cnts = {'taxids':set(), 'genes':set(), 'goids':set()}
+        # Line numbers of the lines in each chunk start after the lines of earlier chunks
+        lnum_chunk = len(hdr_lines)
+        for rows, cnts_chunk, lnum, line, err in map_chunks(_read_chunk, tasks, processes):
+            if err is not None:
+                self._prt_fatal(fin_anno, lnum_chunk + lnum, line, err)
+            for key, vals in cnts_chunk.items():
+                cnts[key].update(vals)
+            if columnar:
+                chunks.append(rows)
+            else:
+                nts.extend(ntobj._make(vals) for vals in rows)
+            lnum_chunk += lnum
+        if chunks:
+            return AnnoColumns.concat(chunks, ntobj), cnts
+        return nts, cnts
+
+    # pylint: disable=too-many-locals
+    def _read_lines(self, lines, taxids, namespaces, nts, ntobj_make):
+        """Read annotation lines into a list of namedtuples, or into columns"""
+        lnum = -1
+        line = "\t"*len(self.flds)
+        cnts = {'taxids':set(), 'genes':set(), 'goids':set()}
+        try:
+            category2ns = {'Process':'BP', 'Function':'MF', 'Component':'CC'}
+            # Get: 1) Specified taxids, default taxid(human), or all taxids
+            get_all_taxids = taxids is True
+            get_all_nss = namespaces is None or namespaces == {'BP', 'MF', 'CC'}
+            taxids = self.taxids
+            for lnum, line in enumerate(lines, 1):
+                # Read data
+                if line[0] != '#':
+                    vals = line.split('\t')
+                    taxid = int(vals[0])
+                    nspc = category2ns[vals[7].rstrip()]
+                    if (get_all_taxids or taxid in taxids) and (get_all_nss or nspc in namespaces):
+                        # assert len(vals) == 8
+                        cnts['taxids'].add(taxid)
+                        geneid = int(vals[1])
+                        cnts['genes'].add(geneid)
+                        goid = vals[2]
+                        cnts['goids'].add(goid)
+                        # tax_id DB_ID GO_ID Evidence_Code Qualifier GO_term DB_Reference NS
+                        nts.append(ntobj_make((
+                            taxid, geneid, goid, vals[3], self._get_qualifiers(vals[4]),
+                            vals[5], self._get_pmids(vals[6]), nspc)))
+                        #self._chk_qualifiers(qualifiers, lnum, ntd)
+                # Read header
+                elif line[0] == '#':
+                    assert line[1:-1].split('\t') == self.hdrs
+        # pylint: disable=broad-except
+        except Exception as inst:
+            import traceback
+            err = '{TB}\n  **FATAL: {MSG}\n\n'.format(TB=traceback.format_exc(), MSG=str(inst))
+            return cnts, lnum, line, err
+        return cnts, lnum, line, None
+
+    def _prt_fatal(self, fin_anno, lnum, line, err):
+        """Print the line which could not be read and exit"""
+        sys.stderr.write(err)
+        sys.stderr.write("**FATAL: {FIN}[{LNUM}]:\n{L}".format(FIN=fin_anno, L=line, LNUM=lnum))
+        self._prt_line_detail(sys.stdout, line, lnum)
+        sys.exit(1)
+
+    @staticmethod
+    def _get_nts(ntobj, columnar):
+        """Get an empty list of namedtuples, or an empty columnar store"""
+        return AnnoColumns(ntobj, {'Qualifier':'set', 'DB_Reference':'list'}) if columnar else []
+
     @staticmethod
     def _get_qualifiers(qualifier):
         """Return a list of qualifiers if they exist."""
@@ -139,4 +192,17 @@ class InitAssc(object):
     ##             # self.illegal_lines[errname].append((lnum, "\t".join(flds)))
 
 
+def _read_chunk(task):
+    """Read the annotation lines in a byte range of a gene2go file, in a worker process"""
+    objinit, fin_anno, beg, end, taxids, namespaces, columnar = task
+    ntobj = cx.namedtuple('ntanno', objinit.flds)
+    # Worker processes return values, not namedtuples: namedtuple classes made here are not found when unpickled
+    # pylint: disable=protected-access
+    rows = InitAssc._get_nts(ntobj, columnar)
+    cnts, lnum, line, err = objinit._read_lines(iter_lines(fin_anno, beg, end), taxids, namespaces, rows, tuple)
+    if columnar and err is None:
+        rows.finish()
+    return rows, cnts, lnum, line, err
+
+
 # Copyright (C) 2016-present, DV Klopfenstein, H Tang. All rights reserved."
@@ -9,11 +9,12 @@
 import sys
 import re
 import collections as cx
-from goatools.base import nopen
 from goatools.godag.consts import NAMESPACE2NS
 from goatools.anno.init.utils import get_date_yyyymmdd
 from goatools.anno.extensions.factory import get_extensions
 from goatools.anno.eco2group import ECO2GRP
+from goatools.anno.columns import AnnoColumns
+from goatools.anno.init.opener import open_anno
 
 __copyright__ = "Copyright (C) 2016-present, DV Klopfenstein, H Tang. All rights reserved."
 __author__ = "DV Klopfenstein"
@@ -174,7 +175,7 @@ class InitAssc:
         return prop2val
 
     # pylint: disable=too-many-locals
-    def init_associations(self, hdr_only=False, namespaces=None, prt=sys.stdout):
+    def init_associations(self, hdr_only=False, namespaces=None, prt=sys.stdout, columnar=False):
         """Read GPAD file. HTTP address okay. GZIPPED/BZIPPED file okay."""
         import timeit
         import datetime
@@ -185,44 +186,54 @@ class InitAssc:
         ver = None
         ntgpadobj_make = None
         hdrobj = GpadHdr()
-        ifstrm = nopen(self.filename)
         _add_ns = self.godag is not None
         _get_ntgpadvals = self._get_ntgpadvals
         get_all_nss = self._get_b_all_nss(namespaces)
-        for lnum, line in enumerate(ifstrm, 1):
-            # Read data
-            if ntgpadobj_make:
-                flds = self._split_line(line)
-                try:
-                    # pylint: disable=not-callable
-                    goid = flds[3]
-                    nspc = self._get_namespace(goid) if _add_ns else None
-                    if get_all_nss or nspc in namespaces:
-                        ntgpad = ntgpadobj_make(_get_ntgpadvals(flds, goid, nspc, _add_ns))
-                        associations.append(ntgpad)
-                # pylint: disable=broad-except
-                except Exception as inst:
-                    import traceback
-                    traceback.print_exc()
-                    sys.stdout.write("\n  **FATAL: {MSG}\n\n".format(MSG=str(inst)))
-                    sys.stdout.write("**FATAL: {FIN}[{LNUM}]:\n{L}\n".format(
-                        FIN=self.filename, L=line, LNUM=lnum))
-                    for idx, (key, val) in enumerate(zip(self.gpadhdr, flds)):
-                        sys.stdout.write('{I:2} {KEY:13} {VAL}\n'.format(I=idx, KEY=key, VAL=val))
-                    ## if datobj is not None:
-                    ##     datobj.prt_line_detail(sys.stdout, line)
-                    sys.exit(1)
-            # Read header
-            else:
-                if line[0] == '!':
-                    if ver is None and line[1:13] == 'gpa-version:':
-                        ver = line[13:].strip()
-                    hdrobj.chkaddhdr(line)
+        with open_anno(self.filename) as ifstrm:
+            for lnum, line in enumerate(ifstrm, 1):
+                # Read data
+                if ntgpadobj_make:
+                    flds = self._split_line(line)
+                    try:
+                        # pylint: disable=not-callable
+                        goid = flds[3]
+                        nspc = self._get_namespace(goid) if _add_ns else None
+                        if get_all_nss or nspc in namespaces:
+                            gpadvals = _get_ntgpadvals(flds, goid, nspc, _add_ns)
+                            if columnar:
+                                # Extensions and properties are converted once per distinct value
+                                gpadvals[11] = flds[10]
+                                gpadvals[12] = flds[11]
+                                associations.append(gpadvals)
+                            else:
+                                associations.append(ntgpadobj_make(gpadvals))
+                    # pylint: disable=broad-except
+                    except Exception as inst:
+                        import traceback
+                        traceback.print_exc()
+                        sys.stdout.write("\n  **FATAL: {MSG}\n\n".format(MSG=str(inst)))
+                        sys.stdout.write("**FATAL: {FIN}[{LNUM}]:\n{L}\n".format(
+                            FIN=self.filename, L=line, LNUM=lnum))
+                        for idx, (key, val) in enumerate(zip(self.gpadhdr, flds)):
+                            sys.stdout.write('{I:2} {KEY:13} {VAL}\n'.format(I=idx, KEY=key, VAL=val))
+                        ## if datobj is not None:
+                        ##     datobj.prt_line_detail(sys.stdout, line)
+                        sys.exit(1)
+                # Read header
                 else:
-                    self.hdr = hdrobj.get_hdr()
-                    if hdr_only:
-                        return associations
-                    ntgpadobj_make = self._get_ntgpadnt(ver, _add_ns)._make
+                    if line[0] == '!':
+                        if ver is None and line[1:13] == 'gpa-version:':
+                            ver = line[13:].strip()
+                        hdrobj.chkaddhdr(line)
+                    else:
+                        self.hdr = hdrobj.get_hdr()
+                        if hdr_only:
+                            return associations
+                        ntgpadobj_make = self._get_ntgpadnt(ver, _add_ns)._make
+                        if columnar:
+                            associations = self._get_columns(ver, _add_ns)
+        if isinstance(associations, AnnoColumns):
+            associations.finish()
         # GPAD file has been read
         prt.write('HMS:{HMS} {N:7,} annotations READ: {ANNO} {NSs}\n'.format(
             N=len(associations), ANNO=self.filename,
@@ -237,6 +248,12 @@ class InitAssc:
             print('**WARNING: GODAG NOT LOADED. IGNORING namespaces={NS}'.format(NS=namespaces))
         return self.godag is None or namespaces is None or namespaces == {'BP', 'MF', 'CC'}
 
+    def _get_columns(self, ver, add_ns):
+        """Get an empty columnar store for GPAD annotations"""
+        fld2kind = {'Qualifier':'set', 'DB_Reference':'set', 'With_From':'set'}
+        fld2cnv = {'Extension':get_extensions, 'Properties':self._get_properties}
+        return AnnoColumns(self._get_ntgpadnt(ver, add_ns), fld2kind, fld2cnv)
+
     def _get_ntgpadnt(self, ver, add_ns):
         """Create a namedtuple object for each annotation"""
         hdrs = self.gpad_columns[ver]
@@ -4,6 +4,7 @@ import timeit
 import datetime
 import collections as cx
 from goatools.godag.consts import NAMESPACE2NS
+from goatools.anno.init.opener import open_anno
 
 __copyright__ = "Copyright (C) 2016-present, DV Klopfenstein, H Tang. All rights reserved."
 __author__ = "DV Klopfenstein"
@@ -85,7 +86,7 @@ class InitAssc:
 
         ## top_terms = set(['GO:0008150', 'GO:0003674', 'GO:0005575']) # BP, MF, CC
         gene_int = None
-        with open(assoc_fn) as ifstrm:
+        with open_anno(assoc_fn) as ifstrm:
             for row in ifstrm:
                 atoms = row.split()
                 if len(atoms) == 2:
@@ -5,7 +5,7 @@ __author__ = "DV Klopfenstein"
 
 import sys
 from collections import defaultdict
-from goatools.gosubdag.go_tasks import get_go2parents_go2obj
+from goatools.godag.closure import get_go2ancestors_goids
 from goatools.anno.broad_gos import NS2GOS_SHORT
 from goatools.anno.broad_gos import NS2GOS
 
@@ -26,8 +26,7 @@ def update_association(assc_gene2gos, go2obj, relationships=None, prt=sys.stdout
     _chk_goids_notfound(goids_assoc_all, goids_avail)
     # Get the subset of GO objects in the association
     _goids_assoc_cur = goids_assoc_all.intersection(goids_avail)
-    _go2obj_assc = {go:go2obj[go] for go in _goids_assoc_cur}
-    go2ancestors = get_go2parents_go2obj(_go2obj_assc, relationships, prt)
+    go2ancestors = get_go2ancestors_goids(go2obj, _goids_assoc_cur, relationships, prt)
     # Update the GO sets in assc_gene2gos to include all GO ancestors
     for assc_goids_cur in assc_goid_sets:
         parents = set()
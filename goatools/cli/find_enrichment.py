@@ -145,6 +145,9 @@ class GoeaCliArgs:
                        help="Check that a minimum amount of study genes are in the population")
         p.add_argument('--goslim', default='goslim_generic.obo', type=str,
                        help="The GO slim file is used when grouping GO terms.")
+        p.add_argument('--anno_cache', nargs='?', const=True, default=None,
+                       help=('Save filtered and propagated associations in cache files, in this '
+                             'directory or next to the annotation file, and load them in later runs'))
         p.add_argument('--ev_inc', type=str,
                        help="Include specified evidence codes and groups separated by commas")
         p.add_argument('--ev_exc', type=str,
@@ -232,7 +235,7 @@ class GoeaCliFnc:
         _study, _pop = self.rd_files(*self.args.filenames[:2])
         if not self.args.compare:
             # Compare population and study gene product sets
-            self.chk_genes(_study, _pop, self.objanno.associations)
+            self.chk_genes(_study, _pop, assc_ids=self.objanno.get_dbids())
         self.methods = self.args.method.split(",")
         self.itemid2name = self._init_itemid2name()
         # Get GOEnrichmentStudyNS
@@ -251,7 +254,11 @@ class GoeaCliFnc:
             anno_type = self.args.annofmt if self.args.annofmt else 'id2gos'
         # kws: namespaces taxid godag
         kws = self._get_kws_objanno(anno_type)
-        return get_objanno(assoc_fn, anno_type, **kws)
+        return get_objanno(assoc_fn, anno_type, cache=self._get_anno_cache(), **kws)
+
+    def _get_anno_cache(self):
+        """Get the annotation cache directory, True to cache next to the annotations, or None"""
+        return getattr(self.args, 'anno_cache', None)
 
     def _get_ns(self):
         """Return namespaces."""
@@ -332,11 +339,17 @@ class GoeaCliFnc:
 
     def _init_objgoeans(self, pop):
         """Run gene ontology enrichment analysis (GOEA)."""
-        ns2assoc = self.objanno.get_ns2assc(**self._get_anno_kws())
+        propagate_counts = not self.args.no_propagate_counts
+        kws_anno = self._get_anno_kws()
+        # Cached associations are saved after propagating counts
+        if propagate_counts and self._get_anno_cache():
+            kws_anno['propagate_counts'] = True
+            kws_anno['relationships'] = self.args.relationships
+        ns2assoc = self.objanno.get_ns2assc(**kws_anno)
         ## BROAD rm_goids = self._get_remove_goids()
         rm_goids = False  # BROAD
         return GOEnrichmentStudyNS(pop, ns2assoc, self.godag,
-                                   propagate_counts=not self.args.no_propagate_counts,
+                                   propagate_counts=propagate_counts and not self._get_anno_cache(),
                                    relationships=self.args.relationships,
                                    alpha=self.args.alpha,
                                    pvalcalc=self.args.pvalcalc,
@@ -351,7 +364,7 @@ class GoeaCliFnc:
             kws['ev_exclude'] = set(self.args.ev_exc.split(','))
         return kws
 
-    def chk_genes(self, study, pop, ntsassoc=None):
+    def chk_genes(self, study, pop, ntsassoc=None, assc_ids=None):
         """Compare population and study gene product sets"""
         if len(pop) < len(study):
             exit("\nERROR: The study file contains more elements than the population file. "
@@ -367,6 +380,7 @@ class GoeaCliFnc:
         # Population and associations
         if ntsassoc is not None:
             assc_ids = set(nt.DB_ID for nt in ntsassoc)
+        if assc_ids is not None:
             if pop.isdisjoint(assc_ids):
                 if self.objanno.name == 'gene2go':
                     err = ('**FATAL: NO POPULATION ITEMS SEEN IN THE NCBI gene2go ANNOTATIONS '
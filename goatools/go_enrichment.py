@@ -17,23 +17,34 @@ __copyright__ = "Copyright (C) 2010-2019, H Tang et al., All rights reserved."
 __author__ = "various"
 
 import sys
+import itertools
 import collections as cx
+import numpy as np
 
 from goatools.multiple_testing import Methods
 from goatools.multiple_testing import Bonferroni
 from goatools.multiple_testing import Sidak
 from goatools.multiple_testing import HolmBonferroni
+from goatools.multiple_testing import HolmSidak
+from goatools.multiple_testing import SimesHochberg
+from goatools.multiple_testing import Hommel
+from goatools.multiple_testing import FdrBH
+from goatools.multiple_testing import FdrBY
+from goatools.multiple_testing import FdrTSBH
+from goatools.multiple_testing import FdrTSBKY
+from goatools.multiple_testing import FdrGBS
 from goatools.multiple_testing import FDR
-from goatools.multiple_testing import calc_qval
 from goatools.anno.update_association import update_association
 from goatools.anno.update_association import remove_assc_goids
 # BROAD from goatools.anno.update_association import get_goids_to_remove
 from goatools.ratio import get_terms, count_terms, is_ratio_different
 import goatools.wr_tbl as RPT
 from goatools.pvalcalc import FisherFactory
+from goatools.pvalcalc import FisherVectorized
 
 from goatools.godag.prtfncs import GoeaPrintFunctions
 from goatools.rpt.goea_nt_xfrm import MgrNtGOEAs
+from goatools.goea.results_table import GoeaResultsTable
 from goatools.rpt.prtfmt import PrtFmt
 # from goatools.goea.results import GoeaResults
 
@@ -251,6 +262,22 @@ class GOEnrichmentStudy(object):
 
     objprtres = GoeaPrintFunctions()
 
+    # Local multipletest corrections, calculated in NumPy
+    method2correction = {
+        'bonferroni':Bonferroni,
+        'sidak':Sidak,
+        'holm':HolmBonferroni,
+        'fdr_bh':FdrBH,
+        'np_holm-sidak':HolmSidak,
+        'np_simes-hochberg':SimesHochberg,
+        'np_hommel':Hommel,
+        'np_fdr_bh':FdrBH,
+        'np_fdr_by':FdrBY,
+        'np_fdr_tsbh':FdrTSBH,
+        'np_fdr_tsbky':FdrTSBKY,
+        'np_fdr_gbs':FdrGBS,
+    }
+
     def __init__(self, pop, assoc, obo_dag, propagate_counts=True, alpha=.05, methods=None, **kws):
         self.name = kws.get('name', 'GOEA')
         print('\nLoad {OBJNAME} Gene Ontology Analysis ...'.format(OBJNAME=self.name))
@@ -266,7 +293,7 @@ class GOEnrichmentStudy(object):
         if methods is None:
             methods = ["bonferroni", "sidak", "holm"]
         self.methods = Methods(methods)
-        self.pval_obj = FisherFactory(**kws).pval_obj
+        self.pval_obj_min = None  # Calculates minimum attainable p-values, if GO terms are pruned
 
         if propagate_counts:
             update_association(assoc, obo_dag, kws.get('relationships', None))
@@ -274,6 +301,15 @@ class GOEnrichmentStudy(object):
         ## BROAD if broad_goids:
         ## BROAD     assoc = self._remove_assc_goids(assoc, broad_goids)
         self.go2popitems = get_terms("population", pop, assoc, obo_dag, self.log)
+        self.incidence = None  # GoeaIncidence, created on first use by run_studies
+        self.goidx2ns = None   # Namespace of each GO ID in the incidence matrix, used by tables
+        self.pval_obj = self._init_pval_obj(kws)
+        # Resampling FDR: Number of random study sets, random seed, and number of processes
+        self.fdr_kws = {
+            'num_samples':kws.get('fdr_samples', 500),
+            'seed':kws.get('fdr_seed', None),
+            'processes':kws.get('fdr_processes', None)}
+        self.objfdr = None  # FdrResampling, created on first use by the 'fdr' method
 
     # def get_objresults(self, name, study, **kws):
     #     """Run GOEA, return results in an object"""
@@ -292,6 +328,9 @@ class GOEnrichmentStudy(object):
     def run_study(self, study, **kws):
         """Run Gene Ontology Enrichment Study (GOEA) on study ids."""
         study_name = kws.get('name', 'current')
+        if kws.get('table'):
+            # Results are returned in a GoeaResultsTable, which stores NumPy columns
+            return self.run_studies({study_name:study}, **kws)[study_name]
         log = self._get_log_or_prt(kws)
         if log:
             log.write('\nRun {OBJNAME} Gene Ontology Analysis: {STU} study set of {N} IDs ...'.format(
@@ -301,16 +340,22 @@ class GOEnrichmentStudy(object):
         # Key-word arguments:
         methods = Methods(kws['methods']) if 'methods' in kws else self.methods
         alpha = kws['alpha'] if 'alpha' in kws else self.alpha
+        # Skip GO terms which cannot be significant: kws 'prune' and 'enriched_only'
+        pruning = self._get_pruning(methods, alpha, kws)
         # Calculate uncorrected pvalues
-        results = self.get_pval_uncorr(study, log)
+        results = self.get_pval_uncorr(study, log, pruning)
         if not results:
             return []
 
         if log is not None:
             log.write("  {MSG}\n".format(MSG="\n  ".join(self.get_results_msg(results, study))))
+        num_pruned = pruning.get_num_pruned() if pruning is not None else 0
+        return self._get_results_corrected(results, study, methods, alpha, log, kws, num_pruned)
 
+    def _get_results_corrected(self, results, study, methods, alpha, log, kws, num_pruned=0):
+        """Run multiple-test corrections. Return sorted results which pass the user's keep_if."""
         # Do multipletest corrections on uncorrected pvalues and update results
-        self._run_multitest_corr(results, methods, alpha, study, log)
+        self._run_multitest_corr(results, methods, alpha, study, log, num_pruned)
 
         for rec in results:
             # get go term for name and level
@@ -327,6 +372,226 @@ class GOEnrichmentStudy(object):
         results.sort(key=lambda r: [r.enrichment, r.NS, r.p_uncorrected])
         return results # list of GOEnrichmentRecord objects
 
+    def run_studies(self, studies, **kws):
+        """Run GOEAs on many study sets. Return a dict of study names and their GOEA results.
+
+           Study counts of all study sets are found in one sparse matrix product.
+           The results of each study set are the same as those from run_study.
+        """
+        log = self._get_log_or_prt(kws)
+        if log:
+            log.write('\nRun {OBJNAME} Gene Ontology Analysis: {N:,} study sets ...\n'.format(
+                OBJNAME=self.name, N=len(studies)))
+        methods = Methods(kws['methods']) if 'methods' in kws else self.methods
+        alpha = kws['alpha'] if 'alpha' in kws else self.alpha
+        names = list(studies)
+        studies_in_pop = [self.pop.intersection(studies[n]) for n in names]
+        study_ns = [len(s) for s in studies_in_pop]
+        incidence = self.get_incidence()
+        study_counts = incidence.get_study_counts(studies_in_pop)
+        # Skip GO terms which cannot be significant: kws 'prune' and 'enriched_only'
+        pruning = self._get_pruning(methods, alpha, kws)
+        tested = [pruning.get_tested(c, n, incidence.pop_counts, self.pop_n) if n else None
+                  for c, n in zip(study_counts, study_ns)] if pruning is not None else [None]*len(names)
+        pvals = self._get_pvals_studies(study_counts, study_ns, incidence.pop_counts, tested)
+        name2results = cx.OrderedDict()
+        for name, study_in_pop, counts, pvals_study, tested_study in zip(
+                names, studies_in_pop, study_counts, pvals, tested):
+            if kws.get('table'):
+                table = GoeaResultsTable(self, study_in_pop, counts, pvals_study)
+                if tested_study is not None:
+                    table.prune(tested_study)
+                name2results[name] = self._get_table_corrected(table, studies[name], methods, alpha, kws)
+                continue
+            results = self._get_results_incidence(incidence, study_in_pop, counts, pvals_study, tested_study)
+            if results:
+                num_pruned = int(tested_study.size - tested_study.sum()) if tested_study is not None else 0
+                results = self._get_results_corrected(
+                    results, studies[name], methods, alpha, None, kws, num_pruned)
+            name2results[name] = results
+        if log and pruning is not None:
+            log.write('{MSG}\n'.format(MSG=pruning.get_msg()))
+        if log:
+            log.write('{N:,} study sets run: {M:,} have significant results (< {A}=alpha)\n'.format(
+                N=len(names), A=alpha,
+                M=sum(self._has_significant(rs, alpha) for rs in name2results.values())))
+        return name2results
+
+    def run_ranked(self, ranked_genes, **kws):
+        """Run a GOEA on a ranked gene list, most interesting gene first, instead of a study set.
+
+           Every GO ID is tested at every cutoff of the ranking in one pass (mHG).
+           Each result is for the cutoff where the GO ID is most enriched:
+           ratio_in_study is the study count and the number of genes above the cutoff.
+        """
+        log = self._get_log_or_prt(kws)
+        methods = Methods(kws['methods']) if 'methods' in kws else self.methods
+        alpha = kws['alpha'] if 'alpha' in kws else self.alpha
+        if any(nt.method == 'fdr' for nt in methods):
+            # The resampling FDR draws random study sets, not random rankings
+            raise Exception('RESAMPLING FDR, fdr, CANNOT CORRECT RANKED GOEAS. USE fdr_bh OR ANOTHER METHOD')
+        # Genes not in the population are skipped. Repeated genes keep their first rank
+        ranked = list(cx.OrderedDict.fromkeys(g for g in ranked_genes if g in self.pop))
+        if log:
+            log.write('\nRun {OBJNAME} minimum-hypergeometric GOEA: {N:,} of {M:,} ranked IDs in population\n'.format(
+                OBJNAME=self.name, N=len(ranked), M=len(ranked_genes)))
+        if not ranked:
+            return []
+        from goatools.goea.ranked import MinHypergeometric
+        incidence = self.get_incidence()
+        ntmhg = MinHypergeometric(incidence, self.pop_n).get_mhg(ranked, kws.get('max_rank'))
+        gene2rank = {g:r for r, g in enumerate(ranked)}
+        go2popitems = self.go2popitems
+        pop_n = self.pop_n
+        results = []
+        for goid, mhg, pval, study_count, rank_cutoff, pop_count in zip(
+                incidence.goids, ntmhg.mhg.tolist(), ntmhg.pval.tolist(), ntmhg.study_count.tolist(),
+                ntmhg.rank_cutoff.tolist(), incidence.pop_counts.tolist()):
+            pop_items = go2popitems[goid]
+            results.append(GOEnrichmentRecord(
+                goid,
+                p_uncorrected=pval,
+                mhg=mhg,
+                study_items=set(g for g in pop_items if gene2rank.get(g, rank_cutoff) < rank_cutoff),
+                pop_items=pop_items,
+                ratio_in_study=(study_count, rank_cutoff),
+                ratio_in_pop=(pop_count, pop_n)))
+        return self._get_results_corrected(results, ranked, methods, alpha, log, kws)
+
+    def _get_table_corrected(self, table, study, methods, alpha, kws):
+        """Run multiple-test corrections on a results table. Keep rows which pass the user's keep_if"""
+        if not table.study_n:
+            table.take([])
+            return table
+        self._run_multitest_corr(table, methods, alpha, study, None, table.num_pruned)
+        if 'keep_if' in kws:
+            table.keep_if(kws['keep_if'])
+        table.sort()
+        return table
+
+    @staticmethod
+    def _has_significant(results, alpha):
+        """Return True if any GOEA result is significant"""
+        if isinstance(results, GoeaResultsTable):
+            return bool(np.any(results.get_pvalues() < alpha))
+        return any(r.get_pvalue() < alpha for r in results)
+
+    def _get_pruning(self, methods, alpha, kws):
+        """Get the object which skips GO terms that cannot be significant, if requested"""
+        if not kws.get('prune') and not kws.get('enriched_only'):
+            return None
+        from goatools.goea.pruning import GoeaPruning
+        if self.pval_obj_min is None:
+            # Minimum attainable p-values use a log-factorial table, which is kept
+            self.pval_obj_min = self.pval_obj if hasattr(self.pval_obj, 'calc_min_pvalues') else \
+                FisherVectorized('fisher_vectorized', None, self.pval_obj.alternative)
+        return GoeaPruning(methods, alpha, self.pval_obj_min,
+                           kws.get('prune', False), kws.get('enriched_only', False))
+
+    def get_goidx2ns(self):
+        """Get the namespace (BP, MF, CC) of each GO ID in the population incidence matrix"""
+        if self.goidx2ns is None:
+            obo_dag = self.obo_dag
+            # GO IDs not in the GO DAG have the namespace, 'XX', as in GOEnrichmentRecord
+            self.goidx2ns = np.array([
+                GOEnrichmentRecord.namespace2NS[obo_dag[go].namespace] if go in obo_dag else 'XX'
+                for go in self.get_incidence().goids])
+        return self.goidx2ns
+
+    def shutdown(self):
+        """Stop the worker processes of the p-value calculator, if any were started"""
+        if hasattr(self.pval_obj, 'shutdown'):
+            self.pval_obj.shutdown()
+
+    def get_incidence(self):
+        """Get the population gene-by-GO incidence matrix, created once."""
+        if self.incidence is None:
+            from goatools.goea.incidence import GoeaIncidence
+            self.incidence = GoeaIncidence(self.go2popitems)
+        return self.incidence
+
+    def _init_pval_obj(self, kws):
+        """Get the p-value calculator: Fisher's exact test, or permutations of study gene labels"""
+        if kws.get('pvalcalc') != 'permutation':
+            return FisherFactory(**kws).pval_obj
+        from goatools.goea.permutation import PermutationPvals
+        incidence = self.get_incidence()
+        weights = kws.get('perm_weights')
+        if weights is not None:
+            # Weight of each population gene in incidence row order. Genes without GO IDs are last
+            genes = incidence.genes + sorted(self.pop.difference(incidence.gene2row), key=str)
+            weights = [weights[g] for g in genes]
+        return PermutationPvals(
+            incidence, self.pop_n,
+            num_perms=kws.get('perm_samples', 1000),
+            seed=kws.get('perm_seed', None),
+            processes=kws.get('perm_processes', None),
+            alpha=self.alpha,
+            early_stop=kws.get('perm_early_stop', True),
+            weights=weights,
+            alternative=kws.get('alternative', 'two-sided'))
+
+    def _get_calc_pvalues(self, goids=None, goidxs=None):
+        """Get the calculator of many p-values in one call, if any. Permutations also need GO IDs"""
+        calc_pvalues_goidxs = getattr(self.pval_obj, 'calc_pvalues_goidxs', None)
+        if calc_pvalues_goidxs is None:
+            return getattr(self.pval_obj, 'calc_pvalues', None)
+        if goidxs is None:
+            goid2col = self.get_incidence().goid2col
+            goidxs = [goid2col[go] for go in goids]
+        return lambda study_counts, study_n, *_: calc_pvalues_goidxs(study_counts, study_n, goidxs)
+
+    def get_objfdr(self):
+        """Get the p-value distribution generator for the resampling FDR method, 'fdr', created once."""
+        if self.objfdr is None:
+            from goatools.goea.fdr_resampling import FdrResampling
+            incidence = self.get_incidence()
+            self.objfdr = FdrResampling(incidence.matrix, incidence.pop_counts, self.pop_n,
+                                        pval_cache=getattr(self.pval_obj, 'cache', None),
+                                        alternative=self.pval_obj.alternative, **self.fdr_kws)
+        return self.objfdr
+
+    def _get_pvals_studies(self, study_counts, study_ns, pop_counts, tested):
+        """Calculate the uncorrected pvalues for all study sets. One row per study set."""
+        return [self._get_pvals_study(counts, study_n, pop_counts, tested_study) if study_n else []
+                for counts, study_n, tested_study in zip(study_counts, study_ns, tested)]
+
+    def _get_pvals_study(self, study_counts, study_n, pop_counts, tested=None, goidxs=None):
+        """Calculate the uncorrected pvalues for one study set. Untested GO IDs have p-values of 1"""
+        if tested is not None:
+            pvals = np.ones(study_counts.size)
+            pvals[tested] = self._get_pvals_study(
+                study_counts[tested], study_n, pop_counts[tested], goidxs=np.flatnonzero(tested))
+            return pvals
+        calc_pvalues = self._get_calc_pvalues(
+            goidxs=np.arange(study_counts.size) if goidxs is None else goidxs)
+        if calc_pvalues is not None:
+            return calc_pvalues(study_counts, study_n, pop_counts, self.pop_n)
+        calc_pvalue = self.pval_obj.calc_pvalue
+        return [calc_pvalue(s, study_n, p, self.pop_n)
+                for s, p in zip(study_counts.tolist(), pop_counts.tolist())]
+
+    def _get_results_incidence(self, incidence, study_in_pop, study_counts, pvals, tested=None):
+        """Get GOEA results with uncorrected pvalues for one study set."""
+        study_n = len(study_in_pop)
+        if not study_n:
+            return []
+        pop_n = self.pop_n
+        go2studyitems = incidence.get_go2studyitems(study_in_pop)
+        go2popitems = self.go2popitems
+        pvals = pvals.tolist() if hasattr(pvals, 'tolist') else pvals
+        tested = tested.tolist() if tested is not None else [True]*len(pvals)
+        return [GOEnrichmentRecord(
+            goid,
+            p_uncorrected=pval,
+            study_items=go2studyitems.get(goid, set()),
+            pop_items=go2popitems[goid],
+            ratio_in_study=(study_count, study_n),
+            ratio_in_pop=(pop_count, pop_n))
+                for goid, pval, study_count, pop_count, is_tested in
+                zip(incidence.goids, pvals, study_counts.tolist(), incidence.pop_counts.tolist(), tested)
+                if is_tested]
+
     def _get_log_or_prt(self, kws):
         """Allow either keyword, 'log', or 'prt' to be used to suppress or redirect printing"""
         if 'log' in kws:
@@ -354,26 +619,38 @@ class GOEnrichmentStudy(object):
             msg.append("{STU} study items".format(STU=stu_txt))
         return msg
 
-    def get_pval_uncorr(self, study, log=sys.stdout):
-        """Calculate the uncorrected pvalues for study items."""
+    def get_pval_uncorr(self, study, log=sys.stdout, pruning=None):
+        """Calculate the uncorrected pvalues for study items. Skip GO terms pruned, if given"""
         results = []
         study_in_pop = self.pop.intersection(study)
         # " 99%    378 of    382 study items found in population"
         go2studyitems = get_terms("study", study_in_pop, self.assoc, self.obo_dag, log)
         pop_n, study_n = self.pop_n, len(study_in_pop)
-        allterms = set(go2studyitems).union(set(self.go2popitems))
+        # Sorted, so results with the same significance are in the same order in every run
+        allterms = sorted(set(go2studyitems).union(set(self.go2popitems)))
+        if pruning is not None and study_n:
+            tested = pruning.get_tested(
+                [len(go2studyitems.get(go, ())) for go in allterms], study_n,
+                [len(self.go2popitems.get(go, ())) for go in allterms], pop_n)
+            allterms = [go for go, is_tested in zip(allterms, tested.tolist()) if is_tested]
         if log is not None:
             # Some study genes may not have been found in the population. Report from orig
             study_n_orig = len(study)
             perc = 100.0*study_n/study_n_orig if study_n_orig != 0 else 0.0
             log.write("{R:3.0f}% {N:>6,} of {M:>6,} study items found in population({P})\n".format(
                 N=study_n, M=study_n_orig, P=pop_n, R=perc))
+            if study_n and pruning is not None:
+                log.write("{MSG}\n".format(MSG=pruning.get_msg()))
             if study_n:
                 log.write("Calculating {N:,} uncorrected p-values using {PFNC}\n".format(
                     N=len(allterms), PFNC=self.pval_obj.name))
         # If no study genes were found in the population, return empty GOEA results
         if not study_n:
             return []
+        # Vectorized p-value calculators calculate all p-values in one call
+        calc_pvalues = self._get_calc_pvalues(goids=allterms)
+        if calc_pvalues is not None:
+            return self._get_pval_uncorr_vectorized(calc_pvalues, allterms, go2studyitems, study_n)
         calc_pvalue = self.pval_obj.calc_pvalue
 
         for goid in allterms:
@@ -394,10 +671,34 @@ class GOEnrichmentStudy(object):
 
         return results
 
-    def _run_multitest_corr(self, results, usrmethod_flds, alpha, study, log):
+    def _get_pval_uncorr_vectorized(self, calc_pvalues, allterms, go2studyitems, study_n):
+        """Calculate the uncorrected pvalues for all GO terms in one call."""
+        pop_n = self.pop_n
+        goids = list(allterms)
+        study_items_all = [go2studyitems.get(goid, set()) for goid in goids]
+        pop_items_all = [self.go2popitems.get(goid, set()) for goid in goids]
+        pvals = calc_pvalues([len(s) for s in study_items_all], study_n,
+                             [len(p) for p in pop_items_all], pop_n)
+        return [GOEnrichmentRecord(
+            goid,
+            p_uncorrected=pval,
+            study_items=study_items,
+            pop_items=pop_items,
+            ratio_in_study=(len(study_items), study_n),
+            ratio_in_pop=(len(pop_items), pop_n))
+                for goid, pval, study_items, pop_items in
+                zip(goids, pvals.tolist(), study_items_all, pop_items_all)]
+
+    def _run_multitest_corr(self, results, usrmethod_flds, alpha, study, log, num_pruned=0):
         """Do multiple-test corrections on uncorrected pvalues."""
         assert 0 < alpha < 1, "Test-wise alpha must fall between (0, 1)"
-        pvals = [r.p_uncorrected for r in results]
+        if isinstance(results, GoeaResultsTable):
+            pvals = results.get_column('p_uncorrected')
+        else:
+            pvals = [r.p_uncorrected for r in results]
+        if num_pruned:
+            # GO terms pruned before calculating p-values are still tests. Their p-values are 1
+            pvals = np.concatenate([pvals, np.ones(num_pruned)])
         ntobj = cx.namedtuple("ntobj", "results pvals alpha nt_method study")
         for nt_method in usrmethod_flds:
             ntmt = ntobj(results, pvals, alpha, nt_method, study)
@@ -442,23 +743,12 @@ class GOEnrichmentStudy(object):
         """Use multitest mthods that have been implemented locally."""
         corrected_pvals = None
         method = ntmt.nt_method.method
-        if method == "bonferroni":
-            corrected_pvals = Bonferroni(ntmt.pvals, ntmt.alpha).corrected_pvals
-        elif method == "sidak":
-            corrected_pvals = Sidak(ntmt.pvals, ntmt.alpha).corrected_pvals
-        elif method == "holm":
-            corrected_pvals = HolmBonferroni(ntmt.pvals, ntmt.alpha).corrected_pvals
+        if method in self.method2correction:
+            corrected_pvals = self.method2correction[method](ntmt.pvals, ntmt.alpha).corrected_pvals
         elif method == "fdr":
             # get the empirical p-value distributions for FDR
-            term_pop = getattr(self, 'term_pop', None)
-            if term_pop is None:
-                term_pop = count_terms(self.pop, self.assoc, self.obo_dag)
-            p_val_distribution = calc_qval(len(ntmt.study),
-                                           self.pop_n,
-                                           self.pop, self.assoc,
-                                           term_pop, self.obo_dag)
-            corrected_pvals = FDR(p_val_distribution,
-                                  ntmt.results, ntmt.alpha).corrected_pvals
+            p_val_distribution = self.get_objfdr().get_pval_distribution(len(ntmt.study))
+            corrected_pvals = FDR.get_corrected_pvals(p_val_distribution, ntmt.pvals)
 
         self._update_pvalcorr(ntmt, corrected_pvals)
 
@@ -467,6 +757,9 @@ class GOEnrichmentStudy(object):
         """Add data members to store multiple test corrections."""
         if corrected_pvals is None:
             return
+        if isinstance(ntmt.results, GoeaResultsTable):
+            ntmt.results.set_corrected_pvals(ntmt.nt_method, corrected_pvals[:len(ntmt.results)])
+            return
         for rec, val in zip(ntmt.results, corrected_pvals):
             rec.set_corrected_pval(ntmt.nt_method, val)
 
@@ -512,15 +805,63 @@ class GOEnrichmentStudy(object):
 
     def wr_tsv(self, fout_tsv, goea_results, **kws):
         """Write tab-separated table data to file"""
-        prt_flds = kws.get('prt_flds', self.objprtres.get_prtflds_default(goea_results))
-        tsv_data = MgrNtGOEAs(goea_results).get_goea_nts_prt(prt_flds, **kws)
-        RPT.wr_tsv(fout_tsv, tsv_data, **kws)
+        if 'sort_by' in kws:
+            # Sorting needs all rows in memory
+            goea_results = self._get_results_list(goea_results)
+            prt_flds = kws.get('prt_flds', self.objprtres.get_prtflds_default(goea_results))
+            tsv_data = MgrNtGOEAs(goea_results).get_goea_nts_prt(prt_flds, **kws)
+            RPT.wr_tsv(fout_tsv, tsv_data, **kws)
+            return
+        # GOEA results may be a generator: Read the first result to see if there are any
+        first, goea_results = self._peek_results(goea_results)
+        if first is None:
+            sys.stdout.write("      0 {ITEMS}. NOT WRITING {FOUT}\n".format(
+                ITEMS=kws.get('items', 'items'), FOUT=fout_tsv))
+            return
+        with open(fout_tsv, 'w') as prt:
+            num_rows = self.prt_tsv(prt, goea_results, **kws)
+        sys.stdout.write("  {N:>5} {ITEMS} WROTE: {FOUT}\n".format(
+            N=num_rows, ITEMS=kws.get('items', 'items'), FOUT=fout_tsv))
 
     def prt_tsv(self, prt, goea_results, **kws):
-        """Write tab-separated table data"""
-        prt_flds = kws.get('prt_flds', self.objprtres.get_prtflds_default(goea_results))
-        tsv_data = MgrNtGOEAs(goea_results).get_goea_nts_prt(prt_flds, **kws)
-        RPT.prt_tsv(prt, tsv_data, **kws)
+        """Write tab-separated table data. Rows are formatted and written in chunks"""
+        if 'sort_by' in kws:
+            goea_results = self._get_results_list(goea_results)
+            prt_flds = kws.get('prt_flds', self.objprtres.get_prtflds_default(goea_results))
+            tsv_data = MgrNtGOEAs(goea_results).get_goea_nts_prt(prt_flds, **kws)
+            return RPT.prt_tsv(prt, tsv_data, **kws)
+        from goatools.rpt.goea_stream import GoeaStreamWriter
+        return GoeaStreamWriter(prt, **kws).wr_results(goea_results)
+
+    @staticmethod
+    def _peek_results(goea_results):
+        """Get the first GOEA result, or None, and all GOEA results, including the first"""
+        itr = iter(goea_results)
+        first = next(itr, None)
+        if itr is goea_results and first is not None:
+            # A generator: Put the first result back
+            goea_results = itertools.chain([first], itr)
+        return first, goea_results
+
+    @staticmethod
+    def _get_results_list(goea_results):
+        """Get GOEA results which can be indexed, reading a generator into a list"""
+        return goea_results if hasattr(goea_results, '__getitem__') else list(goea_results)
+
+    @staticmethod
+    def wr_tsv_studies(fout_tsv, name2results, study_fld='study', **kws):
+        """Write GOEA results of many studies to one long-format TSV having a study column.
+
+           name2results is a dict or (name, GOEA results) pairs. It may be a generator,
+           so the results of only one study are held in memory at a time:
+               >>> goeaobj.wr_tsv_studies('goea.tsv', ((n, goeaobj.run_study(s)) for n, s in studies.items()))
+        """
+        from goatools.rpt.goea_stream import GoeaStreamWriter
+        with open(fout_tsv, 'w') as prt:
+            objwr = GoeaStreamWriter(prt, study_fld=study_fld, **kws)
+            num_studies = objwr.wr_studies(name2results)
+        sys.stdout.write("  {N:>5} {ITEMS} WROTE: {FOUT} ({S} studies)\n".format(
+            N=objwr.num_rows, ITEMS=kws.get('items', 'items'), FOUT=fout_tsv, S=num_studies))
 
     @staticmethod
     def get_ns2nts(results, fldnames=None, **kws):
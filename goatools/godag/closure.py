@@ -0,0 +1,342 @@
+"""Ancestors and descendants of every GO Term, computed once per GO DAG and relationship set.
+
+    The transitive closure is computed without recursion, one topological layer
+    at a time, and stored as sorted integer arrays in CSR-style tables:
+
+        ancestors of GO Term i:   ancestors.indices[ancestors.indptr[i]:ancestors.indptr[i+1]]
+
+    A GODag keeps one GoClosure per relationship set, which is shared by every
+    caller that propagates counts or gets ancestors and descendants:
+
+        >>> closure = godag.get_closure({'part_of'})
+        >>> closure.is_ancestor('GO:0008150', 'GO:0019222')
+        True
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+import numpy as np
+from goatools.godag.consts import RELATIONSHIP_SET
+from goatools.godag.termstore import Csr
+from goatools.godag.level_depth import get_topological_order
+
+
+def get_closure(go2obj, relationships=None):
+    """Get the GoClosure shared by a GODag, or create one for other GO ID-to-GO Term dicts."""
+    if hasattr(go2obj, 'get_closure'):
+        return go2obj.get_closure(relationships)
+    return GoClosure(go2obj, relationships)
+
+def get_go2ancestors_goids(go2obj, goids, relationships=None, prt=None):
+    """Get ancestors of GO IDs found in go2obj, using the GoClosure shared by a GODag."""
+    if hasattr(go2obj, 'get_closure'):
+        return go2obj.get_closure(relationships).get_go2ancestors(goids, prt)
+    # Other GO ID-to-GO Term dicts: Traverse the GO Terms for the GO IDs
+    from goatools.gosubdag.go_tasks import get_go2parents_go2obj
+    return get_go2parents_go2obj({go:go2obj[go] for go in goids if go in go2obj}, relationships, prt)
+
+def get_relationships_key(relationships):
+    """Get a hashable value for: no relationships, all relationships, or a relationship set."""
+    if not relationships:
+        return frozenset()
+    # All relationships loaded in the GO DAG are traversed, as in go_tasks.get_go2ancestors
+    if relationships is True or relationships == RELATIONSHIP_SET:
+        return True
+    return frozenset(relationships)
+
+
+class GoClosure(object):
+    """Ancestors and descendants of every GO Term, computed once per GO DAG and relationship set."""
+
+    def __init__(self, go2obj, relationships=None):
+        self.relationships = get_relationships_key(relationships)
+        self.goids, self.go2idx, csr_upper = self._init_csr_upper(go2obj)
+        self.ancestors = get_csr_ancestors(csr_upper)
+        self._descendants = None
+        # Sets of ancestor and descendant indices of GO Terms tested by is_ancestor or is_descendant
+        self._idx2ancestors = {}
+        self._idx2descendants = {}
+
+    @property
+    def descendants(self):
+        """Table of descendants, transposed from the table of ancestors on first use"""
+        if self._descendants is None:
+            self._descendants = self.ancestors.get_transpose()
+        return self._descendants
+
+    def is_ancestor(self, goid_upper, goid):
+        """Return True if goid_upper is an ancestor of goid. O(1) after the first test of goid."""
+        idxs = _get_idxset(self._idx2ancestors, self.ancestors, self.go2idx[goid])
+        return self.go2idx[goid_upper] in idxs
+
+    def is_descendant(self, goid_lower, goid):
+        """Return True if goid_lower is a descendant of goid. O(1) after the first test of goid."""
+        idxs = _get_idxset(self._idx2descendants, self.descendants, self.go2idx[goid])
+        return self.go2idx[goid_lower] in idxs
+
+    def get_ancestors(self, goid):
+        """Get the set of ancestor GO IDs for one GO ID."""
+        return self._get_goids(self.ancestors.get_row(self.go2idx[goid]))
+
+    def get_descendants(self, goid):
+        """Get the set of descendant GO IDs for one GO ID."""
+        return self._get_goids(self.descendants.get_row(self.go2idx[goid]))
+
+    def get_go2ancestors(self, goids, prt=None):
+        """Get GO IDs and their non-empty sets of ancestors. GO IDs not in the GO DAG are skipped."""
+        if prt is not None:
+            prt.write('up: {RELS}\n'.format(RELS=self.get_relationships_str()))
+        return self._get_go2relatives(self.ancestors, goids)
+
+    def get_go2descendants(self, goids, prt=None):
+        """Get GO IDs and their non-empty sets of descendants. GO IDs not in the GO DAG are skipped."""
+        if prt is not None:
+            prt.write('down: {RELS}\n'.format(RELS=self.get_relationships_str()))
+        return self._get_go2relatives(self.descendants, goids)
+
+    def get_goids_n_ancestors(self, goids):
+        """Get the main GO IDs of the user GO IDs and all of their ancestors."""
+        return self._get_goids_n_relatives(self.ancestors, goids)
+
+    def get_goids_n_descendants(self, goids):
+        """Get the main GO IDs of the user GO IDs and all of their descendants."""
+        return self._get_goids_n_relatives(self.descendants, goids)
+
+    def get_relationships_str(self):
+        """Get a string describing the relationships traversed."""
+        if not self.relationships:
+            return 'is_a'
+        rels = RELATIONSHIP_SET if self.relationships is True else self.relationships
+        return 'is_a and {Rs}'.format(Rs=' '.join(sorted(rels)))
+
+    def apply_diff(self, go2obj, diff):
+        """Update the ancestors of GO Terms which moved in a new release, and those below them."""
+        goids = self.goids
+        go2idx = self.go2idx
+        # Removed GO Terms keep their index, with no ancestors, but are not found by GO ID
+        idxs_removed = [go2idx.pop(go) for go in diff.get_goids_removed(go2obj.load_obsolete)]
+        for goid_alt in self._get_alts_removed(go2obj, diff):
+            del go2idx[goid_alt]
+        for goid in sorted(diff.added):
+            go2idx[goid] = len(goids)
+            goids.append(goid)
+        for goid in diff.added.union(diff.alt_ids):
+            if goid in go2obj:
+                for goid_alt in go2obj[goid].alt_ids:
+                    go2idx[goid_alt] = go2idx[goid]
+        # Ancestors of each moved GO Term are computed after the ancestors of the GO Terms above it
+        goterms = self._get_goterms_moved(go2obj, diff)
+        idx2row = {}
+        ancestors = self.ancestors
+        for goterm in get_topological_order({o:self._get_uppers(o) for o in goterms}):
+            if goterm in goterms:
+                uppers = np.array([go2idx[o.item_id] for o in self._get_uppers(goterm)], dtype=np.int32)
+                rows = [idx2row[i] if i in idx2row else ancestors.get_row(i) for i in uppers.tolist()]
+                idx2row[go2idx[goterm.item_id]] = _get_unique(np.concatenate([uppers] + rows))
+        for idx in idxs_removed:
+            idx2row[idx] = np.zeros(0, dtype=np.int32)
+        self.ancestors = get_csr_updated(ancestors, len(goids), idx2row)
+        self._descendants = None
+        self._idx2ancestors = {}
+        self._idx2descendants = {}
+
+    def _get_alts_removed(self, go2obj, diff):
+        """Get the old alt GO IDs which are no longer alt GO IDs of the same GO Term."""
+        goids_alt = set()
+        for goid, (alts_old, _) in diff.alt_ids.items():
+            for goid_alt in alts_old:
+                goterm = go2obj.get(goid_alt)
+                if goid_alt in self.go2idx and (goterm is None or goterm.item_id != goid):
+                    goids_alt.add(goid_alt)
+        return goids_alt
+
+    def _get_goterms_moved(self, go2obj, diff):
+        """Get GO Terms with new GO Terms one step up, and all GO Terms below them."""
+        goids = diff.added.union(diff.reparented)
+        if self.relationships:
+            goids.update(diff.relinked)
+        goterms = set(go2obj[go] for go in goids if go in go2obj)
+        stack = list(goterms)
+        while stack:
+            for lower in self._get_lowers(stack.pop()):
+                if lower not in goterms:
+                    goterms.add(lower)
+                    stack.append(lower)
+        return goterms
+
+    def _get_go2relatives(self, csr, goids):
+        """Get GO IDs and their non-empty sets of related GO IDs."""
+        go2relatives = {}
+        go2idx = self.go2idx
+        for goid in goids:
+            if goid in go2idx:
+                idxs = csr.get_row(go2idx[goid])
+                if idxs.size:
+                    go2relatives[goid] = self._get_goids(idxs)
+        return go2relatives
+
+    def _get_goids_n_relatives(self, csr, goids):
+        """Get the main GO IDs of the user GO IDs and all of their related GO IDs."""
+        go2idx = self.go2idx
+        idxs = [go2idx[go] for go in goids if go in go2idx]
+        rows = [csr.get_row(i) for i in idxs]
+        return self._get_goids(np.unique(np.concatenate([np.array(idxs, dtype=np.int32)] + rows)))
+
+    def _get_goids(self, idxs):
+        """Get a set of GO IDs, given GO Term indices."""
+        goids = self.goids
+        return set(goids[i] for i in idxs.tolist())
+
+    def _init_csr_upper(self, go2obj):
+        """Get GO Term indices and a table of GO Terms one step up from each GO Term."""
+        termstore = getattr(go2obj, 'termstore', None)
+        if termstore is not None:
+            go2idx = dict(termstore.go2idx)
+            for goid_alt, idx in termstore.altgo2idx:
+                go2idx[goid_alt] = idx
+            return termstore.goids, go2idx, termstore.get_csr_upper(self.relationships)
+        goterms = self._get_goterms(go2obj)
+        goids = [o.item_id for o in goterms]
+        go2idx = {goid:idx for idx, goid in enumerate(goids)}
+        for goid, goterm in go2obj.items():
+            if goid not in go2idx:
+                go2idx[goid] = go2idx[goterm.item_id]
+        indptr = [0]
+        indices = []
+        for goterm in goterms:
+            indices.extend(sorted(go2idx[o.item_id] for o in self._get_uppers(goterm)))
+            indptr.append(len(indices))
+        return goids, go2idx, Csr(indptr, indices)
+
+    def _get_goterms(self, go2obj):
+        """Get the GO Terms in go2obj and all GO Terms reachable from them."""
+        goterms = []
+        seen = set()
+        stack = list(go2obj.values())
+        while stack:
+            goterm = stack.pop()
+            if goterm.item_id not in seen:
+                seen.add(goterm.item_id)
+                goterms.append(goterm)
+                stack.extend(self._get_uppers(goterm))
+                stack.extend(self._get_lowers(goterm))
+        return sorted(goterms, key=lambda o: o.item_id)
+
+    def _get_uppers(self, goterm):
+        """Get GO Terms one step up, through is_a and the user-specified relationships."""
+        relationships = self.relationships
+        if not relationships:
+            return goterm.parents
+        if relationships is True:
+            return goterm.get_goterms_upper()
+        return goterm.get_goterms_upper_rels(relationships)
+
+    def _get_lowers(self, goterm):
+        """Get GO Terms one step down, through is_a and the user-specified relationships."""
+        relationships = self.relationships
+        if not relationships:
+            return goterm.children
+        if relationships is True:
+            return goterm.get_goterms_lower()
+        return goterm.get_goterms_lower_rels(relationships)
+
+
+def get_csr_ancestors(csr_upper):
+    """Get the transitive closure of a table of GO Terms one step up from each GO Term."""
+    num_rows = len(csr_upper)
+    rowbeg = np.zeros(num_rows, dtype=np.int64)
+    rowlen = np.zeros(num_rows, dtype=np.int64)
+    # Ancestors of each layer are appended to a buffer which doubles in size when full
+    ancestors = np.zeros(max(num_rows, 1), dtype=np.int32)
+    num_ancestors = 0
+    # All GO Terms up from the GO Terms in a layer are in earlier layers
+    for layer in get_topological_layers(csr_upper):
+        layer = np.sort(layer)
+        lowers, uppers = _get_edges(csr_upper, layer)
+        # Ancestors are the GO Terms one step up plus the ancestors of those GO Terms
+        lens = rowlen[uppers]
+        rows = np.concatenate([lowers, np.repeat(lowers, lens)]).astype(np.int64)
+        vals = np.concatenate([uppers, ancestors[_get_ranges(rowbeg[uppers], lens)]])
+        keys = _get_unique(rows * num_rows + vals)
+        cnts = np.bincount(keys // num_rows, minlength=num_rows)[layer]
+        rowlen[layer] = cnts
+        rowbeg[layer] = num_ancestors + np.cumsum(cnts) - cnts
+        if num_ancestors + keys.size > ancestors.size:
+            ancestors = np.resize(ancestors, max(2*ancestors.size, num_ancestors + keys.size))
+        ancestors[num_ancestors:num_ancestors + keys.size] = keys % num_rows
+        num_ancestors += keys.size
+    indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(rowlen, out=indptr[1:])
+    return Csr(indptr, ancestors[_get_ranges(rowbeg, rowlen)])
+
+def get_csr_updated(csr, num_rows, idx2row):
+    """Get a copy of a table with more rows, replacing the rows in idx2row."""
+    lens = np.zeros(num_rows, dtype=np.int64)
+    lens[:len(csr)] = np.diff(csr.indptr)
+    for idx, row in idx2row.items():
+        lens[idx] = row.size
+    indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(lens, out=indptr[1:])
+    indices = np.zeros(indptr[-1], dtype=np.int32)
+    # Copy each block of unchanged rows, then the next new row
+    idx_beg = 0
+    for idx in sorted(idx2row) + [num_rows]:
+        idx_end = min(idx, len(csr))
+        if idx_beg < idx_end:
+            indices[indptr[idx_beg]:indptr[idx_end]] = \
+                csr.indices[csr.indptr[idx_beg]:csr.indptr[idx_end]]
+        if idx != num_rows:
+            indices[indptr[idx]:indptr[idx+1]] = idx2row[idx]
+        idx_beg = idx + 1
+    return Csr(indptr, indices)
+
+def get_topological_layers(csr_upper):
+    """Get layers of GO Term indices, where GO Terms up from a layer are in earlier layers."""
+    num_rows = len(csr_upper)
+    csr_lower = csr_upper.get_transpose()
+    num_uppers = np.diff(csr_upper.indptr)
+    layer = np.flatnonzero(num_uppers == 0)
+    layers = []
+    num_seen = 0
+    while layer.size:
+        layers.append(layer)
+        num_seen += layer.size
+        _, lowers = _get_edges(csr_lower, layer)
+        num_uppers -= np.bincount(lowers, minlength=num_rows)
+        lowers = np.unique(lowers)
+        layer = lowers[num_uppers[lowers] == 0]
+    if num_seen != num_rows:
+        raise RuntimeError("CYCLE FOUND IN GO DAG: {N} OF {M} GO TERMS ARE IN A CYCLE".format(
+            N=num_rows - num_seen, M=num_rows))
+    return layers
+
+def _get_edges(csr, rows):
+    """Get the (row, index) pairs stored in the selected rows."""
+    starts = csr.indptr[rows]
+    cnts = csr.indptr[rows + 1] - starts
+    return np.repeat(rows, cnts), csr.indices[_get_ranges(starts, cnts)]
+
+def _get_ranges(starts, lens):
+    """Concatenate the integer ranges, [start, start+len), into one array."""
+    lens = np.asarray(lens, dtype=np.int64)
+    ends = np.cumsum(lens)
+    return np.repeat(np.asarray(starts, dtype=np.int64) - ends + lens, lens) + \
+           np.arange(ends[-1] if lens.size else 0, dtype=np.int64)
+
+def _get_unique(vals):
+    """Sort the values and remove duplicates."""
+    vals.sort()
+    if vals.size:
+        vals = vals[np.concatenate([[True], vals[1:] != vals[:-1]])]
+    return vals
+
+def _get_idxset(idx2set, csr, idx):
+    """Get the set of indices in one row of a table, creating it on first use."""
+    idxset = idx2set.get(idx)
+    if idxset is None:
+        idxset = idx2set[idx] = frozenset(csr.get_row(idx).tolist())
+    return idxset
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,90 @@
+"""Set level, depth, and reldepth of all items in a DAG in one topological pass.
+
+    level:    Shortest distance from a root item, through is_a
+    depth:    Longest distance from a root item, through is_a
+    reldepth: Longest distance from a root item, through is_a and all relationships
+
+    Items are visited so that each item is visited after all items above it, so
+    the values for each item are computed once from the values of the items above
+    it. No recursion is used, so very deep DAGs do not reach the recursion limit.
+
+        >>> id2level, id2depth = get_id2level_depth({'B':{'A'}, 'C':{'A', 'B'}})
+        >>> id2level
+        {'A': 0, 'B': 1, 'C': 1}
+        >>> id2depth
+        {'A': 0, 'B': 1, 'C': 2}
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+
+def get_id2level_depth(id2parents):
+    """Get the level and depth of all items, given the set of parent IDs of each item."""
+    id2level = {}
+    id2depth = {}
+    for item_id in get_topological_order(id2parents):
+        parents = id2parents.get(item_id)
+        if parents:
+            id2level[item_id] = min([id2level[p] for p in parents]) + 1
+            id2depth[item_id] = max([id2depth[p] for p in parents]) + 1
+        else:
+            id2level[item_id] = 0
+            id2depth[item_id] = 0
+    return id2level, id2depth
+
+def set_level_depth(goterms, has_relationship=False):
+    """Set level and depth, and reldepth if relationships are loaded, on all GO Terms.
+
+       GO Terms above the GO Terms given, but not given, keep their values.
+    """
+    if not has_relationship:
+        rec2uppers = {rec:rec.parents for rec in goterms}
+    else:
+        # Parents are a subset of the GO Terms above a GO Term through is_a and all relationships
+        rec2uppers = {rec:rec.get_goterms_upper() for rec in goterms}
+    for rec in get_topological_order(rec2uppers):
+        if rec not in rec2uppers:
+            continue
+        parents = rec.parents
+        if parents:
+            rec.level = min([o.level for o in parents]) + 1
+            rec.depth = max([o.depth for o in parents]) + 1
+        else:
+            rec.level = 0
+            rec.depth = 0
+        if has_relationship:
+            uppers = rec2uppers[rec]
+            rec.reldepth = max([o.reldepth for o in uppers]) + 1 if uppers else 0
+
+def get_topological_order(item2uppers):
+    """Get all items, ordered so each item follows all items above it.
+
+       Items found only in the sets of upper items are treated as root items.
+    """
+    ordered = []
+    seen = set()
+    done = set()
+    for item_top in item2uppers:
+        if item_top in done:
+            continue
+        # Depth-first search, using a stack rather than recursion
+        stack = [(item_top, iter(item2uppers[item_top]))]
+        seen.add(item_top)
+        while stack:
+            item, uppers = stack[-1]
+            for upper in uppers:
+                if upper not in seen:
+                    seen.add(upper)
+                    stack.append((upper, iter(item2uppers.get(upper, ()))))
+                    break
+                if upper not in done:
+                    raise RuntimeError("CYCLE FOUND IN DAG AT: {ITEM}".format(ITEM=upper))
+            else:
+                stack.pop()
+                done.add(item)
+                ordered.append(item)
+    return ordered
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
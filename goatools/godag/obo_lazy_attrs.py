@@ -0,0 +1,209 @@
+"""Load optional GO Term attributes from the obo file on first access.
+
+    The GODag is loaded as fast as when no optional attributes are requested.
+    The first time an optional attribute is accessed on a GO Term, all lazy
+    optional attributes for that GO Term are read from its [Term] stanza, found
+    by seeking to the stanza's byte offset in the obo file.
+
+    The relationship attributes (relationship, relationship_rev, and reldepth)
+    link GO Terms to each other, so they are loaded for all GO Terms at once.
+
+        >>> godag = GODag("go-basic.obo", lazy_attrs={'def', 'synonym', 'relationship'})
+        >>> godag['GO:0008150'].defn              # Reads one [Term] stanza
+        >>> godag['GO:0008150'].relationship_rev  # Reads relationships for all GO Terms
+        >>> godag.load_optional_attrs()           # Reads the rest in one pass
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+import re
+from goatools.obo_parser import GOTerm
+from goatools.godag.obo_optional_attributes import OboOptionalAttrs
+from goatools.godag.level_depth import set_level_depth
+from goatools.godag.obo_reader_mmap import get_mmap
+
+
+class OboLazyAttrs(object):
+    """Load optional GO Term attributes from the obo file on first access."""
+
+    # Attributes set on a GO Term when each optional obo field is loaded
+    attr2names = {
+        'def': {'defn'},
+        'relationship': {'relationship', 'relationship_rev', 'reldepth'},
+    }
+
+    def __init__(self, obo_file, godag, optional_attrs, goid2offset=None):
+        self.obo_file = obo_file
+        self.godag = godag
+        self.optional_attrs = optional_attrs
+        self.attrnames = set(n for a in optional_attrs for n in self.attr2names.get(a, {a}))
+        # GO Term attributes are loaded one GO Term at a time
+        attrs_term = optional_attrs.difference({'relationship'})
+        self.optobj_term = OboOptionalAttrs(attrs_term) if attrs_term else None
+        # Relationships are loaded for all GO Terms at once
+        self.load_relationship = 'relationship' in optional_attrs
+        # Byte offset of each [Term] stanza, saved by the obo reader when parsing the obo file
+        self.goid2offset = goid2offset
+        self.goids_loaded = set()
+        # The obo file is opened and memory-mapped on the first load and closed after the last
+        self.ifstrm = None
+        self.data = None
+        # GO Terms are lazy until all optional attributes are loaded
+        goterms = self._get_goterms()
+        self.num_goterms = len(goterms)
+        for rec in goterms:
+            rec.__class__ = LazyGOTerm
+
+    def __getstate__(self):
+        # An open file and its memory map are not pickled. They are reopened on the next load
+        state = dict(self.__dict__)
+        state['ifstrm'] = None
+        state['data'] = None
+        # The optional attribute parser holds local functions. It is created again when unpickled
+        state['optobj_term'] = self.optobj_term is not None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        attrs_term = self.optional_attrs.difference({'relationship'})
+        self.optobj_term = OboOptionalAttrs(attrs_term) if self.optobj_term else None
+
+    def load_attr(self, goterm, attrname):
+        """Load an optional attribute on first access. Return False if it is not lazy."""
+        if attrname not in self.attrnames:
+            return False
+        if attrname[:3] == 'rel':
+            if self.load_relationship:
+                self.load_relationships()
+        elif goterm.item_id not in self.goids_loaded:
+            self.load_goterm(goterm)
+        return True
+
+    def load_goterm(self, goterm):
+        """Load optional attributes, other than relationships, for one GO Term."""
+        goid = goterm.item_id
+        self.goids_loaded.add(goid)
+        if self.optobj_term is None:
+            return
+        stanza = _get_stanza(self._get_data(), self.get_goid2offset()[goid])
+        self._update_rec(self.optobj_term, goterm, stanza)
+        self._chk_done()
+
+    def load_all(self):
+        """Load all lazy optional attributes on all GO Terms in one pass through the obo file."""
+        recs = [o for o in self._get_goterms() if o.item_id not in self.goids_loaded]
+        if self.optobj_term is not None and recs:
+            goid2offset = self.get_goid2offset()
+            data = self._get_data()
+            for rec in recs:
+                self.goids_loaded.add(rec.item_id)
+                self._update_rec(self.optobj_term, rec, _get_stanza(data, goid2offset[rec.item_id]))
+        self.goids_loaded.update(o.item_id for o in recs)
+        if self.load_relationship:
+            self.load_relationships()
+        self._chk_done()
+
+    def load_relationships(self):
+        """Load relationships for all GO Terms, link them, and set reldepth."""
+        self.load_relationship = False
+        optobj = OboOptionalAttrs({'relationship'})
+        recs = self._get_goterms()
+        for rec in recs:
+            optobj.init_datamembers(rec)
+        goid2offset = self.get_goid2offset()
+        data = self._get_data()
+        for rec in recs:
+            stanza = _get_stanza(data, goid2offset[rec.item_id])
+            for line in stanza.splitlines():
+                if line[:14] == "relationship: ":
+                    optobj.update_rec(rec, line.rstrip())
+        # pylint: disable=protected-access
+        for rec in recs:
+            self.godag._populate_relationships(rec)
+        set_level_depth(recs, has_relationship=True)
+        self._chk_done()
+
+    def get_goid2offset(self):
+        """Get the byte offset of every [Term] stanza. Find them if the obo file was not parsed."""
+        if self.goid2offset is None:
+            self.goid2offset = get_goid2offset(self._get_data())
+        return self.goid2offset
+
+    def close(self):
+        """Close the obo file"""
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        if self.ifstrm is not None:
+            self.ifstrm.close()
+            self.ifstrm = None
+
+    def _get_data(self):
+        """Get the memory-mapped obo file, kept open for all loads."""
+        if self.data is None:
+            self.ifstrm = open(self.obo_file, 'rb')
+            self.data = get_mmap(self.ifstrm)
+        return self.data
+
+    def _get_goterms(self):
+        """Get all GO Terms in the GODag, without the duplicates for alternate GO IDs."""
+        return [o for goid, o in self.godag.items() if goid == o.item_id]
+
+    def _chk_done(self):
+        """When all optional attributes are loaded, GO Terms are no longer lazy."""
+        if self.load_relationship:
+            return
+        if self.optobj_term is not None and len(self.goids_loaded) < self.num_goterms:
+            return
+        for rec in self._get_goterms():
+            rec.__class__ = GOTerm
+        self.close()
+
+    @staticmethod
+    def _update_rec(optobj, rec, stanza):
+        """Set optional attributes on a GO Term, given the text of its [Term] stanza."""
+        optobj.init_datamembers(rec)
+        for line in stanza.splitlines():
+            line = line.rstrip()
+            if ':' in line:
+                optobj.update_rec(rec, line)
+
+
+class LazyGOTerm(GOTerm):
+    """A GO Term which loads lazy optional attributes on first access."""
+
+    __slots__ = ()
+
+    def __getattr__(self, attrname):
+        """Called only if the attribute is not found. Load it, if it is a lazy attribute."""
+        # The GODag holding this GO Term has the OboLazyAttrs which loads its attributes
+        if attrname != '_godag' and self._godag.lazyattrs.load_attr(self, attrname):
+            if attrname in self.__dict__:
+                return self.__dict__[attrname]
+        raise AttributeError(attrname)
+
+    def __reduce__(self):
+        # Unlike a GOTerm, a LazyGOTerm is pickled with its GODag, which loads its lazy attributes
+        return (_new_lazy_goterm, (), (self.__dict__, {'_godag':getattr(self, '_godag', None)}))
+
+
+def _new_lazy_goterm():
+    """Create an empty LazyGOTerm, whose state is then set by unpickling"""
+    return LazyGOTerm.__new__(LazyGOTerm)
+
+# The blank line or the header of the next stanza which ends a stanza
+STANZA_END = re.compile(br'\n[ \t\r]*\n|\n\[')
+
+def get_goid2offset(data):
+    """Get the byte offset of every [Term] stanza in the bytes of an obo file."""
+    cmpd = re.compile(br'^\[Term\][ \t\r]*\n(?:[^\n]*\n)*?id: ([^\s!]+)', re.M)
+    return {m.group(1).decode('utf-8'):m.start() for m in cmpd.finditer(data)}
+
+def _get_stanza(data, beg):
+    """Get one stanza, starting at the beginning offset, as text."""
+    mtch = STANZA_END.search(data, beg + 1)
+    return data[beg:mtch.start() if mtch else len(data)].decode('utf-8')
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
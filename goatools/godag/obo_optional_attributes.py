@@ -6,6 +6,9 @@ __author__ = "DV Klopfenstein"
 import re
 import collections as cx
 
+# Defined in the module, so GO Terms holding synonyms can be pickled, as in a GODag snapshot
+NtSynonym = cx.namedtuple("NtSynonym", "text scope typename dbxrefs")
+
 
 class OboOptionalAttrs:
     """Manage optional GO-DAG attributes."""
@@ -83,7 +86,7 @@ class OboOptionalAttrs:
             ntd = fnc_updaterec.ntobj._make([text, scope, typename, dbxrefs])
             rec.synonym.append(ntd)
         fnc_updaterec.cmpd = re.compile(r'"(\S.*\S)" ([A-Z]+) (.*)\[(.*)\](.*)$')
-        fnc_updaterec.ntobj = cx.namedtuple("synonym", "text scope typename dbxrefs")
+        fnc_updaterec.ntobj = NtSynonym
         return fnc_chkline, fnc_updaterec
 
     @staticmethod
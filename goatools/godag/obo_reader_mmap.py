@@ -0,0 +1,150 @@
+"""Read an obo file using a memory map, decoding only the fields which are stored.
+
+    OBOReader decodes every line to a str and checks it against each field name.
+    OboReaderMmap splits the memory-mapped obo file into stanzas on the blank
+    lines and stanza headers, then splits each field name from its value as
+    bytes. Only the values of stored fields are decoded. Lines of optional
+    attributes which were not requested are never decoded.
+
+    The GO Terms and Typedefs are the same as those created by OBOReader.
+
+        >>> godag = GODag("go-basic.obo", reader='mmap')
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+import re
+import mmap
+from goatools.obo_parser import OBOReader
+from goatools.obo_parser import GOTerm
+from goatools.godag.typedef import TypeDef
+from goatools.godag.typedef import add_to_typedef
+
+
+class OboReaderMmap(OBOReader):
+    """Read an obo file using a memory map, decoding only the fields which are stored."""
+
+    # The blank line which ends a stanza
+    blank_line = re.compile(br'\n[ \t\r\f\v]*\n')
+
+    def __init__(self, obo_file="go-basic.obo", optional_attrs=None):
+        super(OboReaderMmap, self).__init__(obo_file, optional_attrs)
+        # Names of the optional fields to decode. Ex: b'def', b'synonym'
+        optobj = self.optobj
+        self.optflds = set(a.encode() for a in optobj.optional_attrs) if optobj else set()
+
+    def __iter__(self):
+        """Return one GO Term record at a time from an obo file."""
+        with open(self.obo_file, 'rb') as ifstrm:
+            data = get_mmap(ifstrm)
+            try:
+                for rec in self._iter_goterms(data):
+                    yield rec
+            finally:
+                data.close()
+
+    def _iter_goterms(self, data):
+        """Return one GO Term record at a time from obo file data."""
+        pos = self._init_header(data)
+        for rec in self._iter_stanzas(data, pos, len(data)):
+            yield rec
+
+    def _iter_stanzas(self, data, pos, pos_end):
+        """Return GO Terms and save Typedefs in stanzas with headers from pos up to pos_end."""
+        blank_line = self.blank_line
+        while pos != -1 and pos < pos_end:
+            # pos is the first character of a stanza header, like [Term]
+            hdr_end = data.find(b'\n', pos)
+            if hdr_end == -1:
+                return
+            mtch = blank_line.search(data, hdr_end)
+            end = mtch.start() if mtch else len(data)
+            header = data[pos:pos+9].lower()
+            if header[:6] == b"[term]":
+                rec = self._get_goterm(data[hdr_end+1:end])
+                if self.goid2offset is not None:
+                    self.goid2offset[rec.item_id] = pos
+                yield rec
+            elif header == b"[typedef]" and mtch:
+                # As in OBOReader, a Typedef is saved when a blank line ends its stanza
+                typedef = self._get_typedef(data[hdr_end+1:end])
+                self.typedefs[typedef.item_id] = typedef
+            pos = find_header(data, end)
+
+    def _init_header(self, data):
+        """Save the obo format-version and data-version. Return the position of the first stanza."""
+        pos = find_header(data, 0)
+        header = data[:pos if pos != -1 else len(data)]
+        # Lines end in a newline, as when reading a file in text mode
+        for line in header.decode('utf-8').replace('\r\n', '\n').splitlines(True):
+            if self.data_version is None:
+                self._init_obo_version(line)
+        return pos
+
+    def _get_goterm(self, stanza):
+        """Create a GO Term from the field lines of a [Term] stanza."""
+        rec = GOTerm()
+        optobj = self.optobj
+        optflds = self.optflds
+        if optobj:
+            optobj.init_datamembers(rec)
+        for line in stanza.split(b'\n'):
+            fld, sep, val = line.partition(b': ')
+            if not sep:
+                continue
+            if fld == b'is_a':
+                rec._parents.add(val.split()[0].decode('utf-8'))
+            elif fld == b'id':
+                assert not rec.item_id
+                item_id = val.decode('utf-8').rstrip()
+                rec.item_id = item_id
+                rec.id = item_id
+            elif fld == b'name':
+                assert not rec.name
+                rec.name = val.decode('utf-8').rstrip()
+            elif fld == b'namespace':
+                assert not rec.namespace
+                rec.namespace = val.decode('utf-8').rstrip()
+            elif fld == b'alt_id':
+                rec.alt_ids.add(val.decode('utf-8').rstrip())
+            elif fld == b'is_obsolete' and val.rstrip() == b'true':
+                rec.is_obsolete = True
+            elif fld in optflds:
+                optobj.update_rec(rec, line.decode('utf-8').rstrip())
+        return rec
+
+    @staticmethod
+    def _get_typedef(stanza):
+        """Create a Typedef from the field lines of a [Typedef] stanza."""
+        typedef = TypeDef()
+        for line in stanza.decode('utf-8').split('\n'):
+            line = line.rstrip()
+            if line:
+                add_to_typedef(typedef, line)
+        return typedef
+
+
+def get_mmap(ifstrm):
+    """Memory-map an open file. An empty file cannot be memory-mapped."""
+    try:
+        return mmap.mmap(ifstrm.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        return _EmptyData()
+
+def find_header(data, pos):
+    """Find the next stanza header, which starts a line with '['."""
+    if pos == 0 and data[:1] == b'[':
+        return 0
+    pos = data.find(b'\n[', pos)
+    return pos + 1 if pos != -1 else -1
+
+
+class _EmptyData(bytes):
+    """The contents of an empty file, which can be closed like a memory map."""
+
+    def close(self):
+        """Nothing to close."""
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,140 @@
+"""Read a large obo file by parsing stanza-aligned chunks in a pool of processes.
+
+    The obo file is split into chunks of about the same size, each starting at a
+    stanza header. Each worker process parses the stanzas in one chunk using the
+    memory-mapped reader and returns compact records: tuples of GO Term values.
+    The main process creates GO Terms from the records, in the order found in the
+    obo file, so the GODag is the same as one read by a single process.
+
+        >>> godag = GODag("go.obo", optional_attrs=OPTATTRS, reader='parallel', processes=8)
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from goatools.obo_parser import GOTerm
+from goatools.godag.obo_reader_mmap import OboReaderMmap
+from goatools.godag.obo_reader_mmap import get_mmap
+from goatools.godag.obo_reader_mmap import find_header
+
+
+class OboReaderParallel(OboReaderMmap):
+    """Read a large obo file by parsing stanza-aligned chunks in a pool of processes."""
+
+    # Each process parses about this many chunks, so processes finish at about the same time
+    chunks_per_process = 4
+
+    def __init__(self, obo_file="go-basic.obo", optional_attrs=None, processes=None):
+        super(OboReaderParallel, self).__init__(obo_file, optional_attrs)
+        self.optional_attrs = optional_attrs
+        self.processes = processes if processes else os.cpu_count()
+        # Optional data members stored in each compact record
+        self.attrnames = _get_attrnames(self.optobj)
+
+    def __iter__(self):
+        """Return one GO Term record at a time from an obo file."""
+        if self.processes == 1:
+            for rec in super(OboReaderParallel, self).__iter__():
+                yield rec
+            return
+        with open(self.obo_file, 'rb') as ifstrm:
+            data = get_mmap(ifstrm)
+            try:
+                pos = self._init_header(data)
+                chunks = get_chunks(data, pos, self.processes*self.chunks_per_process)
+            finally:
+                data.close()
+        offsets = self.goid2offset is not None
+        args = [(self.obo_file, self.optional_attrs, beg, end, offsets) for beg, end in chunks]
+        if len(args) < 2:
+            results = map(read_chunk, args)
+            for rec in self._iter_goterms_results(results):
+                yield rec
+            return
+        with ProcessPoolExecutor(self.processes) as executor:
+            # Results are returned in chunk order, so the GO Terms are in file order
+            for rec in self._iter_goterms_results(executor.map(read_chunk, args)):
+                yield rec
+
+    def _iter_goterms_results(self, results):
+        """Return GO Terms created from compact records. Save Typedefs and [Term] offsets."""
+        optobj = self.optobj
+        attrnames = self.attrnames
+        for records, typedefs, goid2offset in results:
+            if goid2offset is not None:
+                self.goid2offset.update(goid2offset)
+            for item_id, name, namespace, is_obsolete, alt_ids, parents, optvals in records:
+                rec = GOTerm()
+                if optobj:
+                    optobj.init_datamembers(rec)
+                rec.item_id = item_id
+                rec.id = item_id
+                rec.name = name
+                rec.namespace = namespace
+                rec.is_obsolete = is_obsolete
+                rec.alt_ids = set(alt_ids)
+                rec._parents = set(parents)
+                for attrname, val in zip(attrnames, optvals):
+                    if val is not None:
+                        setattr(rec, attrname, val)
+                yield rec
+            for typedef in typedefs:
+                self.typedefs[typedef.item_id] = typedef
+
+
+def get_chunks(data, pos, num_chunks):
+    """Split obo data, starting at pos, into byte ranges starting at stanza headers."""
+    chunks = []
+    if pos == -1:
+        return chunks
+    size = max((len(data) - pos)//num_chunks, 1)
+    while pos != -1:
+        end = find_header(data, pos + size) if pos + size < len(data) else -1
+        chunks.append((pos, end if end != -1 else len(data)))
+        pos = end
+    return chunks
+
+def read_chunk(args):
+    """Parse the stanzas in one chunk of an obo file. Return compact records, Typedefs, and offsets."""
+    obo_file, optional_attrs, beg, end, offsets = args
+    reader = _OboReaderChunk(obo_file, optional_attrs)
+    if offsets:
+        reader.goid2offset = {}
+    attrnames = _get_attrnames(reader.optobj)
+    records = []
+    with open(obo_file, 'rb') as ifstrm:
+        data = get_mmap(ifstrm)
+        try:
+            for rec in reader._iter_stanzas(data, beg, end):  # pylint: disable=protected-access
+                records.append((
+                    rec.item_id, rec.name, rec.namespace, rec.is_obsolete,
+                    tuple(rec.alt_ids), tuple(rec._parents),  # pylint: disable=protected-access
+                    tuple(getattr(rec, a, None) for a in attrnames)))
+        finally:
+            data.close()
+    return records, list(reader.typedefs.values()), reader.goid2offset
+
+class _OboReaderChunk(OboReaderMmap):
+    """Read GO Terms in a worker process, keeping alt_ids in the order found in the obo file."""
+
+    alt_id = re.compile(br'^alt_id: ([^\n]*)', re.M)
+
+    def _get_goterm(self, stanza):
+        """Create a GO Term. Alt IDs are a list, so the main process adds them in file order."""
+        rec = super(_OboReaderChunk, self)._get_goterm(stanza)
+        if len(rec.alt_ids) > 1:
+            # The order of a set of strings can depend on the order the strings were added
+            rec.alt_ids = [v.decode('utf-8').rstrip() for v in self.alt_id.findall(stanza)]
+        return rec
+
+def _get_attrnames(optobj):
+    """Get the names of the GO Term data members which hold optional attributes."""
+    if optobj is None:
+        return []
+    return sorted(a if a != 'def' else 'defn' for a in optobj.optional_attrs)
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,236 @@
+"""Update a GO DAG in place from a new obo release. Return the differences.
+
+    The GO Terms in the new obo file are compared to the GO Terms in the GO DAG:
+
+        added:      GO IDs of GO Terms which are new in the release
+        obsoleted:  GO IDs of GO Terms which are obsolete in the release, but were not
+        removed:    GO IDs of GO Terms which are not in the release at all
+        renamed:    GO ID -> (old name, new name)
+        reparented: GO ID -> (old is_a parent GO IDs, new is_a parent GO IDs)
+        relinked:   GO ID -> (old relationships, new relationships), if relationships are loaded
+        alt_ids:    GO ID -> (old alt GO IDs, new alt GO IDs). Alt GO IDs of removed GO Terms are removed
+        modified:   GO IDs of GO Terms with any other changed attribute, like namespace or defn
+
+    Only the changed GO Terms are updated, keeping the same GOTerm objects.
+    Level, depth, and reldepth are set again only on GO Terms whose parents changed
+    and the GO Terms below them. The GoClosures attached to the GO DAG recompute
+    the ancestors of those same GO Terms.
+
+        >>> diff = godag.apply_release("go-basic.2024-01.obo")
+        >>> diff.prt_summary()
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+import sys
+from goatools.godag.level_depth import set_level_depth
+
+# GO Term data members which are compared separately or which are set from the GO DAG
+STRUCTURAL = {'id', 'item_id', 'name', 'is_obsolete', 'alt_ids', '_parents', 'parents', 'children',
+              'level', 'depth', 'reldepth', 'relationship', 'relationship_rev'}
+
+
+class GoDagDiff(object):
+    """Differences between the GO Terms in a GO DAG and those in a new obo release."""
+
+    def __init__(self, data_version_old, data_version_new):
+        self.data_versions = (data_version_old, data_version_new)
+        self.added = set()
+        self.obsoleted = set()
+        self.removed = set()
+        self.renamed = {}
+        self.reparented = {}
+        self.relinked = {}
+        self.alt_ids = {}
+        self.modified = set()
+        # GO IDs whose ancestors, level, or depth may have changed. Set when the diff is applied
+        self.affected = set()
+
+    def get_goids_changed(self):
+        """Get the GO IDs of all GO Terms that were added, removed, or changed."""
+        return self.added.union(self.obsoleted, self.removed, self.renamed, self.reparented,
+                                self.relinked, self.alt_ids, self.modified)
+
+    def get_goids_removed(self, load_obsolete):
+        """Get the GO IDs of GO Terms removed from the GO DAG."""
+        return self.removed if load_obsolete else self.removed.union(self.obsoleted)
+
+    def get_goids_moved(self):
+        """Get the GO IDs of GO Terms with new GO Terms one step up."""
+        return self.added.union(self.reparented, self.relinked)
+
+    def prt_summary(self, prt=sys.stdout):
+        """Print the number of GO Terms in each category of changes."""
+        prt.write('GO DAG RELEASE {A} -> {B}\n'.format(A=self.data_versions[0], B=self.data_versions[1]))
+        for name in ['added', 'obsoleted', 'removed', 'renamed', 'reparented', 'relinked',
+                     'alt_ids', 'modified', 'affected']:
+            prt.write('{N:8,} {NAME}\n'.format(N=len(getattr(self, name)), NAME=name))
+
+
+def apply_release(godag, reader, prt=sys.stdout):
+    """Update the GO DAG in place from a new obo release. Return a GoDagDiff."""
+    id2rec = {rec.item_id:rec for rec in reader}
+    diff = GoDagDiff(godag.data_version, reader.data_version)
+    has_relationship = godag.optional_attrs is not None and 'relationship' in godag.optional_attrs
+    _init_diff(diff, godag, id2rec, has_relationship)
+    _apply_diff(diff, godag, id2rec, has_relationship)
+    for closure in godag.closures.values():
+        closure.apply_diff(godag, diff)
+    godag.typedefs = reader.typedefs
+    godag.version = godag._str_desc(reader)  # pylint: disable=protected-access
+    godag.data_version = reader.data_version
+    if prt:
+        diff.prt_summary(prt)
+    return diff
+
+def _init_diff(diff, godag, id2rec, has_relationship):
+    """Find the GO Terms which were added, removed, or changed in the new release."""
+    load_obsolete = godag.load_obsolete
+    id2old = {goid:rec for goid, rec in godag.items() if goid == rec.item_id}
+    diff.removed = set(id2old).difference(id2rec)
+    for goid in diff.removed:
+        if id2old[goid].alt_ids:
+            diff.alt_ids[goid] = (id2old[goid].alt_ids, set())
+    for goid, rec in id2rec.items():
+        old = id2old.get(goid)
+        if old is None:
+            if load_obsolete or not rec.is_obsolete:
+                diff.added.add(goid)
+            continue
+        if rec.is_obsolete and not old.is_obsolete:
+            diff.obsoleted.add(goid)
+            if not load_obsolete:
+                if old.alt_ids:
+                    diff.alt_ids[goid] = (old.alt_ids, set())
+                continue
+        if rec.name != old.name:
+            diff.renamed[goid] = (old.name, rec.name)
+        parents_old = set(o.item_id for o in old.parents)
+        if rec._parents != parents_old:  # pylint: disable=protected-access
+            diff.reparented[goid] = (parents_old, rec._parents)  # pylint: disable=protected-access
+        if has_relationship:
+            rels_old = {r:set(o.item_id for o in recs) for r, recs in old.relationship.items()}
+            if rec.relationship != rels_old:
+                diff.relinked[goid] = (rels_old, rec.relationship)
+        if rec.alt_ids != old.alt_ids:
+            diff.alt_ids[goid] = (old.alt_ids, rec.alt_ids)
+        # A GO Term which is no longer obsolete is modified
+        if old.is_obsolete and not rec.is_obsolete or _has_attrs_changed(rec, old):
+            diff.modified.add(goid)
+
+def _apply_diff(diff, godag, id2rec, has_relationship):
+    """Update the changed GO Terms in the GO DAG. Set level and depth below moved GO Terms."""
+    # Remove GO Terms which are no longer in the GO DAG
+    goids_removed = diff.get_goids_removed(godag.load_obsolete)
+    for goid in goids_removed:
+        _remove_goterm(godag, godag[goid], has_relationship)
+    # Add new GO Terms. Relationships are GO IDs in the new release, then GO Terms when linked
+    goid2rels = {go:id2rec[go].relationship for go in diff.added.union(diff.relinked)} \
+        if has_relationship else {}
+    for goid in diff.added:
+        rec = id2rec[goid]
+        godag[goid] = rec
+        godag.set_goterms_godag([rec])
+        for goid_alt in rec.alt_ids:
+            godag[goid_alt] = rec
+        if has_relationship:
+            rec.relationship = {}
+    # Update GO Terms, keeping the same GOTerm objects
+    for goid in set(diff.alt_ids).difference(goids_removed):
+        rec = godag[goid]
+        for goid_alt in rec.alt_ids:
+            if godag.get(goid_alt) is rec:
+                del godag[goid_alt]
+        rec.alt_ids = id2rec[goid].alt_ids
+        for goid_alt in rec.alt_ids:
+            godag[goid_alt] = rec
+    for goid, (_, name) in diff.renamed.items():
+        godag[goid].name = name
+    for goid in diff.modified.union(diff.obsoleted).difference(goids_removed):
+        _set_attrs(godag[goid], id2rec[goid])
+    # Link GO Terms with new parents and relationships
+    for goid in diff.added.union(diff.reparented):
+        _set_parents(godag, godag[goid], id2rec[goid]._parents)  # pylint: disable=protected-access
+    if has_relationship:
+        for goid in diff.added.union(diff.relinked):
+            _set_relationships(godag, godag[goid], goid2rels[goid])
+    # Set level and depth on the moved GO Terms and all GO Terms below them
+    goterms = _get_goterms_below([godag[go] for go in diff.get_goids_moved()], has_relationship)
+    set_level_depth(goterms, has_relationship)
+    diff.affected = set(o.item_id for o in goterms)
+
+def _remove_goterm(godag, rec, has_relationship):
+    """Remove a GO Term and its alt GO IDs from the GO DAG. Unlink it from other GO Terms."""
+    for goid in [rec.item_id] + list(rec.alt_ids):
+        if godag.get(goid) is rec:
+            del godag[goid]
+    for parent in rec.parents:
+        parent.children.discard(rec)
+    for child in rec.children:
+        child.parents.discard(rec)
+    if has_relationship:
+        _set_relationships(godag, rec, {})
+        for reltype, lowers in rec.relationship_rev.items():
+            for lower in lowers:
+                lower.relationship.get(reltype, set()).discard(rec)
+
+def _set_parents(godag, rec, parent_goids):
+    """Set the is_a parents of a GO Term and the children of its old and new parents."""
+    for parent in rec.parents:
+        parent.children.discard(rec)
+    rec._parents = parent_goids  # pylint: disable=protected-access
+    rec.parents = set(godag[goid] for goid in parent_goids)
+    for parent in rec.parents:
+        parent.children.add(rec)
+
+def _set_relationships(godag, rec, relationship):
+    """Set the relationships of a GO Term and the reverse relationships of the related GO Terms."""
+    for reltype, uppers in rec.relationship.items():
+        for upper in uppers:
+            upper.relationship_rev.get(reltype, set()).discard(rec)
+            if not upper.relationship_rev.get(reltype, True):
+                del upper.relationship_rev[reltype]
+    rec.relationship = {r:set(godag[goid] for goid in goids) for r, goids in relationship.items()}
+    for reltype, uppers in rec.relationship.items():
+        for upper in uppers:
+            if reltype not in upper.relationship_rev:
+                upper.relationship_rev[reltype] = set([rec])
+            else:
+                upper.relationship_rev[reltype].add(rec)
+
+def _get_goterms_below(goterms, has_relationship):
+    """Get the GO Terms and all GO Terms below them."""
+    seen = set(goterms)
+    stack = list(goterms)
+    while stack:
+        rec = stack.pop()
+        for lower in rec.get_goterms_lower() if has_relationship else rec.children:
+            if lower not in seen:
+                seen.add(lower)
+                stack.append(lower)
+    return seen
+
+def _has_attrs_changed(rec, old):
+    """Return True if any GO Term attribute which is not compared separately has changed."""
+    vals = vars(rec)
+    vals_old = vars(old)
+    for attr, val in vals.items():
+        if attr not in STRUCTURAL and (attr not in vals_old or vals_old[attr] != val):
+            return True
+    return any(a not in vals for a in vals_old if a not in STRUCTURAL)
+
+def _get_attrs(rec):
+    """Get GO Term attributes which are not compared separately."""
+    return {k:v for k, v in vars(rec).items() if k not in STRUCTURAL}
+
+def _set_attrs(rec, rec_new):
+    """Copy GO Term attributes which are not compared separately from the new release."""
+    for attr in set(_get_attrs(rec)).difference(_get_attrs(rec_new)):
+        delattr(rec, attr)
+    for attr, val in _get_attrs(rec_new).items():
+        setattr(rec, attr, val)
+    rec.is_obsolete = rec_new.is_obsolete
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
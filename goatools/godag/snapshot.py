@@ -0,0 +1,248 @@
+"""Save and load a binary snapshot of a parsed GO DAG.
+
+    Parsing go-basic.obo line-by-line is the main start-up cost for programs
+    that load the GO DAG. A snapshot stores the parsed GO terms in integer-indexed
+    arrays so a fully linked GODag can be rebuilt without re-parsing the obo file.
+
+    A snapshot is keyed by the obo file's path, size, modification time, and
+    data-version, as well as the optional attributes and load_obsolete arguments
+    used to create the GODag. A stale or missing snapshot is ignored and rewritten.
+
+        >>> godag = GODag("go-basic.obo", cache=True)  # Writes go-basic.obo.snapshot
+        >>> godag = GODag("go-basic.obo", cache=True)  # Reads go-basic.obo.snapshot
+"""
+
+from __future__ import print_function
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+import os
+import sys
+import gc
+import pickle
+from array import array
+from goatools.obo_parser import GOTerm
+from goatools.godag.typedef import TypeDef
+
+
+class GoDagSnapshot(object):
+    """Save and load a binary snapshot of a parsed GO DAG."""
+
+    version = 2
+    suffix = '.snapshot'
+
+    def __init__(self, obo_file, cache=True, optional_attrs=None, load_obsolete=False):
+        self.obo_file = obo_file
+        self.fin_snapshot = obo_file + self.suffix if cache is True else cache
+        self.key = self._init_key(optional_attrs, load_obsolete)
+
+    def read(self, reader):
+        """Return the snapshot payload and update the reader. Return None if missing or stale."""
+        payload = self._read_payload()
+        if payload is not None:
+            reader.format_version = payload['format_version']
+            reader.data_version = payload['data_version']
+            reader.typedefs = _get_typedefs(payload['typedefs'])
+        return payload
+
+    def save(self, payload, prt=sys.stdout):
+        """Write the snapshot payload of a fully loaded GODag."""
+        fout_tmp = '{SNAPSHOT}.{PID}.tmp'.format(SNAPSHOT=self.fin_snapshot, PID=os.getpid())
+        try:
+            with open(fout_tmp, 'wb') as prt_snapshot:
+                pickle.dump(self.key, prt_snapshot, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(payload, prt_snapshot, pickle.HIGHEST_PROTOCOL)
+            # Replace atomically so concurrent readers never see a partial snapshot
+            os.replace(fout_tmp, self.fin_snapshot)
+        except (IOError, OSError) as err:
+            sys.stderr.write("**WARNING: COULD NOT WRITE SNAPSHOT({F}): {E}\n".format(
+                F=self.fin_snapshot, E=err))
+            if os.path.exists(fout_tmp):
+                os.remove(fout_tmp)
+            return
+        if prt:
+            prt.write('  WROTE: {SNAPSHOT}\n'.format(SNAPSHOT=self.fin_snapshot))
+
+    def _read_payload(self):
+        """Read the snapshot payload if the snapshot is current. Otherwise return None."""
+        if not os.path.exists(self.fin_snapshot):
+            return None
+        try:
+            with open(self.fin_snapshot, 'rb') as ifstrm:
+                if pickle.load(ifstrm) != self.key:
+                    return None
+                return pickle.load(ifstrm)
+        # A truncated or corrupt snapshot is treated as a stale snapshot
+        except Exception:  # pylint: disable=broad-except
+            return None
+
+    def _init_key(self, optional_attrs, load_obsolete):
+        """Get the values which must match for a snapshot to be current."""
+        fstat = os.stat(self.obo_file)
+        return (
+            self.version,
+            os.path.abspath(self.obo_file),
+            fstat.st_size,
+            fstat.st_mtime_ns,
+            get_data_version(self.obo_file),
+            tuple(sorted(optional_attrs)) if optional_attrs else (),
+            bool(load_obsolete))
+
+
+def get_data_version(obo_file):
+    """Read the data-version in the obo header, stopping at the first stanza."""
+    with open(obo_file) as ifstrm:
+        for line in ifstrm:
+            if line[:1] == '[':
+                return None
+            if line[:14] == "data-version: ":
+                return line[14:].rstrip()
+    return None
+
+def get_payload(godag, reader):
+    """Get integer-indexed lists and arrays storing all parsed GO DAG data."""
+    goterms = [o for goid, o in godag.items() if goid == o.item_id]
+    go2idx = {o.item_id:idx for idx, o in enumerate(goterms)}
+    namespaces = sorted(set(o.namespace for o in goterms))
+    ns2idx = {ns:idx for idx, ns in enumerate(namespaces)}
+    optobj = reader.optobj
+    optional_attrs = optobj.optional_attrs if optobj is not None else set()
+    has_relationship = 'relationship' in optional_attrs
+    return {
+        'optional_attrs': sorted(optional_attrs),
+        'format_version': reader.format_version,
+        'data_version': reader.data_version,
+        'typedefs': {k:vars(o) for k, o in reader.typedefs.items()},
+        'goids': [o.item_id for o in goterms],
+        'names': [o.name for o in goterms],
+        'namespaces': namespaces,
+        'nsidxs': array('H', [ns2idx[o.namespace] for o in goterms]),
+        'obsolete': array('i', [i for i, o in enumerate(goterms) if o.is_obsolete]),
+        'parents': _get_csr(go2idx, [o.parents for o in goterms]),
+        'relationship': _get_csr_relationship(go2idx, goterms) if has_relationship else {},
+        'alt_ids': [tuple(o.alt_ids) for o in goterms],
+        'altgo2idx': [(goid, go2idx[o.item_id]) for goid, o in godag.items() if goid != o.item_id],
+        'level': array('i', [o.level for o in goterms]),
+        'depth': array('i', [o.depth for o in goterms]),
+        'reldepth': array('i', [getattr(o, 'reldepth', -1) for o in goterms]),
+        'optattrs': _get_optattrs(goterms, optobj),
+    }
+
+def _get_csr(go2idx, objsets):
+    """Store sets of GO Terms as a CSR-style index pointer array and index array."""
+    indptr = array('i', [0])
+    indices = array('i')
+    for objs in objsets:
+        indices.extend(sorted(go2idx[o.item_id] for o in objs))
+        indptr.append(len(indices))
+    return indptr, indices
+
+def _get_csr_relationship(go2idx, goterms):
+    """Store the GO Terms in each relationship type as a CSR-style table."""
+    rels = sorted(set(r for o in goterms for r in o.relationship))
+    return {r:_get_csr(go2idx, [o.relationship.get(r, ()) for o in goterms]) for r in rels}
+
+def _get_optattrs(goterms, optobj):
+    """Get optional attribute values, other than relationship, stored on each GO Term."""
+    attr2vals = {}
+    if optobj is None:
+        return attr2vals
+    for attr in optobj.optional_attrs.difference({'relationship'}):
+        attrname = attr if attr != 'def' else 'defn'
+        attr2vals[attrname] = [getattr(o, attrname, None) for o in goterms]
+    return attr2vals
+
+def _get_typedefs(typedef2dct):
+    """Create TypeDef objects from their saved attributes."""
+    typedefs = {}
+    for typedef_id, dct in typedef2dct.items():
+        obj = TypeDef()
+        obj.__dict__.update(dct)
+        typedefs[typedef_id] = obj
+    return typedefs
+
+def load_godag(godag, payload):
+    """Create linked GO Terms from the snapshot payload and add them to the GODag."""
+    # Creating many linked objects triggers many cyclic garbage collections, none needed
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        _load_godag(godag, payload)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+def _load_godag(godag, payload):
+    """Create linked GO Terms from the snapshot payload and add them to the GODag."""
+    namespaces = payload['namespaces']
+    obsolete = set(payload['obsolete'])
+    has_relationship = 'relationship' in payload['optional_attrs']
+    newobj = GOTerm.__new__
+    goterms = []
+    for idx, (goid, name, nsidx, alt_ids, level, depth) in enumerate(zip(
+            payload['goids'], payload['names'], payload['nsidxs'],
+            payload['alt_ids'], payload['level'], payload['depth'])):
+        # Set the same data members as GOTerm.__init__, skipping its default values
+        rec = newobj(GOTerm)
+        rec.__dict__.update({
+            'id': goid,
+            'item_id': goid,
+            'name': name,
+            'namespace': namespaces[nsidx],
+            '_parents': None,
+            'parents': None,
+            'children': set(),
+            'level': level,
+            'depth': depth,
+            'is_obsolete': idx in obsolete,
+            'alt_ids': set(alt_ids)})
+        if has_relationship:
+            rec.relationship = {}
+            rec.relationship_rev = {}
+        goterms.append(rec)
+        godag[goid] = rec
+    _load_parents(goterms, payload['parents'])
+    _load_relationships(goterms, payload['relationship'])
+    _load_optattrs(goterms, payload['optattrs'])
+    for rec, reldepth in zip(goterms, payload['reldepth']):
+        if reldepth != -1:
+            rec.reldepth = reldepth
+    for goid_alt, idx in payload['altgo2idx']:
+        godag[goid_alt] = goterms[idx]
+
+def _load_parents(goterms, csr):
+    """Set parents and children on all GO Terms."""
+    indptr, indices = csr
+    for idx, rec in enumerate(goterms):
+        parents = set(goterms[i] for i in indices[indptr[idx]:indptr[idx+1]])
+        rec.parents = parents
+        # pylint: disable=protected-access
+        rec._parents = set(o.item_id for o in parents)
+        for parent in parents:
+            parent.children.add(rec)
+
+def _load_relationships(goterms, rel2csr):
+    """Set relationship and reverse relationship on all GO Terms."""
+    for rel, (indptr, indices) in rel2csr.items():
+        for idx, rec in enumerate(goterms):
+            beg, end = indptr[idx], indptr[idx+1]
+            if beg == end:
+                continue
+            uppers = set(goterms[i] for i in indices[beg:end])
+            rec.relationship[rel] = uppers
+            for upper in uppers:
+                if rel not in upper.relationship_rev:
+                    upper.relationship_rev[rel] = set([rec])
+                else:
+                    upper.relationship_rev[rel].add(rec)
+
+def _load_optattrs(goterms, attr2vals):
+    """Set optional attributes, other than relationship, on all GO Terms."""
+    for attrname, vals in attr2vals.items():
+        for rec, val in zip(goterms, vals):
+            if val is not None:
+                setattr(rec, attrname, val)
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,249 @@
+"""Integer-indexed, array-backed storage for all GO Terms in a GO DAG.
+
+    Each GO ID is mapped to a dense integer index. The namespace, level, depth, and
+    reldepth of all GO Terms are stored in NumPy arrays. Parents, children, and
+    relationship edges are stored in CSR-style adjacency tables, where the
+    neighbors of GO Term i are: indices[indptr[i]:indptr[i+1]]
+
+    The GODag values are light-weight GoTermViews, which have the same attributes
+    as a GOTerm, but which read their values from the GoTermStore on access.
+
+        >>> godag = GODag("go-basic.obo", optional_attrs={'relationship'}, compact=True)
+        >>> godag.termstore.parents.get_row(godag.termstore.go2idx['GO:0008152'])
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+import numpy as np
+from goatools.obo_parser import GOTerm
+
+
+class Csr(object):
+    """Compressed sparse rows of integer indices."""
+
+    def __init__(self, indptr, indices):
+        self.indptr = np.asarray(indptr, dtype=np.int32)
+        self.indices = np.asarray(indices, dtype=np.int32)
+
+    def get_row(self, idx):
+        """Get the indices stored in one row."""
+        return self.indices[self.indptr[idx]:self.indptr[idx+1]]
+
+    def get_rowidxs(self):
+        """Get the row index of every stored index."""
+        num_rows = len(self.indptr) - 1
+        return np.repeat(np.arange(num_rows, dtype=np.int32), np.diff(self.indptr))
+
+    def get_transpose(self):
+        """Get the transpose of a square table. Example: children from parents."""
+        num_rows = len(self.indptr) - 1
+        order = np.argsort(self.indices, kind='stable')
+        indptr = np.zeros(num_rows + 1, dtype=np.int32)
+        np.cumsum(np.bincount(self.indices, minlength=num_rows), out=indptr[1:])
+        return Csr(indptr, self.get_rowidxs()[order])
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+
+class GoTermStore(object):
+    """Integer-indexed, array-backed storage for all GO Terms in a GO DAG."""
+
+    def __init__(self, payload):
+        num_goids = len(payload['goids'])
+        self.goids = payload['goids']
+        self.go2idx = {goid:idx for idx, goid in enumerate(self.goids)}
+        self.names = payload['names']
+        self.namespaces = payload['namespaces']
+        self.nsidxs = np.asarray(payload['nsidxs'], dtype=np.uint16)
+        self.is_obsolete = np.zeros(num_goids, dtype=bool)
+        self.is_obsolete[np.asarray(payload['obsolete'], dtype=np.int64)] = True
+        self.level = np.asarray(payload['level'], dtype=np.int32)
+        self.depth = np.asarray(payload['depth'], dtype=np.int32)
+        self.reldepth = np.asarray(payload['reldepth'], dtype=np.int32)  # -1 if not set
+        self.parents = Csr(*payload['parents'])
+        self.children = self.parents.get_transpose()
+        self.optional_attrs = set(payload['optional_attrs'])
+        self.rel2upper = {r:Csr(*t) for r, t in payload['relationship'].items()}
+        self.rel2lower = {r:c.get_transpose() for r, c in self.rel2upper.items()}
+        self.idx2alt_ids = {i:alts for i, alts in enumerate(payload['alt_ids']) if alts}
+        self.altgo2idx = payload['altgo2idx']
+        self.optattrs = payload['optattrs']
+        self.views = [GoTermView(self, idx) for idx in range(num_goids)]
+
+    def get_go2view(self):
+        """Get GO IDs, main GO IDs followed by alternate GO IDs, and their GoTermViews."""
+        views = self.views
+        go2view = {goid:views[idx] for idx, goid in enumerate(self.goids)}
+        for goid_alt, idx in self.altgo2idx:
+            go2view[goid_alt] = views[idx]
+        return go2view
+
+    def get_views(self, idxs):
+        """Get a set of GoTermViews, given GO Term indices."""
+        views = self.views
+        return set(views[i] for i in idxs.tolist())
+
+    def get_csr_upper(self, relationships=None):
+        """Get a table of parents plus GO Terms up the user-specified relationships."""
+        csrs = [self.parents] + self._get_relcsrs(self.rel2upper, relationships)
+        return _combine_csrs(csrs)
+
+    def get_csr_lower(self, relationships=None):
+        """Get a table of children plus GO Terms down the user-specified relationships."""
+        csrs = [self.children] + self._get_relcsrs(self.rel2lower, relationships)
+        return _combine_csrs(csrs)
+
+    @staticmethod
+    def _get_relcsrs(rel2csr, relationships):
+        """Get relationship tables, given True or a set of relationships."""
+        if not relationships:
+            return []
+        if relationships is True:
+            return list(rel2csr.values())
+        return [c for r, c in rel2csr.items() if r in relationships]
+
+
+def _combine_csrs(csrs):
+    """Combine square tables into one table containing the union of each row."""
+    if len(csrs) == 1:
+        return csrs[0]
+    rowidxs = np.concatenate([c.get_rowidxs() for c in csrs])
+    indices = np.concatenate([c.indices for c in csrs])
+    num_rows = len(csrs[0])
+    # Sort and remove duplicates using a single key per (row, index) pair
+    keys = np.unique(rowidxs.astype(np.int64) * num_rows + indices)
+    indptr = np.zeros(num_rows + 1, dtype=np.int32)
+    np.cumsum(np.bincount(keys // num_rows, minlength=num_rows), out=indptr[1:])
+    return Csr(indptr, keys % num_rows)
+
+
+class GoTermView(GOTerm):
+    """A GO Term having the same attributes as a GOTerm, read from a GoTermStore."""
+
+    __slots__ = ('_store', '_idx')
+
+    # pylint: disable=super-init-not-called
+    def __init__(self, store, idx):
+        self._store = store
+        self._idx = idx
+
+    def __getstate__(self):
+        # A view is its store and index. The GODag is not pickled with a GO Term
+        return (None, {'_store':self._store, '_idx':self._idx})
+
+    @property
+    def item_id(self):
+        """GO ID"""
+        return self._store.goids[self._idx]
+
+    @property
+    def id(self):
+        """GO ID, **DEPRECATED** use item_id"""
+        return self._store.goids[self._idx]
+
+    @property
+    def name(self):
+        """GO Term name"""
+        return self._store.names[self._idx]
+
+    @property
+    def namespace(self):
+        """GO Term namespace, biological_process, molecular_function, or cellular_component"""
+        store = self._store
+        return store.namespaces[store.nsidxs[self._idx]]
+
+    @property
+    def level(self):
+        """Shortest distance from root node"""
+        return int(self._store.level[self._idx])
+
+    @property
+    def depth(self):
+        """Longest distance from root node"""
+        return int(self._store.depth[self._idx])
+
+    @property
+    def reldepth(self):
+        """Longest distance from root node, traversing is_a and all relationships"""
+        reldepth = int(self._store.reldepth[self._idx])
+        if reldepth == -1:
+            raise AttributeError('reldepth')
+        return reldepth
+
+    @property
+    def is_obsolete(self):
+        """True if the GO Term is obsolete"""
+        return bool(self._store.is_obsolete[self._idx])
+
+    @property
+    def alt_ids(self):
+        """Alternate GO IDs"""
+        return set(self._store.idx2alt_ids.get(self._idx, ()))
+
+    @property
+    def _parents(self):
+        """Parent GO IDs"""
+        store = self._store
+        goids = store.goids
+        return set(goids[i] for i in store.parents.get_row(self._idx).tolist())
+
+    @property
+    def parents(self):
+        """Parent GO Terms"""
+        store = self._store
+        return store.get_views(store.parents.get_row(self._idx))
+
+    @property
+    def children(self):
+        """Children GO Terms"""
+        store = self._store
+        return store.get_views(store.children.get_row(self._idx))
+
+    @property
+    def relationship(self):
+        """GO Terms up each relationship, if the GODag was loaded with relationship"""
+        return self._get_rel2views(self._store.rel2upper)
+
+    @property
+    def relationship_rev(self):
+        """GO Terms down each relationship, if the GODag was loaded with relationship"""
+        return self._get_rel2views(self._store.rel2lower)
+
+    def _get_rel2views(self, rel2csr):
+        """Get a dict of relationships and their GO Terms."""
+        store = self._store
+        if 'relationship' not in store.optional_attrs:
+            raise AttributeError('relationship')
+        rel2views = {}
+        for rel, csr in rel2csr.items():
+            idxs = csr.get_row(self._idx)
+            if idxs.size:
+                rel2views[rel] = store.get_views(idxs)
+        return rel2views
+
+    def __getattr__(self, attrname):
+        """Get optional attributes, like defn or synonym, loaded by the GODag."""
+        if attrname == '_store':
+            # Not yet set while unpickling
+            raise AttributeError(attrname)
+        attr2vals = self._store.optattrs
+        if attrname in attr2vals:
+            val = attr2vals[attrname][self._idx]
+            if val is not None:
+                return val
+        raise AttributeError(attrname)
+
+    @property
+    def __dict__(self):
+        """Get all attributes and values, as found in the data members of a GOTerm."""
+        attrs = ['id', 'item_id', 'name', 'namespace', '_parents', 'parents', 'children',
+                 'level', 'depth', 'is_obsolete', 'alt_ids']
+        attrs.extend(self._store.optattrs.keys())
+        if 'relationship' in self._store.optional_attrs:
+            attrs.extend(['relationship', 'relationship_rev', 'reldepth'])
+        return {a:getattr(self, a) for a in attrs if hasattr(self, a)}
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -5,6 +5,7 @@
 
 from collections import defaultdict
 from goatools.godag_small import GODagSmall
+from goatools.godag.level_depth import get_id2level_depth
 
 __copyright__ = "Copyright (C) 2016-2018, DV Klopfenstein, H Tang, All rights reserved."
 __author__ = "DV Klopfenstein"
@@ -56,31 +57,51 @@ class OboToGoDagSmall(object):
 
     def _traverse_parent_objs(self, goobj_child):
         """Traverse from source GO up parents."""
-        child_id = goobj_child.id
-        # mark child as seen
-        self.seen_cids.add(child_id)
-        self.godag.go2obj[child_id] = goobj_child
-        # Loop through parents of child object
-        for parent_obj in goobj_child.parents:
-            parent_id = parent_obj.id
-            self.godag.p_from_cs[parent_id].add(child_id)
-            # If parent has not been seen, traverse
-            if parent_id not in self.seen_cids:
-                self._traverse_parent_objs(parent_obj)
-            
+        # Use a stack, not recursion, so very deep DAGs do not reach the recursion limit
+        stack = [goobj_child]
+        while stack:
+            goobj_child = stack.pop()
+            child_id = goobj_child.id
+            if child_id in self.seen_cids:
+                continue
+            # mark child as seen
+            self.seen_cids.add(child_id)
+            self.godag.go2obj[child_id] = goobj_child
+            # Loop through parents of child object
+            for parent_obj in goobj_child.parents:
+                self.godag.p_from_cs[parent_obj.id].add(child_id)
+                # If parent has not been seen, traverse
+                if parent_obj.id not in self.seen_cids:
+                    stack.append(parent_obj)
+
     def _traverse_child_objs(self, goobj_parent):
         """Traverse from source GO down children."""
-        parent_id = goobj_parent.id
-        # mark parent as seen
-        self.seen_pids.add(parent_id)
-        self.godag.go2obj[parent_id] = goobj_parent
-        # Loop through children
-        for child_obj in goobj_parent.children:
-            child_id = child_obj.id
-            self.godag.p2cs[parent_id].add(child_id)
-            # If child has not been seen
-            if child_id not in self.seen_pids:
-                self._traverse_child_objs(child_obj)
+        stack = [goobj_parent]
+        while stack:
+            goobj_parent = stack.pop()
+            parent_id = goobj_parent.id
+            if parent_id in self.seen_pids:
+                continue
+            # mark parent as seen
+            self.seen_pids.add(parent_id)
+            self.godag.go2obj[parent_id] = goobj_parent
+            # Loop through children
+            for child_obj in goobj_parent.children:
+                self.godag.c_from_ps[parent_id].add(child_obj.id)
+                # If child has not been seen
+                if child_obj.id not in self.seen_pids:
+                    stack.append(child_obj)
+
+    def get_go2level_depth(self):
+        """Get the level and depth of each GO ID in the sub-graph, measured within the sub-graph."""
+        go2parents = {go:set() for go in self.godag.go2obj}
+        for parent_id, child_ids in self.godag.p_from_cs.items():
+            for child_id in child_ids:
+                go2parents[child_id].add(parent_id)
+        for parent_id, child_ids in self.godag.c_from_ps.items():
+            for child_id in child_ids:
+                go2parents[child_id].add(parent_id)
+        return get_id2level_depth(go2parents)
 
 # Copyright (C) 2016-2018, DV Klopfenstein, H Tang, All rights reserved.
 
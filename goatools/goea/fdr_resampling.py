@@ -0,0 +1,103 @@
+"""P-value distribution for the resampling FDR, from many random study sets.
+
+    As described in http://www.biomedcentral.com/1471-2105/6/168, the smallest
+    uncorrected p-value of each random study set drawn from the population is saved.
+    The q-value of a GOEA result is the fraction of saved p-values which are smaller.
+
+    The random study sets are counted using one sparse product with the population
+    gene-by-GO incidence matrix. P-values are calculated once for each distinct pair
+    of study count and GO ID, using vectorized Fisher's exact tests.
+
+        >>> objfdr = FdrResampling(incidence.matrix, incidence.pop_counts, pop_n, seed=1)
+        >>> distribution = objfdr.get_pval_distribution(study_n)
+        >>> qvals = FDR(distribution, goea_results).corrected_pvals
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+import numpy as np
+from scipy import sparse
+from goatools.pvalcalc import FisherVectorized
+from goatools.pvalcalc import PvalCalcCachedVectorized
+
+# The FdrResampling object of a worker process
+_WORKER = {}
+
+
+class FdrResampling(object):
+    """P-value distribution for the resampling FDR, from many random study sets."""
+
+    # Random study sets are drawn in chunks, each with its own seed, so the
+    # distribution is the same for the same seed regardless of the number of processes
+    chunksize = 100
+
+    def __init__(self, matrix, pop_counts, pop_n, num_samples=500, seed=None, processes=None,
+                 pval_cache=None, alternative='two-sided'):
+        # Population genes by GO IDs. Rows past the last row are population genes having no GO IDs
+        self.matrix = matrix
+        self.pop_counts = np.asarray(pop_counts, dtype=np.int64)
+        self.pop_n = pop_n
+        self.num_samples = num_samples
+        self.seed = seed
+        self.processes = processes
+        # Random study sets are tested as the GOEA is: two-tailed, or one-sided
+        self.pval_obj = FisherVectorized('fisher_vectorized', None, alternative)
+        if pval_cache is not None:
+            # P-values of tables seen in earlier random study sets are not calculated again
+            self.pval_obj = PvalCalcCachedVectorized(self.pval_obj, pval_cache)
+
+    def get_pval_distribution(self, study_n, num_samples=None):
+        """Get the sorted smallest p-values of many random study sets of size study_n"""
+        if num_samples is None:
+            num_samples = self.num_samples
+        seeds = np.random.SeedSequence(self.seed).spawn(-(-num_samples//self.chunksize))
+        chunks = [(study_n, min(self.chunksize, num_samples - i*self.chunksize), s) \
+            for i, s in enumerate(seeds)]
+        if self.processes is None or self.processes < 2 or len(chunks) < 2:
+            minpvals = [self.get_minpvals(*c) for c in chunks]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(self.processes, initializer=_init_worker,
+                                     initargs=(self,)) as executor:
+                minpvals = list(executor.map(_get_minpvals_worker, chunks))
+        return np.sort(np.concatenate(minpvals))
+
+    def get_minpvals(self, study_n, num_samples, seed):
+        """Get the smallest p-value of each of a number of random study sets"""
+        rng = np.random.default_rng(seed)
+        num_genes = self.matrix.shape[0]
+        rows = []
+        cols = []
+        for idx in range(num_samples):
+            generows = rng.choice(self.pop_n, study_n, replace=False)
+            generows = generows[generows < num_genes]
+            rows.append(np.full(generows.size, idx))
+            cols.append(generows)
+        rows = np.concatenate(rows)
+        study_genes = sparse.csr_matrix(
+            (np.ones(rows.size, dtype=np.int32), (rows, np.concatenate(cols))),
+            shape=(num_samples, num_genes))
+        study_counts = (study_genes @ self.matrix).toarray()
+        # As in the original resampling, only GO IDs seen in a random study set are tested
+        samples, goidxs = np.nonzero(study_counts)
+        counts = study_counts[samples, goidxs]
+        # Calculate each distinct p-value once
+        keys, inverse = np.unique(counts*study_counts.shape[1] + goidxs, return_inverse=True)
+        ucounts, ugoidxs = np.divmod(keys, study_counts.shape[1])
+        upvals = self.pval_obj.calc_pvalues(ucounts, study_n, self.pop_counts[ugoidxs], self.pop_n)
+        minpvals = np.ones(num_samples)
+        np.minimum.at(minpvals, samples, upvals[inverse.ravel()])
+        return minpvals
+
+
+def _init_worker(objfdr):
+    """Save the FdrResampling object in a new worker process"""
+    _WORKER['objfdr'] = objfdr
+
+def _get_minpvals_worker(chunk):
+    """Get the smallest p-value of each random study set in a chunk, in a worker process"""
+    return _WORKER['objfdr'].get_minpvals(*chunk)
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -1,11 +1,39 @@
 # -*- coding: UTF-8 -*-
-"""Runs Fisher's exact test, as well as multiple corrections for each of: BP MF CC"""
+"""Runs Fisher's exact test, as well as multiple corrections for each of: BP MF CC
+
+    The BP, MF, and CC GOEAs can be built and run in parallel:
+
+        >>> goeaobj = GOEnrichmentStudyNS(pop, ns2assoc, godag, n_jobs=3)
+        >>> goea_results = goeaobj.run_study(study_ids)
+
+    Each GOEA is built once, in a worker process, and returned. The first run starts
+    n_jobs worker processes, which receive the GOEAs, including the GO DAG and
+    associations, once, when they start, not once per task. Later runs use the same
+    workers. The workers are stopped by shutdown, at the end of a with block, or when
+    the GOEnrichmentStudyNS is garbage collected:
+
+        >>> with GOEnrichmentStudyNS(pop, ns2assoc, godag, n_jobs=3) as goeaobj:
+        >>>     for study_ids in studies:
+        >>>         goea_results = goeaobj.run_study(study_ids)
+
+    A concurrent.futures thread pool may be given instead, using
+    executor=ThreadPoolExecutor(3). Its threads share all data.
+"""
 
 __copyright__ = "Copyright (C) 2010-2019, H Tang et al., All rights reserved."
 __author__ = "various"
 
+import sys
+import copy
+import weakref
+import collections as cx
 import itertools
+from concurrent.futures import ProcessPoolExecutor
 from goatools.go_enrichment import GOEnrichmentStudy
+from goatools.goea.results_table import GoeaResultsTable
+
+# GOEA inputs or GOEnrichmentStudy objects of a worker process in an n_jobs pool
+_WORKER = {}
 
 
 class GOEnrichmentStudyNS:
@@ -13,13 +41,71 @@ class GOEnrichmentStudyNS:
 
     # pylint: disable=too-many-arguments
     def __init__(self, pop, ns2assoc, godag, propagate_counts=True, alpha=.05, methods=None, **kws):
+        self.n_jobs = kws.pop('n_jobs', None)
+        self.executor = kws.pop('executor', None)
+        self._chk_executor()
+        # Worker processes, started by the first run in parallel and used by all later runs
+        self.pool = None
         self.ns2objgoea = self._ns2o(pop, ns2assoc, godag, propagate_counts, alpha, methods, **kws)
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
     def run_study(self, study_ids, **kws):
         """Run GOEAs for each namespace, BP MF CC"""
-        ns2results = {ns:o.run_study(study_ids, **kws) for ns, o in sorted(self.ns2objgoea.items())}
+        if self._use_pool():
+            kws_worker = self._get_kws_worker(kws)
+            pool = self._get_pool()
+            ns2results = {ns:pool.submit(_run_study_worker, ns, study_ids, kws_worker) \
+                for ns in sorted(self.ns2objgoea)}
+            ns2results = {ns:self._get_results_worker(f.result(), ns, kws) for ns, f in ns2results.items()}
+        elif self.executor is not None:
+            ns2results = {ns:self.executor.submit(o.run_study, study_ids, **kws) \
+                for ns, o in sorted(self.ns2objgoea.items())}
+            ns2results = {ns:f.result() for ns, f in ns2results.items()}
+        else:
+            ns2results = {ns:o.run_study(study_ids, **kws) for ns, o in sorted(self.ns2objgoea.items())}
         return list(itertools.chain.from_iterable(ns2results.values()))
 
+    def run_studies(self, studies, **kws):
+        """Run GOEAs on many study sets for each namespace. Return a dict of study names and results.
+
+           In parallel, the study sets are split into n_jobs chunks for each namespace.
+           The results of each study set are the same as those from run_study.
+        """
+        names = list(studies)
+        nss = sorted(self.ns2objgoea)
+        if self._use_pool():
+            kws_worker = self._get_kws_worker(kws)
+            pool = self._get_pool()
+            futures = [(ns, pool.submit(_run_studies_worker, ns, self._get_studies(studies, n), kws_worker)) \
+                for ns in nss for n in self._get_chunks(names)]
+            name2nsresults = self._get_name2nsresults(
+                {n:self._get_results_worker(r, ns, kws) for n, r in f.result().items()} for ns, f in futures)
+        elif self.executor is not None:
+            futures = [self.executor.submit(
+                self.ns2objgoea[ns].run_studies, self._get_studies(studies, n), **kws) \
+                    for ns in nss for n in self._get_chunks(names)]
+            name2nsresults = self._get_name2nsresults(f.result() for f in futures)
+        else:
+            name2nsresults = self._get_name2nsresults(
+                [self.ns2objgoea[ns].run_studies(studies, **kws) for ns in nss])
+        name2results = cx.OrderedDict()
+        for name in names:
+            name2results[name] = name2nsresults[name]
+        return name2results
+
+    def shutdown(self):
+        """Stop the worker processes, if any were started using n_jobs and are running"""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        for objgoea in self.ns2objgoea.values():
+            objgoea.shutdown()
+
     def wr_xlsx(self, fout_xlsx, goea_results, **kws):
         """Write to spreadsheet format"""
         next(iter(self.ns2objgoea.values())).wr_xlsx(fout_xlsx, goea_results, **kws)
@@ -32,15 +118,154 @@ class GOEnrichmentStudyNS:
         """Write to spreadsheet format"""
         next(iter(self.ns2objgoea.values())).wr_txt(fout_tsv, goea_results, **kws)
 
-    @staticmethod
-    def _ns2o(pop, ns2assoc, godag, propagate_counts, alpha, methods, **kws):
+    def _ns2o(self, pop, ns2assoc, godag, propagate_counts, alpha, methods, **kws):
+        """Create one GOEnrichmentStudy object for each namespace, BP MF CC"""
+        if self._use_pool():
+            return self._ns2o_pool(pop, ns2assoc, godag, (propagate_counts, alpha, methods), kws)
+        if self.executor is not None:
+            ns2obj = {
+                ns:self.executor.submit(
+                    GOEnrichmentStudy, pop, a, godag, propagate_counts, alpha, methods, name=ns, **kws) \
+                for ns, a in sorted(ns2assoc.items())}
+            return {ns:f.result() for ns, f in ns2obj.items()}
         return {
             ns:GOEnrichmentStudy(pop, a, godag, propagate_counts, alpha, methods, name=ns, **kws) \
                 for ns, a in sorted(ns2assoc.items())}
 
+    def _ns2o_pool(self, pop, ns2assoc, godag, args, kws):
+        """Build the GOEnrichmentStudy of each namespace in a worker process, once"""
+        nss = sorted(ns2assoc)
+        kws_worker = {k:v for k, v in kws.items() if k != 'log'}
+        with ProcessPoolExecutor(
+                min(self.n_jobs, len(nss)), initializer=_init_worker_inputs,
+                initargs=(pop, ns2assoc, godag, args, kws_worker)) as pool:
+            objgoeas = list(pool.map(_get_objgoea_worker, nss))
+        ns2objgoea = {}
+        for nsname, objgoea in zip(nss, objgoeas):
+            # Counts are propagated in the user's associations, as when built serially
+            ns2assoc[nsname].update(objgoea.assoc)
+            objgoea.assoc = ns2assoc[nsname]
+            objgoea.obo_dag = godag
+            objgoea.log = kws['log'] if 'log' in kws else sys.stdout
+            ns2objgoea[nsname] = objgoea
+        return ns2objgoea
+
+    def _chk_executor(self):
+        """A user-supplied executor must be a thread pool"""
+        if isinstance(self.executor, ProcessPoolExecutor):
+            raise ValueError('USE n_jobs TO RUN GOEAs IN PROCESSES. '
+                             'A ProcessPoolExecutor WOULD PICKLE THE GO DAG FOR EVERY TASK')
+
+    def _use_pool(self):
+        """GOEAs are built and run in n_jobs worker processes, unless an executor is given"""
+        return self.executor is None and self.n_jobs is not None and self.n_jobs >= 2
+
+    def _get_pool(self):
+        """Start n_jobs worker processes, each getting the GOEAs once, if not already running"""
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                self.n_jobs, initializer=_init_worker_goeas, initargs=(self._get_ns2objgoea_worker(),))
+            # Stop the workers if shutdown is not called before this object is garbage collected
+            weakref.finalize(self, self.pool.shutdown, wait=False)
+        return self.pool
+
+    def _get_ns2objgoea_worker(self):
+        """Get the GOEAs sent to workers. Workers do not log"""
+        ns2objgoea = {}
+        for nsname, objgoea in self.ns2objgoea.items():
+            objgoea_worker = copy.copy(objgoea)
+            objgoea_worker.log = None
+            ns2objgoea[nsname] = objgoea_worker
+        return ns2objgoea
+
+    def _get_chunks(self, names):
+        """Split the study names into one chunk for each job"""
+        num_chunks = min(self.n_jobs if self.n_jobs else 1, len(names))
+        if num_chunks < 2:
+            return [names]
+        chunksize = -(-len(names)//num_chunks)
+        return [names[i:i+chunksize] for i in range(0, len(names), chunksize)]
+
+    @staticmethod
+    def _get_studies(studies, names):
+        """Get the study sets for a chunk of study names"""
+        return cx.OrderedDict((n, studies[n]) for n in names)
+
+    @staticmethod
+    def _get_name2nsresults(ns_name2results):
+        """Merge the results of each study name, in namespace order"""
+        name2results = cx.defaultdict(list)
+        for name2results_ns in ns_name2results:
+            for name, results in name2results_ns.items():
+                name2results[name].extend(results)
+        return name2results
+
+    @staticmethod
+    def _get_kws_worker(kws):
+        """Get the run keyword args sent to workers. Printing and keep_if are done here"""
+        kws_worker = {k:v for k, v in kws.items() if k not in {'log', 'prt', 'keep_if'}}
+        kws_worker['prt'] = None
+        return kws_worker
+
+    def _get_results_worker(self, results, nsname, kws):
+        """Link results from a worker to this process's GOEA, then keep the results the user wants"""
+        objgoea = self.ns2objgoea[nsname]
+        if isinstance(results, GoeaResultsTable):
+            # The table's incidence matrix is made from the same population items in every process
+            objgoea.get_incidence()
+            results.goeaobj = objgoea
+            if 'keep_if' in kws:
+                results.keep_if(kws['keep_if'])
+            return results
+        for rec in results:
+            rec.set_goterm(objgoea.obo_dag)
+        if 'keep_if' in kws:
+            keep_if = kws['keep_if']
+            results[:] = [r for r in results if keep_if(r)]
+        return results
+
     def get_assoc(self):
         """Get a list of all GO sets in all (BP, MF, CC) associations"""
         return {geneid:gos for o in self.ns2objgoea.values() for geneid, gos in o.assoc.items()}
 
 
+def _init_worker_inputs(pop, ns2assoc, godag, args, kws):
+    """Save the GOEA inputs in a new worker process, which builds GOEAs"""
+    _WORKER['inputs'] = (pop, ns2assoc, godag, args, kws)
+
+def _get_objgoea_worker(nsname):
+    """Build the GOEnrichmentStudy of a namespace in a worker process"""
+    pop, ns2assoc, godag, (propagate_counts, alpha, methods), kws = _WORKER['inputs']
+    objgoea = GOEnrichmentStudy(
+        pop, ns2assoc[nsname], godag, propagate_counts, alpha, methods,
+        name=nsname, log=None, **kws)
+    # The main process has the GO DAG. Do not send it back
+    objgoea.obo_dag = None
+    return objgoea
+
+def _init_worker_goeas(ns2objgoea):
+    """Save the GOEnrichmentStudy objects in a new worker process, which runs GOEAs"""
+    _WORKER['ns2objgoea'] = ns2objgoea
+
+def _run_study_worker(nsname, study_ids, kws):
+    """Run a GOEA on one namespace in a worker process"""
+    return _get_results_picklable(_WORKER['ns2objgoea'][nsname].run_study(study_ids, **kws))
+
+def _run_studies_worker(nsname, studies, kws):
+    """Run GOEAs on many study sets on one namespace in a worker process"""
+    name2results = _WORKER['ns2objgoea'][nsname].run_studies(studies, **kws)
+    for results in name2results.values():
+        _get_results_picklable(results)
+    return name2results
+
+def _get_results_picklable(results):
+    """Remove GO Terms or the GOEA, which link to the whole GO DAG, before sending results"""
+    if isinstance(results, GoeaResultsTable):
+        results.goeaobj = None
+        return results
+    for rec in results:
+        rec.goterm = None
+    return results
+
+
 # Copyright (C) 2010-2019, H Tang et al., All rights reserved.
@@ -0,0 +1,80 @@
+"""Sparse population gene-by-GO incidence matrix, shared by many GOEA study sets.
+
+    Each row is a population gene and each column is a GO ID associated with at
+    least one population gene. The study counts of many study sets are found
+    with one sparse matrix product:
+
+        study sets x genes  @  genes x GO IDs  ->  study sets x GO IDs
+
+        >>> incidence = GoeaIncidence(goeaobj.go2popitems)
+        >>> study_counts = incidence.get_study_counts([study1, study2])
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+import collections as cx
+import numpy as np
+from scipy import sparse
+
+
+class GoeaIncidence(object):
+    """Sparse population gene-by-GO incidence matrix, shared by many GOEA study sets."""
+
+    def __init__(self, go2popitems):
+        # Columns: GO IDs sorted, as are GOEA results before sorting on significance
+        self.goids = sorted(go2popitems)
+        self.genes = sorted(set(g for genes in go2popitems.values() for g in genes), key=str)
+        self.gene2row = {g:i for i, g in enumerate(self.genes)}
+        self.goid2col = {go:i for i, go in enumerate(self.goids)}
+        self.pop_counts = np.array([len(go2popitems[go]) for go in self.goids], dtype=np.int64)
+        self.matrix = self._init_matrix(go2popitems)
+        # GO IDs associated with each gene, for listing the study genes of each GO ID
+        self.gene2goids = self._init_gene2goids()
+
+    def get_study_counts(self, studies):
+        """Get the number of study genes associated with each GO ID. One row per study set."""
+        gene2row = self.gene2row
+        rows = []
+        cols = []
+        for idx, study in enumerate(studies):
+            generows = [gene2row[g] for g in study if g in gene2row]
+            rows.extend([idx]*len(generows))
+            cols.extend(generows)
+        study_genes = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+            shape=(len(studies), len(self.genes)))
+        return (study_genes @ self.matrix).toarray()
+
+    def get_go2studyitems(self, study):
+        """Get the study genes associated with each GO ID."""
+        go2studyitems = cx.defaultdict(set)
+        gene2goids = self.gene2goids
+        for gene in study:
+            if gene in gene2goids:
+                for goid in gene2goids[gene]:
+                    go2studyitems[goid].add(gene)
+        return go2studyitems
+
+    def _init_gene2goids(self):
+        """Get the GO IDs associated with each gene, from the rows of the incidence matrix."""
+        indptr = self.matrix.indptr
+        cols = self.matrix.indices.tolist()
+        goids = self.goids
+        return {g:[goids[c] for c in cols[indptr[i]:indptr[i+1]]] for i, g in enumerate(self.genes)}
+
+    def _init_matrix(self, go2popitems):
+        """Create the sparse gene-by-GO incidence matrix."""
+        gene2row = self.gene2row
+        rows = []
+        cols = []
+        for col, goid in enumerate(self.goids):
+            genes = go2popitems[goid]
+            rows.extend(gene2row[g] for g in genes)
+            cols.extend([col]*len(genes))
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+            shape=(len(self.genes), len(self.goids)))
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
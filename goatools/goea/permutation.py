@@ -0,0 +1,215 @@
+"""Empirical p-values from permuting study gene labels over the population.
+
+    Each permutation is a random study set of the same size as the study set, drawn
+    from the population. The study counts of many permutations are found with one
+    sparse product with the population gene-by-GO incidence matrix. The empirical
+    p-value of a GO ID is the fraction of permutations having study counts at least
+    as extreme as the observed study count (Phipson & Smyth, 2010):
+
+        p = (1 + permutations as extreme) / (1 + permutations)
+
+    Genes may be drawn with unequal probabilities, such as gene lengths, so GO IDs
+    of long genes are not enriched only because long genes are found more often
+    (Young et al., 2010, GOseq). When genes are drawn with equal probabilities, the
+    empirical p-values approach Fisher's exact p-values.
+
+    Permutations are run in rounds. After each round, GO IDs whose p-values are
+    clearly larger than alpha stop being counted (Besag & Clifford, 1991).
+
+        >>> objperm = PermutationPvals(incidence, pop_n, num_perms=1000, seed=1)
+        >>> pvals = objperm.calc_pvalues_goidxs(study_counts, study_n, goidxs)
+
+    Using many processes, one process pool is started by the first call and used
+    by every later call. It is stopped by shutdown or at the end of a with block:
+
+        >>> with PermutationPvals(incidence, pop_n, processes=4) as objperm:
+        >>>     for study_counts, study_n, goidxs in studies:
+        >>>         pvals = objperm.calc_pvalues_goidxs(study_counts, study_n, goidxs)
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+import numpy as np
+from scipy import sparse
+
+# The PermutationPvals object of a worker process
+_WORKER = {}
+
+
+class PermutationPvals(object):
+    """Empirical p-values from permuting study gene labels over the population."""
+
+    alternatives = ('two-sided', 'greater', 'less')
+
+    # Permutations are drawn in chunks, each with its own seed, so p-values are
+    # the same for the same seed regardless of the number of processes
+    chunksize = 100
+    # Number of chunks in each round. Stopping is checked after each round
+    chunks_per_round = 5
+    # A GO ID stops being counted if its p-value is larger than alpha with this confidence
+    confidence = 0.999
+    # Relative tolerance used when comparing minimum attainable p-values to thresholds
+    rel_tol = 1e-7
+
+    def __init__(self, incidence, pop_n, num_perms=1000, seed=None, processes=None,
+                 alpha=0.05, early_stop=True, weights=None, alternative='two-sided'):
+        if alternative not in self.alternatives:
+            raise Exception("UNRECOGNIZED alternative({A}). EXPECTED: {As}".format(
+                A=alternative, As=' '.join(self.alternatives)))
+        self.name = 'permutation'
+        self.log = None
+        self.alternative = alternative
+        # Population genes by GO IDs. Rows past the last row are population genes having no GO IDs
+        self.matrix = incidence.matrix.tocsc()
+        self.pop_counts = incidence.pop_counts
+        self.pop_n = pop_n
+        self.num_perms = num_perms
+        self.seed = seed
+        self.processes = processes
+        self.alpha = alpha
+        self.early_stop = early_stop
+        # Probability weight of each population gene, in incidence row order
+        self.weights = self._init_weights(weights)
+        # Number of permutations counted for each GO ID in the last call
+        self.perms_done = None
+        # Worker processes, started by the first call using more than one process
+        self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def __getstate__(self):
+        # A process pool cannot be pickled: Workers get a copy of this object without it
+        state = dict(self.__dict__)
+        state['pool'] = None
+        return state
+
+    def shutdown(self):
+        """Stop the worker processes, if any were started"""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def calc_pvalues_goidxs(self, study_counts, study_n, goidxs):
+        """Get the empirical p-values of GO IDs, given as columns in the incidence matrix"""
+        obs = np.asarray(study_counts, dtype=np.int64)
+        goidxs = np.asarray(goidxs, dtype=np.int64)
+        hits_ge = np.zeros(obs.size, dtype=np.int64)
+        hits_le = np.zeros(obs.size, dtype=np.int64)
+        perms_done = np.zeros(obs.size, dtype=np.int64)
+        chunks = self._get_chunks(study_n)
+        active = np.arange(obs.size)
+        executor = self._get_executor(chunks)
+        for beg in range(0, len(chunks), self.chunks_per_round):
+            if not active.size:
+                break
+            tasks = [(study_n, goidxs[active], obs[active], n, s) \
+                for n, s in chunks[beg:beg+self.chunks_per_round]]
+            hits = executor.map(_get_hits_worker, tasks) if executor is not None else \
+                [self.get_hits(*t) for t in tasks]
+            for hits_ge_chunk, hits_le_chunk in hits:
+                hits_ge[active] += hits_ge_chunk
+                hits_le[active] += hits_le_chunk
+            perms_done[active] += sum(n for n, _ in chunks[beg:beg+self.chunks_per_round])
+            if self.early_stop:
+                active = active[~self._get_stopped(
+                    hits_ge[active], hits_le[active], perms_done[active])]
+        self.perms_done = perms_done
+        return self._get_pvals(hits_ge, hits_le, perms_done)
+
+    def calc_min_pvalues(self, study_n, pop_counts, pop_n):
+        """Get the minimum attainable p-values, used to skip GO IDs which cannot be significant"""
+        minpval = 1.0/(1 + self.num_perms)
+        if self.alternative == 'two-sided':
+            minpval *= 2
+        return np.full(len(pop_counts), min(1.0, minpval))
+
+    def get_hits(self, study_n, goidxs, obs, num_perms, seed):
+        """Count permutations with study counts at least, and at most, the observed counts"""
+        study_genes = self._get_random_studies(study_n, num_perms, np.random.default_rng(seed))
+        counts = (study_genes @ self.matrix[:, goidxs]).toarray()
+        return (counts >= obs).sum(0), (counts <= obs).sum(0)
+
+    def _get_random_studies(self, study_n, num_perms, rng):
+        """Draw random study sets. Return a sparse matrix of permutations by annotated genes"""
+        num_genes = self.matrix.shape[0]
+        if self.weights is None:
+            generows = np.array([rng.choice(self.pop_n, study_n, replace=False) \
+                for _ in range(num_perms)]).reshape(num_perms, study_n)
+        else:
+            # Weighted random sampling without replacement (Efraimidis & Spirakis, 2006):
+            # The study_n genes having the largest keys, log(u)/weight, are drawn
+            with np.errstate(divide='ignore'):
+                keys = np.log(rng.random((num_perms, self.pop_n)))/self.weights
+            generows = np.argpartition(-keys, study_n - 1, axis=1)[:, :study_n]
+        # Each row holds the annotated genes of one permutation, so the CSR arrays are built directly
+        annotated = generows < num_genes
+        indptr = np.concatenate([[0], np.cumsum(annotated.sum(1))])
+        return sparse.csr_matrix(
+            (np.ones(indptr[-1], dtype=np.int32), generows[annotated], indptr),
+            shape=(num_perms, num_genes))
+
+    def _get_pvals(self, hits_ge, hits_le, perms_done):
+        """Get the empirical p-values from the numbers of permutations as extreme as observed"""
+        pvals_ge = (1.0 + hits_ge)/(1.0 + perms_done)
+        pvals_le = (1.0 + hits_le)/(1.0 + perms_done)
+        if self.alternative == 'greater':
+            return pvals_ge
+        if self.alternative == 'less':
+            return pvals_le
+        return np.minimum(1.0, 2*np.minimum(pvals_ge, pvals_le))
+
+    def _get_stopped(self, hits_ge, hits_le, perms_done):
+        """Return True for GO IDs whose p-values are larger than alpha with high confidence"""
+        from scipy.stats import beta
+        if self.alternative == 'greater':
+            hits, factor = hits_ge, 1
+        elif self.alternative == 'less':
+            hits, factor = hits_le, 1
+        else:
+            hits, factor = np.minimum(hits_ge, hits_le), 2
+        # Clopper-Pearson lower bound of the fraction of permutations as extreme as observed
+        with np.errstate(invalid='ignore'):
+            lower = beta.ppf(1 - self.confidence, hits, perms_done - hits + 1)
+        return np.nan_to_num(lower)*factor > self.alpha
+
+    def _get_chunks(self, study_n):
+        """Get the number of permutations and the seed of each chunk"""
+        seeds = np.random.SeedSequence(self.seed).spawn(-(-self.num_perms//self.chunksize))
+        return [(min(self.chunksize, self.num_perms - i*self.chunksize), s) \
+            for i, s in enumerate(seeds)] if study_n else []
+
+    def _get_executor(self, chunks):
+        """Get the process pool, started once, if more than one process was requested"""
+        if self.processes is None or self.processes < 2 or len(chunks) < 2:
+            return None
+        if self.pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self.pool = ProcessPoolExecutor(self.processes, initializer=_init_worker, initargs=(self,))
+        return self.pool
+
+    def _init_weights(self, weights):
+        """Get the normalized probability weight of each population gene"""
+        if weights is None:
+            return None
+        weights = np.asarray(weights, dtype=float)
+        if weights.size != self.pop_n or np.any(weights < 0) or not np.any(weights > 0):
+            raise Exception("EXPECTED {N:,} NON-NEGATIVE WEIGHTS, ONE PER POPULATION GENE".format(
+                N=self.pop_n))
+        return weights/weights.max()
+
+
+def _init_worker(objperm):
+    """Save the PermutationPvals object in a new worker process"""
+    _WORKER['objperm'] = objperm
+
+def _get_hits_worker(task):
+    """Count permutations as extreme as observed for a chunk, in a worker process"""
+    return _WORKER['objperm'].get_hits(*task)
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,102 @@
+"""Skip GO terms which cannot reach significance, before calculating their p-values.
+
+    A GO term is pruned if:
+      * Only enriched GO terms are wanted and the GO term is purified,
+        including all GO terms having no study items.
+      * Its minimum attainable p-value is too large to be significant (Tarone).
+
+    GO terms having few population items often cannot reach significance,
+    whatever the study set.
+
+    Pruned GO terms are still counted as tests in multiple-test corrections.
+    Their p-values are set to 1 in the corrections. GO terms which cannot reach
+    significance have the same corrected p-values below alpha as without pruning.
+    Pruning purified GO terms does not change Bonferroni or Sidak corrections.
+    Step-wise corrections, like Holm and fdr_bh, become more conservative if
+    purified GO terms would have been significant.
+
+        >>> goea_results = goeaobj.run_study(study, prune=True, enriched_only=True)
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+import collections as cx
+import numpy as np
+from goatools.pvalcalc import FisherVectorized
+
+
+class GoeaPruning(object):
+    """Skip GO terms which cannot reach significance, before calculating their p-values."""
+
+    # Multiple-test corrections whose corrected p-values are never smaller than
+    # uncorrected p-values. Others, like 'fdr' and two-stage FDRs, cannot be pruned
+    method2threshold = {
+        'bonferroni':lambda alpha, num_tests: alpha/num_tests,
+        'sidak':lambda alpha, num_tests: 1 - (1 - alpha)**(1.0/num_tests),
+        'holm':lambda alpha, num_tests: alpha,
+        'holm-sidak':lambda alpha, num_tests: alpha,
+        'simes-hochberg':lambda alpha, num_tests: alpha,
+        'hommel':lambda alpha, num_tests: alpha,
+        'fdr_bh':lambda alpha, num_tests: alpha,
+        'fdr_by':lambda alpha, num_tests: alpha,
+        'np_holm-sidak':lambda alpha, num_tests: alpha,
+        'np_simes-hochberg':lambda alpha, num_tests: alpha,
+        'np_hommel':lambda alpha, num_tests: alpha,
+        'np_fdr_bh':lambda alpha, num_tests: alpha,
+        'np_fdr_by':lambda alpha, num_tests: alpha,
+    }
+
+    def __init__(self, methods, alpha, pval_obj=None, prune=True, enriched_only=False):
+        self.methods = [nt.method for nt in methods]
+        self.alpha = alpha
+        self.prune = prune
+        self.enriched_only = enriched_only
+        # Number of GO terms tested, pruned because they are purified, or cannot be significant
+        self.ctr = cx.Counter()
+        if prune:
+            self._chk_methods()
+        # Calculates minimum attainable p-values
+        self.pval_obj = pval_obj if pval_obj is not None else FisherVectorized('fisher_vectorized', None)
+
+    def get_tested(self, study_counts, study_n, pop_counts, pop_n):
+        """Get True for GO terms whose p-values are to be calculated"""
+        study_counts = np.asarray(study_counts, dtype=np.int64)
+        pop_counts = np.asarray(pop_counts, dtype=np.int64)
+        tested = np.ones(study_counts.size, dtype=bool)
+        if self.enriched_only:
+            tested = study_counts*pop_n > pop_counts*study_n
+            self.ctr['purified'] += int(study_counts.size - tested.sum())
+        if self.prune and study_counts.size:
+            minpvals = self.pval_obj.calc_min_pvalues(study_n, pop_counts[tested], pop_n)
+            threshold = self.get_threshold(study_counts.size)
+            attainable = minpvals <= threshold*(1 + self.pval_obj.rel_tol)
+            self.ctr['unattainable'] += int(attainable.size - attainable.sum())
+            tested[tested] = attainable
+        self.ctr['tests'] += int(study_counts.size)
+        return tested
+
+    def get_num_pruned(self):
+        """Get the number of GO terms whose p-values were not calculated"""
+        return self.ctr['purified'] + self.ctr['unattainable']
+
+    def get_msg(self):
+        """Get a message reporting the number of GO terms pruned"""
+        return '{N:,} of {M:,} GO terms pruned: {P:,} purified, {U:,} cannot reach significance'.format(
+            N=self.get_num_pruned(), M=self.ctr['tests'], P=self.ctr['purified'], U=self.ctr['unattainable'])
+
+    def get_threshold(self, num_tests):
+        """Get the largest uncorrected p-value which can be significant in any method"""
+        thresholds = [self.method2threshold[m](self.alpha, num_tests) for m in self.methods]
+        # With no multiple-test corrections, uncorrected p-values are compared to alpha
+        return max(thresholds) if thresholds else self.alpha
+
+    def _chk_methods(self):
+        """Check that all multiple-test corrections can be pruned"""
+        bad = [m for m in self.methods if m not in self.method2threshold]
+        if bad:
+            raise Exception('CANNOT PRUNE WITH METHODS({BAD}). CAN PRUNE WITH: {OK}'.format(
+                BAD=' '.join(bad), OK=' '.join(sorted(self.method2threshold))))
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,143 @@
+"""Minimum-hypergeometric (mHG) enrichment of GO IDs over a ranked gene list.
+
+    Instead of one study set, the genes are ranked, most interesting first. Every
+    cutoff of the ranking defines a study set: the genes ranked above the cutoff.
+    The mHG of a GO ID is its smallest one-sided hypergeometric tail over all cutoffs
+    (Eden et al., 2007, PLoS Comput Biol 3:e39).
+
+    The smallest tail is always found at a cutoff just after a gene associated with
+    the GO ID. So the cumulative study counts are found in one pass over the ranking:
+    the k-th ranked gene of a GO ID is the cutoff where its study count becomes k.
+    Table probabilities are found from the log-factorial table shared with the
+    vectorized Fisher's exact test. Tails are summed away from the most likely
+    table, only until the rest of the tail is negligible.
+
+    The mHG is not a p-value, because it is the best of many cutoffs. The p-value
+    is no more than the mHG times the number of genes of the GO ID which can be
+    ranked above the last cutoff tried. This bound is conservative.
+
+        >>> objmhg = MinHypergeometric(incidence, pop_n)
+        >>> nts = objmhg.get_mhg(ranked_genes)
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+import collections as cx
+import numpy as np
+from goatools.pvalcalc import LOGFACTORIALS
+
+
+class MinHypergeometric(object):
+    """Minimum-hypergeometric (mHG) enrichment of GO IDs over a ranked gene list."""
+
+    ntobj = cx.namedtuple('NtMhg', 'mhg pval study_count rank_cutoff')
+
+    # Number of table probabilities summed for each tail before checking if the rest is negligible
+    blocksize = 32
+    # Maximum number of tails summed at once. Small chunks stay in the CPU cache
+    max_tails = 2048
+    # The rest of a tail is negligible if it is smaller than the sum, times this tolerance
+    rel_tol = 1e-12
+
+    def __init__(self, incidence, pop_n):
+        # Population genes by GO IDs. Population genes having no GO IDs are not rows
+        self.incidence = incidence
+        self.pop_n = pop_n
+
+    def get_mhg(self, ranked_genes, max_rank=None):
+        """Get the mHG, p-value bound, study count, and rank cutoff of every GO ID, as arrays.
+
+           Population genes not in the ranked list are ranked last. If max_rank
+           is given, only cutoffs in the top max_rank genes are tried.
+        """
+        num_ranked = len(ranked_genes) if max_rank is None else min(max_rank, len(ranked_genes))
+        gene2row = self.incidence.gene2row
+        ranks = [r for r, g in enumerate(ranked_genes[:num_ranked]) if g in gene2row]
+        rows = [gene2row[ranked_genes[r]] for r in ranks]
+        # Ranked annotated genes by GO IDs. Within a column, the rows are in ranked order
+        ranked = self.incidence.matrix[rows].tocsc()
+        ranked.sort_indices()
+        pop_counts = self.incidence.pop_counts
+        num_gos = pop_counts.size
+        col_counts = np.diff(ranked.indptr)
+        cols = np.repeat(np.arange(num_gos), col_counts)
+        # Cutoff after the k-th ranked gene of a GO ID: study count is k, study size is its rank
+        study_counts = np.arange(cols.size) - np.repeat(ranked.indptr[:-1], col_counts) + 1
+        study_ns = np.asarray(ranks, dtype=np.int64)[ranked.indices] + 1
+        tails = self._get_tails(study_counts, study_ns, pop_counts[cols])
+        # Smallest tail of each GO ID. Ties are broken by the smallest cutoff
+        order = np.lexsort((study_ns, tails, cols))
+        firsts = order[np.searchsorted(cols[order], np.flatnonzero(col_counts))]
+        mhg = np.ones(num_gos)
+        mhg_counts = np.zeros(num_gos, dtype=np.int64)
+        mhg_ns = np.full(num_gos, num_ranked, dtype=np.int64)
+        gos = cols[firsts]
+        mhg[gos] = tails[firsts]
+        mhg_counts[gos] = study_counts[firsts]
+        mhg_ns[gos] = study_ns[firsts]
+        # Union bound over the k-th gene of a GO ID being ranked at, or above, its mHG cutoff
+        pvals = np.minimum(1.0, mhg*np.minimum(pop_counts, num_ranked))
+        return self.ntobj(mhg=mhg, pval=pvals, study_count=mhg_counts, rank_cutoff=mhg_ns)
+
+    def _get_tails(self, study_counts, study_ns, pop_counts):
+        """Get the probabilities of study counts at least as large as those observed.
+
+           Tails above the mean are summed upward. Tails at or below the mean are
+           one minus the lower tail, which is summed downward.
+        """
+        tails = np.ones(study_counts.size)
+        upper = study_counts*self.pop_n > study_ns*pop_counts
+        tails[upper] = self._sum_tables(study_counts[upper], study_ns[upper], pop_counts[upper], 1)
+        lower = ~upper
+        tails[lower] -= self._sum_tables(study_counts[lower] - 1, study_ns[lower], pop_counts[lower], -1)
+        return np.clip(tails, 0.0, 1.0)
+
+    def _sum_tables(self, starts, study_ns, pop_counts, step):
+        """Sum the table probabilities from the start study counts, going up (1) or down (-1)"""
+        sums = np.zeros(starts.size)
+        for beg in range(0, starts.size, self.max_tails):
+            end = beg + self.max_tails
+            sums[beg:end] = self._sum_tables_chunk(starts[beg:end], study_ns[beg:end], pop_counts[beg:end], step)
+        return sums
+
+    def _sum_tables_chunk(self, starts, study_ns, pop_counts, step):
+        """Sum the table probabilities of a chunk of tails, a block of tables at a time.
+
+           Going away from the most likely table, each table is less likely than the
+           one before, by a ratio which falls. So the rest of a tail is no more than
+           a geometric series of the first table in the rest and the last ratio.
+        """
+        pop_n = self.pop_n
+        lfs = LOGFACTORIALS.get(pop_n)
+        lows = np.maximum(0, study_ns + pop_counts - pop_n)
+        highs = np.minimum(study_ns, pop_counts)
+        lasts = highs if step == 1 else lows
+        logmargins = lfs[pop_counts] + lfs[pop_n - pop_counts] + lfs[study_ns] + lfs[pop_n - study_ns] - lfs[pop_n]
+        starts = starts.copy()
+        sums = np.zeros(starts.size)
+        # Tails having no tables sum to 0
+        pending = np.flatnonzero((lasts - starts)*step >= 0)
+        # One more table than the block: the first table of the rest
+        offsets = np.arange(self.blocksize + 1)*step
+        while pending.size:
+            counts = starts[pending, None] + offsets
+            study_n = study_ns[pending, None]
+            pop_count = pop_counts[pending, None]
+            valid = (lasts[pending, None] - counts)*step >= 0
+            counts = np.where(valid, counts, starts[pending, None])
+            logps = logmargins[pending, None] - (
+                lfs[counts] + lfs[pop_count - counts] + lfs[study_n - counts] +
+                lfs[pop_n - pop_count - study_n + counts])
+            probs = np.where(valid, np.exp(logps), 0.0)
+            sums[pending] += probs[:, :-1].sum(1)
+            ratios = np.exp(logps[:, -1] - logps[:, -2])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rest = np.where(ratios < 1, probs[:, -1]/(1 - ratios), np.inf)
+            rest[~valid[:, -1]] = 0.0
+            starts[pending] += self.blocksize*step
+            pending = pending[rest > self.rel_tol*sums[pending]]
+        return sums
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
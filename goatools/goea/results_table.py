@@ -0,0 +1,141 @@
+"""GOEA results of one study set, stored as NumPy columns rather than one object per GO term.
+
+    GO IDs are indexes into the GO IDs of the population incidence matrix. Study
+    items are indexes into the population genes, stored in one array for all GO IDs.
+    Population items and GO Terms are shared by all tables of a GOEA.
+
+    Iterating yields GOEnrichmentRecord objects, created one at a time, so the
+    GOEA writers work on tables as on lists of GOEnrichmentRecord objects:
+
+        >>> goea_table = goeaobj.run_study(study, table=True)
+        >>> goeaobj.wr_xlsx('goea.xlsx', goea_table)
+        >>> pvals = goea_table.get_column('p_uncorrected')
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+import collections as cx
+import numpy as np
+
+
+class GoeaResultsTable(object):
+    """GOEA results of one study set, stored as NumPy columns rather than one object per GO term."""
+
+    def __init__(self, goeaobj, study_in_pop, study_counts, pvals):
+        incidence = goeaobj.get_incidence()
+        self.goeaobj = goeaobj
+        self.study_n = len(study_in_pop)
+        self.goidxs = np.arange(len(incidence.goids), dtype=np.int32)
+        self.study_counts = np.asarray(study_counts, dtype=np.int32)
+        self.pvals = cx.OrderedDict([('p_uncorrected', np.asarray(pvals, dtype=np.float64))])
+        self.method_flds = []
+        # Number of GO IDs pruned before calculating p-values, which still count as tests
+        self.num_pruned = 0
+        self.itemptr, self.items = self._init_items(incidence, study_in_pop)
+
+    def __len__(self):
+        return self.goidxs.size
+
+    def __getitem__(self, idx):
+        return self.get_record(idx)
+
+    def __iter__(self):
+        for idx in range(self.goidxs.size):
+            yield self.get_record(idx)
+
+    def get_record(self, idx):
+        """Get a GOEnrichmentRecord for one row, holding the same values as from run_study"""
+        from goatools.go_enrichment import GOEnrichmentRecord
+        goeaobj = self.goeaobj
+        incidence = goeaobj.incidence
+        goidx = self.goidxs[idx]
+        goid = incidence.goids[goidx]
+        genes = incidence.genes
+        rec = GOEnrichmentRecord(
+            goid,
+            p_uncorrected=float(self.pvals['p_uncorrected'][idx]),
+            study_items=set(genes[i] for i in self.items[self.itemptr[idx]:self.itemptr[idx+1]]),
+            pop_items=goeaobj.go2popitems[goid],
+            ratio_in_study=(int(self.study_counts[idx]), self.study_n),
+            ratio_in_pop=(int(incidence.pop_counts[goidx]), goeaobj.pop_n))
+        for nt_method in self.method_flds:
+            rec.set_corrected_pval(nt_method, self.pvals['p_' + nt_method.fieldname][idx])
+        rec.set_goterm(goeaobj.obo_dag)
+        return rec
+
+    def get_column(self, name):
+        """Get a column: GO, NS, enrichment, study_count, study_n, pop_count, pop_n, or a p-value"""
+        incidence = self.goeaobj.incidence
+        if name in self.pvals:
+            return self.pvals[name]
+        if name == 'GO':
+            return [incidence.goids[i] for i in self.goidxs]
+        if name == 'NS':
+            return self.goeaobj.get_goidx2ns()[self.goidxs]
+        if name == 'enrichment':
+            return np.where(self.get_enriched(), 'e', 'p')
+        if name == 'study_count':
+            return self.study_counts
+        if name == 'pop_count':
+            return incidence.pop_counts[self.goidxs]
+        if name == 'study_n':
+            return np.full(self.goidxs.size, self.study_n)
+        if name == 'pop_n':
+            return np.full(self.goidxs.size, self.goeaobj.pop_n)
+        raise KeyError('UNKNOWN COLUMN({C}): {P}'.format(C=name, P=' '.join(self.pvals)))
+
+    def get_pvalues(self):
+        """Get the p-values of the first method, if it exists. Else get the uncorrected p-values"""
+        if self.method_flds:
+            return self.pvals['p_' + self.method_flds[0].fieldname]
+        return self.pvals['p_uncorrected']
+
+    def get_enriched(self):
+        """Get True for GO IDs whose study ratio is larger than the population ratio"""
+        pop_counts = self.goeaobj.incidence.pop_counts[self.goidxs]
+        return (1.0 * self.study_counts / self.study_n) > (1.0 * pop_counts / self.goeaobj.pop_n)
+
+    def set_corrected_pvals(self, nt_method, pvals):
+        """Add a column of corrected p-values"""
+        self.method_flds.append(nt_method)
+        self.pvals['p_' + nt_method.fieldname] = np.asarray(pvals, dtype=np.float64)
+
+    def prune(self, tested):
+        """Remove GO IDs whose p-values were not calculated"""
+        self.num_pruned += int(tested.size - tested.sum())
+        self.take(tested)
+
+    def keep_if(self, keep_if):
+        """Keep the rows whose GOEnrichmentRecord passes the user's keep_if"""
+        self.take(np.array([keep_if(r) for r in self], dtype=bool))
+
+    def sort(self):
+        """Sort on enrichment, namespace, and uncorrected p-value, as are results from run_study"""
+        nss = self.goeaobj.get_goidx2ns()[self.goidxs]
+        self.take(np.lexsort((self.pvals['p_uncorrected'], nss, ~self.get_enriched())))
+
+    def take(self, idxs):
+        """Keep the rows given as indexes or as a boolean mask, in the order given"""
+        idxs = np.arange(self.goidxs.size)[idxs]
+        self.goidxs = self.goidxs[idxs]
+        self.study_counts = self.study_counts[idxs]
+        for name, pvals in self.pvals.items():
+            self.pvals[name] = pvals[idxs]
+        # Study items of the rows kept
+        lens = np.diff(self.itemptr)[idxs]
+        begs = np.repeat(self.itemptr[idxs], lens)
+        offsets = np.arange(lens.sum()) - np.repeat(np.cumsum(lens) - lens, lens)
+        self.items = self.items[begs + offsets]
+        self.itemptr = np.concatenate([[0], np.cumsum(lens)])
+
+    @staticmethod
+    def _init_items(incidence, study_in_pop):
+        """Get the population gene indexes of the study items of each GO ID"""
+        generows = np.array(sorted(incidence.gene2row[g] for g in study_in_pop if g in incidence.gene2row),
+                            dtype=np.int32)
+        go2genes = incidence.matrix[generows].T.tocsr()
+        return go2genes.indptr.astype(np.int64), generows[go2genes.indices]
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
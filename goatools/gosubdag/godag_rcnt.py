@@ -9,12 +9,13 @@ from goatools.gosubdag.godag_rcnt_init import CountRelativesInit
 class CountRelatives:
     """Get descendant/parent counts for all GO terms in a GODag and broad L0 and L1 terms."""
 
-    def __init__(self, go2obj, relationships=None, dcnt=True, go2letter=None):
+    # pylint: disable=too-many-arguments
+    def __init__(self, go2obj, relationships=None, dcnt=True, go2letter=None, closure=None):
         # print("INITIALIZING CountRelatives")
         # Subset go2obj contains only items needed by go_sources
         self.go2obj = go2obj
         # Count of total number of descendants for each GO term
-        _ini = CountRelativesInit(go2obj, relationships, dcnt, go2letter)
+        _ini = CountRelativesInit(go2obj, relationships, dcnt, go2letter, closure)
         self.go2descendants = _ini.go2descendants  # GO IDs
         # Used by: Semantic, Grouper
         self.go2parents = _ini.go2ancestors    # Will be DEPRECATED: renamed to go2ancestors
@@ -17,7 +17,8 @@ class CountRelativesInit:
     """Get descendant/parent counts for all GO terms in a GODag and broad L0 and L1 terms."""
 
 
-    def __init__(self, go2obj, relationships, dcnt, go2letter):
+    # pylint: disable=too-many-arguments
+    def __init__(self, go2obj, relationships, dcnt, go2letter, closure=None):
         # Subset go2obj contains only items needed by go_sources
         self.go2obj = go2obj
         self.relationships = relationships
@@ -26,8 +27,15 @@ class CountRelativesInit:
         # Ex: set(['part_of', 'regulates', 'negatively_regulates', 'positively_regulates'])
         _goobjs, _altgo2goobj = get_goobjs_altgo2goobj(self.go2obj)
         _r0 = not relationships  # True if not using relationships
-        self.go2descendants = get_go2descendants(_goobjs, relationships)
-        self.go2ancestors = get_go2ancestors(_goobjs, relationships)
+        if closure is None:
+            self.go2descendants = get_go2descendants(_goobjs, relationships)
+            self.go2ancestors = get_go2ancestors(_goobjs, relationships)
+        else:
+            # GoClosure for the full GO DAG, computed once and shared
+            _goids = set(o.item_id for o in _goobjs)
+            self.go2descendants = closure.get_go2descendants(
+                closure.get_goids_n_descendants(_goids))
+            self.go2ancestors = closure.get_go2ancestors(closure.get_goids_n_ancestors(_goids))
         self.go2dcnt = cx.Counter({go: len(p) for go, p in self.go2descendants.items()})
         add_alt_goids(self.go2ancestors, _altgo2goobj)
         add_alt_goids(self.go2descendants, _altgo2goobj)
@@ -99,6 +99,7 @@ class InitFields:
 
     def __init__(self, ini_main, **kws):
         self.go2obj = ini_main.go2obj
+        self.go2obj_orig = ini_main.go2obj_orig
         self.kws = get_kwargs(kws, self.exp_keys, None)
         if 'rcntobj' not in kws:
             self.kws['rcntobj'] = True
@@ -117,7 +118,14 @@ class InitFields:
                 self.go2obj,  # Subset go2obj contains only items needed by go_sources
                 self.relationships,
                 dcnt='dcnt' in self.kw_elems,
-                go2letter=self.kws.get('go2letter'))
+                go2letter=self.kws.get('go2letter'),
+                closure=self._get_closure())
+        return None
+
+    def _get_closure(self):
+        """Get the GoClosure shared by a GODag. Return None for other GO ID-to-GO Term dicts."""
+        if hasattr(self.go2obj_orig, 'get_closure'):
+            return self.go2obj_orig.get_closure(self.relationships)
         return None
 
     def get_go2nt_all(self, rcntobj):
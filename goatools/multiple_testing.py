@@ -7,19 +7,36 @@ A list of commonly used multiple correction routines
 from __future__ import print_function
 from __future__ import absolute_import
 import sys
-import random
 import numpy as np
 import collections as cx
 
 __copyright__ = "Copyright (C) 2010-2018, H Tang et al., All rights reserved."
 __author__ = "various"
 
+# Defined in the module, so results holding methods can be pickled (sent to worker processes)
+NtMethodInfo = cx.namedtuple("NtMethodInfo", "source method fieldname")
+
 class Methods(object):
     """Class to manage multipletest methods from both local and remote sources."""
 
     # https://github.com/statsmodels/statsmodels/blob/master/statsmodels/stats/multitest.py
     all_methods = [
-        ("local", ("bonferroni", "sidak", "holm", "fdr")),
+        ("local", (
+            'bonferroni',        #  0) Bonferroni one-step correction
+            'sidak',             #  1) Sidak one-step correction
+            'holm',              #  2) Holm step-down method using Bonferroni adjustments
+            'fdr',               #  3) FDR based on resampling
+            'fdr_bh',            #  4) FDR Benjamini/Hochberg  (non-negative), in NumPy
+            # NumPy implementations of these statsmodels methods:
+            'np_holm-sidak',     #  5) Holm-Sidak step-down method using Sidak adjustments
+            'np_simes-hochberg', #  6) Simes-Hochberg step-up method  (independent)
+            'np_hommel',         #  7) Hommel closed method based on Simes tests (non-negative)
+            'np_fdr_bh',         #  8) FDR Benjamini/Hochberg  (non-negative)
+            'np_fdr_by',         #  9) FDR Benjamini/Yekutieli (negative)
+            'np_fdr_tsbh',       # 10) FDR 2-stage Benjamini-Hochberg (non-negative)
+            'np_fdr_tsbky',      # 11) FDR 2-stage Benjamini-Krieger-Yekutieli (non-negative)
+            'np_fdr_gbs',        # 12) FDR adaptive Gavrilov-Benjamini-Sarkar
+            )),
         ("statsmodels", (
             'bonferroni',     #  0) Bonferroni one-step correction
             'sidak',          #  1) Sidak one-step correction
@@ -36,7 +53,7 @@ class Methods(object):
 
     ]
     prefixes = {'statsmodels':'sm_'}
-    NtMethodInfo = cx.namedtuple("NtMethodInfo", "source method fieldname")
+    NtMethodInfo = NtMethodInfo
 
     def __init__(self, usr_methods=None):
         self._srcmethod2fieldname = self._init_srcmethod2fieldname()
@@ -139,7 +156,10 @@ class Methods(object):
         """Only load statsmodels package if it is used."""
         if self.statsmodels_multicomp is not None:
             return self.statsmodels_multicomp
-        from statsmodels.sandbox.stats.multicomp import multipletests
+        try:
+            from statsmodels.stats.multitest import multipletests
+        except ImportError:
+            from statsmodels.sandbox.stats.multicomp import multipletests
         self.statsmodels_multicomp = multipletests
         return self.statsmodels_multicomp
 
@@ -201,26 +221,135 @@ class HolmBonferroni(_AbstractCorrection):
     """
     def set_correction(self):
         """Do Holm-Bonferroni multiple test correction on original p-values."""
-        if len(self.pvals):
-            idxs, correction = list(zip(*self._generate_significant()))
-            idxs = list(idxs)
-            self.corrected_pvals[idxs] *= correction
+        # Number of p-values not smaller than each p-value
+        num_pvals = self.n - np.searchsorted(np.sort(self.pvals), self.pvals, side='left')
+        significant = self.pvals < self.a * num_pvals
+        self.corrected_pvals[significant] *= num_pvals[significant]
+
+
+class _AbstractCorrectionSorted(_AbstractCorrection):
+    """Base class for corrections calculated on p-values sorted once, as in statsmodels."""
+
+    def set_correction(self):
+        """Sort the p-values, correct them, and return the corrected p-values to their places."""
+        idxs = np.argsort(self.pvals)
+        self.corrected_pvals = np.empty(self.n)
+        self.corrected_pvals[idxs] = self._get_corrected_sorted(self.pvals[idxs])
+
+    def _get_corrected_sorted(self, pvals):
+        # derived classes correct the sorted p-values;
+        # by default, as in _AbstractCorrection, the p-values are left uncorrected
+        return pvals
+
+    @staticmethod
+    def _get_stepup(pvals_raw):
+        """Each corrected p-value is the smallest raw p-value at its position or later."""
+        return np.minimum.accumulate(pvals_raw[::-1])[::-1]
 
-    def _generate_significant(self):
+    def _get_fdr_bh(self, pvals):
+        """Get Benjamini/Hochberg corrected p-values."""
+        return np.minimum(self._get_stepup(pvals * self.n / np.arange(1, self.n + 1)), 1)
 
-        pvals = self.pvals
-        pvals_idxs = list(zip(pvals, list(range(len(pvals)))))
-        pvals_idxs.sort()
 
-        num_pvals = len(self.pvals)
+class HolmSidak(_AbstractCorrectionSorted):
+    """Holm-Sidak step-down method using Sidak adjustments
+    >>> HolmSidak([0.01, 0.01, 0.03, 0.05, 0.005], a=0.05).corrected_pvals
+    array([0.03940399, 0.03940399, 0.0591    , 0.0591    , 0.02475125])
+    """
+
+    def _get_corrected_sorted(self, pvals):
+        with np.errstate(divide='ignore'):
+            pvals_raw = -np.expm1(np.arange(self.n, 0, -1) * np.log1p(-pvals))
+        return np.maximum.accumulate(pvals_raw)
+
+
+class SimesHochberg(_AbstractCorrectionSorted):
+    """Simes-Hochberg step-up method
+    >>> SimesHochberg([0.01, 0.01, 0.03, 0.05, 0.005], a=0.05).corrected_pvals
+    array([0.03 , 0.03 , 0.05 , 0.05 , 0.025])
+    """
 
-        from itertools import groupby
-        for pval, idxs in groupby(pvals_idxs, lambda x: x[0]):
-            idxs = list(idxs)
-            for p, i in idxs:
-                if p * 1. / num_pvals < self.a:
-                    yield (i, num_pvals)
-            num_pvals -= len(idxs)
+    def _get_corrected_sorted(self, pvals):
+        return self._get_stepup(np.arange(self.n, 0, -1) * pvals)
+
+
+class Hommel(_AbstractCorrectionSorted):
+    """Hommel closed method based on Simes tests. One vectorized pass for each subset size.
+    >>> Hommel([0.01, 0.01, 0.03, 0.05, 0.005], a=0.05).corrected_pvals
+    array([0.03, 0.03, 0.05, 0.05, 0.02])
+    """
+
+    def _get_corrected_sorted(self, pvals):
+        corrected = pvals.copy()
+        for num in range(self.n, 1, -1):
+            cim = np.min(num * pvals[-num:] / np.arange(1, num + 1.0))
+            corrected[-num:] = np.maximum(corrected[-num:], cim)
+            corrected[:-num] = np.maximum(corrected[:-num], np.minimum(num * pvals[:-num], cim))
+        return corrected
+
+
+class FdrBH(_AbstractCorrectionSorted):
+    """FDR Benjamini/Hochberg
+    >>> FdrBH([0.01, 0.01, 0.03, 0.05, 0.005], a=0.05).corrected_pvals
+    array([0.01666667, 0.01666667, 0.0375    , 0.05      , 0.01666667])
+    """
+
+    def _get_corrected_sorted(self, pvals):
+        return self._get_fdr_bh(pvals)
+
+
+class FdrBY(_AbstractCorrectionSorted):
+    """FDR Benjamini/Yekutieli
+    >>> FdrBY([0.01, 0.01, 0.03, 0.05, 0.005], a=0.05).corrected_pvals
+    array([0.03805556, 0.03805556, 0.085625  , 0.11416667, 0.03805556])
+    """
+
+    def _get_corrected_sorted(self, pvals):
+        ranks = np.arange(1, self.n + 1)
+        return self._get_stepup(pvals * self.n * np.sum(1.0 / ranks) / ranks)
+
+
+class FdrTSBH(_AbstractCorrectionSorted):
+    """FDR 2-stage Benjamini-Hochberg
+    >>> FdrTSBH([0.01, 0.01, 0.03, 0.05, 0.005], a=0.05).corrected_pvals
+    array([0.01666667, 0.01666667, 0.0375    , 0.05      , 0.01666667])
+    """
+
+    alpha_factor = 0.0
+
+    def _get_corrected_sorted(self, pvals):
+        # As in statsmodels fdrcorrection_twostage using one iteration, the default
+        fact = 1.0 + self.alpha_factor * self.a
+        corrected = self._get_fdr_bh(pvals)
+        # Stage one: Number of p-values rejected by Benjamini/Hochberg at alpha/fact
+        rejected = np.nonzero(pvals <= np.arange(1, self.n + 1) * self.a / fact / self.n)[0]
+        num_rejected = rejected[-1] + 1 if rejected.size else 0
+        if 0 < num_rejected < self.n:
+            # Stage two: Correct for the estimated number of true null hypotheses
+            corrected = corrected * (self.n - num_rejected) / self.n
+        return corrected * fact
+
+
+class FdrTSBKY(FdrTSBH):
+    """FDR 2-stage Benjamini-Krieger-Yekutieli
+    >>> FdrTSBKY([0.01, 0.01, 0.03, 0.05, 0.005], a=0.05).corrected_pvals
+    array([0.0035  , 0.0035  , 0.007875, 0.0105  , 0.0035  ])
+    """
+
+    alpha_factor = 1.0
+
+
+class FdrGBS(_AbstractCorrectionSorted):
+    """FDR adaptive Gavrilov-Benjamini-Sarkar
+    >>> FdrGBS([0.01, 0.01, 0.03, 0.05, 0.005], a=0.05).corrected_pvals
+    array([0.02512563, 0.02512563, 0.02512563, 0.02512563, 0.02512563])
+    """
+
+    def _get_corrected_sorted(self, pvals):
+        ranks = np.arange(1, self.n + 1)
+        with np.errstate(divide='ignore'):
+            pvals_raw = (self.n + 1.0 - ranks) / ranks * pvals / (1.0 - pvals)
+        return self._get_stepup(np.maximum.accumulate(pvals_raw))
 
 
 class FDR(object):
@@ -229,11 +358,15 @@ class FDR(object):
     http://www.biomedcentral.com/1471-2105/6/168
     """
     def __init__(self, p_val_distribution, results, a=.05):
-        self.corrected_pvals = fdr = []
-        for rec in results:
-            q = (sum(1 for x in p_val_distribution if x < rec.p_uncorrected)
-                 * 1.0 / len(p_val_distribution))
-            fdr.append(q)
+        self.corrected_pvals = self.get_corrected_pvals(
+            p_val_distribution, [rec.p_uncorrected for rec in results])
+
+    @staticmethod
+    def get_corrected_pvals(p_val_distribution, pvals):
+        """Get the fraction of resampled p-values smaller than each p-value"""
+        # Count the resampled p-values smaller than each p-value using a binary search
+        distribution = np.sort(p_val_distribution)
+        return (np.searchsorted(distribution, pvals, side='left') * 1.0 / len(distribution)).tolist()
 
 def mcorrection_factory(pvals, alpha, method):
     """Return 'multiple correction' object of requested AbstractCorrection base class."""
@@ -246,33 +379,17 @@ def mcorrection_factory(pvals, alpha, method):
 
 
 def calc_qval(study_n, pop_n,
-              pop, assoc, term_pop, obo_dag, T=500):
+              pop, assoc, term_pop, obo_dag, T=500, seed=None, processes=None):
     """Generate p-value distribution for FDR based on resampling."""
-    from goatools.pvalcalc import FisherFactory
-    from goatools.ratio import count_terms
+    from goatools.ratio import get_terms
+    from goatools.goea.incidence import GoeaIncidence
+    from goatools.goea.fdr_resampling import FdrResampling
     sys.stderr.write("Generate p-value distribution for FDR "
-                     "based on resampling (this might take a while)\n")
-    distribution = []
-    calc_pvalue = FisherFactory().pval_obj.calc_pvalue
-    for i in range(T):
-        new_study = random.sample(pop, study_n)
-        new_term_study = count_terms(new_study, assoc, obo_dag)
-
-        smallest_p = 1
-        for term, study_count in list(new_term_study.items()):
-            pop_count = term_pop[term]
-            p_uncorrected = calc_pvalue(study_count,
-                                        study_n,
-                                        pop_count,
-                                        pop_n)
-            if p_uncorrected < smallest_p:
-                smallest_p = p_uncorrected
-
-        distribution.append(smallest_p)
-        if i % 10 == 0:
-            sys.stderr.write("Sample {0} / {1}: "
-                             "p-value {2}\n".format(i, T, smallest_p))
-    return distribution
+                     "based on resampling {T} study sets\n".format(T=T))
+    # Population counts are found from the association. term_pop is no longer needed
+    incidence = GoeaIncidence(get_terms("population", pop, assoc, obo_dag, None))
+    objfdr = FdrResampling(incidence.matrix, incidence.pop_counts, pop_n, T, seed, processes)
+    return objfdr.get_pval_distribution(study_n).tolist()
 
 
 if __name__ == '__main__':
@@ -41,6 +41,9 @@ class OBOReader(object):
         self.format_version = None # e.g., "1.2" of "format-version:" line
         self.data_version = None # e.g., "releases/2016-07-07" from "data-version:" line
         self.typedefs = {}
+        # If a dict, the byte offset of each [Term] stanza is saved while reading, for lazy_attrs
+        self.goid2offset = None
+        self.offset = 0
 
         # True if obo file exists or if a link to an obo file exists.
         if os.path.isfile(obo_file):
@@ -55,15 +58,18 @@ class OBOReader(object):
     def __iter__(self):
         """Return one GO Term record at a time from an obo file."""
         # Wait to open file until needed. Automatically close file when done.
-        with open(self.obo_file) as fstream:
+        goid2offset = self.goid2offset
+        with open(self.obo_file) if goid2offset is None else open(self.obo_file, 'rb') as fstream:
+            lines = fstream if goid2offset is None else self._iter_lines_offset(fstream)
             rec_curr = None # Stores current GO Term
             typedef_curr = None  # Stores current typedef
-            for line in fstream:
+            for line in lines:
                 # obo lines start with any of: [Term], [Typedef], /^\S+:/, or /^\s*/
                 if self.data_version is None:
                     self._init_obo_version(line)
                 if rec_curr is None and line[0:6].lower() == "[term]":
                     rec_curr = GOTerm()
+                    offset_curr = self.offset
                     if self.optobj:
                         self.optobj.init_datamembers(rec_curr)
                 elif typedef_curr is None and line[0:9].lower() == "[typedef]":
@@ -74,6 +80,8 @@ class OBOReader(object):
                         self._add_to_obj(rec_curr, typedef_curr, line)
                     else:
                         if rec_curr is not None:
+                            if goid2offset is not None:
+                                goid2offset[rec_curr.item_id] = offset_curr
                             yield rec_curr
                             rec_curr = None
                         elif typedef_curr is not None:
@@ -82,8 +90,18 @@ class OBOReader(object):
                             typedef_curr = None
             # Return last record, if necessary
             if rec_curr is not None:
+                if goid2offset is not None:
+                    goid2offset[rec_curr.item_id] = offset_curr
                 yield rec_curr
 
+    def _iter_lines_offset(self, fstream):
+        """Return lines, as in text mode, from an obo file opened as bytes. Save each line's offset."""
+        offset = 0
+        for line in fstream:
+            self.offset = offset
+            offset += len(line)
+            yield line.decode('utf-8').replace('\r\n', '\n')
+
     def _add_to_obj(self, rec_curr, typedef_curr, line):
         """Add information on line to GOTerm or Typedef."""
         if rec_curr is not None:
@@ -141,6 +159,9 @@ class GOTerm(object):
     GO term, actually contain a lot more properties than interfaced here
     """
 
+    # _godag: The GODag holding this GO Term, kept out of the data members, like name and level
+    __slots__ = ('__dict__', '__weakref__', '_godag')
+
     def __init__(self):
         self.id = ""                # GO:NNNNNNN  **DEPRECATED** RESERVED NAME IN PYTHON
         self.item_id = ""           # GO:NNNNNNN (will replace deprecated "id")
@@ -154,6 +175,10 @@ class GOTerm(object):
         self.is_obsolete = False    # is_obsolete
         self.alt_ids = set()        # alternative identifiers
 
+    def __getstate__(self):
+        # The GODag is not pickled or copied with a GO Term. An unpickled GODag sets it again
+        return self.__dict__
+
     def __str__(self):
         ret = ['{GO}\t'.format(GO=self.item_id)]
         if self.level is not None:
@@ -204,6 +229,9 @@ class GOTerm(object):
 
     def get_all_parents(self):
         """Return all parent GO IDs."""
+        closure = self._get_closure(None)
+        if closure is not None:
+            return closure.get_ancestors(self.item_id)
         all_parents = set()
         for parent in self.parents:
             all_parents.add(parent.item_id)
@@ -212,6 +240,9 @@ class GOTerm(object):
 
     def get_all_upper(self):
         """Return all parent GO IDs through both 'is_a' and all relationships."""
+        closure = self._get_closure(True)
+        if closure is not None:
+            return closure.get_ancestors(self.item_id)
         all_upper = set()
         for upper in self.get_goterms_upper():
             all_upper.add(upper.item_id)
@@ -220,6 +251,9 @@ class GOTerm(object):
 
     def get_all_children(self):
         """Return all children GO IDs."""
+        closure = self._get_closure(None)
+        if closure is not None:
+            return closure.get_descendants(self.item_id)
         all_children = set()
         for parent in self.children:
             all_children.add(parent.item_id)
@@ -228,12 +262,25 @@ class GOTerm(object):
 
     def get_all_lower(self):
         """Return all parent GO IDs through both reverse 'is_a' and all relationships."""
+        closure = self._get_closure(True)
+        if closure is not None:
+            return closure.get_descendants(self.item_id)
         all_lower = set()
         for lower in self.get_goterms_lower():
             all_lower.add(lower.item_id)
             all_lower |= lower.get_all_lower()
         return all_lower
 
+    def _get_closure(self, relationships):
+        """Get the closure shared by the GODag holding this GO Term, if it is in a GODag."""
+        godag = getattr(self, '_godag', None)
+        if godag is None:
+            return None
+        if relationships and 'relationship' not in (godag.optional_attrs or ()):
+            # Relationships are not loaded. Traverse the GO Terms, as when not in a GODag
+            return None
+        return godag.get_closure(relationships)
+
     def get_all_parent_edges(self):
         """Return tuples for all parent GO IDs, containing current GO ID and parent GO ID."""
         all_parent_edges = set()
@@ -278,16 +325,100 @@ class GOTerm(object):
 
 
 class GODag(dict):
-    """Holds the GO DAG as a dict."""
+    """Holds the GO DAG as a dict.
 
-    def __init__(self, obo_file="go-basic.obo", optional_attrs=None, load_obsolete=False, prt=sys.stdout):
-        super(GODag, self).__init__()
-        self.version, self.data_version = self.load_obo_file(obo_file, optional_attrs, load_obsolete, prt)
+       If cache is True or a file name, a binary snapshot of the parsed obo file
+       is read if it is current. Otherwise the obo is parsed and the snapshot written.
+
+       If compact is True, GO Terms are stored in an integer-indexed GoTermStore
+       and the GODag values are light-weight views having the GOTerm attributes.
+
+       If lazy_attrs is True or a set of optional attributes, those optional
+       attributes are loaded from the obo file when first accessed on a GO Term.
 
-    def load_obo_file(self, obo_file, optional_attrs, load_obsolete, prt):
+       If reader is 'mmap', the obo file is read with a memory-mapped, bytes-level
+       reader, which decodes only the fields which are stored. If reader is
+       'parallel', stanza-aligned chunks of the obo file are parsed in a pool of
+       processes (default: one per CPU).
+
+       Ancestors and descendants of all GO Terms are computed once for each set of
+       relationships requested from get_closure and shared by all callers.
+
+       apply_release updates the GO DAG and its closures in place from a new obo
+       release and returns the added, obsoleted, renamed, and re-parented GO Terms.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, obo_file="go-basic.obo", optional_attrs=None, load_obsolete=False,
+                 prt=sys.stdout, cache=None, compact=False, lazy_attrs=None, reader=None,
+                 processes=None):
+        super(GODag, self).__init__()
+        self.termstore = None  # GoTermStore, if compact
+        self.closures = {}     # relationships -> GoClosure
+        self.lazyattrs = None  # OboLazyAttrs, if lazy_attrs
+        self.optional_attrs = None
+        self.load_obsolete = load_obsolete
+        self.version, self.data_version = self.load_obo_file(
+            obo_file, optional_attrs, load_obsolete, prt, cache, compact, lazy_attrs,
+            (reader, processes))
+
+    def load_obo_file(self, obo_file, optional_attrs, load_obsolete, prt, cache=None,
+                      compact=False, lazy_attrs=None, reader=None):
         """Read obo file. Store results."""
-        reader = OBOReader(obo_file, optional_attrs)
+        lazy_attrs = self._init_lazy_attrs(optional_attrs, lazy_attrs)
+        if compact and lazy_attrs:
+            # GoTermViews read optional attributes from the GoTermStore, so load them now
+            optional_attrs = set(optional_attrs if optional_attrs else []).union(lazy_attrs)
+            lazy_attrs = None
+        reader = self._init_reader(obo_file, optional_attrs, reader)
+        if lazy_attrs:
+            # Lazy attributes are read from [Term] stanzas found while parsing the obo file
+            reader.goid2offset = {}
+        self.optional_attrs = set(reader.optobj.optional_attrs) if reader.optobj else None
+        self.load_obsolete = load_obsolete
+        # Optionally load a binary snapshot of a previously parsed obo file
+        snapshot = self._init_snapshot(cache, reader, load_obsolete)
+        payload = snapshot.read(reader) if snapshot is not None else None
+        if payload is not None:
+            self._load_snapshot(payload, compact)
+        else:
+            self._load_obo_reader(reader, load_obsolete)
+            if snapshot is not None or compact:
+                payload = self._get_payload(reader)
+            if snapshot is not None:
+                snapshot.save(payload, prt)
+            if compact:
+                self.clear()
+                self._load_termstore(payload)
+        self.typedefs = reader.typedefs
+        if lazy_attrs:
+            # If loaded from a snapshot, the obo file was not parsed. Offsets are found on first use
+            goid2offset = reader.goid2offset if payload is None else None
+            self._load_lazy_attrs(reader.obo_file, lazy_attrs, goid2offset)
+        self.set_goterms_godag(self.values())
+        desc = self._str_desc(reader)
+        if prt:
+            prt.write("{DESC}\n".format(DESC=desc))
+        return desc, reader.data_version
 
+    @staticmethod
+    def _init_reader(obo_file, optional_attrs, reader):
+        """Create the obo reader: None (line-by-line), 'mmap', or 'parallel'."""
+        # reader may be the reader name or a tuple: (reader name, number of processes)
+        reader, processes = reader if isinstance(reader, tuple) else (reader, None)
+        if reader is None:
+            return OBOReader(obo_file, optional_attrs)
+        if reader == 'mmap':
+            from goatools.godag.obo_reader_mmap import OboReaderMmap
+            return OboReaderMmap(obo_file, optional_attrs)
+        if reader == 'parallel':
+            from goatools.godag.obo_reader_parallel import OboReaderParallel
+            return OboReaderParallel(obo_file, optional_attrs, processes)
+        raise ValueError("UNKNOWN READER({R}). EXPECTED: None, 'mmap', or 'parallel'".format(
+            R=reader))
+
+    def _load_obo_reader(self, reader, load_obsolete):
+        """Parse obo file. Link GO Terms and set their level and depth."""
         # Save alt_ids and their corresponding main GO ID. Add to GODag after populating GO Terms
         alt2rec = {}
         for rec in reader:
@@ -309,10 +440,89 @@ class GODag(dict):
         # Add alt_ids to go2obj
         for goid_alt, rec in alt2rec.items():
             self[goid_alt] = rec
-        desc = self._str_desc(reader)
-        if prt:
-            prt.write("{DESC}\n".format(DESC=desc))
-        return desc, reader.data_version
+
+    def _get_payload(self, reader):
+        """Get integer-indexed GO DAG data for a snapshot or a GoTermStore."""
+        from goatools.godag.snapshot import get_payload
+        return get_payload(self, reader)
+
+    def _load_snapshot(self, payload, compact):
+        """Load GO Terms from a snapshot payload."""
+        if compact:
+            self._load_termstore(payload)
+        else:
+            from goatools.godag.snapshot import load_godag
+            load_godag(self, payload)
+
+    def _load_termstore(self, payload):
+        """Store GO Terms in a GoTermStore. Fill GODag with views of GO Terms."""
+        from goatools.godag.termstore import GoTermStore
+        self.termstore = GoTermStore(payload)
+        self.update(self.termstore.get_go2view())
+
+    def _load_lazy_attrs(self, obo_file, lazy_attrs, goid2offset):
+        """Load optional attributes from the obo file when first accessed on a GO Term."""
+        from goatools.godag.obo_lazy_attrs import OboLazyAttrs
+        self.lazyattrs = OboLazyAttrs(obo_file, self, lazy_attrs, goid2offset)
+
+    def load_optional_attrs(self):
+        """Load all lazy optional attributes on all GO Terms in one pass through the obo file."""
+        if self.lazyattrs is not None:
+            self.lazyattrs.load_all()
+
+    @staticmethod
+    def _init_lazy_attrs(optional_attrs, lazy_attrs):
+        """Get optional attributes to load on first access, if they are not loaded now."""
+        if not lazy_attrs:
+            return None
+        attrs_all = OboOptionalAttrs.optional_exp
+        if lazy_attrs is True:
+            lazy_attrs = attrs_all.difference({'defn'})
+        lazy_attrs = OboOptionalAttrs.get_optional_attrs(lazy_attrs, attrs_all)
+        if optional_attrs:
+            lazy_attrs.difference_update(OboOptionalAttrs.get_optional_attrs(optional_attrs, attrs_all))
+        return lazy_attrs
+
+    def apply_release(self, obo_file, prt=sys.stdout, reader=None):
+        """Update the GO DAG in place from a new obo release. Return the differences."""
+        if self.termstore is not None:
+            raise RuntimeError("apply_release IS NOT SUPPORTED ON A compact GODag")
+        if self.lazyattrs is not None:
+            # Compare all optional attributes, which are then kept in the GODag
+            self.load_optional_attrs()
+            self.optional_attrs = set(self.optional_attrs if self.optional_attrs else []).union(
+                self.lazyattrs.optional_attrs)
+            self.lazyattrs = None
+        from goatools.godag.release import apply_release
+        return apply_release(self, self._init_reader(obo_file, self.optional_attrs, reader), prt)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # GO Terms are pickled without their GODag
+        self.set_goterms_godag(self.values())
+
+    def set_goterms_godag(self, goterms):
+        """GO Terms get all ancestors and descendants from the closures of this GODag."""
+        for goterm in goterms:
+            goterm._godag = self  # pylint: disable=protected-access
+
+    def get_closure(self, relationships=None):
+        """Get ancestors and descendants of all GO Terms, computed once per relationship set."""
+        from goatools.godag.closure import GoClosure
+        from goatools.godag.closure import get_relationships_key
+        key = get_relationships_key(relationships)
+        if key not in self.closures:
+            self.closures[key] = GoClosure(self, key)
+        return self.closures[key]
+
+    @staticmethod
+    def _init_snapshot(cache, reader, load_obsolete):
+        """Return a GoDagSnapshot if the user requested a cache. Otherwise return None."""
+        if not cache:
+            return None
+        from goatools.godag.snapshot import GoDagSnapshot
+        optional_attrs = reader.optobj.optional_attrs if reader.optobj else None
+        return GoDagSnapshot(reader.obo_file, cache, optional_attrs, load_obsolete)
 
     def _str_desc(self, reader):
         """String containing information about the current GO DAG."""
@@ -354,59 +564,10 @@ class GODag(dict):
                     parent_rec.relationship_rev[relationship_type].add(rec_curr)
 
     def _set_level_depth(self, optobj):
-        """Set level, depth and add inverted relationships."""
+        """Set level, depth, and reldepth (if relationships are loaded) in one topological pass."""
+        from goatools.godag.level_depth import set_level_depth
         has_relationship = optobj is not None and 'relationship' in optobj.optional_attrs
-
-        def _init_level(rec):
-            if rec.level is None:
-                if rec.parents:
-                    rec.level = min(_init_level(rec) for rec in rec.parents) + 1
-                else:
-                    rec.level = 0
-            return rec.level
-
-        def _init_depth(rec):
-            if rec.depth is None:
-                if rec.parents:
-                    rec.depth = max(_init_depth(rec) for rec in rec.parents) + 1
-                else:
-                    rec.depth = 0
-            return rec.depth
-
-        def _init_reldepth(rec):
-            if not hasattr(rec, 'reldepth'):
-                up_terms = rec.get_goterms_upper()
-                if up_terms:
-                    rec.reldepth = max(_init_reldepth(rec) for rec in up_terms) + 1
-                else:
-                    rec.reldepth = 0
-            return rec.reldepth
-
-        for rec in self.values():
-
-            # Add invert relationships
-            if has_relationship:
-                if rec.depth is None:
-                    _init_reldepth(rec)
-
-                # print("BBBBBBBBBBB1", rec.item_id, rec.relationship)
-                #for (typedef, terms) in rec.relationship.items():
-                #    invert_typedef = self.typedefs[typedef].inverse_of
-                #    # print("BBBBBBBBBBB2 {} ({}) ({}) ({})".format(
-                #    #    rec.item_id, rec.relationship, typedef, invert_typedef))
-                #    if invert_typedef:
-                #        # Add inverted relationship
-                #        for term in terms:
-                #            if not hasattr(term, 'relationship'):
-                #                term.relationship = defaultdict(set)
-                #            term.relationship[invert_typedef].add(rec)
-                # print("BBBBBBBBBBB3", rec.item_id, rec.relationship)
-
-            if rec.level is None:
-                _init_level(rec)
-
-            if rec.depth is None:
-                _init_depth(rec)
+        set_level_depth(self.values(), has_relationship)
 
     def write_dag(self, out=sys.stdout):
         """Write info for all GO Terms in obo file, sorted numerically."""
@@ -610,13 +771,14 @@ class GODag(dict):
     def update_association(self, association):
         """Add the GO parents of a gene's associated GO IDs to the gene's association."""
         bad_goids = set()
+        closure = self.get_closure()
         # Loop through all sets of GO IDs for all genes
         for goids in association.values():
             parents = set()
             # Iterate thru each GO ID in the current gene's association
             for goid in goids:
                 try:
-                    parents.update(self[goid].get_all_parents())
+                    parents.update(closure.get_ancestors(goid))
                 except:
                     bad_goids.add(goid.strip())
             # Add the GO parents of all GO IDs in the current gene's association
@@ -1,4 +1,10 @@
-"""Options for calculating uncorrected p-values."""
+"""Options for calculating uncorrected p-values.
+
+    Two-tailed p-values are calculated by default. One-sided p-values test
+    enrichment ('greater') or purification ('less') of study items:
+
+        >>> pval_obj = FisherFactory(pvalcalc='fisher_vectorized', alternative='greater').pval_obj
+"""
 
 from __future__ import print_function
 
@@ -7,14 +13,23 @@ __author__ = "DV Klopfenstein"
 
 import collections as cx
 import sys
+import threading
+import numpy as np
 
 class PvalCalcBase(object):
     """Base class for initial p-value calculations."""
 
-    def __init__(self, name, pval_fnc, log):
+    # Two-tailed, or one-sided: more study items (enriched) or fewer (purified) than expected
+    alternatives = ('two-sided', 'greater', 'less')
+
+    def __init__(self, name, pval_fnc, log, alternative='two-sided'):
         self.log = log
         self.name = name
         self.pval_fnc = pval_fnc
+        if alternative not in self.alternatives:
+            raise Exception("UNKNOWN ALTERNATIVE({A}). EXPECTED: {E}".format(
+                A=alternative, E=' '.join(self.alternatives)))
+        self.alternative = alternative
 
     def calc_pvalue(self, study_count, study_n, pop_count, pop_n):
         """pvalues are calculated in derived classes."""
@@ -27,16 +42,19 @@ class PvalCalcBase(object):
 class FisherClass(PvalCalcBase):
     """From the 'fisher' package, use function, pvalue_population."""
 
-    def __init__(self, name, log):
+    alternative2tail = {'two-sided':'two_tail', 'greater':'right_tail', 'less':'left_tail'}
+
+    def __init__(self, name, log, alternative='two-sided'):
         import fisher
-        super(FisherClass, self).__init__(name, fisher.pvalue_population, log)
+        super(FisherClass, self).__init__(name, fisher.pvalue_population, log, alternative)
+        self.tail = self.alternative2tail[alternative]
 
     def calc_pvalue(self, study_count, study_n, pop_count, pop_n):
         """Calculate uncorrected p-values."""
         # k, n = study_true, study_tot,
         # K, N = population_true, population_tot
         # def pvalue_population(int k, int n, int K, int N): ...
-        return self.pval_fnc(study_count, study_n, pop_count, pop_n).two_tail
+        return getattr(self.pval_fnc(study_count, study_n, pop_count, pop_n), self.tail)
 
 
 class FisherScipyStats(PvalCalcBase):
@@ -44,9 +62,9 @@ class FisherScipyStats(PvalCalcBase):
 
     fmterr = "STUDY={A}/{B} POP={C}/{D} scnt({scnt}) stot({stot}) pcnt({pcnt}) ptot({ptot})"
 
-    def __init__(self, name, log):
+    def __init__(self, name, log, alternative='two-sided'):
         from scipy import stats
-        super(FisherScipyStats, self).__init__(name, stats.fisher_exact, log)
+        super(FisherScipyStats, self).__init__(name, stats.fisher_exact, log, alternative)
 
     def calc_pvalue(self, study_count, study_n, pop_count, pop_n):
         """Calculate uncorrected p-values."""
@@ -70,36 +88,275 @@ class FisherScipyStats(PvalCalcBase):
         assert cvar >= 0, self.fmterr.format(
             A=avar, B=bvar, C=cvar, D=dvar, scnt=study_count, stot=study_n, pcnt=pop_count, ptot=pop_n)
         # stats.fisher_exact returns oddsratio, pval_uncorrected
-        _, p_uncorrected = self.pval_fnc([[avar, bvar], [cvar, dvar]])
+        _, p_uncorrected = self.pval_fnc([[avar, bvar], [cvar, dvar]], alternative=self.alternative)
         return p_uncorrected
 
 
+class LogFactorials(object):
+    """Table of log(i!) for i in 0 to the largest population size seen, shared by Fisher calculators."""
+
+    def __init__(self):
+        self.table = np.zeros(1)
+
+    def get(self, pop_n):
+        """Get log(i!) for i in 0 to at least pop_n. The table is rebuilt only for a larger pop_n."""
+        table = self.table
+        if table.size <= pop_n:
+            from scipy.special import gammaln
+            table = gammaln(np.arange(pop_n + 1) + 1.0)
+            self.table = table
+        return table
+
+# One log-factorial table is built for each process, sized to the largest population
+LOGFACTORIALS = LogFactorials()
+
+
+class FisherVectorized(PvalCalcBase):
+    """Fisher's exact test p-values for many 2x2 tables at once, using NumPy.
+
+       The hypergeometric probability of each table is computed from a table of
+       log-factorials. As in the 'fisher' package, the two-tailed p-value sums the
+       probabilities of all tables no more likely than the observed table.
+       One-sided p-values sum the probabilities of the tables in one tail,
+       so half of the tables are visited on average.
+       As in scipy.stats.fisher_exact, tables whose probabilities are within a
+       relative tolerance of 1e-7 (rel_tol) of the observed table's are summed.
+       P-values match those from scipy.stats.fisher_exact to the same relative tolerance.
+    """
+
+    # Tables whose probabilities are within this relative tolerance of the observed are summed.
+    # P-values match scipy.stats.fisher_exact to this relative tolerance
+    rel_tol = 1e-7
+    # Maximum number of table probabilities computed at once. Small chunks stay in the CPU cache
+    max_vals = 65536
+
+    def __init__(self, name, log, alternative='two-sided'):
+        super(FisherVectorized, self).__init__(name, self.calc_pvalues, log, alternative)
+
+    def calc_pvalue(self, study_count, study_n, pop_count, pop_n):
+        """Calculate one uncorrected p-value."""
+        return float(self.calc_pvalues([study_count], study_n, [pop_count], pop_n)[0])
+
+    def calc_pvalues(self, study_counts, study_n, pop_counts, pop_n):
+        """Calculate uncorrected p-values for arrays of study counts and population counts."""
+        study_counts = np.asarray(study_counts, dtype=np.int64)
+        pop_counts = np.asarray(pop_counts, dtype=np.int64)
+        assert np.all(study_counts <= pop_counts), "STUDY COUNTS MUST NOT EXCEED POPULATION COUNTS"
+        # Tables having the same margins as the observed table: All, or those in one tail
+        lows = np.maximum(0, study_n + pop_counts - pop_n)
+        highs = np.minimum(study_n, pop_counts)
+        if self.alternative == 'greater':
+            lows = study_counts
+        elif self.alternative == 'less':
+            highs = study_counts
+        lens = highs - lows + 1
+        pvals = np.zeros(study_counts.size)
+        for beg, end in self._get_chunks(lens):
+            pvals[beg:end] = self._calc_pvalues(
+                study_counts[beg:end], study_n, pop_counts[beg:end], pop_n,
+                lows[beg:end], lens[beg:end])
+        return pvals
+
+    def calc_min_pvalues(self, study_n, pop_counts, pop_n):
+        """Get a lower bound of the smallest p-value attainable by any table having the same margins.
+
+           No two-tailed p-value is smaller than the probability of the least likely
+           table, which is one of the two most extreme tables. The smallest
+           one-sided p-value is the probability of the most extreme table in its tail.
+        """
+        pop_counts = np.asarray(pop_counts, dtype=np.int64)
+        lfs = self._get_logfactorials(pop_n)
+        lows = np.maximum(0, study_n + pop_counts - pop_n)
+        highs = np.minimum(study_n, pop_counts)
+        logmargins = lfs[pop_counts] + lfs[pop_n - pop_counts] + lfs[study_n] + lfs[pop_n - study_n] - lfs[pop_n]
+        logcells_lows = self._get_logcells(lows, study_n, pop_counts, pop_n, lfs)
+        logcells_highs = self._get_logcells(highs, study_n, pop_counts, pop_n, lfs)
+        if self.alternative == 'greater':
+            logcells = logcells_highs
+        elif self.alternative == 'less':
+            logcells = logcells_lows
+        else:
+            logcells = np.maximum(logcells_lows, logcells_highs)
+        return np.minimum(np.exp(logmargins - logcells), 1.0)
+
+    def _calc_pvalues(self, study_counts, study_n, pop_counts, pop_n, lows, lens):
+        """Calculate p-values for a chunk of tables."""
+        lfs = self._get_logfactorials(pop_n)
+        # The study count of every table having the same margins, for all observed tables
+        rows = np.repeat(np.arange(lens.size), lens)
+        ends = np.cumsum(lens)
+        counts = np.arange(ends[-1]) - np.repeat(ends - lens - lows, lens)
+        # log P(table) = log(K! (N-K)! n! (N-n)! / N!) - log(k! (K-k)! (n-k)! (N-K-n+k)!)
+        logmargins = lfs[pop_counts] + lfs[pop_n - pop_counts] + lfs[study_n] + lfs[pop_n - study_n] - lfs[pop_n]
+        logps_obs = logmargins - self._get_logcells(study_counts, study_n, pop_counts, pop_n, lfs)
+        logps = logmargins[rows] - self._get_logcells(counts, study_n, pop_counts[rows], pop_n, lfs)
+        if self.alternative == 'two-sided':
+            keep = logps <= logps_obs[rows] + np.log1p(self.rel_tol)
+            pvals = np.bincount(rows[keep], weights=np.exp(logps[keep]), minlength=lens.size)
+        else:
+            # Only the tables in the tail were visited
+            pvals = np.bincount(rows, weights=np.exp(logps), minlength=lens.size)
+        return np.minimum(pvals, 1.0)
+
+    @staticmethod
+    def _get_logcells(study_counts, study_n, pop_counts, pop_n, lfs):
+        """Get the sum of the log-factorials of the four cells of each 2x2 table."""
+        return (lfs[study_counts] + lfs[pop_counts - study_counts] + lfs[study_n - study_counts] +
+                lfs[pop_n - pop_counts - study_n + study_counts])
+
+    @staticmethod
+    def _get_logfactorials(pop_n):
+        """Get log(i!) for i in 0 to pop_n, from the table shared by all calculators."""
+        return LOGFACTORIALS.get(pop_n)
+
+    def _get_chunks(self, lens):
+        """Split the tables into chunks with a limited number of table probabilities."""
+        chunks = []
+        beg = 0
+        cumlens = np.cumsum(lens)
+        while beg < lens.size:
+            tot = cumlens[beg - 1] if beg else 0
+            end = max(int(np.searchsorted(cumlens, tot + self.max_vals, side='right')), beg + 1)
+            chunks.append((beg, end))
+            beg = end
+        return chunks
+
+
+class PvalCache(object):
+    """Bounded least-recently-used cache of p-values, keyed by 2x2 table.
+
+       One cache can be shared by many GOEnrichmentStudy objects in a process:
+
+           >>> pval_cache = PvalCache()
+           >>> goeaobj_bp = GOEnrichmentStudy(pop, assoc_bp, godag, pval_cache=pval_cache)
+           >>> goeaobj_mf = GOEnrichmentStudy(pop, assoc_mf, godag, pval_cache=pval_cache)
+           >>> pval_cache.cache_info()
+    """
+
+    NtCacheInfo = cx.namedtuple('NtCacheInfo', 'hits misses maxsize currsize')
+
+    def __init__(self, maxsize=1048576):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        # Keys are (pvalcalc name, alternative, study_count, study_n, pop_count, pop_n)
+        self.key2pval = cx.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Get a p-value, if it is in the cache. Else get None"""
+        with self.lock:
+            pval = self.key2pval.get(key)
+            if pval is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.key2pval.move_to_end(key)
+            return pval
+
+    def set(self, key, pval):
+        """Add a p-value. Remove the least-recently-used p-value if the cache is full"""
+        with self.lock:
+            self.key2pval[key] = pval
+            if len(self.key2pval) > self.maxsize:
+                self.key2pval.popitem(last=False)
+
+    def cache_info(self):
+        """Get the number of hits, misses, the maximum size, and the current size"""
+        return self.NtCacheInfo(self.hits, self.misses, self.maxsize, len(self.key2pval))
+
+    def clear(self):
+        """Remove all p-values and reset the hit and miss counters"""
+        with self.lock:
+            self.key2pval.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __getstate__(self):
+        # Locks cannot be pickled: Caches are copied to worker processes without them
+        state = dict(self.__dict__)
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+
+class PvalCalcCached(PvalCalcBase):
+    """Get p-values from a cache. Calculate p-values not in the cache and add them."""
+
+    def __init__(self, pval_obj, cache):
+        super(PvalCalcCached, self).__init__(pval_obj.name, pval_obj.pval_fnc, pval_obj.log, pval_obj.alternative)
+        self.pval_obj = pval_obj
+        self.cache = cache
+
+    def calc_pvalue(self, study_count, study_n, pop_count, pop_n):
+        """Get one uncorrected p-value from the cache, or calculate it."""
+        key = (self.name, self.alternative, study_count, study_n, pop_count, pop_n)
+        pval = self.cache.get(key)
+        if pval is None:
+            pval = self.pval_obj.calc_pvalue(study_count, study_n, pop_count, pop_n)
+            self.cache.set(key, pval)
+        return pval
+
+
+class PvalCalcCachedVectorized(PvalCalcCached):
+    """Get p-values from a cache. Calculate all p-values not in the cache in one call."""
+
+    def calc_pvalues(self, study_counts, study_n, pop_counts, pop_n):
+        """Get uncorrected p-values for arrays of study counts and population counts."""
+        study_counts = np.asarray(study_counts, dtype=np.int64)
+        pop_counts = np.asarray(pop_counts, dtype=np.int64)
+        keys = [(self.name, self.alternative, s, study_n, p, pop_n)
+                for s, p in zip(study_counts.tolist(), pop_counts.tolist())]
+        pvals = np.array([self.cache.get(k) for k in keys], dtype=float)
+        misses = np.flatnonzero(np.isnan(pvals))
+        if misses.size:
+            pvals[misses] = self.pval_obj.calc_pvalues(study_counts[misses], study_n, pop_counts[misses], pop_n)
+            for idx in misses.tolist():
+                self.cache.set(keys[idx], float(pvals[idx]))
+        return pvals
+
+
 class FisherFactory(object):
     """Factory for choosing a fisher function."""
 
     options = cx.OrderedDict([
         ('fisher', FisherClass),
         ('fisher_scipy_stats', FisherScipyStats),
+        ('fisher_vectorized', FisherVectorized),
     ])
 
     def __init__(self, **kws):
         self.log = kws['log'] if 'log' in kws else sys.stdout
         self.pval_fnc_name = kws["pvalcalc"] if "pvalcalc" in kws else "fisher"
+        self.alternative = kws.get('alternative', 'two-sided')
         self.pval_obj = self._init_pval_obj()
+        # Optionally, get p-values from a cache: True or a PvalCache shared by many GOEAs
+        if kws.get('pval_cache'):
+            self.pval_obj = self._init_pval_cache(kws['pval_cache'])
 
     def _init_pval_obj(self):
         """Returns a Fisher object based on user-input."""
         if self.pval_fnc_name in self.options.keys():
             try:
-                fisher_obj = self.options[self.pval_fnc_name](self.pval_fnc_name, self.log)
+                fisher_obj = self.options[self.pval_fnc_name](self.pval_fnc_name, self.log, self.alternative)
             except ImportError:
                 print("fisher module not installed.  Falling back on scipy.stats.fisher_exact")
-                fisher_obj = self.options['fisher_scipy_stats']('fisher_scipy_stats', self.log)
+                fisher_obj = self.options['fisher_scipy_stats']('fisher_scipy_stats', self.log, self.alternative)
 
             return fisher_obj
 
         raise Exception("PVALUE FUNCTION({FNC}) NOT FOUND".format(FNC=self.pval_fnc_name))
 
+    def _init_pval_cache(self, pval_cache):
+        """Get an object which gets p-values from a cache, calculating the p-values not found."""
+        cache = pval_cache if isinstance(pval_cache, PvalCache) else PvalCache()
+        if hasattr(self.pval_obj, 'calc_pvalues'):
+            return PvalCalcCachedVectorized(self.pval_obj, cache)
+        return PvalCalcCached(self.pval_obj, cache)
+
     def __str__(self):
         return " ".join(self.options.keys())
 
@@ -11,6 +11,10 @@ def get_study_items(goea_results):
     """Get all study items found in a GOATOOLS GOEA (e.g., geneids)."""
     return MgrNtGOEAs(goea_results).get_study_items()
 
+def iter_goea_nts(goea_results, fldnames=None, **kws):
+    """Yield namedtuples containing data from GOEA results, one at a time."""
+    return MgrNtGOEAs.iter_goea_nts(goea_results, fldnames, **kws)
+
 def get_goea_nts_prt(goea_results, **kws):
     """Get namedtuples containing user-specified (or default) data from GOATOOLS GOEA results."""
     return MgrNtGOEAs(goea_results).get_goea_nts_prt(**kws)
@@ -20,7 +24,8 @@ class MgrNtGOEAs(object):
     """Manage GOATOOLS GOEA namedtuples."""
 
     def __init__(self, goea_results):
-        self.goea_results = list(goea_results)
+        # May be a generator, which is read once, by the first method called
+        self.goea_results = goea_results
 
     def get_study_items(self):
         """Get all study items (e.g., geneids)."""
@@ -31,10 +36,11 @@ class MgrNtGOEAs(object):
 
     def get_nts_strpval(self, fmt="{:8.2e}"):
         """Given GOEA namedtuples, return nts w/P-value in string format."""
-        objntmgr = MgrNts(self.goea_results)
+        goea_results = list(self.goea_results)
+        objntmgr = MgrNts(goea_results)
         dcts = objntmgr.init_dicts()
         # pylint: disable=line-too-long
-        pval_flds = set(k for k in self._get_fieldnames(next(iter(self.goea_results))) if k[:2] == 'p_')
+        pval_flds = set(k for k in self._get_fieldnames(next(iter(goea_results))) if k[:2] == 'p_')
         for fld_float in pval_flds:
             fld_str = "s_" + fld_float[2:]
             objntmgr.add_f2str(dcts, fld_float, fld_str, fmt)
@@ -74,30 +80,43 @@ class MgrNtGOEAs(object):
             namedtuples so the generic table writers may be used.
         """
         # kws: prt_if indent itemid2name(study_items)
-        data_nts = [] # A list of namedtuples containing GOEA results
-        if not self.goea_results:
-            return data_nts
+        return list(self.iter_goea_nts(self.goea_results, fldnames, **kws))
+
+    @staticmethod
+    def iter_goea_nts(goea_results, fldnames=None, **kws):
+        """Yield namedtuples containing data from GOEA results, one at a time.
+
+            GOEA results may be a generator, so only one GOEA result is in memory at a time.
+        """
         keep_if = kws.get('keep_if', None)
         rpt_fmt = kws.get('rpt_fmt', False)
         indent = kws.get('indent', False)
-        # I. FIELD (column) NAMES
-        not_fldnames = kws.get('not_fldnames', None)
-        if fldnames is None:
-            fldnames = self._get_fieldnames(self.goea_results[0])
-        # Ia. Explicitly exclude specific fields from named tuple
-        if not_fldnames is not None:
-            fldnames = [f for f in fldnames if f not in not_fldnames]
-        nttyp = cx.namedtuple("NtGoeaResults", " ".join(fldnames))
-        goid_idx = fldnames.index("GO") if 'GO' in fldnames else None
+        itemid2name = kws.get('itemid2name', None)
+        nttyp = None
+        goid_idx = None
         # II. Loop through GOEA results stored in a GOEnrichmentRecord object
-        for goerec in self.goea_results:
-            vals = self._get_field_values(goerec, fldnames, rpt_fmt, kws.get('itemid2name', None))
+        for goerec in goea_results:
+            if nttyp is None:
+                # I. FIELD (column) NAMES
+                fldnames = MgrNtGOEAs._get_fldnames(goerec, fldnames, kws.get('not_fldnames', None))
+                nttyp = cx.namedtuple("NtGoeaResults", " ".join(fldnames))
+                goid_idx = fldnames.index("GO") if 'GO' in fldnames else None
+            vals = MgrNtGOEAs._get_field_values(goerec, fldnames, rpt_fmt, itemid2name)
             if indent:
                 vals[goid_idx] = "".join([goerec.get_indent_dots(), vals[goid_idx]])
             ntobj = nttyp._make(vals)
             if keep_if is None or keep_if(goerec):
-                data_nts.append(ntobj)
-        return data_nts
+                yield ntobj
+
+    @staticmethod
+    def _get_fldnames(goerec, fldnames, not_fldnames):
+        """Get the field names of the namedtuples"""
+        if fldnames is None:
+            fldnames = MgrNtGOEAs._get_fieldnames(goerec)
+        # Ia. Explicitly exclude specific fields from named tuple
+        if not_fldnames is not None:
+            fldnames = [f for f in fldnames if f not in not_fldnames]
+        return fldnames
 
     @staticmethod
     def _get_field_values(item, fldnames, rpt_fmt=None, itemid2name=None):
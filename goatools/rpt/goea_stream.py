@@ -0,0 +1,112 @@
+"""Write GOEA results in chunks of rows, so all rows are never held in memory at once.
+
+    GOEA results may be lists of GOEnrichmentRecords, GoeaResultsTables, or generators.
+    Results of many studies can be written to one long-format TSV having a study column:
+
+        >>> with open('goea_studies.tsv', 'w') as prt:
+        >>>     objwr = GoeaStreamWriter(prt, study_fld='study')
+        >>>     for name, study in studies.items():
+        >>>         objwr.wr_results(goeaobj.run_study(study), name)
+"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+__author__ = "DV Klopfenstein"
+
+import collections as cx
+from itertools import chain
+from itertools import islice
+from goatools.rpt.goea_nt_xfrm import MgrNtGOEAs
+import goatools.wr_tbl as RPT
+
+
+class GoeaStreamWriter(object):
+    """Write GOEA results in chunks of rows, to tab-separated or text format."""
+
+    # Number of rows held in memory before they are written
+    chunksize = 1000
+
+    def __init__(self, prt, prt_flds=None, prtfmt=None, study_fld=None, **kws):
+        # kws: sep hdrs fld2fmt prt_if keep_if indent itemid2name
+        self.prt = prt
+        self.prt_flds = prt_flds      # Default: GOEnrichmentRecord default print fields
+        self.prtfmt = prtfmt          # Text format string. Default: tab-separated values
+        self.study_fld = study_fld    # Name of the study column in long-format tables
+        self.kws = {k:v for k, v in kws.items() if k != 'sort_by'}
+        self.hdr_wrote = prtfmt is not None
+        self.nt_study = None
+        self.num_rows = 0
+
+    def wr_results(self, goea_results, study=None):
+        """Write the rows of one study. Return the number of rows written."""
+        num_rows = 0
+        nts = self._iter_nts(goea_results, study)
+        chunk = list(islice(nts, self.chunksize))
+        while chunk:
+            num_rows += self._wr_chunk(chunk)
+            chunk = list(islice(nts, self.chunksize))
+        self.num_rows += num_rows
+        return num_rows
+
+    def wr_studies(self, name_results):
+        """Write the rows of many studies: a dict or (name, GOEA results) pairs."""
+        num_studies = 0
+        for name, goea_results in name_results.items() if hasattr(name_results, 'items') else name_results:
+            self.wr_results(goea_results, name)
+            num_studies += 1
+        return num_studies
+
+    def _wr_chunk(self, chunk):
+        """Write a chunk of namedtuples. Return the number of rows written."""
+        if self.prtfmt is not None:
+            lines = RPT.get_lines(chunk, self.prtfmt, **self.kws)
+            for line in lines:
+                self.prt.write(line)
+            return len(lines)
+        kws = self._get_kws_tsv(chunk[0])
+        if not self.hdr_wrote:
+            RPT.prt_tsv_hdr(self.prt, chunk, **kws)
+            self.hdr_wrote = True
+        return RPT.prt_tsv_dat(self.prt, chunk, **kws)
+
+    def _get_kws_tsv(self, ntrow):
+        """Get the keyword arguments for the tab-separated table writers"""
+        kws = dict(self.kws)
+        kws['prt_flds'] = ntrow._fields
+        if self.study_fld is not None and 'hdrs' in kws:
+            kws['hdrs'] = [self.study_fld] + list(kws['hdrs'])
+        return kws
+
+    def _iter_nts(self, goea_results, study):
+        """Yield one namedtuple for each row, adding the study column if requested"""
+        kws = dict(self.kws)
+        kws.setdefault('not_fldnames', ['goterm', 'parents', 'children', 'id'])
+        kws.setdefault('rpt_fmt', True)
+        results = iter(goea_results)
+        if self.prt_flds is None:
+            # Default fields are found from the first GOEA result
+            first = next(results, None)
+            if first is None:
+                return iter([])
+            self.prt_flds = self._get_prt_flds_dflt(first)
+            results = chain([first], results)
+        nts = MgrNtGOEAs.iter_goea_nts(results, list(self.prt_flds), **kws)
+        if self.study_fld is None:
+            return nts
+        return (self._get_nt_study(nt)._make((study,) + nt) for nt in nts)
+
+    def _get_prt_flds_dflt(self, goerec):
+        """Get the fields in the text format, or the default print fields of a GOEnrichmentRecord"""
+        if self.prtfmt is not None:
+            return [f for f in RPT.get_fmtflds(self.prtfmt) if f != self.study_fld]
+        if hasattr(goerec, 'get_prtflds_default'):
+            return goerec.get_prtflds_default()
+        return goerec._fields
+
+    def _get_nt_study(self, ntrow):
+        """Get the namedtuple type of rows having a study column"""
+        if self.nt_study is None:
+            self.nt_study = cx.namedtuple("NtGoeaStudy", " ".join((self.study_fld,) + ntrow._fields))
+        return self.nt_study
+
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
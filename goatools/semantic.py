@@ -14,7 +14,7 @@ from collections import Counter
 from collections import defaultdict
 from goatools.godag.consts import NAMESPACE2GO
 from goatools.godag.consts import NAMESPACE2NS
-from goatools.godag.go_tasks import get_go2ancestors
+from goatools.godag.closure import get_go2ancestors_goids
 from goatools.gosubdag.gosubdag import GoSubDag
 from goatools.godag.relationship_combos import RelationshipCombos
 from goatools.anno.update_association import clean_anno
@@ -68,7 +68,8 @@ class TermCounts:
             a GO Terma are also annotated to all ancestors.
         '''
         go2geneset = defaultdict(set)
-        go2up = get_go2ancestors(set(godag.values()), relationship_set)
+        goids_anno = set(go for goids in self.annots.values() for go in goids)
+        go2up = get_go2ancestors_goids(godag, goids_anno, relationship_set)
         # Fill go-geneset dict with GO IDs in annotations and their corresponding counts
         for geneid, goids_anno in self.annots.items():
             # Make a union of all the terms for a gene, if term parents are
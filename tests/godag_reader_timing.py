@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""Compare the speed of the line-by-line, memory-mapped, and parallel obo readers.
+
+    The default files are go-basic.obo and the full go.obo, which has more relationship
+    types and is the largest file read with all optional attributes:
+
+    Usage: python -m tests.godag_reader_timing [go.obo ...]
+"""
+
+from __future__ import print_function
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import os
+import sys
+import timeit
+from goatools.base import download_go_basic_obo
+from goatools.obo_parser import OBOReader
+from goatools.godag.obo_reader_mmap import OboReaderMmap
+from goatools.godag.obo_reader_parallel import OboReaderParallel
+from tests.utils import REPO
+
+OPTATTRS = {'def', 'synonym', 'relationship', 'xref', 'subset', 'comment', 'consider', 'replaced_by'}
+
+
+def prt_reader_timing(fin_obo, num_runs=3, prt=sys.stdout):
+    """Print the best time to read all GO Terms, for each reader and optional attributes."""
+    prt.write('{OBO}\n'.format(OBO=fin_obo))
+    for optional_attrs in [None, {'def'}, {'relationship'}, OPTATTRS]:
+        secs = []
+        for reader_cls in [OBOReader, OboReaderMmap, OboReaderParallel]:
+            sec = min(_get_secs(reader_cls, fin_obo, optional_attrs) for _ in range(num_runs))
+            secs.append(sec)
+        prt.write('{LINES:6.2f} sec line-by-line {MMAP:6.2f} sec mmap {X:4.2f}x '
+                  '{PAR:6.2f} sec parallel({N} processes) {Y:4.2f}x optional_attrs({A})\n'.format(
+                      LINES=secs[0], MMAP=secs[1], X=secs[0]/secs[1],
+                      PAR=secs[2], N=os.cpu_count(), Y=secs[0]/secs[2],
+                      A=' '.join(sorted(optional_attrs)) if optional_attrs else ''))
+
+def _get_secs(reader_cls, fin_obo, optional_attrs):
+    """Get the seconds to read all GO Terms."""
+    tic = timeit.default_timer()
+    for _ in reader_cls(fin_obo, optional_attrs):
+        pass
+    return timeit.default_timer() - tic
+
+
+if __name__ == '__main__':
+    FINS_OBO = sys.argv[1:] if len(sys.argv) > 1 else [
+        os.path.join(REPO, "go-basic.obo"),
+        os.path.join(REPO, "go.obo")]
+    for FIN_OBO in FINS_OBO:
+        if not os.path.exists(FIN_OBO):
+            download_go_basic_obo(FIN_OBO, loading_bar=None)
+        prt_reader_timing(FIN_OBO)
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""Test saving and loading filtered, and propagated, associations in annotation cache files"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import os
+import sys
+import glob
+import shutil
+import timeit
+import collections as cx
+from goatools.anno.cache import AnnoCache
+from goatools.anno.factory import get_objanno
+from goatools.anno.gaf_reader import GafReader
+from goatools.cli.find_enrichment import GoeaCliFnc
+from goatools.obo_parser import GODag
+from goatools.test_data.cli.find_enrichment_dflts import ArgsDict
+from tests.utils import REPO
+from tests.utils import wr_gaf_synthetic
+from tests.test_anno_columns import _wr_gene2go
+
+# Arguments of calls whose associations are cached
+KWS_ID2GOS = [
+    {},
+    {'keep_ND':True, 'keep_NOT':True},
+    {'ev_exclude':{'IEA'}},
+    {'go2geneids':True},
+    {'propagate_counts':True},
+    {'propagate_counts':True, 'relationships':{'part_of'}},
+]
+
+
+def test_cache_assc():
+    """Test that cached associations are the same as associations from the reader"""
+    dir_cache = os.path.join(REPO, 'anno_cache')
+    fin_gaf = os.path.join(REPO, 'anno_cache.gaf')
+    fin_gene2go = os.path.join(REPO, 'anno_cache_gene2go')
+    wr_gaf_synthetic(fin_gaf, num_lines=2000, seed=14)
+    godag = GODag(os.path.join(REPO, 'tests/data/goslim_generic.obo'), optional_attrs={'relationship'}, prt=None)
+    _wr_gene2go(fin_gene2go, GafReader(fin_gaf, prt=None).associations)
+    _mk_dir(dir_cache)
+    for fin, kws_rdr in [(fin_gaf, {}), (fin_gaf, {'namespaces':{'BP'}}), (fin_gene2go, {'taxids':[10090]})]:
+        objanno = get_objanno(fin, godag=godag, prt=None, **kws_rdr)
+        # First: Associations are from the reader, and saved. Second: Associations are loaded
+        for _ in range(2):
+            objcache = get_objanno(fin, godag=godag, prt=None, cache=dir_cache, **kws_rdr)
+            assert isinstance(objcache, AnnoCache)
+            for kws in KWS_ID2GOS:
+                assert objcache.get_ns2assc(**kws) == objanno.get_ns2assc(**kws)
+                assert objcache.get_id2gos_nss(**kws) == objanno.get_id2gos_nss(**kws)
+                if 'namespaces' in kws_rdr:
+                    assert objcache.get_id2gos(prt=None, **kws) == objanno.get_id2gos(prt=None, **kws)
+            assert objcache.get_dbids() == objanno.get_dbids()
+        # The annotation file is not read when all associations are cached
+        assert objcache.objanno is None
+        # Other reader attributes are from the annotation file
+        assert objcache.get_name() == objanno.get_name()
+        assert objcache.objanno is not None
+    # ns2assc, id2gos_nss, and dbids of each reader, and id2gos of the reader of BP
+    assert len(glob.glob(os.path.join(dir_cache, '*.assc'))) == 3*(2*len(KWS_ID2GOS) + 1) + len(KWS_ID2GOS)
+    shutil.rmtree(dir_cache)
+    os.remove(fin_gaf)
+    os.remove(fin_gene2go)
+
+def test_cache_stale():
+    """Test that cache files are rewritten when the annotation file or the GO DAG change"""
+    fin_gaf = os.path.join(REPO, 'anno_cache.gaf')
+    godag = wr_gaf_synthetic(fin_gaf, num_lines=1000, seed=15)
+    kws = {'propagate_counts':True}
+    objcache = get_objanno(fin_gaf, godag=godag, prt=None, cache=True)
+    ns2assc = objcache.get_ns2assc(**kws)
+    fin_cache = objcache.get_fin_cache('get_ns2assc', (None,), kws)
+    assert os.path.exists(fin_cache)
+    # Same annotation file: cache file is read
+    objcache = get_objanno(fin_gaf, godag=godag, prt=None, cache=True)
+    assert objcache.get_ns2assc(**kws) == ns2assc and objcache.objanno is None
+    # Changed annotation file: cache file is rewritten
+    wr_gaf_synthetic(fin_gaf, num_lines=1000, seed=16)
+    objcache = get_objanno(fin_gaf, godag=godag, prt=None, cache=True)
+    ns2assc_new = objcache.get_ns2assc(**kws)
+    assert ns2assc_new != ns2assc and objcache.objanno is not None
+    assert ns2assc_new == GafReader(fin_gaf, godag=godag, prt=None).get_ns2assc(**kws)
+    assert get_objanno(fin_gaf, godag=godag, prt=None, cache=True).get_ns2assc(**kws) == ns2assc_new
+    # Another GO DAG: another cache file
+    godag_rel = GODag(os.path.join(REPO, 'tests/data/goslim_generic.obo'), optional_attrs={'relationship'}, prt=None)
+    objcache = get_objanno(fin_gaf, godag=godag_rel, prt=None, cache=True)
+    assert objcache.get_fin_cache('get_ns2assc', (None,), kws) != fin_cache
+    # A corrupt cache file is a stale cache file
+    with open(fin_cache, 'wb') as prt:
+        prt.write(b'corrupt')
+    objcache = get_objanno(fin_gaf, godag=godag, prt=None, cache=True)
+    assert objcache.get_ns2assc(**kws) == ns2assc_new and objcache.objanno is not None
+    for fin in glob.glob(fin_gaf + '.*.assc'):
+        os.remove(fin)
+    os.remove(fin_gaf)
+
+def test_cache_cli():
+    """Test that find_enrichment results are the same using cached associations"""
+    fin_gaf = os.path.join(REPO, 'anno_cache.gaf')
+    fin_pop = os.path.join(REPO, 'anno_cache_population')
+    fin_study = os.path.join(REPO, 'anno_cache_study')
+    wr_gaf_synthetic(fin_gaf, num_lines=3000, seed=17)
+    geneids = sorted(GafReader(fin_gaf, prt=None).get_dbids())
+    with open(fin_pop, 'w') as prt:
+        prt.write('\n'.join(geneids) + '\n')
+    with open(fin_study, 'w') as prt:
+        prt.write('\n'.join(geneids[:40]) + '\n')
+    results = []
+    for anno_cache in [None, True, True]:
+        args = _get_args([fin_study, fin_pop, fin_gaf], anno_cache)
+        objcli = GoeaCliFnc(args)
+        results.append(sorted((r.GO, r.study_count, r.pop_count, r.p_uncorrected) for r in objcli.results_all))
+    # The last run loads the associations from cache files, without reading the GAF
+    assert objcli.objanno.objanno is None
+    assert results[1] == results[0]
+    assert results[2] == results[0]
+    for fin in glob.glob(fin_gaf + '.*.assc'):
+        os.remove(fin)
+    for fin in [fin_gaf, fin_pop, fin_study]:
+        os.remove(fin)
+
+def run_benchmark(num_lines=2000000, prt=sys.stdout):
+    """Compare the time to read and propagate associations, with the time to load them from a cache"""
+    fin_gaf = os.path.join(REPO, 'anno_cache_benchmark.gaf')
+    godag = wr_gaf_synthetic(fin_gaf, num_lines=num_lines, num_genes=20000, seed=18)
+    kws = {'propagate_counts':True}
+    for desc in ['read and save', 'load']:
+        tic = timeit.default_timer()
+        get_objanno(fin_gaf, godag=godag, prt=None, cache=True).get_ns2assc(**kws)
+        prt.write('{SECS:8.2f} sec {DESC} ns2assc\n'.format(SECS=timeit.default_timer() - tic, DESC=desc))
+    for fin in glob.glob(fin_gaf + '.*.assc'):
+        os.remove(fin)
+    os.remove(fin_gaf)
+
+def _get_args(filenames, anno_cache):
+    """Get find_enrichment arguments"""
+    objargs = ArgsDict()
+    objargs.namespace['filenames'] = filenames
+    objargs.namespace['obo'] = os.path.join(REPO, 'tests/data/goslim_generic.obo')
+    objargs.namespace['outfile'] = None
+    objargs.namespace['anno_cache'] = anno_cache
+    return cx.namedtuple('Namespace', objargs.namespace.keys())(**objargs.namespace)
+
+def _mk_dir(dir_cache):
+    """Make an empty cache directory"""
+    if os.path.exists(dir_cache):
+        shutil.rmtree(dir_cache)
+    os.makedirs(dir_cache)
+
+
+if __name__ == '__main__':
+    test_cache_assc()
+    test_cache_stale()
+    test_cache_cli()
+    run_benchmark()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""Test reading annotation files in line-aligned byte ranges, using many processes"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import os
+import sys
+import timeit
+from io import StringIO
+from contextlib import redirect_stderr
+from contextlib import redirect_stdout
+from goatools.anno.gaf_reader import GafReader
+from goatools.anno.genetogo_reader import Gene2GoReader
+from goatools.anno.gaf_stream import GafStream
+from goatools.anno.init.chunks import get_hdr_end
+from goatools.anno.init.chunks import get_byte_ranges
+from goatools.anno.init.chunks import iter_lines
+from tests.utils import REPO
+from tests.utils import wr_gaf_synthetic
+from tests.test_anno_columns import _chk_rows
+from tests.test_anno_columns import _wr_gene2go
+
+
+def test_byte_ranges():
+    """Test that line-aligned byte ranges hold all lines after the header, once, in order"""
+    fin_gaf = os.path.join(REPO, 'anno_chunks.gaf')
+    wr_gaf_synthetic(fin_gaf, num_lines=500, seed=5)
+    with open(fin_gaf) as ifstrm:
+        lines = ifstrm.readlines()
+    hdr_lines, beg = get_hdr_end(fin_gaf, '!')
+    assert hdr_lines == [l for l in lines if l[0] == '!']
+    assert beg == sum(len(l) for l in hdr_lines)
+    for num_chunks in [1, 2, 3, 7, 64, 5000]:
+        ranges = get_byte_ranges(fin_gaf, beg, num_chunks)
+        assert len(ranges) <= num_chunks
+        assert ranges[0][0] == beg and ranges[-1][1] == os.path.getsize(fin_gaf)
+        assert all(e0 == b1 for (_, e0), (b1, _) in zip(ranges[:-1], ranges[1:]))
+        assert [l for b, e in ranges for l in iter_lines(fin_gaf, b, e)] == lines[len(hdr_lines):]
+    os.remove(fin_gaf)
+
+def test_gaf_chunks():
+    """Test that a GAF read by many processes is the same as a GAF read by one process"""
+    fin_gaf = os.path.join(REPO, 'anno_chunks.gaf')
+    wr_gaf_synthetic(fin_gaf, num_lines=3000, seed=6)
+    fins = [
+        fin_gaf,
+        os.path.join(REPO, 'data/gaf/goa_human_illegal.gaf'),
+        os.path.join(REPO, 'tests/data/gaf_missingsym.mgi'),
+    ]
+    for fin in fins:
+        for columnar in [False, True]:
+            for nss in [None, {'BP'}]:
+                kws = {'prt':None, 'allow_missing_symbol':True, 'columnar':columnar, 'namespaces':nss}
+                obj1 = GafReader(fin, **kws)
+                obj3 = GafReader(fin, processes=3, **kws)
+                _chk_rows(obj1.associations, obj3.associations)
+                assert obj3.hdr == obj1.hdr
+                assert obj3.get_id2gos_nss(prt=None) == obj1.get_id2gos_nss(prt=None)
+    # Streams
+    for kws in [{}, {'keep_NOT':True, 'namespaces':{'MF'}}, {'taxids':[10090], 'go2geneids':True}]:
+        objstrm1 = GafStream(fin_gaf, **kws)
+        objstrm3 = GafStream(fin_gaf, **kws)
+        id2gos = objstrm1.get_id2gos(prt=None)
+        id2gos3 = objstrm3.get_id2gos(prt=None, processes=3)
+        assert id2gos3 == id2gos
+        # Gene IDs are in the order first seen in the file
+        if 'go2geneids' not in kws:
+            assert list(id2gos3) == list(id2gos)
+        assert (objstrm3.num_read, objstrm3.num_kept) == (objstrm1.num_read, objstrm1.num_kept)
+        assert objstrm3.hdr == objstrm1.hdr
+    os.remove(fin_gaf)
+
+def test_gaf_chunks_fatal():
+    """Test that the line number of an unreadable line is its line number in the file"""
+    fin_gaf = os.path.join(REPO, 'anno_chunks.gaf')
+    wr_gaf_synthetic(fin_gaf, num_lines=1000, seed=9)
+    with open(fin_gaf) as ifstrm:
+        lines = ifstrm.readlines()
+    # Aspect X is not BP, MF, or CC
+    lnum = len(lines) - 100
+    flds = lines[lnum - 1].split('\t')
+    flds[8] = 'X'
+    lines[lnum - 1] = '\t'.join(flds)
+    with open(fin_gaf, 'w') as prt:
+        prt.writelines(lines)
+    for processes in [None, 3]:
+        errstrm = StringIO()
+        try:
+            with redirect_stderr(errstrm), redirect_stdout(StringIO()):
+                GafReader(fin_gaf, prt=None, processes=processes)
+            assert False, 'EXPECTED SystemExit'
+        except SystemExit:
+            pass
+        assert '{FIN}[{LNUM}]'.format(FIN=fin_gaf, LNUM=lnum) in errstrm.getvalue()
+    os.remove(fin_gaf)
+
+def test_gene2go_chunks():
+    """Test that a gene2go read by many processes is the same as a gene2go read by one process"""
+    fin_gaf = os.path.join(REPO, 'anno_chunks.gaf')
+    fin_gene2go = os.path.join(REPO, 'anno_chunks_gene2go')
+    wr_gaf_synthetic(fin_gaf, num_lines=2000, seed=7)
+    _wr_gene2go(fin_gene2go, GafReader(fin_gaf, prt=None).associations)
+    for columnar in [False, True]:
+        for taxids in [True, [9606], [10090]]:
+            obj1 = Gene2GoReader(fin_gene2go, taxids=taxids, columnar=columnar)
+            obj3 = Gene2GoReader(fin_gene2go, taxids=taxids, columnar=columnar, processes=3)
+            _chk_rows(obj1.associations, obj3.associations)
+            assert set(obj3.taxid2asscs) == set(obj1.taxid2asscs)
+            assert obj3.get_ns2assc(True) == obj1.get_ns2assc(True)
+    os.remove(fin_gaf)
+    os.remove(fin_gene2go)
+
+def run_benchmark(num_lines=10000000, processes=None, prt=sys.stdout):
+    """Compare the time to read a large synthetic GAF using one process and many processes"""
+    if processes is None:
+        processes = os.cpu_count()
+    fin_gaf = os.path.join(REPO, 'anno_chunks_benchmark.gaf')
+    wr_gaf_synthetic(fin_gaf, num_lines=num_lines, num_genes=20000, seed=8)
+    for procs in [1, processes]:
+        tic = timeit.default_timer()
+        GafStream(fin_gaf, namespaces={'BP'}).get_id2gos(prt=None, processes=procs)
+        prt.write('{SECS:8.2f} sec GafStream.get_id2gos  {P} processes\n'.format(
+            SECS=timeit.default_timer() - tic, P=procs))
+    for procs in [1, processes]:
+        tic = timeit.default_timer()
+        GafReader(fin_gaf, prt=None, columnar=True, processes=procs)
+        prt.write('{SECS:8.2f} sec GafReader(columnar=True) {P} processes\n'.format(
+            SECS=timeit.default_timer() - tic, P=procs))
+    os.remove(fin_gaf)
+
+
+if __name__ == '__main__':
+    test_byte_ranges()
+    test_gaf_chunks()
+    test_gaf_chunks_fatal()
+    test_gene2go_chunks()
+    run_benchmark()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+"""Test reading annotations into dictionary-encoded columns, instead of namedtuples"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import os
+import sys
+import random
+import timeit
+import tracemalloc
+from goatools.anno.columns import AnnoColumns
+from goatools.anno.gaf_reader import GafReader
+from goatools.anno.gpad_reader import GpadReader
+from goatools.anno.genetogo_reader import Gene2GoReader
+from goatools.anno.factory import get_objanno
+from goatools.anno.eco2group import ECO2GRP
+from goatools.godag.consts import NAMESPACE2NS
+from tests.utils import REPO
+from tests.utils import wr_gaf_synthetic
+
+# Selections of annotation lines, for example, keep NOT or exclude IEA
+KWS_ID2GOS = [
+    {},
+    {'keep_ND':True},
+    {'keep_NOT':True},
+    {'keep_ND':True, 'keep_NOT':True},
+    {'ev_include':{'IDA', 'IMP'}},
+    {'ev_exclude':{'IEA'}, 'keep_NOT':True},
+    {'go2geneids':True},
+    {'propagate_counts':True},
+]
+
+
+def test_gaf_columns():
+    """Test that GAF annotations in columns give the same rows and associations as namedtuples"""
+    fin_gaf = os.path.join(REPO, 'anno_columns.gaf')
+    godag = wr_gaf_synthetic(fin_gaf, num_lines=2000)
+    fins = [
+        fin_gaf,
+        os.path.join(REPO, 'data/gaf/goa_human_illegal.gaf'),
+        os.path.join(REPO, 'tests/data/gaf_missingsym.mgi'),
+        os.path.join(REPO, 'tests/data/yangRWC/fig1b.gaf'),
+    ]
+    for fin in fins:
+        objs = [GafReader(fin, godag=godag, prt=None, allow_missing_symbol=True, columnar=c) for c in [False, True]]
+        assert isinstance(objs[1].associations, AnnoColumns)
+        _chk_rows(objs[0].associations, objs[1].associations)
+        for kws in KWS_ID2GOS:
+            for nspc in ['BP', 'MF', 'CC', 'all']:
+                assert objs[1].get_id2gos(nspc, prt=None, **kws) == objs[0].get_id2gos(nspc, prt=None, **kws)
+            assert objs[1].get_ns2assc(prt=None, **kws) == objs[0].get_ns2assc(prt=None, **kws)
+            assert objs[1].get_id2gos_nss(prt=None, **kws) == objs[0].get_id2gos_nss(prt=None, **kws)
+        assert objs[1].get_goid2dbids(objs[1].associations) == objs[0].get_goid2dbids(objs[0].associations)
+        _chk_rows(objs[0].nts_qual_not(), objs[1].nts_qual_not())
+        _chk_rows(objs[0].nts_ev_nd(), objs[1].nts_ev_nd())
+    # Only one namespace is read
+    objs = [GafReader(fin_gaf, prt=None, namespaces={'MF'}, columnar=c) for c in [False, True]]
+    _chk_rows(objs[0].associations, objs[1].associations)
+    assert objs[1].get_id2gos(prt=None) == objs[0].get_id2gos(prt=None)
+    os.remove(fin_gaf)
+
+def test_gpad_columns():
+    """Test that GPAD annotations in columns give the same rows and associations as namedtuples"""
+    fin_gaf = os.path.join(REPO, 'anno_columns.gaf')
+    fin_gpad = os.path.join(REPO, 'anno_columns.gpad')
+    godag = wr_gaf_synthetic(fin_gaf, num_lines=1000, seed=1)
+    nts = GafReader(fin_gaf, prt=None).associations
+    _wr_gpad(fin_gpad, nts)
+    for kws in [{'godag':godag}, {'godag':godag, 'namespaces':{'BP'}}, {}]:
+        objs = [get_objanno(fin_gpad, columnar=c, **kws) for c in [False, True]]
+        assert isinstance(objs[1], GpadReader)
+        _chk_rows(objs[0].associations, objs[1].associations)
+        assert objs[1].get_relation_cnt() == objs[0].get_relation_cnt()
+        for kws_id2gos in KWS_ID2GOS:
+            if 'godag' in kws:
+                assert objs[1].get_ns2assc(prt=None, **kws_id2gos) == objs[0].get_ns2assc(prt=None, **kws_id2gos)
+            else:
+                kws_id2gos = {k:v for k, v in kws_id2gos.items() if k != 'propagate_counts'}
+            assert objs[1].get_id2gos(prt=None, **kws_id2gos) == objs[0].get_id2gos(prt=None, **kws_id2gos)
+    os.remove(fin_gaf)
+    os.remove(fin_gpad)
+
+def test_gene2go_columns():
+    """Test that gene2go annotations in columns give the same associations as namedtuples"""
+    fin_gaf = os.path.join(REPO, 'anno_columns.gaf')
+    fin_gene2go = os.path.join(REPO, 'anno_columns_gene2go')
+    wr_gaf_synthetic(fin_gaf, num_lines=1000, seed=2)
+    nts = GafReader(fin_gaf, prt=None).associations
+    _wr_gene2go(fin_gene2go, nts)
+    for taxids in [True, [9606], [9606, 10090]]:
+        objs = [get_objanno(fin_gene2go, taxids=taxids, columnar=c) for c in [False, True]]
+        assert isinstance(objs[1], Gene2GoReader)
+        assert objs[1].get_taxid() == objs[0].get_taxid()
+        assert set(objs[1].taxid2asscs) == set(objs[0].taxid2asscs)
+        for taxid, nts_exp in objs[0].taxid2asscs.items():
+            _chk_rows(nts_exp, objs[1].taxid2asscs[taxid])
+        for kws in KWS_ID2GOS[:-1]:
+            assert objs[1].get_ns2assc(True, **kws) == objs[0].get_ns2assc(True, **kws)
+            assert objs[1].get_id2gos_nss(**kws) == objs[0].get_id2gos_nss(**kws)
+            assert objs[1].get_taxid2asscs(**kws) == objs[0].get_taxid2asscs(**kws)
+        assert objs[1].get_ns2assc([9606, 10090]) == objs[0].get_ns2assc([9606, 10090])
+    os.remove(fin_gaf)
+    os.remove(fin_gene2go)
+
+def test_columns_views():
+    """Test row views, slices, and selections of annotations in columns"""
+    fin_gaf = os.path.join(REPO, 'anno_columns.gaf')
+    wr_gaf_synthetic(fin_gaf, num_lines=300, seed=3)
+    nts = GafReader(fin_gaf, prt=None).associations
+    annos = GafReader(fin_gaf, prt=None, columnar=True).associations
+    os.remove(fin_gaf)
+    assert len(annos) == len(nts)
+    assert _get_row(annos[0]) == _get_row(nts[0])
+    assert _get_row(annos[-1]) == _get_row(nts[-1])
+    _chk_rows(nts[10:250:3], annos[10:250:3])
+    # Row views hold their own sets, which may be changed
+    annos[0].Qualifier.add('changed')
+    assert 'changed' not in annos[0].Qualifier
+    # Selections of single-value and many-value fields
+    _chk_rows([nt for nt in nts if nt.Evidence_Code in {'IEA', 'ND'}], annos.select('Evidence_Code', {'IEA', 'ND'}))
+    _chk_rows([nt for nt in nts if 'NOT' in nt.Qualifier], annos.select('Qualifier', {'NOT'}))
+    _chk_rows([nt for nt in nts if 10090 in nt.Taxon], annos.select('Taxon', {10090}))
+    assert not annos.select('GO_ID', {'GO:XXXXXXX'})
+    assert annos.get_values_used('NS') == list(dict.fromkeys(nt.NS for nt in nts))
+    try:
+        annos[len(nts)]
+        assert False, 'EXPECTED IndexError'
+    except IndexError:
+        pass
+
+def test_columns_memory(prt=sys.stdout):
+    """Test that annotations in columns use less memory than namedtuples"""
+    fin_gaf = os.path.join(REPO, 'anno_columns.gaf')
+    wr_gaf_synthetic(fin_gaf, num_lines=20000, num_genes=2000, seed=4)
+    col2mem = {}
+    for columnar in [False, True]:
+        tracemalloc.start()
+        objanno = GafReader(fin_gaf, prt=None, columnar=columnar)
+        col2mem[columnar] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        tic = timeit.default_timer()
+        for _ in range(5):
+            objanno.get_id2gos('BP', prt=None)
+        prt.write('{MB:6.2f} MB {SECS:7.4f} sec/id2gos {DESC}\n'.format(
+            MB=col2mem[columnar]/1e6, SECS=(timeit.default_timer() - tic)/5,
+            DESC='columns' if columnar else 'namedtuples'))
+    os.remove(fin_gaf)
+    assert col2mem[True] < col2mem[False]/3
+
+def _chk_rows(nts_exp, nts_act):
+    """Check that annotations in columns are the same as annotation namedtuples"""
+    assert len(nts_act) == len(nts_exp)
+    rows_act = [_get_row(nt) for nt in nts_act]
+    rows_exp = [_get_row(nt) for nt in nts_exp]
+    assert rows_act == rows_exp
+
+def _get_row(ntd):
+    """Get a comparable row. Annotation Extensions are compared as text"""
+    if hasattr(ntd, 'Extension') and ntd.Extension is not None:
+        return ntd._replace(Extension=str(ntd.Extension))
+    return ntd
+
+def _wr_gpad(fout_gpad, nts):
+    """Write GAF annotations as GPAD, using random ECO codes of the same evidence codes"""
+    rng = random.Random(0)
+    ev2ecos = {}
+    for eco, evcode in sorted(ECO2GRP.items()):
+        ev2ecos.setdefault(evcode, []).append(eco)
+    ns2qual = {'BP':'involved_in', 'MF':'enables', 'CC':'part_of'}
+    with open(fout_gpad, 'w') as prt:
+        prt.write('!gpa-version: 1.1\n')
+        for ntd in nts:
+            quals = [ns2qual[ntd.NS]]
+            if 'NOT' in ntd.Qualifier:
+                quals.insert(0, 'NOT')
+            prt.write('\t'.join([
+                ntd.DB, ntd.DB_ID, '|'.join(quals), ntd.GO_ID, '|'.join(sorted(ntd.DB_Reference)),
+                rng.choice(ev2ecos.get(ntd.Evidence_Code, ev2ecos['IEA'])), '|'.join(sorted(ntd.With_From)),
+                rng.choice(['', 'taxon:10090']), ntd.Date.strftime('%Y%m%d'), ntd.Assigned_By,
+                rng.choice(['', 'part_of(CL:0000576)']),
+                rng.choice(['', 'go_evidence={EV}'.format(EV=ntd.Evidence_Code)])]) + '\n')
+
+def _wr_gene2go(fout_gene2go, nts):
+    """Write GAF annotations in NCBI's gene2go format"""
+    ns2category = {'BP':'Process', 'MF':'Function', 'CC':'Component'}
+    ns2qual = {'BP':'involved_in', 'MF':'enables', 'CC':'located_in'}
+    with open(fout_gene2go, 'w') as prt:
+        prt.write('#tax_id\tGeneID\tGO_ID\tEvidence\tQualifier\tGO_term\tPubMed\tCategory\n')
+        for ntd in nts:
+            quals = [ns2qual[ntd.NS]]
+            if 'NOT' in ntd.Qualifier:
+                quals.insert(0, 'NOT')
+            pmids = sorted(r[5:] for r in ntd.DB_Reference if r[:5] == 'PMID:')
+            prt.write('\t'.join([
+                str(ntd.Taxon[-1]), ntd.DB_ID[1:], ntd.GO_ID, ntd.Evidence_Code, ' '.join(quals),
+                'term', '|'.join(pmids) if pmids else '-', ns2category[ntd.NS]]) + '\n')
+    assert set(NAMESPACE2NS.values()) == set(ns2category)
+
+
+if __name__ == '__main__':
+    test_gaf_columns()
+    test_gpad_columns()
+    test_gene2go_columns()
+    test_columns_views()
+    test_columns_memory()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+"""Test reading gzip, bgzip, and bzip2 annotation files through the common opener"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import os
+import sys
+import bz2
+import gzip
+import timeit
+import threading
+from goatools.anno.init.opener import open_anno
+from goatools.anno.init.opener import get_compression
+from goatools.anno.init.opener import DECOMPRESS
+from goatools.anno.init.chunks import is_chunkable
+from goatools.anno.factory import get_objanno
+from goatools.anno.gaf_reader import GafReader
+from goatools.anno.gaf_stream import GafStream
+from tests.utils import REPO
+from tests.utils import wr_gaf_synthetic
+from tests.test_anno_columns import _chk_rows
+from tests.test_anno_columns import _wr_gpad
+from tests.test_anno_columns import _wr_gene2go
+
+
+def test_opener_lines():
+    """Test that compressed files are read as the same lines as uncompressed files"""
+    fin_gaf = os.path.join(REPO, 'anno_opener.gaf')
+    wr_gaf_synthetic(fin_gaf, num_lines=5000, seed=10)
+    fins = _wr_compressed(fin_gaf)
+    with open(fin_gaf) as ifstrm:
+        lines = ifstrm.readlines()
+    assert get_compression(fin_gaf) is None and is_chunkable(fin_gaf)
+    for fin, compression in fins:
+        assert get_compression(fin) == compression
+        assert not is_chunkable(fin)
+        for decompress in sorted(DECOMPRESS):
+            with open_anno(fin, decompress) as ifstrm:
+                assert ifstrm.readlines() == lines, (fin, decompress)
+    _rm_files([fin_gaf] + [f for f, _ in fins])
+
+def test_opener_close():
+    """Test that decompression stops when a file is closed before it is read"""
+    fin_gaf = os.path.join(REPO, 'anno_opener.gaf')
+    wr_gaf_synthetic(fin_gaf, num_lines=50000, seed=11)
+    fin_gz = fin_gaf + '.gz'
+    _wr_gzip(fin_gaf, fin_gz)
+    for decompress in ['thread', 'subprocess']:
+        with open_anno(fin_gz, decompress) as ifstrm:
+            assert next(ifstrm)[0] == '!'
+        assert not [t for t in threading.enumerate() if t.name == 'gunzip']
+        # Header only
+        GafReader(fin_gz, hdr_only=True, prt=None)
+        assert not [t for t in threading.enumerate() if t.name == 'gunzip']
+    # Files which end before the gzip end-of-stream marker
+    with open(fin_gz, 'rb') as ifstrm:
+        data = ifstrm.read()
+    with open(fin_gz, 'wb') as prt:
+        prt.write(data[:len(data)//2])
+    for decompress, err in [('thread', EOFError), ('subprocess', IOError), ('inline', EOFError)]:
+        try:
+            with open_anno(fin_gz, decompress) as ifstrm:
+                for _ in ifstrm:
+                    pass
+            assert False, 'EXPECTED {E}'.format(E=err.__name__)
+        except err:
+            pass
+    _rm_files([fin_gaf, fin_gz])
+
+def test_opener_readers():
+    """Test that all annotation readers read compressed files"""
+    fin_gaf = os.path.join(REPO, 'anno_opener.gaf')
+    fin_gpad = os.path.join(REPO, 'anno_opener.gpad')
+    fin_gene2go = os.path.join(REPO, 'anno_opener_gene2go')
+    fin_id2gos = os.path.join(REPO, 'anno_opener.id2gos')
+    godag = wr_gaf_synthetic(fin_gaf, num_lines=2000, seed=12)
+    nts = GafReader(fin_gaf, prt=None).associations
+    _wr_gpad(fin_gpad, nts)
+    _wr_gene2go(fin_gene2go, nts)
+    with open(fin_id2gos, 'w') as prt:
+        for dbid, goids in GafReader(fin_gaf, prt=None).get_id2gos_nss(prt=None).items():
+            prt.write('{ID}\t{GOs}\n'.format(ID=dbid, GOs=';'.join(sorted(goids))))
+    fouts = []
+    for fin in [fin_gaf, fin_gpad, fin_gene2go, fin_id2gos]:
+        kws = {'godag':godag, 'taxids':True} if fin != fin_id2gos else {'godag':godag}
+        objanno = get_objanno(fin, anno_type='id2gos' if fin == fin_id2gos else None, **kws)
+        for fin_z, _ in _wr_compressed(fin):
+            fouts.append(fin_z)
+            objz = get_objanno(fin_z, anno_type='id2gos' if fin == fin_id2gos else None, **kws)
+            assert type(objz) is type(objanno)
+            _chk_rows(objanno.associations, objz.associations)
+            assert objz.get_id2gos_nss() == objanno.get_id2gos_nss()
+        if fin == fin_gaf:
+            id2gos = GafStream(fin_gaf).get_id2gos(prt=None)
+            assert GafStream(fin_gaf + '.gz').get_id2gos(prt=None) == id2gos
+            assert GafStream(fin_gaf + '.gz').get_id2gos(prt=None, processes=2) == id2gos
+    _rm_files([fin_gaf, fin_gpad, fin_gene2go, fin_id2gos] + fouts)
+
+def run_benchmark(num_lines=2000000, prt=sys.stdout):
+    """Compare the time to read an uncompressed and a compressed GAF"""
+    fin_gaf = os.path.join(REPO, 'anno_opener_benchmark.gaf')
+    wr_gaf_synthetic(fin_gaf, num_lines=num_lines, num_genes=20000, seed=13)
+    fin_gz = fin_gaf + '.gz'
+    _wr_gzip(fin_gaf, fin_gz)
+    for fin, decompress in [(fin_gaf, None)] + [(fin_gz, d) for d in sorted(DECOMPRESS)]:
+        tic = timeit.default_timer()
+        with open_anno(fin, decompress) as ifstrm:
+            for _ in ifstrm:
+                pass
+        prt.write('{SECS:8.2f} sec read lines {F} {D}\n'.format(
+            SECS=timeit.default_timer() - tic, F=os.path.basename(fin), D=decompress if decompress else ''))
+    for fin in [fin_gaf, fin_gz]:
+        tic = timeit.default_timer()
+        GafStream(fin, namespaces={'BP'}).get_id2gos(prt=None)
+        prt.write('{SECS:8.2f} sec GafStream.get_id2gos {F}\n'.format(
+            SECS=timeit.default_timer() - tic, F=os.path.basename(fin)))
+    _rm_files([fin_gaf, fin_gz])
+
+def _wr_compressed(fin):
+    """Write a file as gzip, as bgzip-like gzip members, and as bzip2"""
+    fin_gz = fin + '.gz'
+    fin_bgz = fin + '.bgz'
+    fin_bz2 = fin + '.bz2'
+    _wr_gzip(fin, fin_gz)
+    with open(fin, 'rb') as ifstrm:
+        data = ifstrm.read()
+    # bgzip files are gzip members of up to 64KB of data, ending with an empty member
+    with open(fin_bgz, 'wb') as prt:
+        for beg in range(0, len(data), 1 << 16):
+            prt.write(gzip.compress(data[beg:beg + (1 << 16)]))
+        prt.write(gzip.compress(b''))
+    with open(fin_bz2, 'wb') as prt:
+        prt.write(bz2.compress(data))
+    return [(fin_gz, 'gzip'), (fin_bgz, 'gzip'), (fin_bz2, 'bzip2')]
+
+def _wr_gzip(fin, fout_gz):
+    """Write a gzip file"""
+    with open(fin, 'rb') as ifstrm:
+        with gzip.open(fout_gz, 'wb') as prt:
+            prt.write(ifstrm.read())
+
+def _rm_files(fins):
+    """Remove files written by a test"""
+    for fin in fins:
+        os.remove(fin)
+
+
+if __name__ == '__main__':
+    test_opener_lines()
+    test_opener_close()
+    test_opener_readers()
+    run_benchmark()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""Test reading a GAF one line at a time, with selections tested on raw fields"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import os
+import sys
+import tracemalloc
+from goatools.anno.gaf_reader import GafReader
+from goatools.anno.gaf_stream import GafStream
+from goatools.anno.opts import AnnoOptions
+from tests.utils import REPO
+from tests.utils import wr_gaf_synthetic
+
+# Selections of annotation lines, for example, keep NOT or exclude IEA
+KWS_ID2GOS = [
+    {},
+    {'keep_ND':True},
+    {'keep_NOT':True},
+    {'keep_ND':True, 'keep_NOT':True},
+    {'ev_include':{'IDA', 'IMP'}},
+    {'ev_exclude':{'IEA'}, 'keep_NOT':True},
+    {'go2geneids':True},
+]
+
+
+def test_stream_id2gos():
+    """Test that id2gos read from a stream is the same as id2gos read from all annotations"""
+    fin_gaf = os.path.join(REPO, 'gaf_stream.gaf')
+    godag = wr_gaf_synthetic(fin_gaf, num_lines=3000)
+    objanno = GafReader(fin_gaf, godag=godag, prt=None)
+    for kws in KWS_ID2GOS:
+        for nspc in ['BP', 'MF', 'CC']:
+            exp = objanno.get_id2gos(nspc, prt=None, **kws)
+            assert GafStream(fin_gaf, namespaces={nspc}, **kws).get_id2gos(prt=None) == exp
+        assert GafStream(fin_gaf, **kws).get_id2gos(prt=None) == objanno.get_id2gos_nss(prt=None, **kws)
+    exp = objanno.get_id2gos('BP', prt=None, propagate_counts=True)
+    objstrm = GafStream(fin_gaf, namespaces={'BP'})
+    assert objstrm.get_id2gos(propagate_counts=True, godag=godag, prt=None) == exp
+    assert objstrm.num_read == 3000
+    assert objstrm.num_kept == sum(1 for nt in objanno.associations if nt.NS == 'BP' and \
+        nt.Evidence_Code != 'ND' and 'NOT' not in nt.Qualifier)
+    assert objstrm.hdr == objanno.hdr
+    # Taxids of gene products
+    for taxids in [[9606], [10090], [9606, 10090], [7227]]:
+        nts = [nt for nt in objanno.associations if nt.Taxon[0] in taxids]
+        # pylint: disable=protected-access
+        exp = objanno._get_id2gos(nts, keep_NOT=True, prt=None)
+        assert GafStream(fin_gaf, taxids=taxids, keep_NOT=True).get_id2gos(prt=None) == exp
+    os.remove(fin_gaf)
+
+def test_stream_nts():
+    """Test that the annotations kept by a stream are the annotations kept by GafReader"""
+    for fin_gaf in ['data/gaf/goa_human_illegal.gaf', 'tests/data/gaf_missingsym.mgi']:
+        fin_gaf = os.path.join(REPO, fin_gaf)
+        objanno = GafReader(fin_gaf, prt=None, allow_missing_symbol=True)
+        for kws in KWS_ID2GOS:
+            for nss in [None, {'MF'}, {'BP', 'CC'}]:
+                fnc = AnnoOptions(objanno.evobj, **kws).getfnc_qual_ev()
+                exp = [nt for nt in objanno.associations \
+                    if (nss is None or nt.NS in nss) and fnc(nt.Qualifier, nt.Evidence_Code)]
+                act = list(GafStream(fin_gaf, namespaces=nss, allow_missing_symbol=True, **kws).iter_nts())
+                assert [_get_row(nt) for nt in act] == [_get_row(nt) for nt in exp]
+
+def test_stream_memory(prt=sys.stdout):
+    """Test that reading id2gos from a stream uses less memory than reading all annotations"""
+    fin_gaf = os.path.join(REPO, 'gaf_stream.gaf')
+    wr_gaf_synthetic(fin_gaf, num_lines=20000, num_genes=2000, seed=1)
+    tracemalloc.start()
+    GafStream(fin_gaf, namespaces={'BP'}).get_id2gos(prt=None)
+    peak_stream = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    tracemalloc.start()
+    GafReader(fin_gaf, prt=None).get_id2gos('BP', prt=None)
+    peak_all = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    os.remove(fin_gaf)
+    prt.write('{S:6.2f} MB peak streaming, {A:6.2f} MB peak reading all annotations\n'.format(
+        S=peak_stream/1e6, A=peak_all/1e6))
+    assert peak_stream < peak_all/10
+
+def _get_row(ntd):
+    """Get a comparable row. Annotation Extensions are compared as text"""
+    return ntd._replace(Extension=str(ntd.Extension)) if hasattr(ntd, 'Extension') else ntd
+
+
+if __name__ == '__main__':
+    test_stream_id2gos()
+    test_stream_nts()
+    test_stream_memory()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""Test ancestors and descendants computed once per GODag and relationship set"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import os
+import copy
+import pickle
+from goatools.obo_parser import GODag
+from goatools.godag.go_tasks import get_go2ancestors
+from goatools.godag.go_tasks import get_go2descendants
+from goatools.godag.closure import GoClosure
+from goatools.godag.closure import get_closure
+from goatools.gosubdag.godag_rcnt import CountRelatives
+from goatools.semantic import TermCounts
+from tests.utils import REPO
+from tests.utils import chk_godags_equal
+
+
+def test_closure():
+    """Test GoClosure ancestors and descendants against GO Term traversals"""
+    for fin in ['tests/data/goslim_generic.obo', 'tests/data/i126/viral_gene_silence.obo']:
+        fin_obo = os.path.join(REPO, fin)
+        godag = GODag(fin_obo, {'relationship'}, prt=None)
+        godag_compact = GODag(fin_obo, {'relationship'}, prt=None, compact=True)
+        goids = set(godag)
+        for relationships in [None, {'part_of'}, {'regulates', 'negatively_regulates'}, True]:
+            go2ancestors = get_go2ancestors(set(godag.values()), relationships)
+            go2descendants = get_go2descendants(set(godag.values()), relationships)
+            for go2obj in [godag, godag_compact, dict(godag)]:
+                closure = get_closure(go2obj, relationships)
+                assert closure.get_go2ancestors(goids) == _add_alts(go2ancestors, godag)
+                assert closure.get_go2descendants(goids) == _add_alts(go2descendants, godag)
+                _chk_is_ancestor(closure, go2ancestors, godag)
+
+def test_closure_shared():
+    """Test that a GODag computes one GoClosure per relationship set"""
+    fin_obo = os.path.join(REPO, 'tests/data/i126/viral_gene_silence.obo')
+    godag = GODag(fin_obo, {'relationship'}, prt=None)
+    assert godag.get_closure() is godag.get_closure(set())
+    assert godag.get_closure(True) is godag.get_closure(
+        {'part_of', 'regulates', 'negatively_regulates', 'positively_regulates'})
+    assert godag.get_closure({'part_of'}) is get_closure(godag, ['part_of'])
+    assert godag.get_closure({'part_of'}) is not godag.get_closure()
+    assert isinstance(GoClosure(dict(godag)), GoClosure)
+
+def test_closure_rcnt():
+    """Test CountRelatives using a GoClosure"""
+    fin_obo = os.path.join(REPO, 'tests/data/i126/viral_gene_silence.obo')
+    godag = GODag(fin_obo, {'relationship'}, prt=None)
+    go2obj = {o.item_id:o for o in godag.values() if o.depth <= 4}
+    for relationships in [None, {'regulates'}, True]:
+        exp = CountRelatives(go2obj, relationships)
+        act = CountRelatives(go2obj, relationships, closure=godag.get_closure(relationships))
+        assert act.go2ancestors == _get_nonempty(exp.go2ancestors)
+        assert act.go2descendants == _get_nonempty(exp.go2descendants)
+        assert act.go2dcnt == _get_nonempty(exp.go2dcnt)
+
+def test_closure_goterm():
+    """Test GO Term ancestors and descendants from the GODag closures against GO Term traversals"""
+    fin_obo = os.path.join(REPO, 'tests/data/i126/viral_gene_silence.obo')
+    godag = GODag(fin_obo, {'relationship'}, prt=None)
+    go2ancestors = get_go2ancestors(set(godag.values()), None)
+    go2upper = get_go2ancestors(set(godag.values()), True)
+    go2descendants = get_go2descendants(set(godag.values()), None)
+    go2lower = get_go2descendants(set(godag.values()), True)
+    for goterm in set(godag.values()):
+        goid = goterm.item_id
+        assert goterm.get_all_parents() == go2ancestors.get(goid, set())
+        assert goterm.get_all_upper() == go2upper.get(goid, set())
+        assert goterm.get_all_children() == go2descendants.get(goid, set())
+        assert goterm.get_all_lower() == go2lower.get(goid, set())
+    assert set(godag.closures) == {frozenset(), True}
+
+def test_closure_pickle():
+    """Test that GO Terms are pickled and copied without their GODag, which sets it again"""
+    fin_obo = os.path.join(REPO, 'tests/data/i126/viral_gene_silence.obo')
+    for compact in [False, True]:
+        godag = GODag(fin_obo, {'relationship'}, prt=None, compact=compact)
+        goterm = godag['GO:0060147']
+        assert goterm.get_all_upper()
+        assert godag.closures
+        # The GODag, including its closures, is not in the state of a GO Term
+        assert getattr(copy.deepcopy(goterm), '_godag', None) is None
+        assert getattr(pickle.loads(pickle.dumps(goterm)), '_godag', None) is None
+        # An unpickled GODag is set in each of its GO Terms
+        godag_rd = pickle.loads(pickle.dumps(godag))
+        chk_godags_equal(godag_rd, godag)
+        for goid, goterm_rd in godag_rd.items():
+            assert goterm_rd._godag is godag_rd  # pylint: disable=protected-access
+            assert goterm_rd.get_all_upper() == godag[goid].get_all_upper()
+
+def test_closure_termcounts():
+    """Test that TermCounts using the closure has the counts found by traversing all GO Terms"""
+    fin_obo = os.path.join(REPO, 'tests/data/goslim_generic.obo')
+    godag = GODag(fin_obo, {'relationship'}, prt=None)
+    goids_main = sorted(set(o.item_id for o in godag.values()))
+    goids_alt = sorted(go for go, o in godag.items() if go != o.item_id)
+    assert goids_alt
+    # Annotations to main and alternate GO IDs
+    annots = {'gene{N}'.format(N=i):{goids_main[i], goids_alt[i % len(goids_alt)]} for i in range(40)}
+    for relationships in [None, {'part_of'}]:
+        tcntobj = TermCounts(godag, annots, relationships)
+        # Counts found as before the closure: Ancestors of all GO Terms, for main GO IDs
+        go2up = get_go2ancestors(set(godag.values()), relationships)
+        go2genes = {}
+        for gene, goids in annots.items():
+            for goid in set(godag[go].item_id for go in goids):
+                for goid_up in go2up.get(goid, set()).union([goid]):
+                    go2genes.setdefault(goid_up, set()).add(gene)
+        assert {go:tcntobj.gocnts[go] for go in goids_main if tcntobj.gocnts[go]} == \
+            {go:len(genes) for go, genes in go2genes.items()}
+
+def _chk_is_ancestor(closure, go2ancestors, godag):
+    """Check is_ancestor and is_descendant for all GO ID pairs"""
+    goids = [o.item_id for o in godag.values()]
+    for goid in goids:
+        ancestors = go2ancestors.get(goid) or set()
+        assert closure.get_ancestors(goid) == ancestors
+        for goid_upper in goids:
+            exp = goid_upper in ancestors
+            assert closure.is_ancestor(goid_upper, goid) == exp
+            assert closure.is_descendant(goid, goid_upper) == exp
+
+def _add_alts(go2relatives, godag):
+    """Add alternate GO IDs to the GO IDs with relatives"""
+    return {go:go2relatives[o.item_id] for go, o in godag.items() if go2relatives.get(o.item_id)}
+
+def _get_nonempty(go2relatives):
+    """Get GO IDs having relatives. Traversing selected relationships also returns empty sets"""
+    return {go:rels for go, rels in go2relatives.items() if rels}
+
+
+if __name__ == '__main__':
+    test_closure()
+    test_closure_shared()
+    test_closure_rcnt()
+    test_closure_goterm()
+    test_closure_pickle()
+    test_closure_termcounts()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
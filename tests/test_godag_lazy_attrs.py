@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""Test loading optional GO Term attributes from the obo file on first access"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import os
+import shutil
+import pickle
+import tempfile
+from goatools.obo_parser import GODag
+from goatools.obo_parser import GOTerm
+from goatools.godag.obo_lazy_attrs import LazyGOTerm
+from goatools.godag.obo_lazy_attrs import get_goid2offset
+from tests.utils import REPO
+from tests.utils import get_godag_summary
+
+OPTATTRS = {'def', 'synonym', 'relationship', 'xref', 'subset', 'comment', 'consider', 'replaced_by'}
+FINS = ['tests/data/goslim_generic.obo', 'tests/data/i126/viral_gene_silence.obo']
+
+
+def test_lazy_attrs():
+    """Test that lazy optional attributes have the same values as optional attributes"""
+    for fin in FINS:
+        fin_obo = os.path.join(REPO, fin)
+        exp = get_godag_summary(GODag(fin_obo, OPTATTRS, prt=None))
+        # Load optional attributes one GO Term at a time, relationships all at once
+        godag = GODag(fin_obo, lazy_attrs=True, prt=None)
+        assert get_godag_summary(godag) == exp
+        _chk_not_lazy(godag)
+        # Load all optional attributes in one pass
+        godag = GODag(fin_obo, {'def', 'xref'}, lazy_attrs=OPTATTRS, prt=None)
+        assert godag.lazyattrs.optional_attrs == OPTATTRS.difference({'def', 'xref'})
+        godag.load_optional_attrs()
+        _chk_not_lazy(godag)
+        assert get_godag_summary(godag) == exp
+        # Optional attributes in a compact GODag are loaded when the GODag is loaded
+        godag = GODag(fin_obo, lazy_attrs=OPTATTRS, prt=None, compact=True)
+        assert godag.lazyattrs is None
+        assert get_godag_summary(godag) == exp
+
+def test_lazy_attrs_first_access():
+    """Test that one GO Term is loaded at a time, except relationships"""
+    fin_obo = os.path.join(REPO, 'tests/data/i126/viral_gene_silence.obo')
+    godag = GODag(fin_obo, lazy_attrs={'defn', 'synonym', 'relationship'}, prt=None)
+    lazyobj = godag.lazyattrs
+    goterm = godag['GO:0060147']
+    assert isinstance(goterm, LazyGOTerm)
+    assert not lazyobj.goids_loaded and lazyobj.data is None
+    assert goterm.defn[:1] == '"'
+    assert lazyobj.goids_loaded == {'GO:0060147'}
+    assert 'synonym' in vars(goterm)
+    assert 'relationship' not in vars(godag['GO:0060148'])
+    # Relationships link GO Terms, so accessing one loads relationships for all GO Terms
+    assert goterm.relationship
+    assert all('relationship' in vars(o) for o in godag.values())
+    assert all(hasattr(o, 'reldepth') for o in godag.values())
+    # Attributes which are not optional attributes are not found
+    assert not hasattr(goterm, 'not_an_attr')
+    assert not hasattr(goterm, 'xref')
+    # The obo file is kept open until all lazy attributes are loaded
+    assert lazyobj.data is not None
+    godag.load_optional_attrs()
+    assert lazyobj.data is None and lazyobj.ifstrm is None
+
+def test_lazy_attrs_offsets():
+    """Test that each obo reader saves the byte offsets of [Term] stanzas while parsing"""
+    fin_obo = os.path.join(REPO, 'tests/data/goslim_generic.obo')
+    with open(fin_obo, 'rb') as ifstrm:
+        exp = get_goid2offset(ifstrm.read())
+    for reader, processes in [(None, None), ('mmap', None), ('parallel', 2)]:
+        godag = GODag(fin_obo, lazy_attrs=True, prt=None, reader=reader, processes=processes)
+        assert godag.lazyattrs.goid2offset == exp, reader
+    # A GODag loaded from a snapshot finds the offsets on first access
+    dir_tmp = tempfile.mkdtemp()
+    try:
+        fin_tmp = os.path.join(dir_tmp, 'goslim_generic.obo')
+        shutil.copy(fin_obo, fin_tmp)
+        exp_summary = get_godag_summary(GODag(fin_tmp, OPTATTRS, prt=None))
+        for _ in range(2):
+            godag = GODag(fin_tmp, lazy_attrs=OPTATTRS, prt=None, cache=True)
+            assert get_godag_summary(godag) == exp_summary
+        assert godag.lazyattrs.goid2offset == exp
+    finally:
+        shutil.rmtree(dir_tmp)
+
+def test_lazy_attrs_pickle():
+    """Test that a GODag with lazy GO Terms can be pickled"""
+    fin_obo = os.path.join(REPO, 'tests/data/goslim_generic.obo')
+    exp = get_godag_summary(GODag(fin_obo, OPTATTRS, prt=None))
+    godag = GODag(fin_obo, lazy_attrs=OPTATTRS, prt=None)
+    # One GO Term is loaded, so the obo file is open
+    assert godag['GO:0008150'].defn
+    godag_rd = pickle.loads(pickle.dumps(godag))
+    goterm = godag_rd['GO:0008150']
+    assert type(goterm) is LazyGOTerm  # pylint: disable=unidiomatic-typecheck
+    assert goterm._godag is godag_rd  # pylint: disable=protected-access
+    assert godag_rd.lazyattrs.godag is godag_rd
+    assert get_godag_summary(godag_rd) == exp
+    _chk_not_lazy(godag_rd)
+    # A lazy GO Term is pickled with its GODag
+    goterm = pickle.loads(pickle.dumps(GODag(fin_obo, lazy_attrs=OPTATTRS, prt=None)['GO:0005575']))
+    assert goterm.synonym is not None and goterm._godag['GO:0005575'] is goterm
+
+def _chk_not_lazy(godag):
+    """When all optional attributes are loaded, GO Terms are GOTerm objects"""
+    for goterm in godag.values():
+        assert type(goterm) is GOTerm  # pylint: disable=unidiomatic-typecheck
+
+
+if __name__ == '__main__':
+    test_lazy_attrs()
+    test_lazy_attrs_first_access()
+    test_lazy_attrs_offsets()
+    test_lazy_attrs_pickle()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
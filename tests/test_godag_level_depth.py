@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""Test level, depth, and reldepth set in one topological pass"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import os
+import tempfile
+import shutil
+from goatools.obo_parser import GODag
+from goatools.godag_obosm import OboToGoDagSmall
+from goatools.godag.level_depth import get_id2level_depth
+from tests.utils import REPO
+
+
+def test_level_depth():
+    """Test level, depth, and reldepth against the distances from the root GO Terms"""
+    for fin in ['tests/data/goslim_generic.obo', 'tests/data/i126/viral_gene_silence.obo']:
+        godag = GODag(os.path.join(REPO, fin), {'relationship'}, prt=None)
+        for goterm in godag.values():
+            assert goterm.level == _get_dist(goterm, lambda o: o.parents, min), goterm
+            assert goterm.depth == _get_dist(goterm, lambda o: o.parents, max), goterm
+            assert goterm.reldepth == _get_dist(goterm, lambda o: o.get_goterms_upper(), max)
+        # The same values, given GO IDs and their parent GO IDs
+        id2level, id2depth = get_id2level_depth(
+            {o.item_id:set(p.item_id for p in o.parents) for o in godag.values()})
+        for goterm in godag.values():
+            assert id2level[goterm.item_id] == goterm.level
+            assert id2depth[goterm.item_id] == goterm.depth
+
+def test_level_depth_deep():
+    """Test a DAG deeper than the recursion limit"""
+    num_terms = 5000
+    dirtmp = tempfile.mkdtemp()
+    try:
+        fin_obo = os.path.join(dirtmp, 'deep.obo')
+        with open(fin_obo, 'w') as prt:
+            prt.write('format-version: 1.2\n\n')
+            for idx in range(num_terms):
+                prt.write('[Term]\nid: GO:{I:07}\nname: term {I}\nnamespace: biological_process\n'.format(I=idx))
+                if idx:
+                    prt.write('is_a: GO:{I:07}\n'.format(I=idx-1))
+                if idx > 1:
+                    prt.write('relationship: part_of GO:{I:07}\n'.format(I=idx-2))
+                prt.write('\n')
+        godag = GODag(fin_obo, {'relationship'}, prt=None)
+        for idx in range(num_terms):
+            goterm = godag['GO:{I:07}'.format(I=idx)]
+            assert goterm.level == idx
+            assert goterm.depth == idx
+            assert goterm.reldepth == idx
+        # Traverse the sub-graph above the deepest GO Term
+        objsm = OboToGoDagSmall(goids=['GO:{I:07}'.format(I=num_terms-1)], obodag=godag)
+        go2level, go2depth = objsm.get_go2level_depth()
+        assert len(go2level) == num_terms
+        assert go2depth['GO:{I:07}'.format(I=num_terms-1)] == num_terms - 1
+    finally:
+        shutil.rmtree(dirtmp)
+
+def test_level_depth_cycle():
+    """Test that a cycle is reported"""
+    try:
+        get_id2level_depth({'B':{'A'}, 'C':{'B', 'D'}, 'D':{'C'}})
+        assert False, 'CYCLE NOT FOUND'
+    except RuntimeError as err:
+        assert 'CYCLE' in str(err)
+
+def _get_dist(goterm, get_uppers, fnc):
+    """Get the shortest or longest distance from a root GO Term, without memoization"""
+    uppers = get_uppers(goterm)
+    if not uppers:
+        return 0
+    return fnc(_get_dist(o, get_uppers, fnc) for o in uppers) + 1
+
+
+if __name__ == '__main__':
+    test_level_depth()
+    test_level_depth_deep()
+    test_level_depth_cycle()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
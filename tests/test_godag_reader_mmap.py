@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""Test that the memory-mapped obo reader creates the same GODag as OBOReader"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import os
+import tempfile
+import shutil
+from goatools.obo_parser import GODag
+from tests.utils import REPO
+from tests.utils import chk_godags_equal
+
+OPTATTRS = {'def', 'synonym', 'relationship', 'xref', 'subset', 'comment', 'consider', 'replaced_by'}
+
+
+def test_reader_mmap():
+    """Test that the memory-mapped obo reader creates the same GODag as OBOReader"""
+    for fin in ['tests/data/goslim_generic.obo',
+                'tests/data/i126/viral_gene_silence.obo',
+                'tests/data/yangRWC/fig1a.obo']:
+        fin_obo = os.path.join(REPO, fin)
+        for optional_attrs in [None, {'def'}, {'relationship'}, OPTATTRS]:
+            for load_obsolete in [False, True]:
+                godag_exp = GODag(fin_obo, optional_attrs, load_obsolete, prt=None)
+                godag_act = GODag(fin_obo, optional_attrs, load_obsolete, prt=None, reader='mmap')
+                chk_godags_equal(godag_act, godag_exp)
+
+def test_reader_mmap_lines():
+    """Test stanza boundaries: CRLF line endings, whitespace-only lines, no final blank line"""
+    fin_obo = os.path.join(REPO, 'tests/data/goslim_generic.obo')
+    with open(fin_obo) as ifstrm:
+        txt = ifstrm.read()
+    dirtmp = tempfile.mkdtemp()
+    try:
+        fout_obo = os.path.join(dirtmp, 'lines.obo')
+        for txt_cur in [txt.replace('\n', '\r\n'),
+                        txt.replace('\n\n', '\n  \n'),
+                        txt.rstrip(),
+                        txt[:txt.index('[Typedef]')].rstrip()]:
+            with open(fout_obo, 'w', newline='') as prt:
+                prt.write(txt_cur)
+            godag_exp = GODag(fout_obo, OPTATTRS, prt=None)
+            godag_act = GODag(fout_obo, OPTATTRS, prt=None, reader='mmap')
+            chk_godags_equal(godag_act, godag_exp)
+    finally:
+        shutil.rmtree(dirtmp)
+
+
+if __name__ == '__main__':
+    test_reader_mmap()
+    test_reader_mmap_lines()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
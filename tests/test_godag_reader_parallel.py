@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""Test that the parallel obo reader creates the same GODag as OBOReader"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import os
+from goatools.obo_parser import GODag
+from goatools.godag.obo_reader_parallel import OboReaderParallel
+from goatools.godag.obo_reader_parallel import get_chunks
+from goatools.godag.obo_reader_mmap import get_mmap
+from tests.utils import REPO
+from tests.utils import chk_godags_equal
+
+OPTATTRS = {'def', 'synonym', 'relationship', 'xref', 'subset', 'comment', 'consider', 'replaced_by'}
+
+
+def test_reader_parallel():
+    """Test that the parallel obo reader creates the same GODag as OBOReader"""
+    for fin in ['tests/data/goslim_generic.obo',
+                'tests/data/i126/viral_gene_silence.obo']:
+        fin_obo = os.path.join(REPO, fin)
+        for optional_attrs in [None, {'relationship'}, OPTATTRS]:
+            for load_obsolete in [False, True]:
+                godag_exp = GODag(fin_obo, optional_attrs, load_obsolete, prt=None)
+                for processes in [1, 2, 3]:
+                    godag_act = GODag(fin_obo, optional_attrs, load_obsolete, prt=None,
+                                      reader='parallel', processes=processes)
+                    chk_godags_equal(godag_act, godag_exp)
+                    assert list(godag_act.typedefs) == list(godag_exp.typedefs)
+                    # GO Terms are read in the same order as the serial reader
+                    assert list(godag_act) == list(godag_exp)
+
+def test_reader_parallel_chunks():
+    """Test that chunks start at stanza headers and cover all stanzas"""
+    fin_obo = os.path.join(REPO, 'tests/data/goslim_generic.obo')
+    reader = OboReaderParallel(fin_obo, OPTATTRS, processes=1)
+    with open(fin_obo, 'rb') as ifstrm:
+        data = get_mmap(ifstrm)
+        pos = reader._init_header(data)  # pylint: disable=protected-access
+        for num_chunks in [1, 2, 7, 100, 100000]:
+            chunks = get_chunks(data, pos, num_chunks)
+            assert chunks[0][0] == pos and chunks[-1][1] == len(data)
+            for (_, end), (beg, _) in zip(chunks, chunks[1:]):
+                assert end == beg
+            assert all(data[beg:beg+1] == b'[' for beg, _ in chunks)
+        data.close()
+
+
+if __name__ == '__main__':
+    test_reader_parallel()
+    test_reader_parallel_chunks()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
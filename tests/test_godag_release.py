@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""Test updating a GODag in place from a new obo release"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import os
+import tempfile
+import shutil
+from goatools.obo_parser import GODag
+from tests.utils import REPO
+from tests.utils import get_godag_summary
+
+OPTATTRS = {'def', 'synonym', 'relationship', 'xref', 'subset', 'comment', 'consider', 'replaced_by'}
+RELS = [None, True, {'regulates'}]
+
+TERM_NEW = """[Term]
+id: GO:0099998
+name: new child of gene expression
+namespace: biological_process
+alt_id: GO:0099997
+is_a: GO:0010467 ! gene expression
+relationship: part_of GO:0009987 ! cellular process
+
+"""
+
+OBSOLETE_OLD = """is_a: GO:0060148 ! positive regulation of posttranscriptional gene silencing
+relationship: part_of GO:0009616 ! virus induced gene silencing
+"""
+
+
+def test_apply_release():
+    """Test updating a GODag in place from a new obo release"""
+    fin_obo = os.path.join(REPO, 'tests/data/i126/viral_gene_silence.obo')
+    dirtmp = tempfile.mkdtemp()
+    try:
+        fout_obo1, fout_obo2 = _wr_releases(fin_obo, dirtmp)
+        for optional_attrs in [None, OPTATTRS]:
+            for load_obsolete in [False, True]:
+                godag = GODag(fin_obo, optional_attrs, load_obsolete, prt=None)
+                rels_all = RELS if optional_attrs else [None]
+                closures = [godag.get_closure(r) for r in rels_all]
+                # Release 1: Add, rename, re-parent, relink, add alt_id, modify, and obsolete
+                diff = godag.apply_release(fout_obo1, prt=None)
+                assert diff.added == {'GO:0099998'}
+                assert diff.obsoleted == {'GO:0060150'}
+                assert not diff.removed
+                assert set(diff.renamed) == {'GO:0010608'}
+                assert 'GO:0010629' in diff.reparented
+                assert diff.alt_ids == {'GO:0010467': (set(), {'GO:0099999'})}
+                assert diff.modified == ({'GO:0010608'} if optional_attrs else set())
+                assert ('GO:0010468' in diff.relinked) == (optional_attrs is not None)
+                assert 'GO:0060150' not in godag or load_obsolete
+                _chk_godag(godag, GODag(fout_obo1, optional_attrs, load_obsolete, prt=None))
+                # Closures are updated in place
+                assert [godag.get_closure(r) for r in rels_all] == closures
+                # Release 2: Remove GO Terms, one having an alt GO ID
+                diff = godag.apply_release(fout_obo2, prt=None)
+                assert diff.removed == ({'GO:0099998', 'GO:0060150'} if load_obsolete else {'GO:0099998'})
+                assert diff.alt_ids['GO:0099998'] == ({'GO:0099997'}, set())
+                _chk_godag(godag, GODag(fout_obo2, optional_attrs, load_obsolete, prt=None))
+    finally:
+        shutil.rmtree(dirtmp)
+
+def _chk_godag(godag_act, godag_exp):
+    """Check that the updated GODag and its closures are the same as the GODag read from the release"""
+    assert set(godag_act) == set(godag_exp)
+    assert get_godag_summary(godag_act) == get_godag_summary(godag_exp)
+    assert godag_act.data_version == godag_exp.data_version
+    assert godag_act.version == godag_exp.version
+    for rels in RELS:
+        if rels and godag_exp.optional_attrs is None:
+            continue
+        closure_act = godag_act.get_closure(rels)
+        closure_exp = godag_exp.get_closure(rels)
+        assert set(closure_act.go2idx) == set(closure_exp.go2idx)
+        for goid in godag_exp:
+            assert closure_act.get_ancestors(goid) == closure_exp.get_ancestors(goid), goid
+            assert closure_act.get_descendants(goid) == closure_exp.get_descendants(goid), goid
+
+def _wr_releases(fin_obo, dirtmp):
+    """Write two new obo releases, each changing GO Terms in the previous release"""
+    with open(fin_obo) as ifstrm:
+        txt = ifstrm.read()
+    for old, new in [
+            ('releases/2019-04-17', 'releases/2019-05-01'),
+            ('name: posttranscriptional regulation of gene expression',
+             'name: post-transcriptional regulation of gene expression'),
+            ('gene expression after the production of an RNA transcript." [GOC:dph, GOC:tb]',
+             'gene expression after the production of an RNA transcript." [GOC:dph]'),
+            ('is_a: GO:0010605 ! negative regulation of macromolecule metabolic process\n'
+             'relationship: negatively_regulates GO:0010467',
+             'relationship: negatively_regulates GO:0010467'),
+            ('relationship: regulates GO:0010467 ! gene expression',
+             'relationship: positively_regulates GO:0010467 ! gene expression'),
+            ('name: gene expression\nnamespace: biological_process\n',
+             'name: gene expression\nnamespace: biological_process\nalt_id: GO:0099999\n'),
+            (OBSOLETE_OLD, 'is_obsolete: true\n')]:
+        assert txt.count(old) == 1, old
+        txt = txt.replace(old, new)
+    txt = txt.rstrip() + '\n\n' + TERM_NEW
+    fout_obo1 = os.path.join(dirtmp, 'release1.obo')
+    with open(fout_obo1, 'w') as prt:
+        prt.write(txt)
+    txt = txt.replace('releases/2019-05-01', 'releases/2019-06-01').replace(TERM_NEW, '')
+    beg = txt.index('[Term]\nid: GO:0060150')
+    txt = txt[:beg] + txt[txt.index('[Term]', beg + 1):]
+    fout_obo2 = os.path.join(dirtmp, 'release2.obo')
+    with open(fout_obo2, 'w') as prt:
+        prt.write(txt)
+    return fout_obo1, fout_obo2
+
+
+if __name__ == '__main__':
+    test_apply_release()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
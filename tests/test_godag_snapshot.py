@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+"""Test loading a GODag from a binary snapshot of a parsed obo file"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import os
+import shutil
+import tempfile
+from goatools.obo_parser import GODag
+from tests.utils import REPO
+from tests.utils import chk_godags_equal
+
+OPTATTRS = {'def', 'synonym', 'relationship', 'xref', 'subset', 'comment', 'consider', 'replaced_by'}
+
+
+def test_snapshot():
+    """Test that a GODag loaded from a snapshot matches a GODag parsed from an obo"""
+    dir_tmp = tempfile.mkdtemp()
+    try:
+        fin_obo = os.path.join(dir_tmp, 'goslim_generic.obo')
+        shutil.copy(os.path.join(REPO, 'tests/data/goslim_generic.obo'), fin_obo)
+        fin_snapshot = fin_obo + '.snapshot'
+        for optional_attrs in [None, {'relationship'}, OPTATTRS]:
+            godag_exp = GODag(fin_obo, optional_attrs, prt=None)
+            # Write the snapshot because it does not exist or is stale
+            godag_wr = GODag(fin_obo, optional_attrs, prt=None, cache=True)
+            assert os.path.exists(fin_snapshot)
+            chk_godags_equal(godag_wr, godag_exp)
+            # Read the snapshot
+            mtime = os.path.getmtime(fin_snapshot)
+            godag_rd = GODag(fin_obo, optional_attrs, prt=None, cache=True)
+            assert os.path.getmtime(fin_snapshot) == mtime
+            chk_godags_equal(godag_rd, godag_exp)
+            # Read the snapshot into a GoTermStore
+            godag_compact = GODag(fin_obo, optional_attrs, prt=None, cache=True, compact=True)
+            chk_godags_equal(godag_compact, godag_exp)
+        # A snapshot becomes stale if the obo file changes
+        with open(fin_obo, 'a') as prt:
+            prt.write('\n[Term]\nid: GO:1234567\nname: new term\nnamespace: biological_process\n')
+        godag = GODag(fin_obo, OPTATTRS, prt=None, cache=True)
+        assert 'GO:1234567' in godag
+        chk_godags_equal(GODag(fin_obo, OPTATTRS, prt=None, cache=True), godag)
+        # A corrupt snapshot is replaced
+        with open(fin_snapshot, 'wb') as prt:
+            prt.write(b'corrupt')
+        chk_godags_equal(GODag(fin_obo, OPTATTRS, prt=None, cache=fin_snapshot), godag)
+    finally:
+        shutil.rmtree(dir_tmp)
+
+
+if __name__ == '__main__':
+    test_snapshot()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""Test GODag GO Terms stored in an integer-indexed, array-backed GoTermStore"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import os
+from goatools.obo_parser import GODag
+from goatools.gosubdag.gosubdag import GoSubDag
+from goatools.godag.go_tasks import get_go2parents
+from goatools.godag.go_tasks import get_go2children
+from tests.utils import REPO
+from tests.utils import chk_godags_equal
+
+OPTATTRS = {'def', 'synonym', 'relationship', 'xref', 'subset', 'comment', 'consider', 'replaced_by'}
+
+
+def test_termstore():
+    """Test that GoTermViews have the same values as GOTerms"""
+    for fin in ['tests/data/goslim_generic.obo', 'tests/data/i126/viral_gene_silence.obo']:
+        fin_obo = os.path.join(REPO, fin)
+        for optional_attrs in [None, {'relationship'}, OPTATTRS]:
+            godag_exp = GODag(fin_obo, optional_attrs, prt=None)
+            godag_act = GODag(fin_obo, optional_attrs, prt=None, compact=True)
+            chk_godags_equal(godag_act, godag_exp)
+            # The same GO Term is returned for a GO ID and its alternate GO IDs
+            for goid, goterm in godag_act.items():
+                assert godag_act[goterm.item_id] is goterm, goid
+
+def test_termstore_csr():
+    """Test CSR-style tables of GO Terms above and below each GO Term"""
+    fin_obo = os.path.join(REPO, 'tests/data/i126/viral_gene_silence.obo')
+    godag = GODag(fin_obo, {'relationship'}, prt=None, compact=True)
+    store = godag.termstore
+    for relationships in [None, {'regulates', 'negatively_regulates'}, True]:
+        rels = relationships if relationships is not True else {'part_of', 'regulates',
+                                                                'negatively_regulates',
+                                                                'positively_regulates'}
+        go2parents = get_go2parents(godag, rels)
+        go2children = get_go2children(godag, rels)
+        csr_upper = store.get_csr_upper(relationships)
+        csr_lower = store.get_csr_lower(relationships)
+        for goid, idx in store.go2idx.items():
+            assert set(store.goids[i] for i in csr_upper.get_row(idx)) == \
+                go2parents.get(goid, set())
+            assert set(store.goids[i] for i in csr_lower.get_row(idx)) == \
+                go2children.get(goid, set())
+
+def test_termstore_gosubdag():
+    """Test creating a GoSubDag using a compact GODag"""
+    fin_obo = os.path.join(REPO, 'tests/data/i126/viral_gene_silence.obo')
+    godag_exp = GODag(fin_obo, {'relationship'}, prt=None)
+    godag_act = GODag(fin_obo, {'relationship'}, prt=None, compact=True)
+    goids = set(o.item_id for o in godag_exp.values())
+    for relationships in [None, {'regulates'}, True]:
+        exp = GoSubDag(goids, godag_exp, relationships=relationships, prt=None)
+        act = GoSubDag(goids, godag_act, relationships=relationships, prt=None)
+        assert act.rcntobj.go2ancestors == exp.rcntobj.go2ancestors
+        assert act.rcntobj.go2descendants == exp.rcntobj.go2descendants
+
+
+if __name__ == '__main__':
+    test_termstore()
+    test_termstore_csr()
+    test_termstore_gosubdag()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""Test the resampling FDR, which uses the smallest p-values of random study sets"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import numpy as np
+from goatools.go_enrichment import GOEnrichmentStudy
+from goatools.goea.fdr_resampling import FdrResampling
+from goatools.multiple_testing import FDR
+from goatools.pvalcalc import FisherFactory
+from goatools.ratio import count_terms
+from tests.utils import get_goea_inputs
+from tests.utils import get_goea_study
+
+
+def test_minpvals():
+    """Test the smallest p-values of random study sets against p-values found one term at a time"""
+    godag, pop, assoc = get_goea_inputs()
+    # Add population genes which have no GO IDs
+    pop = pop + ['unannotated{N}'.format(N=i) for i in range(200)]
+    goeaobj = GOEnrichmentStudy(pop, assoc, godag, methods=['fdr'], log=None)
+    incidence = goeaobj.get_incidence()
+    objfdr = FdrResampling(incidence.matrix, incidence.pop_counts, goeaobj.pop_n)
+    # Population genes, in the order of the random draws: genes with GO IDs, then genes without
+    pop_ordered = incidence.genes + sorted(goeaobj.pop.difference(incidence.genes))
+    calc_pvalue = FisherFactory(pvalcalc='fisher').pval_obj.calc_pvalue
+    term_pop = count_terms(pop, assoc, godag)
+    for study_n in [1, 5, 60]:
+        seed = np.random.SeedSequence(study_n)
+        minpvals = objfdr.get_minpvals(study_n, 30, seed)
+        rng = np.random.default_rng(seed)
+        for minpval in minpvals:
+            study = [pop_ordered[i] for i in rng.choice(len(pop), study_n, replace=False)]
+            pvals = [calc_pvalue(c, study_n, term_pop[go], len(pop)) \
+                for go, c in count_terms(study, assoc, godag).items()]
+            assert np.isclose(minpval, min(pvals + [1.0]), rtol=1e-7, atol=0)
+
+def test_fdr_resampling():
+    """Test that FDR q-values are reproducible, using a seed, and use the whole distribution"""
+    godag, pop, assoc = get_goea_inputs()
+    study = get_goea_study(pop, assoc, 'GO:0005975', seed=1)
+    goeaobj = GOEnrichmentStudy(pop, assoc, godag, methods=['fdr'], log=None, fdr_seed=7)
+    objfdr = goeaobj.get_objfdr()
+    distribution = objfdr.get_pval_distribution(len(study))
+    assert len(distribution) == 500
+    assert list(distribution) == sorted(distribution)
+    # The distribution depends on the seed, but not on the number of processes
+    objfdr.processes = 2
+    assert np.array_equal(objfdr.get_pval_distribution(len(study)), distribution)
+    assert len(objfdr.get_pval_distribution(len(study), 150)) == 150
+
+    results = goeaobj.run_study(study, prt=None)
+    # One FdrResampling is made for the GOEA's population and used for every correction
+    assert goeaobj.get_objfdr() is objfdr
+    assert [r.p_fdr for r in results] == [r.p_fdr for r in goeaobj.run_study(study, prt=None)]
+    assert min(r.p_fdr for r in results) < 0.05
+    # q-values are the fraction of resampled p-values smaller than each p-value
+    qvals = FDR(distribution, results).corrected_pvals
+    assert qvals == [r.p_fdr for r in results]
+    for qval, rec in zip(qvals, results):
+        assert qval == sum(1 for p in distribution if p < rec.p_uncorrected)/len(distribution)
+
+
+if __name__ == '__main__':
+    test_minpvals()
+    test_fdr_resampling()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""Test that BP, MF, and CC GOEAs run in parallel give the same results as when run serially"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import copy
+import collections as cx
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from goatools.godag.consts import NAMESPACE2NS
+from goatools.goea.go_enrichment_ns import GOEnrichmentStudyNS
+from tests.utils import get_goea_inputs
+from tests.utils import get_goea_study
+
+METHODS = ['bonferroni', 'holm']
+
+
+def test_goea_ns_parallel():
+    """Test that BP, MF, and CC GOEAs run in parallel give the same results as when run serially"""
+    godag, pop, assoc = get_goea_inputs()
+    ns2assoc = _get_ns2assoc(assoc, godag)
+    studies = {
+        'carbohydrate': get_goea_study(pop, assoc, 'GO:0005975', seed=1),
+        'transport': get_goea_study(pop, assoc, 'GO:0006810', num_study=40, seed=2),
+        'kinase': get_goea_study(pop, assoc, 'GO:0016301', seed=3),
+        'empty': set(),
+    }
+    keep_if = lambda r: r.p_holm < 0.05
+    ns2assoc_exp = copy.deepcopy(ns2assoc)
+    objexp = GOEnrichmentStudyNS(pop, ns2assoc_exp, godag, methods=METHODS, log=None)
+    results_exp = objexp.run_study(studies['carbohydrate'], prt=None)
+    results_kept = objexp.run_study(studies['carbohydrate'], prt=None, keep_if=keep_if)
+    name2results_exp = objexp.run_studies(studies, prt=None)
+    assert results_kept and len(results_kept) < len(results_exp)
+
+    for kws in [{'n_jobs':2}, {'executor':ThreadPoolExecutor(2), 'n_jobs':2}]:
+        ns2assoc_act = copy.deepcopy(ns2assoc)
+        objact = GOEnrichmentStudyNS(pop, ns2assoc_act, godag, methods=METHODS, log=None, **kws)
+        # Counts are propagated in the user's associations, as when run serially
+        assert ns2assoc_act == ns2assoc_exp
+        _chk_results(objact.run_study(studies['carbohydrate'], prt=None), results_exp)
+        _chk_results(objact.run_study(studies['carbohydrate'], prt=None, keep_if=keep_if), results_kept)
+        name2results_act = objact.run_studies(studies, prt=None)
+        assert list(name2results_act) == list(studies)
+        for name, results in name2results_exp.items():
+            _chk_results(name2results_act[name], results)
+        # Tables are kept using keep_if, as when run serially
+        kws_tbl = {'prt':None, 'table':True, 'keep_if':keep_if}
+        _chk_results(objact.run_study(studies['carbohydrate'], **kws_tbl),
+                     objexp.run_study(studies['carbohydrate'], **kws_tbl))
+        name2results_tbl = objexp.run_studies(studies, **kws_tbl)
+        for name, results in objact.run_studies(studies, **kws_tbl).items():
+            _chk_results(results, name2results_tbl[name])
+        # Worker processes are kept for all runs, until the end of a with block
+        with objact:
+            pool = objact.pool
+            _chk_results(objact.run_study(studies['carbohydrate'], prt=None), results_exp)
+            assert objact.pool is pool
+        assert objact.pool is None
+
+    # A process pool executor would pickle the GO DAG and associations for every task
+    with pytest.raises(ValueError):
+        GOEnrichmentStudyNS(pop, ns2assoc, godag, executor=ProcessPoolExecutor(2), log=None)
+
+def _get_ns2assoc(assoc, godag):
+    """Split an association into BP, MF, and CC associations"""
+    ns2assoc = cx.defaultdict(dict)
+    for gene, goids in assoc.items():
+        for goid in goids:
+            nsname = NAMESPACE2NS[godag[goid].namespace]
+            if gene not in ns2assoc[nsname]:
+                ns2assoc[nsname][gene] = set()
+            ns2assoc[nsname][gene].add(goid)
+    return dict(ns2assoc)
+
+def _chk_results(results_act, results_exp):
+    """Check that the GOEA results are the same"""
+    assert [r.GO for r in results_act] == [r.GO for r in results_exp]
+    for rec_act, rec_exp in zip(results_act, results_exp):
+        assert vars(rec_act) == vars(rec_exp)
+
+
+if __name__ == '__main__':
+    test_goea_ns_parallel()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
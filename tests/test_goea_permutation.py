@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""Test empirical p-values from permuting study gene labels over the population"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import sys
+import numpy as np
+from goatools.go_enrichment import GOEnrichmentStudy
+from goatools.goea.permutation import PermutationPvals
+from goatools.pvalcalc import FisherFactory
+from tests.utils import get_goea_inputs
+from tests.utils import get_goea_study
+
+
+def test_perm_fisher():
+    """Test that permutations with equal gene weights give Fisher's exact p-values"""
+    goeaobj, study = _get_goea()
+    incidence = goeaobj.get_incidence()
+    study_counts = incidence.get_study_counts([study])[0]
+    goidxs = np.arange(study_counts.size)
+    num_perms = 2000
+    alt2pvals = {a:FisherFactory(pvalcalc='fisher_vectorized', alternative=a).pval_obj.calc_pvalues(
+        study_counts, len(study), incidence.pop_counts, goeaobj.pop_n) for a in ['greater', 'less']}
+    # Two-sided permutation p-values are doubled one-sided p-values
+    alt2pvals['two-sided'] = np.minimum(1.0, 2*np.minimum(alt2pvals['greater'], alt2pvals['less']))
+    for alternative, pvals_exp in alt2pvals.items():
+        for weights in [None, np.ones(goeaobj.pop_n)]:
+            objperm = PermutationPvals(incidence, goeaobj.pop_n, num_perms=num_perms, seed=3,
+                                       early_stop=False, weights=weights, alternative=alternative)
+            pvals_act = objperm.calc_pvalues_goidxs(study_counts, len(study), goidxs)
+            # Monte Carlo error of the empirical p-values. Two-sided p-values are doubled
+            pvals_tail = pvals_exp if alternative != 'two-sided' else pvals_exp/2
+            err = 10*np.sqrt(pvals_tail*(1 - pvals_tail)/num_perms) + 4.0/num_perms
+            assert np.all(np.abs(pvals_act - pvals_exp) <= err), alternative
+
+def test_perm_seed():
+    """Test that p-values are the same for the same seed, with or without worker processes"""
+    goeaobj, study = _get_goea()
+    incidence = goeaobj.get_incidence()
+    study_counts = incidence.get_study_counts([study])[0]
+    goidxs = np.arange(study_counts.size)
+    pvals = [PermutationPvals(incidence, goeaobj.pop_n, num_perms=600, seed=7, processes=p).calc_pvalues_goidxs(
+        study_counts, len(study), goidxs) for p in [None, 2]]
+    assert np.array_equal(pvals[0], pvals[1])
+    # One process pool is used by every call, until shutdown
+    with PermutationPvals(incidence, goeaobj.pop_n, num_perms=600, seed=7, processes=2) as objperm:
+        assert np.array_equal(objperm.calc_pvalues_goidxs(study_counts, len(study), goidxs), pvals[0])
+        pool = objperm.pool
+        assert pool is not None
+        assert np.array_equal(objperm.calc_pvalues_goidxs(study_counts, len(study), goidxs), pvals[0])
+        assert objperm.pool is pool
+    assert objperm.pool is None
+    pvals_seed = PermutationPvals(incidence, goeaobj.pop_n, num_perms=600, seed=8).calc_pvalues_goidxs(
+        study_counts, len(study), goidxs)
+    assert not np.array_equal(pvals[0], pvals_seed)
+
+def test_perm_early_stop(prt=sys.stdout):
+    """Test that GO IDs which are clearly not significant stop being counted"""
+    goeaobj, study = _get_goea()
+    incidence = goeaobj.get_incidence()
+    study_counts = incidence.get_study_counts([study])[0]
+    goidxs = np.arange(study_counts.size)
+    kws = {'num_perms':2000, 'seed':1, 'alternative':'greater'}
+    objall = PermutationPvals(incidence, goeaobj.pop_n, early_stop=False, **kws)
+    objstop = PermutationPvals(incidence, goeaobj.pop_n, early_stop=True, **kws)
+    pvals_all = objall.calc_pvalues_goidxs(study_counts, len(study), goidxs)
+    pvals_stop = objstop.calc_pvalues_goidxs(study_counts, len(study), goidxs)
+    prt.write('{S:,} of {A:,} GO-by-permutation counts with early stopping\n'.format(
+        S=objstop.perms_done.sum(), A=objall.perms_done.sum()))
+    assert objstop.perms_done.sum() < objall.perms_done.sum()
+    stopped = objstop.perms_done < kws['num_perms']
+    assert np.all(pvals_stop[stopped] > objstop.alpha)
+    assert np.array_equal(pvals_stop[~stopped], pvals_all[~stopped])
+    assert np.all(pvals_all[pvals_all < objstop.alpha] == pvals_stop[pvals_all < objstop.alpha])
+
+def test_perm_weights():
+    """Test that genes having no weight are never drawn"""
+    goeaobj, study = _get_goea()
+    incidence = goeaobj.get_incidence()
+    col = int(np.argmin(incidence.pop_counts))
+    rows = incidence.matrix[:, col].nonzero()[0]
+    weights = np.ones(goeaobj.pop_n)
+    weights[rows] = 0
+    objperm = PermutationPvals(incidence, goeaobj.pop_n, num_perms=300, seed=1, weights=weights,
+                               early_stop=False, alternative='greater')
+    pval = objperm.calc_pvalues_goidxs([1], len(study), [col])
+    assert pval[0] == 1.0/301
+
+def test_goea_permutation():
+    """Test GOEAs using permutation p-values, as records, tables, and with pruning"""
+    godag, pop, assoc = get_goea_inputs()
+    study = get_goea_study(pop, assoc, 'GO:0005975', seed=1)
+    gene2len = {g:1 + int(g[4:]) % 7 for g in pop}
+    for weights in [None, gene2len]:
+        goeaobj = GOEnrichmentStudy(pop, assoc, godag, methods=['bonferroni'], log=None,
+                                    pvalcalc='permutation', perm_samples=500, perm_seed=2,
+                                    perm_weights=weights, alternative='greater')
+        results = goeaobj.run_study(study, prt=None)
+        assert results[0].GO == 'GO:0005975' or results[0].p_uncorrected < 0.05
+        assert min(r.p_uncorrected for r in results) == 1.0/501
+        go2pval = {r.GO:r.p_uncorrected for r in results}
+        table = goeaobj.run_studies({'a':study}, prt=None, table=True)['a']
+        assert {go:p for go, p in zip(table.get_column('GO'), table.get_column('p_uncorrected'))} == go2pval
+        pruned = goeaobj.run_study(study, prt=None, prune=True)
+        assert all(go2pval[r.GO] == r.p_uncorrected for r in pruned)
+
+def _get_goea():
+    """Get a GOEA object and a study set"""
+    godag, pop, assoc = get_goea_inputs()
+    goeaobj = GOEnrichmentStudy(pop, assoc, godag, log=None)
+    return goeaobj, get_goea_study(pop, assoc, 'GO:0005975', seed=1)
+
+
+if __name__ == '__main__':
+    test_perm_fisher()
+    test_perm_seed()
+    test_perm_early_stop()
+    test_perm_weights()
+    test_goea_permutation()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""Test skipping GO terms which cannot reach significance, before calculating their p-values"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import sys
+import pytest
+from goatools.go_enrichment import GOEnrichmentStudy
+from goatools.pvalcalc import FisherFactory
+from goatools.pvalcalc import FisherVectorized
+from tests.utils import get_goea_inputs
+from tests.utils import get_goea_study
+
+
+def test_min_pvalues():
+    """Test that minimum attainable p-values are no larger than any p-value of the same margins"""
+    pval_obj = FisherVectorized('fisher_vectorized', None)
+    calc_pvalue = FisherFactory(pvalcalc='fisher_scipy_stats').pval_obj.calc_pvalue
+    pop_n = 40
+    for study_n in [1, 7, 20, 39]:
+        pop_counts = list(range(pop_n + 1))
+        minpvals = pval_obj.calc_min_pvalues(study_n, pop_counts, pop_n)
+        for pop_count, minpval in zip(pop_counts, minpvals):
+            pvals = [calc_pvalue(c, study_n, pop_count, pop_n) \
+                for c in range(max(0, study_n + pop_count - pop_n), min(study_n, pop_count) + 1)]
+            assert minpval <= min(pvals)*(1 + 1e-9)
+
+def test_pruning(prt=sys.stdout):
+    """Test that pruning GO terms does not change significant results"""
+    godag, pop, assoc = get_goea_inputs()
+    # Annotate only some genes, so some GO terms have too few genes to be significant
+    assoc = {g:gos if int(g[4:]) < 300 else set() for g, gos in assoc.items()}
+    study = get_goea_study(pop, assoc, 'GO:0005975', num_study=60, seed=1)
+    alpha = 0.05
+    for methods in [['bonferroni'], ['bonferroni', 'sidak'], ['holm', 'np_fdr_bh', 'hommel'], []]:
+        goeaobj = GOEnrichmentStudy(pop, assoc, godag, methods=methods, log=None)
+        flds = ['p_' + nt.fieldname for nt in goeaobj.methods]
+        go2exp = {r.GO:r for r in goeaobj.run_study(study, prt=None)}
+        results = goeaobj.run_study(study, prt=None, prune=True)
+        assert results
+        go2act = {r.GO:r for r in results}
+        prt.write('{M:35} {N:3} of {T:3} GO terms pruned\n'.format(
+            M=' '.join(methods), N=len(go2exp) - len(go2act), T=len(go2exp)))
+        if methods == ['bonferroni']:
+            assert len(go2act) < len(go2exp)
+        for goid, rec in go2exp.items():
+            if goid not in go2act:
+                assert all(getattr(rec, f) >= alpha for f in flds or ['p_uncorrected'])
+            else:
+                for fld in flds:
+                    pval_exp = getattr(rec, fld)
+                    pval_act = getattr(go2act[goid], fld)
+                    assert pval_act >= alpha if pval_exp >= alpha else pval_act == pval_exp
+        # Many study sets give the same results, as records or as tables
+        for table in [False, True]:
+            act = goeaobj.run_studies({'a':study}, prune=True, prt=None, table=table)['a']
+            assert [r.GO for r in act] == [r.GO for r in results]
+            for rec_act, rec_exp in zip(act, results):
+                assert [getattr(rec_act, f) for f in flds] == [getattr(rec_exp, f) for f in flds]
+
+def test_enriched_only():
+    """Test that GOEAs of only enriched GO terms keep the Bonferroni denominators"""
+    godag, pop, assoc = get_goea_inputs()
+    study = get_goea_study(pop, assoc, 'GO:0005975', seed=1)
+    goeaobj = GOEnrichmentStudy(pop, assoc, godag, methods=['bonferroni', 'holm'], log=None)
+    go2exp = {r.GO:r for r in goeaobj.run_study(study, prt=None)}
+    results = goeaobj.run_study(study, prt=None, enriched_only=True)
+    assert results and len(results) < len(go2exp)
+    assert {r.GO for r in results} == {go for go, r in go2exp.items() if r.enrichment == 'e'}
+    for rec in results:
+        assert rec.p_bonferroni == go2exp[rec.GO].p_bonferroni
+        assert rec.p_holm >= go2exp[rec.GO].p_holm
+    table = goeaobj.run_study(study, prt=None, enriched_only=True, table=True)
+    assert table.num_pruned == len(go2exp) - len(results)
+    assert list(table.get_column('p_bonferroni')) == [r.p_bonferroni for r in results]
+
+def test_prune_methods():
+    """Test that pruning is refused for corrections which can make p-values smaller"""
+    godag, pop, assoc = get_goea_inputs()
+    goeaobj = GOEnrichmentStudy(pop, assoc, godag, methods=['fdr_tsbh'], log=None)
+    with pytest.raises(Exception):
+        goeaobj.run_study(pop[:50], prt=None, prune=True)
+
+
+if __name__ == '__main__':
+    test_min_pvalues()
+    test_pruning()
+    test_enriched_only()
+    test_prune_methods()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""Test minimum-hypergeometric (mHG) GOEAs of ranked gene lists"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import random
+import numpy as np
+import pytest
+from goatools.go_enrichment import GOEnrichmentStudy
+from goatools.goea.ranked import MinHypergeometric
+from goatools.pvalcalc import FisherFactory
+from tests.utils import get_goea_inputs
+from tests.utils import get_goea_study
+
+
+def test_mhg():
+    """Test that the mHG is the smallest one-sided Fisher p-value over all cutoffs"""
+    goeaobj, ranked = _get_goea_ranked()
+    incidence = goeaobj.get_incidence()
+    calc_pvalues = FisherFactory(pvalcalc='fisher_vectorized', alternative='greater').pval_obj.calc_pvalues
+    for max_rank in [None, 40]:
+        ntmhg = MinHypergeometric(incidence, goeaobj.pop_n).get_mhg(ranked, max_rank)
+        num_ranked = len(ranked) if max_rank is None else max_rank
+        # One study set and one Fisher's exact test per GO ID for every cutoff
+        study_counts = incidence.get_study_counts([ranked[:n] for n in range(1, num_ranked + 1)])
+        pvals = np.array([calc_pvalues(c, n, incidence.pop_counts, goeaobj.pop_n) \
+            for n, c in enumerate(study_counts, 1)])
+        assert np.allclose(ntmhg.mhg, np.minimum(1.0, pvals.min(0)), rtol=1e-9, atol=0)
+        annotated = ntmhg.study_count != 0
+        cutoffs = ntmhg.rank_cutoff[annotated]
+        assert np.array_equal(ntmhg.study_count[annotated], study_counts[cutoffs - 1, annotated])
+        assert np.allclose(pvals[cutoffs - 1, annotated], ntmhg.mhg[annotated], rtol=1e-9, atol=0)
+        bound = ntmhg.mhg*np.minimum(incidence.pop_counts, num_ranked)
+        assert np.array_equal(ntmhg.pval, np.minimum(1.0, bound))
+
+def test_tails():
+    """Test that tails summed until the rest is negligible are one-sided Fisher's exact p-values"""
+    rng = np.random.RandomState(0)
+    calc_pvalue = FisherFactory(pvalcalc='fisher_vectorized', alternative='greater').pval_obj.calc_pvalue
+    for pop_n in [10, 2000, 30000]:
+        objmhg = MinHypergeometric(None, pop_n)
+        study_ns = rng.randint(1, pop_n + 1, 200)
+        pop_counts = rng.randint(1, pop_n + 1, 200)
+        lows = np.maximum(1, study_ns + pop_counts - pop_n)
+        highs = np.minimum(study_ns, pop_counts)
+        study_counts = np.minimum(lows + (rng.random_sample(200)*(highs - lows + 1)).astype(int), highs)
+        tails = objmhg._get_tails(study_counts, study_ns, pop_counts)
+        exp = [calc_pvalue(int(c), int(n), int(p), pop_n) for c, n, p in zip(study_counts, study_ns, pop_counts)]
+        assert np.allclose(tails, exp, rtol=1e-9, atol=1e-15)
+
+def test_run_ranked():
+    """Test GOEAs of ranked gene lists"""
+    goeaobj, ranked = _get_goea_ranked()
+    results = goeaobj.run_ranked(ranked + ['geneX', ranked[0]], prt=None)
+    assert len(results) == len(goeaobj.get_incidence().goids)
+    assert results[0].GO == 'GO:0005975'
+    assert results[0].p_bonferroni < 0.05
+    # Results are for the cutoff where each GO ID is most enriched
+    gene2rank = {g:r for r, g in enumerate(ranked)}
+    for rec in results:
+        assert rec.study_n == rec.ratio_in_study[1]
+        assert all(gene2rank[g] < rec.study_n for g in rec.study_items)
+        assert len(rec.study_items) == rec.study_count
+        assert rec.p_uncorrected >= rec.mhg
+    results_top = goeaobj.run_ranked(ranked, prt=None, max_rank=10, keep_if=lambda r: r.study_count)
+    assert results_top and all(r.study_n <= 10 for r in results_top)
+    assert goeaobj.run_ranked(['geneX'], prt=None) == []
+    with pytest.raises(Exception):
+        goeaobj.run_ranked(ranked, prt=None, methods=['fdr'])
+
+def _get_goea_ranked():
+    """Get a GOEA object and a gene list ranked with genes of GO:0005975 near the top"""
+    godag, pop, assoc = get_goea_inputs()
+    study = sorted(get_goea_study(pop, assoc, 'GO:0005975', seed=1))
+    rng = random.Random(2)
+    rng.shuffle(study)
+    others = sorted(set(pop).difference(study))
+    rng.shuffle(others)
+    goeaobj = GOEnrichmentStudy(pop, assoc, godag, methods=['bonferroni', 'fdr_bh'], log=None)
+    return goeaobj, study + others[:200]
+
+
+if __name__ == '__main__':
+    test_mhg()
+    test_tails()
+    test_run_ranked()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
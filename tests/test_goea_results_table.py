@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""Test that GOEA results tables hold the same results as lists of GOEnrichmentRecord objects"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import os
+import sys
+import tracemalloc
+import numpy as np
+from goatools.go_enrichment import GOEnrichmentStudy
+from goatools.goea.results_table import GoeaResultsTable
+from goatools.rpt.goea_nt_xfrm import MgrNtGOEAs
+from tests.utils import REPO
+from tests.utils import get_goea_inputs
+from tests.utils import get_goea_study
+
+METHODS = ['bonferroni', 'holm', 'fdr_bh', 'fdr']
+
+
+def test_results_table(prt=sys.stdout):
+    """Test that GOEA results tables hold the same results as lists of GOEnrichmentRecord objects"""
+    godag, pop, assoc = get_goea_inputs()
+    goeaobj = GOEnrichmentStudy(pop, assoc, godag, methods=METHODS, log=None, fdr_seed=3)
+    studies = {
+        'carbohydrate': get_goea_study(pop, assoc, 'GO:0005975', seed=1),
+        'transport': get_goea_study(pop, assoc, 'GO:0006810', num_study=40, seed=2),
+        'not_in_pop': {'geneX'},
+    }
+    keep_if = lambda r: r.p_fdr_bh < 0.05
+    for name, study in studies.items():
+        _chk_table(goeaobj.run_study(study, table=True, prt=None), goeaobj.run_study(study, prt=None))
+        table = goeaobj.run_study(study, table=True, prt=None, keep_if=keep_if)
+        _chk_table(table, goeaobj.run_study(study, prt=None, keep_if=keep_if))
+        prt.write('{N:12} {R:3} results kept\n'.format(N=name, R=len(table)))
+    name2table = goeaobj.run_studies(studies, table=True, prt=None)
+    for name, study in studies.items():
+        assert isinstance(name2table[name], GoeaResultsTable)
+        _chk_table(name2table[name], goeaobj.run_study(study, prt=None))
+
+    # The GOEA writers work on tables
+    results = goeaobj.run_study(studies['carbohydrate'], prt=None)
+    table = goeaobj.run_study(studies['carbohydrate'], prt=None, table=True)
+    assert MgrNtGOEAs(table).get_goea_nts_all() == MgrNtGOEAs(results).get_goea_nts_all()
+    for goea_results in [results, table]:
+        goeaobj.wr_tsv(os.path.join(REPO, 'goea_table_{N}.tsv'.format(N=type(goea_results).__name__)),
+                       goea_results)
+    assert _get_lines('goea_table_list.tsv') == _get_lines('goea_table_GoeaResultsTable.tsv')
+
+    # Tables use less memory than GOEnrichmentRecord objects
+    mem_table = _get_memory(lambda: goeaobj.run_studies(studies, prt=None, table=True))
+    mem_records = _get_memory(lambda: goeaobj.run_studies(studies, prt=None))
+    prt.write('{T:,} bytes in tables, {R:,} bytes in records\n'.format(T=mem_table, R=mem_records))
+    assert mem_table < mem_records/4
+
+def _chk_table(table, results):
+    """Check that a table holds the same results as GOEnrichmentRecord objects"""
+    assert len(table) == len(results)
+    assert table.get_column('GO') == [r.GO for r in results]
+    assert list(table.get_column('NS')) == [r.NS for r in results]
+    assert list(table.get_column('enrichment')) == [r.enrichment for r in results]
+    assert list(table.get_column('study_count')) == [r.study_count for r in results]
+    assert list(table.get_column('pop_count')) == [r.pop_count for r in results]
+    for method in METHODS if results else []:
+        assert np.array_equal(table.get_column('p_' + method), [getattr(r, 'p_' + method) for r in results])
+    for rec_act, rec_exp in zip(table, results):
+        assert vars(rec_act) == vars(rec_exp)
+
+def _get_lines(fin):
+    """Read a file written by a test"""
+    fin = os.path.join(REPO, fin)
+    with open(fin) as ifstrm:
+        lines = ifstrm.readlines()
+    os.remove(fin)
+    return lines
+
+def _get_memory(fnc):
+    """Get the size of memory allocated and held by the results of the function"""
+    tracemalloc.start()
+    results = fnc()
+    mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert results
+    return mem
+
+
+if __name__ == '__main__':
+    test_results_table()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""Test that running many study sets at once gives the same results as run_study"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+from goatools.go_enrichment import GOEnrichmentStudy
+from tests.utils import get_goea_inputs
+from tests.utils import get_goea_study
+
+METHODS = ['bonferroni', 'sidak', 'holm']
+
+
+def test_run_studies():
+    """Test that running many study sets at once gives the same results as run_study"""
+    godag, pop, assoc = get_goea_inputs()
+    studies = {
+        'carbohydrate': get_goea_study(pop, assoc, 'GO:0005975', seed=1),
+        'transport': get_goea_study(pop, assoc, 'GO:0006810', num_study=40, seed=2),
+        'one_gene': {'gene7'},
+        'not_in_pop': {'geneX', 'geneY'},
+        'empty': set(),
+        'some_not_in_pop': set(['geneX'] + pop[:30]),
+    }
+    for pvalcalc in ['fisher', 'fisher_vectorized']:
+        goeaobj = GOEnrichmentStudy(pop, assoc, godag, methods=METHODS, pvalcalc=pvalcalc, log=None)
+        name2results = goeaobj.run_studies(studies, prt=None)
+        assert list(name2results) == list(studies)
+        for name, study in studies.items():
+            _chk_results(name2results[name], goeaobj.run_study(study, prt=None))
+        # Keyword arguments are used as in run_study
+        keep_if = lambda r: r.p_holm < 0.05
+        name2results = goeaobj.run_studies(studies, prt=None, keep_if=keep_if, alpha=0.01)
+        for name, study in studies.items():
+            _chk_results(name2results[name],
+                         goeaobj.run_study(study, prt=None, keep_if=keep_if, alpha=0.01))
+        assert name2results['carbohydrate']
+
+def _chk_results(results_act, results_exp):
+    """Check that the GOEA results are the same"""
+    assert [r.GO for r in results_act] == [r.GO for r in results_exp]
+    for rec_act, rec_exp in zip(results_act, results_exp):
+        assert vars(rec_act) == vars(rec_exp)
+
+
+if __name__ == '__main__':
+    test_run_studies()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""Test writing GOEA results in chunks of rows, for one study or many studies"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import os
+import sys
+import tracemalloc
+from io import StringIO
+from goatools.go_enrichment import GOEnrichmentStudy
+from goatools.rpt.goea_nt_xfrm import MgrNtGOEAs
+from goatools.rpt.goea_stream import GoeaStreamWriter
+import goatools.wr_tbl as RPT
+from tests.utils import REPO
+from tests.utils import get_goea_inputs
+from tests.utils import get_goea_study
+
+
+def test_stream_one_study():
+    """Test that GOEA results written in chunks are the same as results written at once"""
+    goeaobj, studies = _get_goea()
+    results = goeaobj.run_study(studies['carbohydrate'], prt=None)
+    table = goeaobj.run_study(studies['carbohydrate'], prt=None, table=True)
+    prt_flds = goeaobj.objprtres.get_prtflds_default(results)
+    for kws in [{}, {'prt_if':lambda nt: nt.p_uncorrected < 0.2, 'fld2fmt':{'p_uncorrected':'{:8.2e}'}}]:
+        exp = StringIO()
+        RPT.prt_tsv(exp, MgrNtGOEAs(results).get_goea_nts_prt(prt_flds), **kws)
+        GoeaStreamWriter.chunksize = 7
+        for goea_results in [results, table, iter(results)]:
+            act = StringIO()
+            goeaobj.prt_tsv(act, goea_results, **kws)
+            assert act.getvalue() == exp.getvalue()
+    # Text format
+    prtfmt = "{NS} {study_count:3} {p_uncorrected:5.3e} {GO} {name}\n"
+    exp = StringIO()
+    goeaobj.prt_txt(exp, results, prtfmt)
+    act = StringIO()
+    GoeaStreamWriter(act, prtfmt=prtfmt).wr_results(table)
+    assert act.getvalue() == exp.getvalue()
+    GoeaStreamWriter.chunksize = 1000
+
+def test_stream_wr_tsv():
+    """Test writing GOEA results from a generator to a file, including no results"""
+    goeaobj, studies = _get_goea()
+    results = goeaobj.run_study(studies['carbohydrate'], prt=None)
+    fout_tsv = os.path.join(REPO, 'goea_stream_wr_tsv.tsv')
+    exp = StringIO()
+    goeaobj.prt_tsv(exp, results)
+    for kws in [{}, {'sort_by':lambda nt: nt.GO}]:
+        goeaobj.wr_tsv(fout_tsv, (r for r in results), **kws)
+        with open(fout_tsv) as ifstrm:
+            lines = ifstrm.readlines()
+        os.remove(fout_tsv)
+        if not kws:
+            assert ''.join(lines) == exp.getvalue()
+        assert len(lines) == 1 + len(results)
+        # No results: No file is written
+        log = StringIO()
+        stdout = sys.stdout
+        sys.stdout = log
+        try:
+            goeaobj.wr_tsv(fout_tsv, (r for r in []), **kws)
+        finally:
+            sys.stdout = stdout
+        assert not os.path.exists(fout_tsv)
+        assert log.getvalue() == '      0 items. NOT WRITING {FOUT}\n'.format(FOUT=fout_tsv)
+    # Results are read by the method called, not when the manager is created
+    itr = iter(results)
+    mgr = MgrNtGOEAs(itr)
+    assert next(itr) is results[0]
+    assert len(mgr.get_goea_nts_all()) == len(results) - 1
+
+def test_stream_studies(prt=sys.stdout):
+    """Test writing many studies to one long-format TSV with a study column"""
+    goeaobj, studies = _get_goea()
+    fout_tsv = os.path.join(REPO, 'goea_stream_studies.tsv')
+    name2results = goeaobj.run_studies(studies, prt=None)
+    goeaobj.wr_tsv_studies(fout_tsv, ((n, goeaobj.run_study(s, prt=None)) for n, s in studies.items()))
+    with open(fout_tsv) as ifstrm:
+        lines = ifstrm.readlines()
+    os.remove(fout_tsv)
+    assert lines[0].startswith('# study\tGO\t')
+    assert len(lines) == 1 + sum(len(rs) for rs in name2results.values())
+    beg = 1
+    for name, results in name2results.items():
+        exp = StringIO()
+        goeaobj.prt_tsv(exp, results)
+        exp_lines = exp.getvalue().splitlines(True)[1:]
+        for line_act, line_exp in zip(lines[beg:beg+len(results)], exp_lines):
+            assert line_act == '{NAME}\t{LINE}'.format(NAME=name, LINE=line_exp)
+        beg += len(results)
+        prt.write('{N:12} {R:3} rows\n'.format(N=name, R=len(results)))
+
+    # Peak memory is smaller writing tables in chunks than writing all rows at once
+    name2table = goeaobj.run_studies(studies, prt=None, table=True)
+    mem_stream = _get_peak(lambda: GoeaStreamWriter(StringIO(), study_fld='study').wr_studies(name2table))
+    mem_all = _get_peak(lambda: [MgrNtGOEAs(t).get_goea_nts_prt() for t in name2table.values()])
+    prt.write('{S:,} bytes peak streaming, {A:,} bytes peak all rows\n'.format(S=mem_stream, A=mem_all))
+    assert mem_stream < mem_all
+
+def _get_goea():
+    """Get a GOEA object and study sets"""
+    godag, pop, assoc = get_goea_inputs()
+    goeaobj = GOEnrichmentStudy(pop, assoc, godag, methods=['bonferroni', 'fdr_bh'], log=None)
+    studies = {
+        'carbohydrate': get_goea_study(pop, assoc, 'GO:0005975', seed=1),
+        'transport': get_goea_study(pop, assoc, 'GO:0006810', num_study=40, seed=2),
+        'not_in_pop': {'geneX'},
+    }
+    for idx in range(20):
+        studies['random{N}'.format(N=idx)] = get_goea_study(pop, assoc, 'GO:0008150', seed=idx)
+    return goeaobj, studies
+
+def _get_peak(fnc):
+    """Get the peak memory allocated while running a function"""
+    tracemalloc.start()
+    fnc()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+if __name__ == '__main__':
+    test_stream_one_study()
+    test_stream_wr_tsv()
+    test_stream_studies()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""Test local NumPy multipletest corrections against those from statsmodels"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import sys
+import subprocess
+import numpy as np
+import pytest
+from goatools.go_enrichment import GOEnrichmentStudy
+from tests.utils import REPO
+from tests.utils import get_goea_inputs
+from tests.utils import get_goea_study
+
+# statsmodels methods. The local NumPy implementations are prefixed with 'np_'
+METHODS = ['holm-sidak', 'simes-hochberg', 'hommel', 'fdr_bh', 'fdr_by', 'fdr_tsbh', 'fdr_tsbky', 'fdr_gbs']
+METHODS_NP = ['np_{M}'.format(M=m) for m in METHODS]
+METHODS_SM = ['sm_{M}'.format(M=m) for m in METHODS]
+
+
+def test_local_vs_statsmodels():
+    """Test local NumPy multipletest corrections against those from statsmodels"""
+    multitest = pytest.importorskip('statsmodels.stats.multitest')
+    rng = np.random.default_rng(0)
+    for pvals in _get_pvals_list(rng):
+        for alpha in [0.01, 0.05, 0.2]:
+            for method_np, method in zip(METHODS_NP, METHODS):
+                act = GOEnrichmentStudy.method2correction[method_np](pvals, alpha).corrected_pvals
+                exp = multitest.multipletests(pvals, alpha, method)[1]
+                assert np.allclose(act, exp, rtol=1e-12, atol=0), method
+
+def test_goea_local():
+    """Test that GOEAs using methods found locally give the same results as with statsmodels"""
+    pytest.importorskip('statsmodels.stats.multitest')
+    godag, pop, assoc = get_goea_inputs()
+    study = get_goea_study(pop, assoc, 'GO:0005975', seed=1)
+    # 'fdr_bh' is run locally; 'sm_fdr_bh' is run in statsmodels
+    methods = METHODS_NP + ['fdr_bh'] + METHODS_SM + ['sm_fdr_bh']
+    goeaobj = GOEnrichmentStudy(pop, assoc, godag, methods=methods, log=None)
+    results = goeaobj.run_study(study, prt=None)
+    assert results
+    src2flds = {'local':[], 'statsmodels':[]}
+    for ntmethod in goeaobj.methods:
+        src2flds[ntmethod.source].append('p_' + ntmethod.fieldname)
+    assert len(src2flds['local']) == len(src2flds['statsmodels'])
+    for rec in results:
+        for fld_local, fld_sm in zip(src2flds['local'], src2flds['statsmodels']):
+            assert np.isclose(getattr(rec, fld_local), getattr(rec, fld_sm), rtol=1e-12, atol=0)
+
+def test_no_statsmodels_import():
+    """Test that GOEAs using local methods do not import statsmodels"""
+    cmd = ("from goatools.go_enrichment import GOEnrichmentStudy;"
+           "from tests.utils import get_goea_inputs;"
+           "import sys;"
+           "godag, pop, assoc = get_goea_inputs();"
+           "obj = GOEnrichmentStudy(pop, assoc, godag, methods={M}, log=None);"
+           "assert obj.run_study(pop[:50], prt=None);"
+           "assert 'statsmodels' not in sys.modules").format(
+               M=METHODS_NP + ['bonferroni', 'sidak', 'holm', 'fdr_bh'])
+    subprocess.check_call([sys.executable, '-c', cmd], cwd=REPO)
+
+def _get_pvals_list(rng):
+    """Get lists of random p-values, including ties, zeros, ones, and empty lists"""
+    pvals_list = [[], [0.03], [1.0, 1.0], [0.0, 0.5, 1.0]]
+    for num in [2, 5, 50, 400]:
+        pvals_list.append(rng.random(num))
+        pvals_list.append(rng.random(num)**8)
+        pvals_list.append(np.round(rng.random(num)**4, 2))
+    return pvals_list
+
+
+if __name__ == '__main__':
+    test_local_vs_statsmodels()
+    test_goea_local()
+    test_no_statsmodels_import()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
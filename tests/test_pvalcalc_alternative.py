@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""Test one-sided p-values: enrichment ('greater') and purification ('less')"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import numpy as np
+import pytest
+from goatools.go_enrichment import GOEnrichmentStudy
+from goatools.pvalcalc import FisherFactory
+from goatools.pvalcalc import LOGFACTORIALS
+from tests.utils import get_goea_inputs
+from tests.utils import get_goea_study
+
+ALTERNATIVES = ['two-sided', 'greater', 'less']
+
+
+def test_alternatives():
+    """Test that all p-value calculators give the same one-sided p-values"""
+    rng = np.random.RandomState(0)
+    for alternative in ALTERNATIVES:
+        pval_objs = [FisherFactory(pvalcalc=p, alternative=alternative).pval_obj \
+            for p in ['fisher', 'fisher_scipy_stats', 'fisher_vectorized']]
+        for pop_n in [1, 10, 100, 2000]:
+            for study_n in sorted(set([0, 1, pop_n//3, pop_n])):
+                pop_counts = rng.randint(0, pop_n + 1, 50)
+                lows = np.maximum(0, study_n + pop_counts - pop_n)
+                highs = np.minimum(study_n, pop_counts)
+                study_counts = np.minimum(lows + (rng.random_sample(50)*(highs - lows + 1)).astype(int), highs)
+                pvals_exp = [pval_objs[0].calc_pvalue(int(s), study_n, int(p), pop_n) \
+                    for s, p in zip(study_counts, pop_counts)]
+                pvals_scipy = [pval_objs[1].calc_pvalue(int(s), study_n, int(p), pop_n) \
+                    for s, p in zip(study_counts, pop_counts)]
+                pvals_vec = pval_objs[2].calc_pvalues(study_counts, study_n, pop_counts, pop_n)
+                assert np.allclose(pvals_vec, pvals_exp, rtol=1e-9, atol=0), alternative
+                assert np.allclose(pvals_scipy, pvals_exp, rtol=1e-6, atol=0), alternative
+                # No p-value is smaller than the minimum attainable p-value
+                minpvals = pval_objs[2].calc_min_pvalues(study_n, pop_counts, pop_n)
+                assert np.all(minpvals <= pvals_vec*(1 + 1e-9))
+    with pytest.raises(Exception):
+        FisherFactory(pvalcalc='fisher_vectorized', alternative='right')
+
+def test_logfactorials():
+    """Test that one log-factorial table is shared by all calculators"""
+    lfs = LOGFACTORIALS.get(5000)
+    assert LOGFACTORIALS.get(100) is lfs
+    assert np.isclose(lfs[10], np.log(3628800.0), rtol=1e-14, atol=0)
+    pval_obj = FisherFactory(pvalcalc='fisher_vectorized').pval_obj
+    assert pval_obj._get_logfactorials(5000) is lfs
+
+def test_goea_greater():
+    """Test GOEAs testing only for enrichment"""
+    godag, pop, assoc = get_goea_inputs()
+    study = get_goea_study(pop, assoc, 'GO:0005975', seed=1)
+    kws = {'log':None, 'methods':['bonferroni', 'fdr'], 'fdr_seed':2}
+    go2exp = {r.GO:r for r in GOEnrichmentStudy(pop, assoc, godag, **kws).run_study(study, prt=None)}
+    calc_pvalue = FisherFactory(pvalcalc='fisher', alternative='greater').pval_obj.calc_pvalue
+    for pvalcalc in ['fisher', 'fisher_vectorized']:
+        goeaobj = GOEnrichmentStudy(pop, assoc, godag, pvalcalc=pvalcalc, alternative='greater', **kws)
+        results = goeaobj.run_study(study, prt=None)
+        assert {r.GO for r in results} == set(go2exp)
+        for rec in results:
+            pval = calc_pvalue(rec.study_count, rec.study_n, rec.pop_count, rec.pop_n)
+            assert np.isclose(rec.p_uncorrected, pval, rtol=1e-9, atol=0)
+            # Enriched GO terms are more significant in one-sided tests
+            if rec.enrichment == 'e':
+                assert rec.p_uncorrected <= go2exp[rec.GO].p_uncorrected*(1 + 1e-9)
+        assert min(r.p_bonferroni for r in results) < 0.05
+        # Tables give the same results
+        table = goeaobj.run_study(study, prt=None, table=True)
+        assert list(table.get_column('p_uncorrected')) == [r.p_uncorrected for r in results]
+
+
+if __name__ == '__main__':
+    test_alternatives()
+    test_logfactorials()
+    test_goea_greater()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""Test getting p-values from a cache keyed by 2x2 table"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import pickle
+from goatools.go_enrichment import GOEnrichmentStudy
+from goatools.pvalcalc import FisherFactory
+from goatools.pvalcalc import PvalCache
+from tests.utils import get_goea_inputs
+from tests.utils import get_goea_study
+
+
+def test_pval_cache():
+    """Test that the least-recently-used p-values are removed from a full cache"""
+    cache = PvalCache(maxsize=3)
+    for pvalcalc in ['fisher', 'fisher_vectorized']:
+        cache.clear()
+        pval_obj = FisherFactory(pvalcalc=pvalcalc, pval_cache=cache).pval_obj
+        pval_exp = FisherFactory(pvalcalc=pvalcalc).pval_obj
+        assert pval_obj.cache is cache
+        tables = [(1, 10, 5, 100), (2, 10, 5, 100), (3, 10, 5, 100)]
+        for table in tables:
+            assert pval_obj.calc_pvalue(*table) == pval_exp.calc_pvalue(*table)
+        assert cache.cache_info() == (0, 3, 3, 3)
+        assert pval_obj.calc_pvalue(*tables[0]) == pval_exp.calc_pvalue(*tables[0])
+        assert cache.cache_info() == (1, 3, 3, 3)
+        # The least-recently used table, tables[1], is removed
+        pval_obj.calc_pvalue(4, 10, 5, 100)
+        assert (pvalcalc, 'two-sided', 2, 10, 5, 100) not in cache.key2pval
+        assert (pvalcalc, 'two-sided', 1, 10, 5, 100) in cache.key2pval
+    # Caches can be sent to worker processes
+    cache_copy = pickle.loads(pickle.dumps(cache))
+    assert cache_copy.key2pval == cache.key2pval
+    assert cache_copy.cache_info() == cache.cache_info()
+
+def test_goea_pval_cache():
+    """Test that GOEAs sharing a cache get the same results as GOEAs without a cache"""
+    godag, pop, assoc = get_goea_inputs()
+    studies = [get_goea_study(pop, assoc, 'GO:0005975', seed=1),
+               get_goea_study(pop, assoc, 'GO:0006810', seed=2)]
+    cache = PvalCache()
+    for pvalcalc in ['fisher', 'fisher_vectorized']:
+        kws = {'pvalcalc':pvalcalc, 'log':None, 'methods':['holm', 'fdr'], 'fdr_seed':4}
+        goeaobj_exp = GOEnrichmentStudy(pop, assoc, godag, **kws)
+        goeaobj_act = GOEnrichmentStudy(pop, assoc, godag, pval_cache=cache, **kws)
+        for study in studies:
+            results_exp = goeaobj_exp.run_study(study, prt=None)
+            results_act = goeaobj_act.run_study(study, prt=None)
+            assert [vars(r) for r in results_act] == [vars(r) for r in results_exp]
+    # A second GOEA sharing the cache finds all p-values in the cache
+    goeaobj = GOEnrichmentStudy(pop, assoc, godag, pval_cache=cache, log=None, methods=['holm'])
+    hits, misses, _, _ = cache.cache_info()
+    goeaobj.run_study(studies[0], prt=None)
+    assert cache.cache_info().misses == misses
+    assert cache.cache_info().hits > hits
+
+
+if __name__ == '__main__':
+    test_pval_cache()
+    test_goea_pval_cache()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
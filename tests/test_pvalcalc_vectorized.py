@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""Test that vectorized Fisher's exact test p-values match those from 'fisher' and scipy"""
+
+__copyright__ = "Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved."
+
+import numpy as np
+from scipy.stats import fisher_exact
+from goatools.pvalcalc import FisherFactory
+from goatools.pvalcalc import FisherVectorized
+from goatools.go_enrichment import GOEnrichmentStudy
+from tests.utils import get_goea_inputs
+from tests.utils import get_goea_study
+
+# P-values from the 'fisher' package, which sums table probabilities the same way, are closer
+REL_TOL = 1e-9
+
+
+def test_pvalcalc_vectorized():
+    """Test vectorized p-values for random 2x2 tables"""
+    obj_vec = FisherFactory(pvalcalc='fisher_vectorized').pval_obj
+    obj_exp = FisherFactory(pvalcalc='fisher').pval_obj
+    assert isinstance(obj_vec, FisherVectorized)
+    rng = np.random.RandomState(0)
+    for pop_n in [1, 2, 10, 100, 1000, 20000]:
+        for study_n in sorted(set([0, 1, min(pop_n, 5), pop_n//3, pop_n])):
+            pop_counts = rng.randint(0, pop_n + 1, 200)
+            lows = np.maximum(0, study_n + pop_counts - pop_n)
+            highs = np.minimum(study_n, pop_counts)
+            study_counts = lows + (rng.random_sample(200)*(highs - lows + 1)).astype(int)
+            study_counts = np.minimum(study_counts, highs)
+            pvals_act = obj_vec.calc_pvalues(study_counts, study_n, pop_counts, pop_n)
+            pvals_exp = [obj_exp.calc_pvalue(int(s), study_n, int(p), pop_n)
+                         for s, p in zip(study_counts, pop_counts)]
+            assert np.allclose(pvals_act, pvals_exp, rtol=REL_TOL, atol=0)
+    # Chunks of tables give the same p-values
+    obj_vec.max_vals = 10
+    assert np.allclose(obj_vec.calc_pvalues([0, 3, 20], 40, [5, 60, 200], 1000),
+                       [obj_exp.calc_pvalue(s, 40, p, 1000) for s, p in [(0, 5), (3, 60), (20, 200)]],
+                       rtol=REL_TOL, atol=0)
+    assert obj_vec.calc_pvalue(8, 10, 9, 16) == obj_vec.calc_pvalues([8], 10, [9], 16)[0]
+
+def test_pvalcalc_vectorized_scipy():
+    """Test vectorized p-values against scipy.stats.fisher_exact, to the documented tolerance"""
+    rng = np.random.RandomState(1)
+    for alternative in ['two-sided', 'greater', 'less']:
+        obj_vec = FisherVectorized('fisher_vectorized', None, alternative)
+        for pop_n in [1, 10, 100, 1000, 20000]:
+            for study_n in sorted(set([0, 1, min(pop_n, 5), pop_n//3, pop_n])):
+                pop_counts = rng.randint(0, pop_n + 1, 50)
+                lows = np.maximum(0, study_n + pop_counts - pop_n)
+                highs = np.minimum(study_n, pop_counts)
+                study_counts = np.minimum(lows + (rng.random_sample(50)*(highs - lows + 1)).astype(int), highs)
+                pvals_act = obj_vec.calc_pvalues(study_counts, study_n, pop_counts, pop_n)
+                pvals_exp = [fisher_exact([[s, study_n - s], [p - s, pop_n - study_n - p + s]], alternative)[1]
+                             for s, p in zip(study_counts, pop_counts)]
+                assert np.allclose(pvals_act, pvals_exp, rtol=FisherVectorized.rel_tol, atol=0), alternative
+
+def test_goea_vectorized():
+    """Test that GOEA results are the same using vectorized p-values"""
+    godag, pop, assoc = get_goea_inputs()
+    study = get_goea_study(pop, assoc, 'GO:0005975')
+    results = {}
+    for pvalcalc in ['fisher', 'fisher_vectorized']:
+        goeaobj = GOEnrichmentStudy(pop, assoc, godag, pvalcalc=pvalcalc, log=None)
+        results[pvalcalc] = {r.GO:r for r in goeaobj.run_study(study, prt=None)}
+    assert results['fisher'].keys() == results['fisher_vectorized'].keys()
+    for goid, rec in results['fisher'].items():
+        rec_vec = results['fisher_vectorized'][goid]
+        assert rec.study_items == rec_vec.study_items
+        assert rec.ratio_in_pop == rec_vec.ratio_in_pop
+        assert np.isclose(rec.p_uncorrected, rec_vec.p_uncorrected, rtol=REL_TOL, atol=0)
+
+
+if __name__ == '__main__':
+    test_pvalcalc_vectorized()
+    test_pvalcalc_vectorized_scipy()
+    test_goea_vectorized()
+
+# Copyright (C) 2010-present, DV Klopfenstein, H Tang, All rights reserved.
@@ -12,7 +12,7 @@ def test_init_methods():
     mobj._add_method_src('statsmodels', 'fdr_bh')
     assert mobj.methods == [
         mobj.NtMethodInfo(source='local', method='bonferroni', fieldname='bonferroni'), 
-        mobj.NtMethodInfo(source='statsmodels', method='fdr_bh', fieldname='fdr_bh')]
+        mobj.NtMethodInfo(source='statsmodels', method='fdr_bh', fieldname='sm_fdr_bh')]
     sm_methods = ['sm_{}'.format(m) for m in mobj.all_methods[1][1]] # statsmodels
     mobj._init_methods(sm_methods)
     assert mobj.methods == [
@@ -37,6 +37,15 @@ def get_expstr_fieldnames():
             sidak
             holm
             fdr
+            fdr_bh
+            np_holm_sidak
+            np_simes_hochberg
+            np_hommel
+            np_fdr_bh
+            np_fdr_by
+            np_fdr_tsbh
+            np_fdr_tsbky
+            np_fdr_gbs
         )
         statsmodels(
             sm_bonferroni
@@ -45,7 +54,7 @@ def get_expstr_fieldnames():
             sm_holm
             simes_hochberg
             hommel
-            fdr_bh
+            sm_fdr_bh
             fdr_by
             fdr_tsbh
             fdr_tsbky
@@ -58,13 +67,22 @@ def get_exp_fieldnames():
         (('local', 'sidak'), 'sidak'),
         (('local', 'holm'), 'holm'),
         (('local', 'fdr'), 'fdr'),
+        (('local', 'fdr_bh'), 'fdr_bh'),
+        (('local', 'np_holm-sidak'), 'np_holm_sidak'),
+        (('local', 'np_simes-hochberg'), 'np_simes_hochberg'),
+        (('local', 'np_hommel'), 'np_hommel'),
+        (('local', 'np_fdr_bh'), 'np_fdr_bh'),
+        (('local', 'np_fdr_by'), 'np_fdr_by'),
+        (('local', 'np_fdr_tsbh'), 'np_fdr_tsbh'),
+        (('local', 'np_fdr_tsbky'), 'np_fdr_tsbky'),
+        (('local', 'np_fdr_gbs'), 'np_fdr_gbs'),
         (('statsmodels', 'bonferroni'), 'sm_bonferroni'),
         (('statsmodels', 'sidak'), 'sm_sidak'),
         (('statsmodels', 'holm-sidak'), 'holm_sidak'),
         (('statsmodels', 'holm'), 'sm_holm'),
         (('statsmodels', 'simes-hochberg'), 'simes_hochberg'),
         (('statsmodels', 'hommel'), 'hommel'),
-        (('statsmodels', 'fdr_bh'), 'fdr_bh'),
+        (('statsmodels', 'fdr_bh'), 'sm_fdr_bh'),
         (('statsmodels', 'fdr_by'), 'fdr_by'),
         (('statsmodels', 'fdr_tsbh'), 'fdr_tsbh'),
         (('statsmodels', 'fdr_tsbky'), 'fdr_tsbky'),
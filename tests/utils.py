@@ -6,6 +6,7 @@ __author__ = "DV Klopfenstein"
 
 import os
 import sys
+import random
 import timeit
 from datetime import timedelta
 from goatools.base import get_godag as base_get_godag
@@ -13,6 +14,7 @@ from goatools.associations import dnld_annotation
 from goatools.anno.factory import get_objanno as get_objanno_factory
 # from goatools.gosubdag.gosubdag import GoSubDag
 from goatools.semantic import TermCounts
+from goatools.obo_parser import GODag
 
 # from goatools_alpha.geneprodsim.semanticcalcs import SemanticCalcs
 
@@ -50,5 +52,87 @@ def get_termcounts(fin_anno, godag, namespace='all', **kws):
     id2gos = objanno.get_id2gos(namespace=namespace, **kws)
     return TermCounts(godag, id2gos)
 
+def get_godag_summary(godag):
+    """Get a summary of every GO Term in a GODag, with GO Term links as GO IDs"""
+    getids = lambda objs: sorted(o.item_id for o in objs)
+    goid2smry = {}
+    for goid, obj in godag.items():
+        smry = {
+            'item_id': obj.item_id,
+            'id': obj.id,
+            'name': obj.name,
+            'namespace': obj.namespace,
+            'is_obsolete': obj.is_obsolete,
+            'alt_ids': sorted(obj.alt_ids),
+            'level': obj.level,
+            'depth': obj.depth,
+            'parents': getids(obj.parents),
+            'children': getids(obj.children),
+            '_parents': sorted(obj._parents)}
+        if hasattr(obj, 'relationship'):
+            smry['relationship'] = {r:getids(s) for r, s in obj.relationship.items()}
+            smry['relationship_rev'] = {r:getids(s) for r, s in obj.relationship_rev.items()}
+            smry['reldepth'] = getattr(obj, 'reldepth', None)
+        for attr in ['defn', 'synonym', 'xref', 'subset', 'comment', 'consider', 'replaced_by']:
+            if hasattr(obj, attr):
+                smry[attr] = getattr(obj, attr)
+        goid2smry[goid] = smry
+    return goid2smry
+
+def get_goea_inputs(num_genes=1000, seed=0, fin_obo='tests/data/goslim_generic.obo'):
+    """Get a GODag, population, and gene-to-GO-IDs association for a synthetic GOEA"""
+    godag = GODag(os.path.join(REPO, fin_obo), prt=None)
+    rng = random.Random(seed)
+    goids = sorted(set(o.item_id for o in godag.values()))
+    pop = ['gene{N}'.format(N=i) for i in range(num_genes)]
+    assoc = {g:set(rng.sample(goids, rng.randint(1, 4))) for g in pop}
+    return godag, pop, assoc
+
+def get_goea_study(pop, assoc, goid, num_study=100, seed=0):
+    """Get study genes: random genes plus genes annotated to goid, to see enrichment"""
+    rng = random.Random(seed)
+    genes_goid = sorted(g for g in pop if goid in assoc[g])
+    return set(rng.sample(pop, num_study//2) + genes_goid[:num_study//2])
+
+def wr_gaf_synthetic(fout_gaf, num_lines=1000, num_genes=200, seed=0, fin_obo='tests/data/goslim_generic.obo'):
+    """Write a GAF 2.1 file of random annotations to the GO IDs in a GODag. Return the GODag"""
+    godag = GODag(os.path.join(REPO, fin_obo), prt=None)
+    rng = random.Random(seed)
+    goids = sorted(set(o.item_id for o in godag.values()))
+    ns2aspect = {'biological_process':'P', 'molecular_function':'F', 'cellular_component':'C'}
+    qualifiers = ['', '', '', '', 'NOT', 'not', 'contributes_to', 'NOT|colocalizes_with']
+    evcodes = ['IDA', 'IMP', 'IEA', 'IEA', 'ISS', 'TAS', 'ND']
+    extensions = ['', '', '', 'part_of(CL:0000576)', 'occurs_in(CL:0000988)|occurs_in(CL:0001021)']
+    with open(fout_gaf, 'w') as prt:
+        prt.write('!gaf-version: 2.1\n')
+        for _ in range(num_lines):
+            gene = rng.randrange(num_genes)
+            goid = rng.choice(goids)
+            prt.write('\t'.join([
+                'UniProtKB', 'P{N:05}'.format(N=gene), 'GENE{N}'.format(N=gene), rng.choice(qualifiers),
+                goid, '|'.join(rng.sample(['PMID:1{N:06}'.format(N=n) for n in range(20)], rng.randint(1, 2))),
+                rng.choice(evcodes), rng.choice(['', 'InterPro:IPR001770', 'UniProtKB:Q12345|PANTHER:PTN1']),
+                ns2aspect[godag[goid].namespace], 'Protein {N}'.format(N=gene),
+                'P{N:05}_HUMAN|GENE{N}'.format(N=gene), 'protein',
+                rng.choice(['taxon:9606', 'taxon:9606', 'taxon:10090', 'taxon:9606|taxon:10090']),
+                '2019{M:02}{D:02}'.format(M=rng.randint(1, 12), D=rng.randint(1, 28)),
+                rng.choice(['UniProt', 'InterPro', 'MGI']), rng.choice(extensions),
+                rng.choice(['', '', 'UniProtKB:P{N:05}-2'.format(N=gene)])]) + '\n')
+    return godag
+
+def chk_godags_equal(godag_act, godag_exp):
+    """Check that two GODags contain the same GO Terms, links, and attributes"""
+    assert list(godag_act.keys()) == list(godag_exp.keys())
+    smry_act = get_godag_summary(godag_act)
+    smry_exp = get_godag_summary(godag_exp)
+    for goid, exp in smry_exp.items():
+        assert smry_act[goid] == exp, '{GO}\nACT: {A}\nEXP: {E}'.format(
+            GO=goid, A=smry_act[goid], E=exp)
+    assert godag_act.version == godag_exp.version
+    assert godag_act.data_version == godag_exp.data_version
+    assert set(godag_act.typedefs) == set(godag_exp.typedefs)
+    for typedef_id, typedef in godag_exp.typedefs.items():
+        assert vars(godag_act.typedefs[typedef_id]) == vars(typedef)
+
 
 # Copyright (C) 2019-2020, DV Klopfenstein, et al. All rights reserved.